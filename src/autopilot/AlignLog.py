@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.core.EDlogger import logger
+
+"""
+File:AlignLog.py
+
+Description:
+  Structured telemetry of the alignments: one record per correction step (axis, offset before, hold,
+  settle, offset after, detection latency, source, ship and throttle) and one per alignment cycle
+  (compass_align, target_fine_align, nudge_align: duration, steps, result). Where the time of an
+  alignment goes was only in the logger.info lines of the routines.
+
+  Records go to fixed size numpy ring buffers (structured arrays, no formatting on the align thread) and
+  are flushed every FLUSH_INTERVAL seconds to a chunk file, align_<start>_<n>.npz, one array per column
+  ('steps.<field>', 'cycles.<field>'). Rows not flushed before the ring wraps are dropped (counted).
+
+  load() reads the chunks of a folder back, summarize() reports the time to align distributions and the
+  overshoot rates per ship, and python -m src.autopilot.AlignLog <folder> prints them.
+"""
+
+STEP_DTYPE = np.dtype([
+    ('time', '<f8'),      # time.time() at the start of the step
+    ('cycle', '<i8'),     # Cycle number of the step, 0 = outside a cycle
+    ('source', '<U8'),    # Offset source: 'compass' or 'target'
+    ('axis', '<U5'),      # 'pit', 'yaw', 'roll' or 'plan' (one AlignPlanner maneuver)
+    ('before', '<f4'),    # Signed axis offset before (deg), 'plan': angle off the target
+    ('hold', '<f4'),      # Seconds of the key hold (wall time)
+    ('settle', '<f4'),    # Seconds waited after the hold
+    ('after', '<f4'),     # Offset after, like before, NaN if not read
+    ('latency', '<f4'),   # Seconds of the read after (detection), NaN if not read
+    ('ship', '<U32'),     # Ship type
+    ('throttle', '<U16'), # Speed demand
+])
+
+CYCLE_DTYPE = np.dtype([
+    ('time', '<f8'),      # time.time() at the start of the cycle
+    ('cycle', '<i8'),     # Cycle number, 1 based
+    ('routine', '<U8'),   # 'compass', 'target' or 'nudge'
+    ('duration', '<f4'),  # Seconds of the cycle
+    ('steps', '<i4'),     # Correction steps of the cycle (not of nested cycles)
+    ('ok', '?'),          # Aligned (compass, target), nudge applied (nudge)
+    ('ship', '<U32'),
+    ('throttle', '<U16'),
+])
+
+RING_CAPACITY = 4096  # Rows kept per ring until flushed
+FLUSH_INTERVAL = 60.0  # Seconds between chunk files
+OVERSHOOT_DEG = 1.0  # Min offset past the center that counts as an overshoot (read noise)
+
+
+class _Ring:
+    """ Structured array ring of the rows not flushed yet. """
+
+    def __init__(self, dtype: np.dtype, capacity: int):
+        self.rows = np.zeros(capacity, dtype=dtype)
+        self.count = 0  # Rows appended since the start
+        self.flushed = 0  # Rows flushed (or dropped)
+        self.dropped = 0
+
+    def append(self, row: tuple):
+        capacity = len(self.rows)
+        if self.count - self.flushed >= capacity:
+            self.flushed = self.flushed + 1  # Overwrites the oldest row not flushed
+            self.dropped = self.dropped + 1
+        self.rows[self.count % capacity] = row
+        self.count = self.count + 1
+
+    def take(self) -> np.ndarray:
+        """ The rows not flushed yet, in order, and marks them flushed. """
+        index = np.arange(self.flushed, self.count) % len(self.rows)
+        self.flushed = self.count
+        return self.rows[index]
+
+
+class AlignLog:
+    """ Ring buffered alignment step and cycle records, flushed to columnar npz chunks. """
+
+    def __init__(self, folder: str, capacity: int = RING_CAPACITY, flush_interval: float = FLUSH_INTERVAL):
+        """
+        @param folder: Output folder, created if missing.
+        @param capacity: Rows kept per ring until flushed.
+        @param flush_interval: Seconds between chunk files (on a record, and on close).
+        """
+        self.folder = folder
+        self.flush_interval = flush_interval
+        self.steps = _Ring(STEP_DTYPE, capacity)
+        self.cycles = _Ring(CYCLE_DTYPE, capacity)
+        self.chunk_count = 0
+        self._prefix = f"align_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self._open = []  # Open cycles, innermost last: [cycle, routine, start, steps, ship, throttle]
+        self._cycle_count = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        logger.info(f"AlignLog: logging to {folder}")
+
+    def begin(self, routine: str, ship: str = '', throttle: str = '') -> int:
+        """ Start an alignment cycle, the steps until its end are of it (a cycle in a cycle is nested).
+        @param routine: 'compass', 'target' or 'nudge'.
+        @return: The cycle number, for end().
+        """
+        with self._lock:
+            self._cycle_count = self._cycle_count + 1
+            self._open.append([self._cycle_count, routine, time.time(), 0, ship or '', throttle or ''])
+            return self._cycle_count
+
+    def end(self, cycle: int, ok: bool):
+        """ End a cycle (and the cycles still open in it, left by an exception). """
+        with self._lock:
+            while self._open:
+                number, routine, start, steps, ship, throttle = self._open.pop()
+                self.cycles.append((start, number, routine, time.time() - start, steps, ok and number == cycle,
+                                    ship, throttle))
+                if number == cycle:
+                    break
+        self._flush_due()
+
+    def step(self, axis: str, before: float, hold: float, settle: float, after: float | None = None,
+             latency: float | None = None, source: str = 'compass', ship: str = '', throttle: str = ''):
+        """ Record one correction step of the innermost open cycle.
+        @param axis: 'pit', 'yaw', 'roll' or 'plan'.
+        @param before: Signed axis offset before the hold in degrees ('plan': angle off the target).
+        @param hold: Seconds of the hold.
+        @param settle: Seconds waited after the hold.
+        @param after: Offset after, None if not read.
+        @param latency: Seconds of the read after, None if not read.
+        """
+        with self._lock:
+            cycle = 0
+            if self._open:
+                self._open[-1][3] = self._open[-1][3] + 1
+                cycle = self._open[-1][0]
+            self.steps.append((time.time() - hold - settle, cycle, source, axis, before, hold, settle,
+                               np.nan if after is None else after, np.nan if latency is None else latency,
+                               ship or '', throttle or ''))
+        self._flush_due()
+
+    def _flush_due(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """ Write the records not flushed yet to the next chunk file. """
+        with self._lock:
+            self._flushed_at = time.monotonic()
+            steps = self.steps.take()
+            cycles = self.cycles.take()
+            if len(steps) == 0 and len(cycles) == 0:
+                return
+            self.chunk_count = self.chunk_count + 1
+            path = os.path.join(self.folder, f"{self._prefix}_{self.chunk_count:04d}.npz")
+        columns = {f"steps.{name}": steps[name] for name in STEP_DTYPE.names}
+        columns.update({f"cycles.{name}": cycles[name] for name in CYCLE_DTYPE.names})
+        np.savez(path, **columns)
+
+    def close(self):
+        """ Flush and log the counts. """
+        self.flush()
+        logger.info(f"AlignLog: {self.steps.count} steps, {self.cycles.count} cycles in {self.chunk_count} chunks"
+                    f" ({self.steps.dropped + self.cycles.dropped} dropped)")
+
+
+def load(folder: str) -> tuple[np.ndarray, np.ndarray]:
+    """ The records of all chunk files of a folder, in file name (time) order.
+    @return: (steps, cycles) structured arrays of STEP_DTYPE and CYCLE_DTYPE.
+    """
+    steps, cycles = [], []
+    for path in sorted(glob.glob(os.path.join(folder, 'align_*.npz'))):
+        with np.load(path) as chunk:
+            for rows, dtype, prefix in ((steps, STEP_DTYPE, 'steps'), (cycles, CYCLE_DTYPE, 'cycles')):
+                part = np.zeros(len(chunk[f"{prefix}.{dtype.names[0]}"]), dtype=dtype)
+                for name in dtype.names:
+                    part[name] = chunk[f"{prefix}.{name}"]
+                rows.append(part)
+    return (np.concatenate(steps) if steps else np.zeros(0, STEP_DTYPE),
+            np.concatenate(cycles) if cycles else np.zeros(0, CYCLE_DTYPE))
+
+
+def overshoots(steps: np.ndarray) -> np.ndarray:
+    """ Steps that ended past the center: the signed offset after is on the other side, by more than
+    OVERSHOOT_DEG. Only axis steps read after ('plan' offsets are not signed). """
+    return (steps['axis'] != 'plan') & (steps['before'] * steps['after'] < 0) \
+        & (np.abs(steps['after']) >= OVERSHOOT_DEG)
+
+
+def summarize(steps: np.ndarray, cycles: np.ndarray) -> dict:
+    """ Time to align and overshoot rates per ship.
+    @return: {ship: {'cycles': {routine: {count, ok, p50, p90, max, steps}},
+                     'axes': {axis: {count, overshoot, hold, settle, latency}}}}
+    """
+    report = {}
+    for ship in sorted(set(cycles['ship']) | set(steps['ship'])):
+        ship_cycles = cycles[cycles['ship'] == ship]
+        ship_steps = steps[steps['ship'] == ship]
+        routines = {}
+        for routine in sorted(set(ship_cycles['routine'])):
+            rows = ship_cycles[ship_cycles['routine'] == routine]
+            ok = rows['duration'][rows['ok']]
+            routines[routine] = {
+                'count': len(rows),
+                'ok': len(ok) / len(rows),
+                'p50': float(np.percentile(ok, 50)) if len(ok) else np.nan,
+                'p90': float(np.percentile(ok, 90)) if len(ok) else np.nan,
+                'max': float(ok.max()) if len(ok) else np.nan,
+                'steps': float(rows['steps'].mean()),
+            }
+        axes = {}
+        for axis in sorted(set(ship_steps['axis'])):
+            rows = ship_steps[ship_steps['axis'] == axis]
+            read = rows[~np.isnan(rows['after'])]
+            axes[axis] = {
+                'count': len(rows),
+                'overshoot': float(overshoots(read).mean()) if len(read) and axis != 'plan' else np.nan,
+                'hold': float(rows['hold'].mean()),
+                'settle': float(rows['settle'].mean()),
+                'latency': float(np.nanmean(rows['latency'])) if len(read) else np.nan,
+            }
+        report[ship or '(unknown)'] = {'cycles': routines, 'axes': axes}
+    return report
+
+
+def _cell(value: float, fmt: str, width: int) -> str:
+    return f"{'-':>{width}}" if np.isnan(value) else f"{value:>{width}{fmt}}"
+
+
+def format_report(report: dict) -> str:
+    """ The summarize() report as a text table per ship. """
+    lines = []
+    for ship, ship_report in report.items():
+        lines.append(f"{ship}")
+        lines.append(f"  {'routine':<8} {'cycles':>6} {'ok':>5} {'p50 s':>6} {'p90 s':>6} {'max s':>6} {'steps':>5}")
+        for routine, r in ship_report['cycles'].items():
+            lines.append(f"  {routine:<8} {r['count']:>6} {r['ok']:>5.0%} {_cell(r['p50'], '.1f', 6)} "
+                         f"{_cell(r['p90'], '.1f', 6)} {_cell(r['max'], '.1f', 6)} {r['steps']:>5.1f}")
+        lines.append(f"  {'axis':<8} {'steps':>6} {'over':>5} {'hold s':>6} {'settle':>6} {'read s':>6}")
+        for axis, a in ship_report['axes'].items():
+            lines.append(f"  {axis:<8} {a['count']:>6} {_cell(a['overshoot'], '.0%', 5)} {a['hold']:>6.2f} "
+                         f"{a['settle']:>6.2f} {_cell(a['latency'], '.3f', 6)}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time to align and overshoot rates per ship of an AlignLog folder")
+    parser.add_argument('folder', nargs='?', default='./align_log')
+    args = parser.parse_args()
+    all_steps, all_cycles = load(args.folder)
+    print(f"{len(all_steps)} steps, {len(all_cycles)} cycles")
+    print(format_report(summarize(all_steps, all_cycles)))
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from math import acos, asin, atan2, degrees, hypot, radians, sin, sqrt
+
+import numpy as np
+
+"""
+File:AlignPlanner.py
+
+Description:
+  Plans one combined maneuver of overlapping axis key holds to point the ship at a target. compass_align
+  aligned pitch, settled, then yaw, settled (or the reverse), and sc_target_align rolled, then pitched, so
+  an alignment paid each axis hold and its settle in series.
+
+  The target is a direction in the ship frame (x right, y up, z forward), its navball offsets are the
+  angles of the orthographic projection: pit = asin(y), yaw = asin(x). All the keys of a plan are pressed
+  at once, each is held angle / rate, so the ship turns about the sum of the active axis rates until the
+  first release, then about the rest. That path is not the great circle to the target, and the axes do not
+  commute, so the plan solves the angles with a few Newton steps over the exact rotations (turn()). Pitch
+  + yaw is the default pair, roll + pitch (the target rolled onto the vertical centerline while pitching)
+  the other one, with a yaw trim where roll + pitch alone cannot end on the target (the fast roll sweeps
+  the pitch around); plan() takes the one that ends first.
+
+  Pure math: the caller turns the angles into hold times (the response curves of the ship) and holds
+  the keys (EDKeys.send_holds).
+"""
+
+# Angular velocity direction of each axis key (positive = up/right/clockwise) in the ship frame. A turn
+# of the ship moves the target direction the other way, turn() applies the rotation to it.
+AXIS_VECTORS = {'pitch': np.array([1.0, 0.0, 0.0]), 'yaw': np.array([0.0, -1.0, 0.0]),
+                'roll': np.array([0.0, 0.0, 1.0])}
+NEWTON_STEPS = 10  # Max steps of the angle solve
+NEWTON_TOL = 1e-5  # End position tolerance (sine of the offset, ~0.0006 deg)
+NEWTON_DELTA = 1e-3  # Degrees of the numeric derivative
+NEWTON_HALVINGS = 6  # Max halvings of a step that does not bring the target closer
+NEWTON_ACCEPT = 1e-3  # Max end position error of a plan (~0.06 deg), else the pair is not used
+
+
+def direction(pit: float, yaw: float) -> np.ndarray:
+    """ Unit target direction (x right, y up, z forward) of navball offsets in degrees, in front. Offsets
+    outside the navball disk (sin(pit)^2 + sin(yaw)^2 > 1) are taken at its edge. """
+    x, y = sin(radians(yaw)), sin(radians(pit))
+    r = hypot(x, y)
+    if r > 1.0:
+        return np.array([x / r, y / r, 0.0])
+    return np.array([x, y, sqrt(1.0 - r * r)])
+
+
+def offset(d) -> tuple[float, float, bool]:
+    """ Navball offsets of a target direction.
+    @return: (pit, yaw) in degrees and False if the target is behind.
+    """
+    x, y, z = float(d[0]), float(d[1]), float(d[2])
+    return degrees(asin(max(-1.0, min(1.0, y)))), degrees(asin(max(-1.0, min(1.0, x)))), z >= 0.0
+
+
+def rotation(w, angle: float) -> np.ndarray:
+    """ Rotation matrix (Rodrigues) of angle radians about the unit axis w. """
+    k = np.array([[0.0, -w[2], w[1]], [w[2], 0.0, -w[0]], [-w[1], w[0], 0.0]])
+    return np.eye(3) + sin(angle) * k + (1.0 - np.cos(angle)) * (k @ k)
+
+
+def turn(d, angles: dict, rates: dict) -> np.ndarray:
+    """ The target direction after the axis holds of a plan, all pressed at once.
+    @param d: Target direction before.
+    @param angles: {axis: signed degrees}, each axis turns at its rate for |angle| / rate seconds.
+    @param rates: {axis: deg/s}.
+    """
+    held = {axis: abs(angle) / rates[axis] for axis, angle in angles.items() if angle != 0.0}
+    d = np.asarray(d, dtype=float)
+    t = 0.0
+    for end in sorted(set(held.values())):
+        w = sum(AXIS_VECTORS[axis] * np.sign(angles[axis]) * radians(rates[axis])
+                for axis, hold in held.items() if hold >= end)
+        speed = float(np.linalg.norm(w))
+        if speed > 0.0:
+            d = rotation(w / speed, speed * (end - t)) @ d
+        t = end
+    return d
+
+
+class AlignPlanner:
+    """ Overlapping axis holds that turn the ship onto a target in one maneuver. """
+
+    def __init__(self, rates: dict, hold_fn=None):
+        """
+        @param rates: {'pitch', 'yaw', 'roll': deg/s} of the ship (at the throttle of the maneuver).
+        @param hold_fn: hold_fn(axis, degrees) -> seconds (the response curve), default degrees / rate.
+        """
+        self.rates = rates
+        self.hold_fn = hold_fn
+
+    def hold(self, axis: str, angle: float) -> float:
+        if self.hold_fn is not None:
+            return self.hold_fn(axis, abs(angle))
+        return abs(angle) / self.rates[axis]
+
+    def holds(self, angles: dict) -> dict:
+        """ {axis: seconds} of a plan. """
+        return {axis: self.hold(axis, angle) for axis, angle in angles.items()}
+
+    def duration(self, angles: dict) -> float:
+        """ Seconds the maneuver of a plan holds a key (the longest hold). """
+        return max(self.holds(angles).values(), default=0.0)
+
+    def plan(self, pit: float, yaw: float, roll: bool = True, min_angle: float = 0.0) -> dict:
+        """ The axis angles that turn the ship onto a target in front.
+        @param pit: Target offset up in degrees (navball or target circle).
+        @param yaw: Target offset right in degrees.
+        @param roll: Also consider roll + pitch (and with a yaw trim), used if it ends first.
+        @param min_angle: Axes turning less (deg) are not held.
+        @return: {axis: signed degrees}, positive = up/right/clockwise, empty if on target.
+        """
+        d = direction(pit, yaw)
+        if hypot(d[0], d[1]) < NEWTON_TOL:
+            return {}
+        plans = [self._solve(('pitch', 'yaw'), d)]
+        if roll:
+            plans.append(self._solve(('roll', 'pitch'), d))
+            plans.append(self._solve(('roll', 'pitch', 'yaw'), d))
+        plans = [{axis: angle for axis, angle in angles.items() if angle != 0.0 and abs(angle) >= min_angle}
+                 for angles in plans if angles is not None]
+        if not plans:  # Not expected: pitch + yaw converges for any target in front
+            return self._great_circle(d, min_angle)
+        return min(plans, key=self.duration)
+
+    def _great_circle(self, d, min_angle: float) -> dict:
+        angles = dict(zip(('pitch', 'yaw'), self._guess(('pitch', 'yaw'), d)))
+        return {axis: float(angle) for axis, angle in angles.items() if angle != 0.0 and abs(angle) >= min_angle}
+
+    def _guess(self, axes: tuple, d) -> np.ndarray:
+        """ Angles of the axes for the great circle to the target (exact for one axis), no trim. """
+        if len(axes) > 2:
+            return np.append(self._guess(axes[:2], d), np.zeros(len(axes) - 2))
+        x, y, z = d
+        theta = degrees(acos(max(-1.0, min(1.0, z))))
+        s = hypot(x, y)
+        if axes == ('pitch', 'yaw'):
+            return np.array([theta * y / s, theta * x / s])
+        roll = degrees(atan2(x, y))  # Clock position of the target, rolled to 12 o'clock
+        if abs(roll) > 90.0:  # Or to 6 o'clock and pitch down
+            return np.array([roll - 180.0 if roll > 0 else roll + 180.0, -theta])
+        return np.array([roll, theta])
+
+    def _end(self, axes: tuple, d, a) -> np.ndarray:
+        return turn(d, dict(zip(axes, a)), self.rates)[:2]
+
+    def _solve(self, axes: tuple, d) -> dict | None:
+        """ Newton steps on the angles of the axes so the target ends at the center (x = y = 0), halved
+        while a step does not bring it closer. With a third axis (a trim) the step is the one of least
+        hold time (minimum norm in seconds).
+        @return: {axis: degrees}, or None if it did not converge.
+        """
+        rates = np.array([self.rates[axis] for axis in axes])
+        a = self._guess(axes, d)
+        f = self._end(axes, d, a)
+        for _ in range(NEWTON_STEPS):
+            if np.abs(f).max() < NEWTON_TOL:
+                break
+            jac = np.empty((2, len(axes)))
+            for i in range(len(axes)):
+                step = np.zeros(len(axes))
+                step[i] = NEWTON_DELTA
+                jac[:, i] = (self._end(axes, d, a + step) - f) / NEWTON_DELTA
+            try:
+                step = np.linalg.lstsq(jac * rates, f, rcond=None)[0] * rates
+            except np.linalg.LinAlgError:
+                return None
+            for _ in range(NEWTON_HALVINGS):
+                f_new = self._end(axes, d, a - step)
+                if np.abs(f_new).max() < np.abs(f).max():
+                    break
+                step = step / 2
+            else:
+                return None
+            a, f = a - step, f_new
+        angles = {axis: float(angle) for axis, angle in zip(axes, a)}
+        if np.abs(f).max() >= NEWTON_ACCEPT or turn(d, angles, self.rates)[2] <= 0.0:
+            return None  # Not converged, or onto the point behind
+        return angles
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from collections import deque
+from math import exp
+
+"""
+File:AxisController.py
+
+Description:
+  Closed loop release of a held axis key. The alignment loops held a key for a computed time (a
+  blocking sleep), let the ship settle (ALIGN_SETTLE) and only then read the navball, so every
+  correction paid hold + settle + detection in series, and the hold was only as good as the axis
+  rate of the ship config.
+
+  AxisController decides the release while the key is held. It gets the navball distance of its axis
+  from the samples taken during the hold, fits the closing rate over the last VELOCITY_WINDOW seconds
+  (until the fit has enough samples, the configured rate spooling up from the press), and releases when the predicted stop
+  position is inside the target band: the distance now, minus what the ship still turns during the
+  sensing latency (the sample shows an older frame) and the coast after the release (stop_lag).
+  It also releases on an overshoot (the fitted distance grows past its minimum) and at max_hold.
+
+  Pure logic: the caller presses and releases the key (EDKeys.press/release) and feeds the samples,
+  so it runs offline on simulated or recorded samples.
+"""
+
+VELOCITY_WINDOW = 1.0  # Seconds of samples of the closing rate fit
+MIN_FIT_SAMPLES = 3  # Samples needed for a fit, else the configured rate is used
+OVERSHOOT_MARGIN = 2.0  # Degrees the fitted distance may grow over its minimum (read noise) before it is an overshoot
+
+
+class AxisController:
+    """ Release decision of one held axis key from the navball samples during the hold. """
+
+    def __init__(self, axis: str, rate: float, target: float, latency: float = 0.15, stop_lag: float = 0.35,
+                 spool: float = 0.15, min_hold: float = 0.0, max_hold: float = 4.0):
+        """
+        @param axis: 'pit', 'yaw' or 'roll' (for the log).
+        @param rate: Expected closing rate in deg/s (the axis rate at the current throttle).
+        @param target: Release when the predicted stop distance is at most this (deg).
+        @param latency: Seconds from a frame to its sample (detection, compass display lag).
+        @param stop_lag: Seconds the ship keeps turning at its rate after the release (coast).
+        @param spool: Time constant of the turn rate after the press (the ship spools up), in seconds.
+        @param min_hold: Min seconds to hold (SC inertia needs a min impulse).
+        @param max_hold: Max seconds to hold, the release whatever the samples say.
+        """
+        self.axis = axis
+        self.rate = rate
+        self.target = target
+        self.latency = latency
+        self.stop_lag = stop_lag
+        self.spool = spool
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.samples = deque()  # (t, distance) of the fit window
+        self.start_time = 0.0
+        self.start_dist = 0.0
+        self.dist = 0.0  # Fitted distance at the last sample
+        self.min_dist = 0.0  # Min fitted distance of the hold
+        self.fitted = False  # dist and closing are fitted (else the last sample and the configured rate)
+        self.closing = 0.0  # Closing rate in deg/s, fitted or the spool up of the configured rate
+        self.reason = ''  # Why it released: 'target', 'overshoot' or 'max_hold'
+        self.released = False
+
+    def start(self, t: float, dist: float):
+        """ The key was pressed at t (perf_counter) with the axis dist degrees off. """
+        self.samples.clear()
+        self.start_time = t
+        self.start_dist = dist
+        self.dist = dist
+        self.min_dist = dist
+        self.closing = 0.0
+        self.fitted = False
+        self.reason = ''
+        self.released = False
+
+    def held(self, t: float) -> float:
+        return t - self.start_time
+
+    def _travel(self, t: float) -> float:
+        """ Degrees turned from the press to t at the configured rate, spooling up. """
+        held = max(0.0, t - self.start_time)
+        if self.spool <= 0:
+            return self.rate * held
+        return self.rate * (held - self.spool * (1.0 - exp(-held / self.spool)))
+
+    def _model_dist(self, t: float) -> float:
+        """ The samples so far, each moved to t by the configured rate, averaged (too few for a fit). """
+        travel = self._travel(t)
+        return sum(d - (travel - self._travel(ts)) for ts, d in self.samples) / len(self.samples)
+
+    def _fit(self):
+        """ Least squares line of the window: (fitted distance at the last sample, closing rate) or None. """
+        n = len(self.samples)
+        t_last = self.samples[-1][0]
+        if n < MIN_FIT_SAMPLES or t_last - self.samples[0][0] < VELOCITY_WINDOW / 2:
+            return None
+        t_mean = sum(t for t, _ in self.samples) / n
+        d_mean = sum(d for _, d in self.samples) / n
+        var = sum((t - t_mean) ** 2 for t, _ in self.samples)
+        if var <= 0.0:
+            return None
+        slope = sum((t - t_mean) * (d - d_mean) for t, d in self.samples) / var
+        return d_mean + slope * (t_last - t_mean), -slope
+
+    def predicted_stop(self) -> float:
+        """ Distance the axis stops at if released now (negative = past the center). """
+        closing = min(max(self.closing, 0.0), 2.0 * self.rate)
+        return self.dist - closing * (self.latency + self.stop_lag)
+
+    def expired(self, now: float) -> bool:
+        """ True (and released) if the key is down max_hold by the clock now, whatever the frame times of
+        the samples (a stalled capture). """
+        if not self.released and self.held(now) >= self.max_hold:
+            self.reason = 'max_hold'
+            self.released = True
+        return self.released
+
+    def update(self, t: float, dist: float | None = None) -> bool:
+        """ A sample of the frame at t, or only the time (dist None, no new sample).
+        @return: True if the key is to be released now (see reason).
+        """
+        if self.released:
+            return True
+        if dist is not None and (not self.samples or t > self.samples[-1][0]):
+            self.samples.append((t, dist))
+            while self.samples[0][0] < t - VELOCITY_WINDOW:
+                self.samples.popleft()
+            fit = self._fit()
+            self.fitted = fit is not None
+            if fit is None:
+                self.dist = self._model_dist(t)
+            else:
+                self.dist, self.closing = fit
+                self.min_dist = min(self.min_dist, self.dist)
+
+        held = self.held(t)
+        if not self.fitted:
+            self.closing = self.rate * (1.0 - exp(-held / self.spool)) if self.spool > 0 else self.rate
+        if held >= self.max_hold:
+            self.reason = 'max_hold'
+        elif held < self.min_hold:
+            return False
+        elif self.predicted_stop() <= self.target:
+            self.reason = 'target'
+        elif self.fitted and self.dist > self.min_dist + OVERSHOOT_MARGIN:
+            self.reason = 'overshoot'  # Or the wrong way, the caller picks the key again
+        else:
+            return False
+        self.released = True
+        return True
@@ -7,13 +7,12 @@ from copy import copy
 from datetime import datetime, timedelta
 from time import sleep
 from enum import Enum
-from math import asin, atan, degrees
+from math import atan, degrees
 import random
 from string import Formatter
 from tkinter import messagebox
 
 import cv2
-import numpy as np
 import kthread
 from simple_localization import LocalizationManager
 
@@ -37,8 +36,22 @@ from src.ed.EDSystemMap import EDSystemMap
 from src.screen import Screen
 from src.screen import Screen_Regions
 from src.screen.Screen import set_focus_elite_window
+from src.screen.Annulus import AnnulusCircleFinder
+from src.screen.CircleTracker import CircleTracker
+from src.screen.ColorLUT import ColorClassFilter, ColorClassifier, get_color_classes
+from src.screen.Compass import RING_RADIUS, CompassCalibrator, NavDotLocator, find_ring, navball_offset
+from src.screen.ImageFormat import FMT_RGB, NATIVE_FORMAT
+from src.screen.Pyramid import PyramidCircleFinder
+from src.screen.RegionFilter import ColorRangeFilter
+from src.screen.SessionRecorder import SessionRecorder
 from src.screen.Screen_Regions import Quad
 from src.autopilot import EDWayPoint
+from src.autopilot.AlignLog import AlignLog
+from src.autopilot.AlignPlanner import AlignPlanner, direction
+from src.autopilot.AxisController import AxisController
+from src.autopilot.NavTelemetry import NavTelemetry
+from src.autopilot.OffsetEstimator import OffsetEstimator
+from src.autopilot.ResponseModel import ShipResponse
 from src.ed import EDJournal
 from src.ed import EDKeys
 from src.ed.EDInternalStatusPanel import EDInternalStatusPanel
@@ -102,6 +115,8 @@ def scale(inp: float, in_min: float, in_max: float, out_min: float, out_max: flo
 
 class EDAutopilot:
 
+    _AXIS_NAMES = {'pit': 'pitch', 'yaw': 'yaw', 'roll': 'roll'}  # Offset key -> _AXIS_CONFIG axis
+
     _AXIS_CONFIG = {
         'pitch': {'rate_attr': 'pitchrate', 'lookup_key': 'PitchRate',
                   'threshold': 30, 'pos_key': 'PitchUpButton', 'neg_key': 'PitchDownButton'},
@@ -201,8 +216,16 @@ class EDAutopilot:
         self.refuel_cnt = 0
         self.current_ship_type = None
         self.gui_loaded = False
-        self._nav_cor_x = 0.0  # Nav Point correction to pitch
-        self._nav_cor_y = 0.0  # Nav Point correction to yaw
+        self._init_vision()
+        self.keys.add_listener(self._on_key_sent)
+        # Navball samples from a producer thread while an assist runs (NavTelemetryEnable, see read_nav_offset)
+        self._telemetry_status = StatusParser()  # GuiFocus of the producer thread
+        self._last_nav_seq = 0
+        self.nav_telemetry = NavTelemetry(self.scr, lambda: self.scrReg.reg['compass']['rect'],
+                                          self._telemetry_nav_offset, paused=self._telemetry_paused)
+        self._closed_loop = False  # ClosedLoopAlignEnable, see _hold_axes
+        self._align_planner = False  # AlignPlannerEnable, see _plan_to_center
+        self.align_log = None  # AlignLogEnable, see _log_step
         self.target_align_outer_lim = 1.0  # In deg. Anything outside of this range will cause alignment.
         self.target_align_inner_lim = 0.5  # In deg. Will stop alignment when in this range.
         self.debug_show_compass_overlay = False
@@ -242,6 +265,32 @@ class EDAutopilot:
         # Process config[] settings to update classes as necessary
         self.process_config_settings()
 
+    def _init_vision(self):
+        """ Create the detector state of the navball, target and compass reads (pipelines, calibration and
+        filters). Needs scr and scrReg only, so the detectors also run headless (see test/bench_Vision.py). """
+        self._nav_dot = NavDotLocator()  # Navball dot at native resolution, see get_nav_offset
+        self._vote_filter = ColorRangeFilter((5, 100, 100), (25, 255, 255), scale=2.0)  # Ring center votes
+        self._target_finder = PyramidCircleFinder((16, 165, 220), (98, 255, 255), self.TARGET_CIRCLE_R_MIN,
+                                                  self.TARGET_CIRCLE_R_MAX)  # Pyramid mode of _find_target_circle
+        self._target_engine = 'hough'  # TargetCircleEngine, see _set_target_engine
+        self._target_tracker = CircleTracker(self._target_finder)  # Window search around the last circle
+        self._target_tracking = True  # TargetTrackEnable
+        # Color masks from one table lookup instead of HSV + inRange (ColorLUTEnable, see _set_color_lut)
+        self._color_lut = False
+        self._target_fmt = FMT_RGB  # Capture format of the target region, native with the color table
+        self._arc_classifier = None
+        self._nav_cor_x = 0.0  # Nav Point correction to pitch
+        self._nav_cor_y = 0.0  # Nav Point correction to yaw
+        self.compass_cal = CompassCalibrator()  # Compass ring center, per ship and resolution in ship_configs.json
+        self.response = ShipResponse()  # Learned key hold response of the ship, in ship_configs.json
+        self._response_saved = 0.0
+        self._key_holds = {}  # Last hold time of each flight key, from _on_key_sent
+        # Fused navball and target offsets, fed by every read and every flight key hold (see _avg_offset)
+        self.nav_est = OffsetEstimator('nav', self.NAV_READ_STD, spherical=True)
+        self.target_est = OffsetEstimator('target', self.TARGET_READ_STD)
+        self._offset_filter = True
+        self._telemetry_dot = NavDotLocator()  # Buffers of the telemetry producer thread
+
     @property
     def ocr(self) -> OCR:
         """ Load OCR class when needed. """
@@ -321,6 +370,25 @@ class EDAutopilot:
             "GalMap_SystemSelectDelay": 0.5,  # Delay selecting the system when in galaxy map
             "PlanetDepartureSCOTime": 5.0,  # SCO boost time when leaving planet in secs
             "FleetCarrierMonitorCAPIDataPath": "",  # EDMC Fleet Carrier Monitor plugin data export path
+            "CaptureThreadEnable": False,  # Grab the screen regions in a background thread into a ring buffer
+            "CaptureThreadRate": 30,  # Background captures per second
+            "RecordSession": False,  # Record all captured screen regions with Status.json flags (see SessionRecorder)
+            "RecordSessionPath": "./recordings",  # Folder for the recorded sessions, one sub folder per session
+            "RecordSessionFrames": 3000,  # Frames kept per region, oldest are overwritten
+            "ChangeDetectEnable": False,  # Reuse detector results while a screen region is unchanged
+            "RegionHotReload": True,  # Watch the screen region and calibration files, apply changes live
+            "PyramidDetectEnable": False,  # Find the target circle and sun on a subsampled region, refine at full res
+            "PyramidDetectStep": 2,  # Subsample factor of the coarse pyramid pass (2 or 4)
+            "OffsetFilterEnable": True,  # Fuse navball/target reads with the key holds, re-sample only when unsure
+            "NavTelemetryEnable": False,  # Compute the navball offset in a background thread while an assist runs
+            "NavTelemetryRate": 30,  # Navball samples per second of the telemetry thread
+            "ColorLUTEnable": True,  # Color masks from a precomputed color table instead of HSV + inRange
+            "TargetTrackEnable": True,  # Search the target circle around its last position first (CircleTracker)
+            "TargetCircleEngine": "hough",  # Target circle detection: 'hough' (HoughCircles) or 'annulus' (matched filter)
+            "ClosedLoopAlignEnable": False,  # Release the alignment keys on the navball read during the hold (AxisController)
+            "AlignPlannerEnable": False,  # Align pitch, yaw (and roll) in one maneuver of overlapping holds (AlignPlanner)
+            "AlignLogEnable": False,  # Log every alignment step and cycle to columnar npz chunks (AlignLog)
+            "AlignLogPath": "./align_log",  # Folder of the alignment log chunks
         }
         cnf = read_json_file(filepath='./configs/AP.json')
         # if we read it then point to it, otherwise use the default table above
@@ -497,6 +565,46 @@ class EDAutopilot:
         self.cv_view = self.config['Enable_CV_View']
         self.debug_show_compass_overlay = self.config['Debug_ShowCompassOverlay']
         self.debug_show_target_overlay = self.config['Debug_ShowTargetOverlay']
+
+        if self.scr:
+            if self.config['CaptureThreadEnable']:
+                self.scr.start_capture_thread(self.config['CaptureThreadRate'], self.CAPTURE_RING_SIZE)
+            else:
+                self.scr.stop_capture_thread()
+
+        self._offset_filter = self.config['OffsetFilterEnable']
+        self._closed_loop = self.config['ClosedLoopAlignEnable']
+        self._align_planner = self.config['AlignPlannerEnable']
+        if self.config['AlignLogEnable'] and self.align_log is None:
+            self.align_log = AlignLog(self.config['AlignLogPath'])
+        elif not self.config['AlignLogEnable'] and self.align_log is not None:
+            self.align_log.close()
+            self.align_log = None
+
+        pyramid_step = self.config['PyramidDetectStep'] if self.config['PyramidDetectEnable'] else 1
+        if self._target_engine != self.config['TargetCircleEngine']:
+            self._set_target_engine(self.config['TargetCircleEngine'])
+        if self._target_engine == 'hough':
+            self._target_finder.step = pyramid_step  # The annulus engine has its own coarse step
+        self._target_tracking = self.config['TargetTrackEnable']
+        self._target_tracker.reset()
+        if self._color_lut != self.config['ColorLUTEnable']:
+            self._set_color_lut(self.config['ColorLUTEnable'])
+        if self.scrReg:
+            self.scrReg.change.enabled = self.config['ChangeDetectEnable']
+            if self.scrReg.pyramid_step != pyramid_step:
+                self.scrReg.set_pyramid_step(pyramid_step)
+            if self.config['RegionHotReload']:
+                self.scrReg.registry.start()
+            else:
+                self.scrReg.registry.stop()
+            if self.config['RecordSession'] and self.scrReg.recorder is None:
+                folder = os.path.join(self.config['RecordSessionPath'], datetime.now().strftime('%Y-%m-%d_%H-%M-%S'))
+                self.scrReg.recorder = SessionRecorder(folder, self.status, self.config['RecordSessionFrames'],
+                                                       screen_size=(self.scr.screen_width, self.scr.screen_height))
+            elif not self.config['RecordSession'] and self.scrReg.recorder is not None:
+                self.scrReg.recorder.close()
+                self.scrReg.recorder = None
         self.debug_overlay = self.config['DebugOverlay']
         self.debug_ocr = self.config['DebugOCR']
         self.debug_images = self.config['DebugImages']
@@ -586,8 +694,169 @@ class EDAutopilot:
         self.jn.ship_state()['interdicted'] = False
         return True
 
-    def get_nav_offset(self, scr_reg, disable_auto_cal: bool = False):
+    def _set_color_lut(self, enable: bool):
+        """ Switch the color detectors between the color class table (see ColorLUT) and HSV + inRange.
+        The masks are the same, the table is built here (~0.3 s, once per process).
+        """
+        classes = get_color_classes() if enable else None
+        if classes is not None:
+            classes.build()
+        self._color_lut = enable
+        self._nav_dot.use_classes(classes)
+        self._telemetry_dot.use_classes(classes)
+        if classes is not None:
+            self._vote_filter = ColorClassFilter('nav_ring', classes, scale=2.0)
+        else:
+            self._vote_filter = ColorRangeFilter((5, 100, 100), (25, 255, 255), scale=2.0)
+        # The target range is tuned on FMT_RGB, its swap_rb class reads the native capture as is
+        self._target_finder.use_classes(classes, 'target')
+        self._target_fmt = NATIVE_FORMAT if classes is not None else FMT_RGB
+        self._arc_classifier = ColorClassifier(classes) if classes is not None else None
+        self.nav_panel.classifier = ColorClassifier(classes) if classes is not None else None
+        if self.scrReg:
+            self.scrReg.set_color_classes(classes)
+        logger.debug(f"Color masks from {'the color table' if enable else 'HSV + inRange'}")
+
+    def _set_target_engine(self, engine: str):
+        """ Switch the target circle detection between HoughCircles ('hough', PyramidCircleFinder) and the
+        annulus matched filter ('annulus', AnnulusCircleFinder, see Annulus.py). The color classes carry
+        over, the tracker starts over.
+        @param engine: 'hough' or 'annulus'.
+        """
+        if engine not in self.TARGET_ENGINES:
+            logger.warning(f"Unknown TargetCircleEngine '{engine}', using 'hough'")
+            engine = 'hough'
+        lower, upper = (16, 165, 220), (98, 255, 255)
+        if engine == 'annulus':
+            finder = AnnulusCircleFinder(lower, upper, self.TARGET_CIRCLE_R_MIN, self.TARGET_CIRCLE_R_MAX)
+        else:
+            finder = PyramidCircleFinder(lower, upper, self.TARGET_CIRCLE_R_MIN, self.TARGET_CIRCLE_R_MAX)
+        finder.use_classes(get_color_classes() if self._color_lut else None, 'target')
+        self._target_finder = finder
+        self._target_tracker = CircleTracker(finder)
+        self._target_engine = engine
+        logger.debug(f"Target circle engine: {engine}")
+
+    def _compass_ring_center(self, scr_reg, compass_image) -> tuple[float, float]:
+        """ The compass ring center in the compass image. Calibrates it with a vote over compass_cal.votes
+        captures if there is no calibration (and saves it to the ship config), else validates the stored
+        center with one ring detection on compass_image when due. The 2x ring mask of the ring detection
+        is only made then, not on every read.
+        @param compass_image: The current compass capture.
+        @return: (x, y) in compass_image pixels, the image center if not calibrated.
+        """
+        cal = self.compass_cal
+        c_left, c_top = scr_reg.reg['compass']['rect'][0:2]
+        if cal.center is None:
+            hits = []
+            for _vote in range(cal.votes):
+                if _vote > 0:
+                    # Each vote needs a new frame, the capture thread may already have one
+                    _t_vote = time.perf_counter()
+                    sleep(0.01)
+                    cap = scr_reg.capture_region(self.scr, 'compass', newer_than=_t_vote)
+                else:
+                    cap = compass_image  # reuse first capture
+                hit = find_ring(self._vote_filter(cap), 2.0)
+                if hit is not None:
+                    hits.append((hit[0] + c_left, hit[1] + c_top, hit[2]))
+            if cal.calibrate(hits):
+                self.save_compass_calibration()
+        elif cal.due():
+            hit = find_ring(self._vote_filter(compass_image), 2.0)
+            if hit is not None:
+                cal.validate((hit[0] + c_left, hit[1] + c_top, hit[2]))
+
+        if cal.center is None:
+            h, w = compass_image.shape[:2]
+            logger.debug(f"Ring: not calibrated, using ROI center ({w / 2:.0f},{h / 2:.0f})")
+            return w / 2.0, h / 2.0
+        return cal.center[0] - c_left, cal.center[1] - c_top
+
+    def _compass_cal_key(self) -> str:
+        """ Key of the compass calibration in the ship config, the resolution. """
+        return f"{self.scr.screen_width}x{self.scr.screen_height}"
+
+    def load_compass_calibration(self, ship_type):
+        """ Use the stored compass ring center of the ship at the current resolution, if any. """
+        ship_cfg = self.ship_configs['Ship_Configs'].get(ship_type, {})
+        self.compass_cal.set_center(ship_cfg.get('CompassRing', {}).get(self._compass_cal_key()))
+
+    def save_compass_calibration(self):
+        """ Store the compass ring center in the ship config of the current ship at the current resolution. """
+        if self.current_ship_type not in ship_size_map or self.compass_cal.center is None:
+            return
+        ship_cfg = self.ship_configs['Ship_Configs'].setdefault(self.current_ship_type, {})
+        ship_cfg.setdefault('CompassRing', {})[self._compass_cal_key()] = self.compass_cal.to_list()
+        write_json_file(self.ship_configs, filepath='./configs/ship_configs.json')
+
+    def load_response_model(self, ship_type):
+        """ Use the learned key hold response of the ship, if any. """
+        ship_cfg = self.ship_configs['Ship_Configs'].get(ship_type, {})
+        self.response.load(ship_cfg.get('Response'))
+
+    def save_response_model(self):
+        """ Store the learned key hold response in the ship config of the current ship. """
+        self._response_saved = time.time()
+        if self.current_ship_type not in ship_size_map or not self.response.changed:
+            return
+        ship_cfg = self.ship_configs['Ship_Configs'].setdefault(self.current_ship_type, {})
+        ship_cfg['Response'] = self.response.to_dict()
+        write_json_file(self.ship_configs, filepath='./configs/ship_configs.json')
+        self.response.changed = False
+
+    # Navball telemetry: max age of a sample taken as fresh, max wait for the next one
+    TELEMETRY_MAX_AGE = 0.05
+    TELEMETRY_WAIT = 0.15
+
+    def _telemetry_paused(self) -> bool:
+        """ Producer thread: no navball while a panel or map has the focus. """
+        return self._telemetry_status.get_gui_focus() != GuiFocusNoFocus
+
+    def _telemetry_nav_offset(self, compass_image) -> dict:
+        """ Producer thread: the navball offset of a compass capture. Uses the calibrated ring center as is
+        (calibration and validation stay with get_nav_offset) and its own dot locator, no overlay and no filter.
+        """
+        center = self.compass_cal.center
+        if center is None:
+            h, w = compass_image.shape[:2]
+            ring = (w / 2.0, h / 2.0)
+        else:
+            c_left, c_top = self.scrReg.reg['compass']['rect'][0:2]
+            ring = (center[0] - c_left, center[1] - c_top)
+        return navball_offset(self._telemetry_dot(compass_image), ring, RING_RADIUS, self._nav_cor_x, self._nav_cor_y)
+
+    def _start_nav_telemetry(self):
+        """ Start the navball producer for an assist, if enabled. """
+        if self.config['NavTelemetryEnable'] and self.scr.using_screen:
+            self.nav_telemetry.rate = self.config['NavTelemetryRate']
+            self.nav_telemetry.start()
+
+    def read_nav_offset(self, scr_reg) -> dict | None:
+        """ The navball offset from the freshest telemetry sample while the producer runs, else get_nav_offset.
+        A sample is used once (the next read waits for a newer frame) and fused into nav_est like an inline read.
+        The ring calibration and its periodic validation still go through get_nav_offset.
+        @return: As get_nav_offset.
+        """
+        telemetry = self.nav_telemetry
+        if telemetry.is_running() and not telemetry.is_paused and self.compass_cal.center is not None \
+                and not self.compass_cal.due():
+            sample = telemetry.fresh(self.TELEMETRY_MAX_AGE, self.TELEMETRY_WAIT)
+            if sample is not None and sample.seq == self._last_nav_seq:
+                sample = telemetry.wait_after(sample.timestamp, self.TELEMETRY_WAIT)
+            if sample is not None:
+                self._last_nav_seq = sample.seq
+                off = dict(sample.offset)
+                if off['z'] < 0:
+                    self.nav_est.reset()
+                else:
+                    self.nav_est.update(off)
+                return off
+        return self.get_nav_offset(scr_reg)
+
+    def get_nav_offset(self, scr_reg, disable_auto_cal: bool = False, compass_image=None):
         """ Determine the x,y offset from center of the compass of the nav point.
+        @param compass_image: The compass region image if already captured (see capture_regions), else it is grabbed.
         @return: {'x': x.xx, 'y': y.yy, 'z': -1|0|+1, 'roll': r.rr, 'pit': p.pp, 'yaw': y.yy} | None
         Where:
             'pit':  0 = dead ahead, +90 = top edge, -90 = bottom edge,
@@ -598,102 +867,38 @@ class EDAutopilot:
         import time as _time
         _t0 = _time.perf_counter()
 
-        # Capture compass region directly (fixed bounding box from config)
-        compass_image = scr_reg.capture_region(self.scr, 'compass', inv_col=False)
+        # Capture compass region from the shared frame (fixed bounding box from config)
+        if compass_image is None:
+            compass_image = scr_reg.capture_region(self.scr, 'compass', ttl=self.FRAME_TTL)
 
         c_left = scr_reg.reg['compass']['rect'][0]
         c_top = scr_reg.reg['compass']['rect'][1]
 
         _t1 = _time.perf_counter()
 
-        # 2x upscale for sub-pixel centroid accuracy (~0.75 deg instead of ~1.5 deg)
-        compass_image = cv2.resize(compass_image, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR)
-        comp_h, comp_w = compass_image.shape[:2]
-
-        logger.debug(f"Compass capture: {comp_w}x{comp_h} (2x upscaled) capture={_t1-_t0:.3f}s")
-
-        # Find nav dot by color instead of template matching
-        # Convert to HSV for color-based detection
-        if compass_image.shape[2] == 4:
-            compass_bgr = cv2.cvtColor(compass_image, cv2.COLOR_BGRA2BGR)
-        else:
-            compass_bgr = compass_image
-        compass_hsv = cv2.cvtColor(compass_bgr, cv2.COLOR_BGR2HSV)
-
-        # Mask out the orange compass ring (hue ~5-25, high saturation)
-        orange_mask = cv2.inRange(compass_hsv, (5, 100, 100), (25, 255, 255))
-
-        # Detect compass ring center: 3-of-5 vote with HoughCircles
-        # Take 5 captures, keep results with hough_r >= 55, use median if 3+ valid
-        ring_r = 60.0  # Fixed: 30px real * 2x upscale
-        valid_centers = []
-        for _vote in range(5):
-            if _vote > 0:
-                sleep(0.01)
-                cap = scr_reg.capture_region(self.scr, 'compass', inv_col=False)
-                cap = cv2.resize(cap, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR)
-                if cap.shape[2] == 4:
-                    cap_bgr = cv2.cvtColor(cap, cv2.COLOR_BGRA2BGR)
-                else:
-                    cap_bgr = cap
-                cap_hsv = cv2.cvtColor(cap_bgr, cv2.COLOR_BGR2HSV)
-                omask = cv2.inRange(cap_hsv, (5, 100, 100), (25, 255, 255))
-            else:
-                omask = orange_mask  # reuse first capture
-            oblur = cv2.GaussianBlur(omask, (5, 5), 1)
-            circles = cv2.HoughCircles(oblur, cv2.HOUGH_GRADIENT, dp=1.2,
-                                       minDist=comp_w // 2,
-                                       param1=50, param2=20,
-                                       minRadius=comp_w // 5,
-                                       maxRadius=comp_w // 2)
-            if circles is not None:
-                best = min(circles[0], key=lambda c: (c[0] - comp_w/2)**2 + (c[1] - comp_h/2)**2)
-                # Reject: radius too small OR center too far from ROI center
-                dx = abs(best[0] - comp_w/2)
-                dy = abs(best[1] - comp_h/2)
-                if best[2] >= 55 and dx < 15 and dy < 15:
-                    valid_centers.append((float(best[0]), float(best[1]), float(best[2])))
-
-        ring_cx = comp_w / 2.0
-        ring_cy = comp_h / 2.0
-        if len(valid_centers) >= 3:
-            # Median of valid centers
-            valid_centers.sort(key=lambda c: c[0])
-            ring_cx = valid_centers[len(valid_centers) // 2][0]
-            valid_centers.sort(key=lambda c: c[1])
-            ring_cy = valid_centers[len(valid_centers) // 2][1]
-            avg_r = sum(c[2] for c in valid_centers) / len(valid_centers)
-            logger.debug(f"Ring: center=({ring_cx:.1f},{ring_cy:.1f}) avg_r={avg_r:.1f} votes={len(valid_centers)}/5")
-        else:
-            logger.debug(f"Ring: {len(valid_centers)}/5 valid, using ROI center ({ring_cx:.0f},{ring_cy:.0f})")
-
-        # Look for cyan dot (front target): hue ~75-105, val 170+
-        # Front dot is cyan (hue~90, sat~80, val~204)
-        front_mask = cv2.inRange(compass_hsv, (75, 40, 170), (105, 255, 255))
-        front_mask = cv2.bitwise_and(front_mask, cv2.bitwise_not(orange_mask))
+        # Compass ring center: calibrated once (3-of-5 vote with HoughCircles) and persisted per ship and
+        # resolution, validated now and then with one HoughCircles on this capture
+        ring_r = RING_RADIUS  # Fixed: 30px
+        ring_cx, ring_cy = self._compass_ring_center(scr_reg, compass_image)
 
-        # Try front dot by color
+        # Look for cyan dot (front target): hue ~75-105, val 170+, orange ring masked out.
+        # Sub-pixel position from the intensity weighted moments at native resolution (no 2x upscale),
+        # one preallocated pipeline: drop alpha, HSV, masks (no allocations per call)
+        dot = self._nav_dot(compass_image)
+        compass_image = self._nav_dot.bgr
+        comp_h, comp_w = compass_image.shape[:2]
         final_z_pct = 0.0
         dot_cx, dot_cy = ring_cx, ring_cy  # default to ring center
-
-        contours, _ = cv2.findContours(front_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        all_areas = [cv2.contourArea(c) for c in contours]
-        valid = [c for c in contours if 2 < cv2.contourArea(c) < comp_w * comp_h * 0.3]
-        if valid:
-            largest = max(valid, key=cv2.contourArea)
-            area = cv2.contourArea(largest)
-            M = cv2.moments(largest)
-            if M["m00"] > 0:
-                dot_cx = M["m10"] / M["m00"]
-                dot_cy = M["m01"] / M["m00"]
-                final_z_pct = 1.0
-                _t3 = _time.perf_counter()
-                logger.debug(f"Dot: pos=({dot_cx:.1f},{dot_cy:.1f}) area={area:.1f} comp={comp_w}x{comp_h} contours={len(contours)} valid={len(valid)} total={_t3-_t0:.3f}s")
+        if dot is not None:
+            dot_cx, dot_cy = dot
+            final_z_pct = 1.0
+            _t3 = _time.perf_counter()
+            logger.debug(f"Dot: pos=({dot_cx:.2f},{dot_cy:.2f}) area={self._nav_dot.area} comp={comp_w}x{comp_h} "
+                         f"capture={_t1-_t0:.3f}s total={_t3-_t0:.3f}s")
 
         # Store debug data for saving after angle calc (so filename includes pit/yaw)
-        _dbg_compass_bgr = compass_bgr
-        _dbg_front_mask = front_mask
-        _dbg_valid = valid
+        _dbg_compass_bgr = compass_image
+        _dbg_front_mask = self._nav_dot.dot_mask
         _dbg_dot_cx = dot_cx
         _dbg_dot_cy = dot_cy
         _dbg_z = final_z_pct
@@ -701,54 +906,14 @@ class EDAutopilot:
         if final_z_pct == 0.0:
             # No cyan front dot = target is behind.
             _t3 = _time.perf_counter()
-            logger.debug(f"Dot: BEHIND comp={comp_w}x{comp_h} contours={len(contours)} areas={all_areas[:5]} total={_t3-_t0:.3f}s")
-            return {'x': 0, 'y': 0, 'z': -1, 'roll': 180.0, 'pit': 180.0, 'yaw': 0}
-
-        # Convert dot position relative to detected ring center (-1.0 to 1.0)
-        ring_radius = ring_r
-
-        # Dot offset from ring center, normalized to ring radius
-        final_x_pct = (dot_cx - ring_cx) / ring_radius
-        final_x_pct = final_x_pct - self._nav_cor_x
-        final_x_pct = max(min(final_x_pct, 1.0), -1.0)
-
-        final_y_pct = -(dot_cy - ring_cy) / ring_radius  # flip Y (screen Y is inverted)
-        final_y_pct = final_y_pct - self._nav_cor_y
-        final_y_pct = max(min(final_y_pct, 1.0), -1.0)
-
-        # Calc angle in degrees starting at 0 deg at 12 o'clock and increasing clockwise
-        # so 3 o'clock is +90° and 9 o'clock is -90°.
-        final_roll_deg = 0.0
-        if final_x_pct > 0.0:
-            final_roll_deg = 90 - degrees(atan(final_y_pct/final_x_pct))
-        elif final_x_pct < 0.0:
-            final_roll_deg = -90 - degrees(atan(final_y_pct/final_x_pct))
-        elif final_y_pct < 0.0:
-            final_roll_deg = 180.0
-
-        # Spherical angle mapping: navball is a sphere rendered flat (orthographic projection)
-        # dot position = sin(angle), so angle = asin(position)
-        if final_z_pct > 0:
-            # Front hemisphere: clamp to [-1,1] for asin safety
-            clamped_y = max(-1.0, min(1.0, final_y_pct))
-            clamped_x = max(-1.0, min(1.0, final_x_pct))
-            final_pit_deg = degrees(asin(clamped_y))
-            final_yaw_deg = degrees(asin(clamped_x))
-        else:
-            # Behind hemisphere
-            clamped_y = max(-1.0, min(1.0, final_y_pct))
-            clamped_x = max(-1.0, min(1.0, final_x_pct))
-            if clamped_y > 0:
-                final_pit_deg = 180.0 - degrees(asin(clamped_y))
-            else:
-                final_pit_deg = -180.0 - degrees(asin(clamped_y))
-            if clamped_x > 0:
-                final_yaw_deg = 180.0 - degrees(asin(clamped_x))
-            else:
-                final_yaw_deg = -180.0 - degrees(asin(clamped_x))
+            logger.debug(f"Dot: BEHIND comp={comp_w}x{comp_h} area={self._nav_dot.area} total={_t3-_t0:.3f}s")
+            self.nav_est.reset()
+            return navball_offset(None, (ring_cx, ring_cy))
 
-        result = {'x': round(final_x_pct, 4), 'y': round(final_y_pct, 4), 'z': round(final_z_pct, 2),
-                  'roll': round(final_roll_deg, 2), 'pit': round(final_pit_deg, 2), 'yaw': round(final_yaw_deg, 2)}
+        result = navball_offset((dot_cx, dot_cy), (ring_cx, ring_cy), ring_r, self._nav_cor_x, self._nav_cor_y)
+        final_x_pct, final_y_pct, final_z_pct = result['x'], result['y'], result['z']
+        final_roll_deg, final_pit_deg, final_yaw_deg = result['roll'], result['pit'], result['yaw']
+        self.nav_est.update(result)
 
         # Draw box around compass region
         if self.debug_overlay:
@@ -762,7 +927,8 @@ class EDAutopilot:
             self.overlay.overlay_paint()
 
         if self.cv_view:
-            icompass_image_d = compass_image.copy()
+            icompass_image_d = cv2.resize(compass_image, (comp_w * 2, comp_h * 2))  # 2x for display only
+            comp_w, comp_h = comp_w * 2, comp_h * 2
             icompass_image_d = cv2.rectangle(icompass_image_d, (0, 0), (comp_w, 45), (0, 0, 0), -1)
             cv2.putText(icompass_image_d, f'x: {final_x_pct:5.2f} y: {final_y_pct:5.2f} z: {final_z_pct:5.2f}', (1, 12), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
             cv2.putText(icompass_image_d, f'r: {final_roll_deg:5.2f}deg p: {final_pit_deg:5.2f}deg y: {final_yaw_deg:5.2f}deg', (1, 27), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
@@ -781,13 +947,15 @@ class EDAutopilot:
             tag = f"{_seq:03d}_p{final_pit_deg:+05.1f}_y{final_yaw_deg:+05.1f}_{z_str}"
             cv2.imwrite(f'{dbg_dir}/{tag}_compass.png', _dbg_compass_bgr)
             cv2.imwrite(f'{dbg_dir}/{tag}_cyan.png', _dbg_front_mask)
-            annotated = _dbg_compass_bgr.copy()
-            cv2.drawContours(annotated, _dbg_valid, -1, (0, 255, 0), 1)
+            annotated = cv2.resize(_dbg_compass_bgr, None, fx=2, fy=2)
             if _dbg_z > 0:
-                cv2.drawMarker(annotated, (int(_dbg_dot_cx), int(_dbg_dot_cy)), (0, 0, 255), cv2.MARKER_CROSS, 8, 1)
+                cv2.drawMarker(annotated, (int(_dbg_dot_cx * 2 + 0.5), int(_dbg_dot_cy * 2 + 0.5)), (0, 0, 255),
+                               cv2.MARKER_CROSS, 8, 1)
             # Yellow + = ROI center, Cyan x = detected ring center
-            cv2.drawMarker(annotated, (comp_w // 2, comp_h // 2), (0, 255, 255), cv2.MARKER_CROSS, 8, 1)
-            cv2.drawMarker(annotated, (int(ring_cx), int(ring_cy)), (255, 0, 0), cv2.MARKER_TILTED_CROSS, 10, 1)
+            cv2.drawMarker(annotated, (annotated.shape[1] // 2, annotated.shape[0] // 2), (0, 255, 255),
+                           cv2.MARKER_CROSS, 8, 1)
+            cv2.drawMarker(annotated, (int(ring_cx * 2 + 0.5), int(ring_cy * 2 + 0.5)), (255, 0, 0),
+                           cv2.MARKER_TILTED_CROSS, 10, 1)
             cv2.imwrite(f'{dbg_dir}/{tag}_annotated.png', annotated)
 
         return result
@@ -795,30 +963,38 @@ class EDAutopilot:
     def is_target_arc_visible(self, scr_reg) -> bool:
         """Check if the orange target arc is visible near screen center.
         Detects partial arcs by checking that orange pixels lie at a consistent
-        radius from screen center (960,540). Text has scattered distances (high std),
-        arc pixels cluster at one radius (low std).
+        radius from the screen center. Text has scattered distances (high std),
+        arc pixels cluster at one radius (low std). The distances are a masked reduction over the
+        region's cached radius map (see RegionGeometry).
         @return: True if arc-like orange pattern is found (min 30px, radius std < 12).
         """
         if 'target_arc' not in scr_reg.reg:
             return False
-        raw = scr_reg.capture_region(self.scr, 'target_arc', inv_col=False)
+        raw = scr_reg.capture_region(self.scr, 'target_arc', ttl=self.FRAME_TTL)
         if raw is None:
             return False
-        hsv = cv2.cvtColor(raw, cv2.COLOR_BGR2HSV)
-        orange_mask = cv2.inRange(hsv, (16, 165, 220), (98, 255, 255))
+        if self._arc_classifier is not None:
+            self._arc_classifier(raw)
+            orange_mask = self._arc_classifier.mask('orange_2')
+        else:
+            hsv = cv2.cvtColor(raw, cv2.COLOR_BGR2HSV)
+            orange_mask = cv2.inRange(hsv, (16, 165, 220), (98, 255, 255))
         count = cv2.countNonZero(orange_mask)
 
         if count < self.MIN_ARC_PIXELS:
             logger.debug(f"target_arc: orange={count}px -- too few")
             return False
 
+        geometry = scr_reg.geometry('target_arc')
+        if self._target_engine == 'annulus':
+            # Ring score around the screen center: ~ the visible fraction of the target ring, text ~0
+            score = self._target_finder.score_at(orange_mask, *geometry.center)
+            is_arc = score >= self.ARC_RING_SCORE
+            logger.debug(f"target_arc: orange={count}px ring_score={score:.2f} arc={is_arc}")
+            return is_arc
+
         # Check if orange pixels form an arc (consistent radius from screen center)
-        box_x1 = scr_reg.reg['target_arc']['rect'][0]
-        box_y1 = scr_reg.reg['target_arc']['rect'][1]
-        ys, xs = np.where(orange_mask > 0)
-        dists = np.sqrt((xs + box_x1 - 960)**2 + (ys + box_y1 - 540)**2)
-        r_std = dists.std()
-        r_mean = dists.mean()
+        _, r_mean, r_std = geometry.radius_stats(orange_mask)
 
         is_arc = r_std < self.ARC_STD_THRESHOLD
         logger.debug(f"target_arc: orange={count}px r_mean={r_mean:.1f} r_std={r_std:.1f} arc={is_arc}")
@@ -826,15 +1002,18 @@ class EDAutopilot:
 
     def target_fine_align(self, scr_reg) -> bool:
         """Use the on-screen target circle for precise fine alignment.
-        The target circle center = exact target position. Screen center (960,540) = aligned.
+        The target circle center = exact target position. Screen center = aligned (see get_target_offset).
         @return: True if fine alignment succeeded.
         """
         _dbg = self.DEBUG_TARGET_CIRCLE
+        cycle = self._log_begin('target')
 
+        self._target_tracker.reset()  # The first read searches the whole region
         target_off = self.get_target_offset(scr_reg)
         if target_off is None:
             if _dbg:
                 logger.info("[TGT_ALIGN] no target circle found, aborting")
+            self._log_end(cycle, False)
             return False
 
         pit = target_off['pit']
@@ -846,39 +1025,57 @@ class EDAutopilot:
         if abs(pit) < self.FINE_ALIGN_CLOSE and abs(yaw) < self.FINE_ALIGN_CLOSE:
             if _dbg:
                 logger.info(f"[TGT_ALIGN] already aligned (threshold={self.FINE_ALIGN_CLOSE})")
+            self._log_end(cycle, True)
             return True
 
         # Single correction per axis -- gentle, 50% approach
+        step = None  # (axis, before, hold, settle) of the last correction, logged with the next read
         if abs(pit) > 2.0:
             key = 'PitchUpButton' if pit > 0 else 'PitchDownButton'
-            hold = (abs(pit) * 0.5) / self.pitchrate
+            hold = self._response_curve('pitch').hold_for(abs(pit) * 0.5, self.pitchrate)
             hold = max(0.10, min(1.0, hold))
             if _dbg:
                 logger.info(f"[TGT_ALIGN] pitch correction: {pit:.1f}deg -> hold={hold:.2f}s key={key}")
+            hold_start = time.perf_counter()
             self.keys.send(key, hold=hold)
+            settle_start = time.perf_counter()
             sleep(2.0)
+            step = ('pit', pit, settle_start - hold_start, time.perf_counter() - settle_start)
 
         if abs(yaw) > 2.0:
             # Re-read after pitch correction
+            read_start = time.perf_counter()
             target_off = self.get_target_offset(scr_reg)
+            if step is not None:
+                self._log_step(*step, None if target_off is None else target_off['pit'],
+                               time.perf_counter() - read_start, source='target')
+                step = None
             if target_off is None:
                 if _dbg:
                     logger.info("[TGT_ALIGN] lost target after pitch correction")
+                self._log_end(cycle, False)
                 return False
             yaw = target_off['yaw']
             if _dbg:
                 logger.info(f"[TGT_ALIGN] post-pitch yaw={yaw:.1f}")
             if abs(yaw) > 2.0:
                 key = 'YawRightButton' if yaw > 0 else 'YawLeftButton'
-                hold = (abs(yaw) * 0.5) / self.yawrate
+                hold = self._response_curve('yaw').hold_for(abs(yaw) * 0.5, self.yawrate)
                 hold = max(0.10, min(1.0, hold))
                 if _dbg:
                     logger.info(f"[TGT_ALIGN] yaw correction: {yaw:.1f}deg -> hold={hold:.2f}s key={key}")
+                hold_start = time.perf_counter()
                 self.keys.send(key, hold=hold)
+                settle_start = time.perf_counter()
                 sleep(2.0)
+                step = ('yaw', yaw, settle_start - hold_start, time.perf_counter() - settle_start)
 
         # Verify with 3-of-3 avg
+        read_start = time.perf_counter()
         med = self._avg_offset(scr_reg, self.get_target_offset)
+        if step is not None:
+            self._log_step(*step, None if med is None else med[step[0]], time.perf_counter() - read_start,
+                           source='target')
         if _dbg:
             if med:
                 logger.info(f"[TGT_ALIGN] final avg: pit={med['pit']:.1f} yaw={med['yaw']:.1f} (ok_threshold={self.FINE_ALIGN_OK})")
@@ -887,8 +1084,19 @@ class EDAutopilot:
         aligned = med is not None and abs(med['pit']) < self.FINE_ALIGN_OK and abs(med['yaw']) < self.FINE_ALIGN_OK
         if _dbg:
             logger.info(f"[TGT_ALIGN] result={'ALIGNED' if aligned else 'MISSED'}")
+        self._log_end(cycle, aligned)
         return aligned
 
+    @staticmethod
+    def _sc_assist_ratio(mask) -> float:
+        """ Ratio of cyan pixels in the filtered SC Assist indicator region. """
+        if mask is None:
+            return 0.0
+        mask_2x = cv2.resize(mask, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR)
+        blue_count = cv2.countNonZero(mask_2x)
+        blue_total = mask_2x.shape[0] * mask_2x.shape[1]
+        return blue_count / blue_total if blue_total > 0 else 0
+
     def is_sc_assist_gone(self, scr_reg) -> bool:
         """3-of-3 check whether SC Assist has actually disappeared.
         Uses the blue indicator check region only.
@@ -898,15 +1106,9 @@ class EDAutopilot:
         for i in range(self.VOTE_COUNT):
             sleep(3)
 
-            # inv_col=False: skip the bogus RGB2BGR conversion in mss capture
-            mask = scr_reg.capture_region_filtered(self.scr, 'sc_assist_ind', inv_col=False)
-
-            ind_ratio = 0.0
-            if mask is not None:
-                mask_2x = cv2.resize(mask, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR)
-                blue_count = cv2.countNonZero(mask_2x)
-                blue_total = mask_2x.shape[0] * mask_2x.shape[1]
-                ind_ratio = blue_count / blue_total if blue_total > 0 else 0
+            # Native BGRA capture, no color conversion before the HSV filter.
+            # Cached ratio while the indicator pixels are unchanged.
+            ind_ratio = scr_reg.detect_region(self.scr, 'sc_assist_ind', self._sc_assist_ratio, ttl=self.FRAME_TTL)
 
             logger.debug(f"sc_assist {i+1}/{self.VOTE_COUNT}: ratio={ind_ratio:.3f}")
 
@@ -921,16 +1123,32 @@ class EDAutopilot:
     # Target circle radius bounds at 1920x1080
     TARGET_CIRCLE_R_MIN = 44
     TARGET_CIRCLE_R_MAX = 48
+    TARGET_ENGINES = ('hough', 'annulus')  # TargetCircleEngine values
 
     def _find_target_circle(self, image_bgr):
         """Find the orange target circle in an image using HoughCircles.
         HoughCircles detects circular arcs directly, ignoring nearby text.
+        With PyramidDetectEnable the search runs on the subsampled image and is refined at full
+        resolution around the hits (see PyramidCircleFinder). TargetCircleEngine 'annulus' correlates the
+        mask with an annulus kernel instead (see AnnulusCircleFinder). With TargetTrackEnable a window around
+        the last circle is searched first, the whole image only when the circle is not there (see CircleTracker).
         @return: (center_x, center_y) or None if no orange circle found.
         """
-        hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+        if self._target_tracking:
+            circle = self._target_tracker.track(image_bgr)
+            if self.DEBUG_TARGET_CIRCLE:
+                logger.info(f"[TGT_CIRCLE] tracker window={self._target_tracker.window_size} "
+                            f"confidence={self._target_tracker.confidence:.2f} selected: {circle}")
+            return None if circle is None else circle[:2]
+
+        if self._target_finder.step > 1 or self._target_engine != 'hough':
+            circle = self._target_finder.find(image_bgr)
+            if self.DEBUG_TARGET_CIRCLE:
+                logger.info(f"[TGT_CIRCLE] {self._target_engine} step={self._target_finder.step} selected: {circle}")
+            return None if circle is None else circle[:2]
 
-        # Orange filter for target circle
-        orange_mask = cv2.inRange(hsv, np.array([16, 165, 220]), np.array([98, 255, 255]))
+        # Orange filter for target circle (HSV + inRange, or the color table, see _set_color_lut)
+        orange_mask = self._target_finder.color_mask(image_bgr)
         blurred = cv2.GaussianBlur(orange_mask, (5, 5), 1)
 
         img_h, img_w = image_bgr.shape[:2]
@@ -964,15 +1182,18 @@ class EDAutopilot:
 
         return cx, cy
 
-    def get_target_offset(self, scr_reg, disable_auto_cal: bool = False):
+    def get_target_offset(self, scr_reg, disable_auto_cal: bool = False, image=None):
         """ Determine how far off we are from the target being in the middle of the screen.
         Uses color-based circle detection (no templates).
+        @param image: The target region image (in _target_fmt) if already captured (see capture_regions), else it is
+        grabbed.
         @return: {'roll': r.rr, 'pit': p.pp, 'yaw': y.yy}, where all are in degrees
         """
         # Grab the target search region (center of screen)
-        # scr_reg.reg rects are already in pixels (converted at Screen_Regions init)
-        target_rect = scr_reg.reg['target']['rect']
-        image = self.scr.get_screen_region(target_rect)
+        # The target HSV range is tuned on the R/B swapped image (FMT_RGB), one conversion from BGRA.
+        # The color table has the range with R/B swapped, it reads the native capture.
+        if image is None:
+            image = scr_reg.capture_region(self.scr, 'target', self._target_fmt, ttl=self.FRAME_TTL)
         if image is None:
             return None
 
@@ -984,22 +1205,9 @@ class EDAutopilot:
         cx, cy = result_circle
         img_h, img_w = image.shape[:2]
 
-        # Convert circle center to screen-relative position
-        # Region rect is [L, T, R, B] in pixels, convert to pct for position calc
-        sw = self.scr.screen_width
-        sh = self.scr.screen_height
-        region_left_pct = target_rect[0] / sw
-        region_top_pct = target_rect[1] / sh
-        region_w_pct = (target_rect[2] - target_rect[0]) / sw
-        region_h_pct = (target_rect[3] - target_rect[1]) / sh
-
-        # Circle position as pct of full screen
-        screen_x_pct = region_left_pct + (cx / img_w) * region_w_pct
-        screen_y_pct = region_top_pct + (cy / img_h) * region_h_pct
-
-        # Convert to -100..+100 range (0 = center of screen)
-        final_x_pct = (screen_x_pct - 0.5) * 200.0
-        final_y_pct = -(screen_y_pct - 0.5) * 200.0  # flip Y (up is positive)
+        # Circle position relative to the screen center, -100..+100 (0 = center of screen, y up positive)
+        geometry = scr_reg.geometry('target')
+        final_x_pct, final_y_pct = geometry.center_offset(cx * geometry.width / img_w, cy * geometry.height / img_h)
         final_x_pct = max(min(final_x_pct, 100.0), -100.0)
         final_y_pct = max(min(final_y_pct, 100.0), -100.0)
 
@@ -1020,6 +1228,7 @@ class EDAutopilot:
 
         result = {'roll': round(final_roll_deg, 2), 'pit': round(final_pit_deg, 2),
                   'yaw': round(final_yaw_deg, 2)}
+        self.target_est.update(result)
         return result
 
     def undock(self):
@@ -1052,7 +1261,7 @@ class EDAutopilot:
         # Debug snapshot after boost (closer to station)
         if self.DEBUG_SNAP:
             try:
-                snap = self.scrReg.capture_region(self.scr, 'center_normalcruise', inv_col=False)
+                snap = self.scrReg.capture_region(self.scr, 'center_normalcruise')
                 if snap is not None:
                     snap_dir = os.path.join('debug-output', 'target-snap')
                     os.makedirs(snap_dir, exist_ok=True)
@@ -1098,7 +1307,7 @@ class EDAutopilot:
         return False
 
     def is_sun_dead_ahead(self, scr_reg):
-        return scr_reg.sun_percent(scr_reg.screen) > 5
+        return scr_reg.sun_percent(scr_reg.screen, ttl=self.FRAME_TTL, near=5) > 5
 
     # use to orient the ship to not be pointing right at the Sun
     # Checks brightness in the region in front of us, if brightness exceeds a threshold
@@ -1148,12 +1357,23 @@ class EDAutopilot:
         """Check if the dot is on the vertical centerline (near 0 or ±180 degrees)."""
         return abs(roll_deg) < close or (180 - abs(roll_deg)) < close
 
+    @staticmethod
+    def _axis_dist(axis, off) -> float:
+        """Distance to target for an axis in degrees (roll: to the nearest centerline)."""
+        if axis == 'roll':
+            return min(abs(off['roll']), 180 - abs(off['roll']))
+        return abs(off[axis])
+
+    @staticmethod
+    def _axis_offset(axis, off) -> float:
+        """Signed offset of an axis in degrees (roll: to the nearest centerline), for the alignment log."""
+        if axis == 'roll':
+            return (off['roll'] + 90) % 180 - 90
+        return off[axis]
+
     def _get_dist(self, axis, off):
         """Get distance to target for an axis (ceiled to full degrees)."""
-        import math
-        if axis == 'roll':
-            return math.ceil(min(abs(off['roll']), 180 - abs(off['roll'])))
-        return math.ceil(abs(off[axis]))
+        return math.ceil(self._axis_dist(axis, off))
 
     def _is_aligned(self, axis, off, close):
         """Check if aligned on an axis."""
@@ -1186,6 +1406,15 @@ class EDAutopilot:
         else:
             return 'YawRightButton' if deg > 0 else 'YawLeftButton'
 
+    @staticmethod
+    def _approach_pct(remaining) -> float:
+        """Part of the remaining degrees to turn in one correction: gentle near center, bolder far out."""
+        if remaining < 10:
+            return 0.4
+        elif remaining < 20:
+            return 0.6
+        return 0.8
+
     def _align_axis(self, scr_reg, axis, off, close=10.0, timeout=None):
         """Align one axis using configured rate and calculated holds.
         @return: Updated offset dict, or None if compass lost.
@@ -1202,39 +1431,55 @@ class EDAutopilot:
         start = time.time()
         remaining = self._get_dist(axis, off)
         rate = self._axis_max_rate(axis) * self.ZERO_THROTTLE_RATE_FACTOR
+        curve = self._response_curve(self._AXIS_NAMES[axis])
         key = self._axis_pick_key(axis, off[axis])
+        last_read = off
 
         logger.info(f"Align {axis}: {off[axis]:.1f}deg, dist={remaining:.1f}, rate={rate:.1f}, key={key}")
 
         # Correction loop with calculated holds
         while remaining > close and (time.time() - start) < timeout:
             self.check_stop()
-            # Progressive approach: gentle near center, bolder far out
-            if remaining < 10:
-                approach_pct = 0.4
-            elif remaining < 20:
-                approach_pct = 0.6
-            else:
-                approach_pct = 0.8
-
-            hold_time = (remaining * approach_pct) / rate
+            approach_pct = self._approach_pct(remaining)
+            hold_time = curve.hold_for(remaining * approach_pct, rate)
             hold_time = max(self.MIN_HOLD_TIME, min(self.MAX_HOLD_TIME, hold_time))
 
-            logger.debug(f"Align {axis}: remaining={remaining:.1f}deg, hold={hold_time:.2f}s, rate={rate:.1f}, key={key}")
-            self.keys.send(key, hold=hold_time)
-            sleep(self.ALIGN_SETTLE)
+            hold_start = time.perf_counter()
+            if self._closed_loop:
+                # Hold until the navball says the axis stops in the band, the ship only coasts after
+                max_hold = max(self.MIN_HOLD_TIME, min(self.MAX_HOLD_TIME, 1.5 * remaining / rate))
+                self._hold_axes(scr_reg, {axis: (key, self._axis_dist(axis, off), self.MIN_HOLD_TIME, max_hold)},
+                                close * self.CLOSED_LOOP_TARGET)
+                settle_start = time.perf_counter()
+                sleep(self.CLOSED_LOOP_SETTLE)
+            else:
+                logger.debug(f"Align {axis}: remaining={remaining:.1f}deg, hold={hold_time:.2f}s, rate={rate:.1f}, key={key}")
+                self.keys.send(key, hold=hold_time)
+                settle_start = time.perf_counter()
+                sleep(self.ALIGN_SETTLE)
+            read_start = time.perf_counter()
 
             # FSD jumped during hold/settle -- compass is garbage, bail out
             if self.status.get_flag(FlagsFsdJump):
                 logger.info(f"Align {axis}: FSD jumped during align, aborting")
+                self._log_step(axis, self._axis_offset(axis, off), settle_start - hold_start, read_start - settle_start)
                 return off
 
-            new_off = self.get_nav_offset(scr_reg)
+            new_off = self.read_nav_offset(scr_reg)
             if new_off is None:
                 sleep(0.5)
-                new_off = self.get_nav_offset(scr_reg)
+                new_off = self.read_nav_offset(scr_reg)
                 if new_off is None:
+                    self._log_step(axis, self._axis_offset(axis, off), settle_start - hold_start,
+                                   read_start - settle_start)
                     return off
+            latency = time.perf_counter() - read_start
+            if not self._closed_loop:
+                self._learn_response(axis, key, last_read, new_off)  # Settled after ALIGN_SETTLE
+            last_read = new_off
+            new_off = self._fused_offset(new_off, self.nav_est)
+            self._log_step(axis, self._axis_offset(axis, off), settle_start - hold_start, read_start - settle_start,
+                           self._axis_offset(axis, new_off) if new_off.get('z', 1) >= 0 else None, latency)
 
             # Target went behind during alignment -- abort, let compass_align handle the flip
             if new_off.get('z', 1) < 0:
@@ -1261,6 +1506,142 @@ class EDAutopilot:
             logger.warning(f"Align {axis}: timeout after {timeout}s")
         return off
 
+    def _planner(self, rate_factor=1.0) -> AlignPlanner:
+        """ An alignment planner with the axis rates of the ship (times rate_factor) and its response curves. """
+        rates = {axis: getattr(self, cfg['rate_attr']) * rate_factor for axis, cfg in self._AXIS_CONFIG.items()}
+        return AlignPlanner(rates, lambda axis, deg: self._response_curve(axis).hold_for(deg, rates[axis]))
+
+    def _move_planned(self, pit, yaw, roll=True, rate_factor=1.0, min_angle=0.0, min_hold=0.0, max_hold=None) -> dict:
+        """ Turn onto a target offset in front in one maneuver: the keys of the AlignPlanner plan held at once.
+        @param pit: Target offset up in degrees.
+        @param yaw: Target offset right in degrees.
+        @param roll: Roll + pitch may be used instead of pitch + yaw.
+        @param rate_factor: Axis rate multiplier of the throttle (ZERO_THROTTLE_RATE_FACTOR at 0%).
+        @param min_angle: Axes turning less (deg) are not held.
+        @param min_hold: Min seconds of a hold.
+        @param max_hold: Max seconds of a hold, None for no limit.
+        @return: The plan {axis: degrees}, empty if no key was held.
+        """
+        if self.speed_demand is None:
+            self.set_speed_25()
+        planner = self._planner(rate_factor)
+        angles = planner.plan(pit, yaw, roll=roll, min_angle=min_angle)
+        holds = {}
+        for axis, angle in angles.items():
+            cfg = self._AXIS_CONFIG[axis]
+            hold = max(min_hold, planner.hold(axis, angle))
+            holds[cfg['pos_key'] if angle > 0 else cfg['neg_key']] = hold if max_hold is None else min(max_hold, hold)
+        if holds:
+            logger.debug(f"Planned align: pit={pit:.1f} yaw={yaw:.1f} -> "
+                         + ", ".join(f"{key} {hold:.2f}s" for key, hold in holds.items()))
+            self.keys.send_holds(holds)
+        return angles
+
+    def _plan_to_center(self, scr_reg, off, close, timeout=None):
+        """Align pitch and yaw at once (AlignPlannerEnable): each correction is one maneuver of overlapping
+        pitch + yaw (or roll + pitch) holds from AlignPlanner, then one ALIGN_SETTLE.
+        @return: Updated offset dict, or None if compass lost.
+        """
+        if timeout is None:
+            timeout = self.ALIGN_TIMEOUT
+        start = time.time()
+        while off.get('z', 1) >= 0 and (abs(off['pit']) >= close or abs(off['yaw']) >= close) \
+                and (time.time() - start) < timeout:
+            self.check_stop()
+            remaining = math.degrees(math.acos(direction(off['pit'], off['yaw'])[2]))
+            approach_pct = self._approach_pct(remaining)
+            hold_start = time.perf_counter()
+            angles = self._move_planned(off['pit'] * approach_pct, off['yaw'] * approach_pct,
+                                        rate_factor=self.ZERO_THROTTLE_RATE_FACTOR, min_angle=close * approach_pct / 2,
+                                        min_hold=self.MIN_HOLD_TIME, max_hold=self.MAX_HOLD_TIME)
+            if not angles:
+                break
+            settle_start = time.perf_counter()
+            sleep(self.ALIGN_SETTLE)
+            read_start = time.perf_counter()
+
+            # FSD jumped during hold/settle -- compass is garbage, bail out
+            if self.status.get_flag(FlagsFsdJump):
+                logger.info("Planned align: FSD jumped during align, aborting")
+                self._log_step('plan', remaining, settle_start - hold_start, read_start - settle_start)
+                return off
+
+            new_off = self.read_nav_offset(scr_reg)
+            if new_off is None:
+                sleep(0.5)
+                new_off = self.read_nav_offset(scr_reg)
+                if new_off is None:
+                    self._log_step('plan', remaining, settle_start - hold_start, read_start - settle_start)
+                    return off
+            latency = time.perf_counter() - read_start
+            off = self._fused_offset(new_off, self.nav_est)
+            self._log_step('plan', remaining, settle_start - hold_start, read_start - settle_start,
+                           math.degrees(math.acos(direction(off['pit'], off['yaw'])[2]))
+                           if off.get('z', 1) >= 0 else None, latency)
+            logger.info(f"Planned align: pit={off['pit']:.1f} yaw={off['yaw']:.1f} ({time.time() - start:.1f}s)")
+
+        if (time.time() - start) >= timeout:
+            logger.warning(f"Planned align: timeout after {timeout}s")
+        return off
+
+    def _nav_sample(self, scr_reg, after: float):
+        """ A navball offset of a frame grabbed after `after` (perf_counter), for the closed loop holds: the
+        telemetry sample while the producer runs, else an inline read every CLOSED_LOOP_PERIOD (it may be of the
+        same shared frame as the last one, AxisController skips those).
+        @return: (frame time, offset), the offset None if not read.
+        """
+        telemetry = self.nav_telemetry
+        if telemetry.is_running() and not telemetry.is_paused:
+            sample = telemetry.wait_after(after, self.TELEMETRY_WAIT)
+            if sample is None:
+                return time.perf_counter(), None
+            return sample.timestamp, dict(sample.offset)
+        sleep(self.CLOSED_LOOP_PERIOD)
+        off = self.get_nav_offset(scr_reg)
+        return self.scr.last_frame_time, off
+
+    def _hold_axes(self, scr_reg, holds: dict, target: float) -> dict | None:
+        """ Closed loop hold: press the keys of the axes at once and release each when the navball read
+        during the hold predicts it stops within target (see AxisController), at max_hold at the latest.
+        The reads of the turning ship are not kept in nav_est, it restarts after the hold.
+        @param holds: {axis: (key, distance in deg, min_hold, max_hold)}.
+        @param target: Predicted stop distance (deg) to release at.
+        @return: The last navball read of the hold, or None.
+        """
+        start = time.perf_counter()
+        active = {}
+        for axis, (key, dist, min_hold, max_hold) in holds.items():
+            ctl = AxisController(axis, self._axis_max_rate(axis) * self.ZERO_THROTTLE_RATE_FACTOR, target,
+                                 latency=self.CLOSED_LOOP_LATENCY, stop_lag=self.CLOSED_LOOP_STOP_LAG,
+                                 spool=self.CLOSED_LOOP_SPOOL, min_hold=min_hold, max_hold=max_hold)
+            ctl.start(start, dist)
+            active[axis] = (key, ctl)
+        off = None
+        t = start
+        try:
+            for key, _ in active.values():
+                self.keys.press(key)
+            while active:
+                self.check_stop()
+                t, sample = self._nav_sample(scr_reg, t)
+                if sample is not None:
+                    off = sample
+                    if sample.get('z', 1) < 0:
+                        logger.info("Closed loop hold: target went behind, releasing")
+                        break
+                for axis, (key, ctl) in list(active.items()):
+                    if ctl.update(t, None if sample is None else self._axis_dist(axis, sample)) \
+                            or ctl.expired(time.perf_counter()):
+                        self.keys.release(key)
+                        del active[axis]
+                        logger.debug(f"Closed loop {axis}: released ({ctl.reason}) after {ctl.held(t):.2f}s, "
+                                     f"dist={ctl.dist:.1f} rate={ctl.closing:.1f} stop={ctl.predicted_stop():.1f}")
+        finally:
+            for key, _ in active.values():
+                self.keys.release(key)
+            self.nav_est.reset()
+        return off
+
     def _roll_to_centerline(self, scr_reg, off, close=10.0):
         """Coarse roll to vertical centerline (only for large offsets)."""
         return self._align_axis(scr_reg, 'roll', off, close)
@@ -1274,24 +1655,106 @@ class EDAutopilot:
         return self._align_axis(scr_reg, 'pit', off, close)
 
     AVG_DELAY = 0.01  # 10ms between reads
+    NAV_READ_STD = 1.5  # degrees -- std of one navball read (dot position + ship jitter)
+    TARGET_READ_STD = 0.5  # degrees -- std of one target circle read
+
+    def _on_key_sent(self, key_binding, held):
+        """ Tell the offset filters about a flight key hold (expected turn from the response curve of the
+        axis, else hold x axis rate), and keep the hold for _learn_response. """
+        for axis, cfg in self._AXIS_CONFIG.items():
+            if key_binding in (cfg['pos_key'], cfg['neg_key']):
+                self._key_holds[key_binding] = held
+                rate = getattr(self, cfg['rate_attr'])
+                if self.speed_demand in ('Speed0', 'SCSpeed0'):
+                    rate = rate * self.ZERO_THROTTLE_RATE_FACTOR
+                turn = self._response_curve(axis).angle_for(held, rate)
+                deg = turn if key_binding == cfg['pos_key'] else -turn
+                self.nav_est.command(axis, deg)
+                self.target_est.command(axis, deg)
+                return
+
+    RESPONSE_SAVE_INTERVAL = 60  # seconds -- min time between two saves of the learned response curves
+
+    def _response_curve(self, axis):
+        """ The response curve of an axis ('pitch', 'yaw' or 'roll') of the ship at the current speed demand,
+        its calibration table compiled on first use. """
+        speed_demand = str(self.speed_demand)
+        curve = self.response.curve(speed_demand, axis)
+        if curve.table is None:
+            cfg = self._AXIS_CONFIG[axis]
+            ship_cfg = self.ship_configs['Ship_Configs'].get(self.current_ship_type, {})
+            curve.set_table(ship_cfg.get(speed_demand, {}).get(cfg['lookup_key']), cfg['threshold'])
+        return curve
+
+    def _learn_response(self, axis, key, before, after):
+        """ Learn the turn of the last hold of key from the navball reads before and after it (settled).
+        @param axis: 'pit', 'yaw' or 'roll' (the offset key).
+        """
+        held = self._key_holds.pop(key, None)
+        if held is None or self.speed_demand is None or before is None or after is None:
+            return
+        if before.get('z', 1) < 0 or after.get('z', 1) < 0:
+            return
+        if axis == 'pit' and max(abs(before['pit']), abs(after['pit'])) > 90:
+            return  # Past the pole the offset moves the other way
+        name = self._AXIS_NAMES[axis]
+        delta = before[axis] - after[axis]  # The offset moves against the turn
+        if axis == 'roll':
+            delta = (delta + 180) % 360 - 180
+        turn = delta if key == self._AXIS_CONFIG[name]['pos_key'] else -delta
+        if self.response.observe(str(self.speed_demand), name, held, turn):
+            logger.debug(f"Response {name}: learned {turn:.1f}deg for {held:.2f}s ({self.speed_demand})")
+        if time.time() - self._response_saved > self.RESPONSE_SAVE_INTERVAL:
+            self.save_response_model()
+
+    def _log_begin(self, routine) -> int | None:
+        """ Start an alignment cycle of the alignment log (AlignLogEnable), None if not logging. """
+        if self.align_log is None:
+            return None
+        return self.align_log.begin(routine, self.current_ship_type, str(self.speed_demand))
+
+    def _log_end(self, cycle, ok):
+        if self.align_log is not None and cycle is not None:
+            self.align_log.end(cycle, bool(ok))
 
-    def _avg_offset(self, scr_reg, get_offset_fn):
-        """Take 3 reads with 10ms gaps, return average pit/yaw.
-        @param get_offset_fn: callable(scr_reg) -> dict with 'pit','yaw' or None
-        @return: dict with avg 'pit','yaw' or None if any read fails.
+    def _log_step(self, axis, before, hold, settle, after=None, latency=None, source='compass'):
+        """ One correction step to the alignment log, see AlignLog.step. """
+        if self.align_log is not None:
+            self.align_log.step(axis, before, hold, settle, after, latency, source, self.current_ship_type,
+                                str(self.speed_demand))
+
+    def _fused_offset(self, off, est):
+        """ A read with its pit/yaw/roll replaced by the filtered estimate (the read is already fused). """
+        if off is None or off.get('z', 1) < 0 or not self._offset_filter:
+            return off
+        fused = est.estimate()
+        if fused is None:
+            return off
+        return dict(off, pit=fused['pit'], yaw=fused['yaw'], roll=fused['roll'], confidence=fused['confidence'])
+
+    def _avg_offset(self, scr_reg, get_offset_fn, reads: int = 3):
+        """Filtered pit/yaw: one new read fused with the offset filter state (see OffsetEstimator), more
+        reads 10ms apart only while the estimate is less certain than the average of `reads` reads (after a
+        key hold). With OffsetFilterEnable off the filter restarts first, so it is the average of `reads` reads.
+        @param get_offset_fn: self.read_nav_offset, self.get_nav_offset or self.get_target_offset
+        @param reads: Max reads, the certainty asked for.
+        @return: dict with 'pit','yaw','roll','std','confidence' or None if any read fails.
+        A navball read with the target behind is returned as is.
         """
-        reads = []
-        for i in range(3):
+        est = self.target_est if get_offset_fn == self.get_target_offset else self.nav_est
+        if not self._offset_filter:
+            est.reset()
+        for i in range(reads):
             if i > 0:
                 sleep(self.AVG_DELAY)
             off = get_offset_fn(scr_reg)
             if off is None:
                 return None
-            reads.append(off)
-        return {
-            'pit': sum(r['pit'] for r in reads) / 3,
-            'yaw': sum(r['yaw'] for r in reads) / 3,
-        }
+            if off.get('z', 1) < 0:
+                return off
+            if est.confident(reads):
+                break
+        return est.estimate()
 
     NUDGE_SAMPLES = 5
     NUDGE_HOLD = 0.4
@@ -1299,42 +1762,67 @@ class EDAutopilot:
     NUDGE_BOTH_THRESHOLD = 5.0
 
     def nudge_align(self, scr_reg) -> bool:
-        """Minimal realignment using 5-of-5 navball consensus.
+        """Minimal realignment using the filtered navball offset (as certain as a 5 read average).
         Nudges both axes if both are above threshold, otherwise worst axis only.
         Returns True if a nudge was applied, False if reads failed."""
-        offsets = []
-        for _ in range(self.NUDGE_SAMPLES):
-            off = self.get_nav_offset(scr_reg)
-            if off is None:
-                return False
-            offsets.append(off)
+        cycle = self._log_begin('nudge')
+        off = self._avg_offset(scr_reg, self.read_nav_offset, reads=self.NUDGE_SAMPLES)
+        if off is None:
+            self._log_end(cycle, False)
+            return False
 
-        avg_pit = sum(o['pit'] for o in offsets) / self.NUDGE_SAMPLES
-        avg_yaw = sum(o['yaw'] for o in offsets) / self.NUDGE_SAMPLES
-        logger.info(f"nudge_align: avg pit={avg_pit:.1f} yaw={avg_yaw:.1f} (5 samples)")
+        avg_pit = off['pit']
+        avg_yaw = off['yaw']
+        logger.info(f"nudge_align: avg pit={avg_pit:.1f} yaw={avg_yaw:.1f} ({off.get('reads', 1)} reads fused)")
 
         if abs(avg_pit) < self.FINE_ALIGN_CLOSE and abs(avg_yaw) < self.FINE_ALIGN_CLOSE:
             logger.info("nudge_align: already aligned, no nudge needed")
+            self._log_end(cycle, True)
             return True
 
         pit_bad = abs(avg_pit) >= self.FINE_ALIGN_CLOSE
         yaw_bad = abs(avg_yaw) >= self.FINE_ALIGN_CLOSE
         both_bad = abs(avg_pit) >= self.NUDGE_BOTH_THRESHOLD and abs(avg_yaw) >= self.NUDGE_BOTH_THRESHOLD
 
+        if self._closed_loop:
+            # Both axes held at once, each released early when the navball says it stops near center
+            if both_bad:
+                axes = ('pit', 'yaw')
+            elif pit_bad and (not yaw_bad or abs(avg_pit) > abs(avg_yaw)):
+                axes = ('pit',)
+            else:
+                axes = ('yaw',)
+            holds = {axis: (self._axis_pick_key(axis, off[axis]), abs(off[axis]), 0.0, self.NUDGE_HOLD) for axis in axes}
+            logger.info(f"nudge_align: closed loop {'+'.join(key for key, *_ in holds.values())} "
+                        f"max hold={self.NUDGE_HOLD}s")
+            hold_start = time.perf_counter()
+            last = self._hold_axes(scr_reg, holds, self.FINE_ALIGN_CLOSE * self.CLOSED_LOOP_TARGET)
+            for axis in axes:
+                self._log_step(axis, off[axis], time.perf_counter() - hold_start, 0.0,
+                               last[axis] if last is not None and last.get('z', 1) >= 0 else None)
+            self._log_end(cycle, True)
+            return True
+
         if both_bad:
             pit_key = self._axis_pick_key('pit', avg_pit)
             yaw_key = self._axis_pick_key('yaw', avg_yaw)
             logger.info(f"nudge_align: both axes off, {pit_key}+{yaw_key} hold={self.NUDGE_HOLD}s")
             self.keys.send(pit_key, hold=self.NUDGE_HOLD)
             self.keys.send(yaw_key, hold=self.NUDGE_HOLD)
+            axes = ('pit', 'yaw')
         elif pit_bad and (not yaw_bad or abs(avg_pit) > abs(avg_yaw)):
             key = self._axis_pick_key('pit', avg_pit)
             logger.info(f"nudge_align: {key} hold={self.NUDGE_HOLD}s")
             self.keys.send(key, hold=self.NUDGE_HOLD)
+            axes = ('pit',)
         else:
             key = self._axis_pick_key('yaw', avg_yaw)
             logger.info(f"nudge_align: {key} hold={self.NUDGE_HOLD}s")
             self.keys.send(key, hold=self.NUDGE_HOLD)
+            axes = ('yaw',)
+        for axis in axes:
+            self._log_step(axis, off[axis], self.NUDGE_HOLD, 0.0)  # Not read after
+        self._log_end(cycle, True)
         return True
 
     # Threshold for roll and coarse alignment -- roll to centerline and trigger coarse
@@ -1349,6 +1837,13 @@ class EDAutopilot:
     ALIGN_CLOSE = 4.0           # degrees -- compass jitter is ~3-4 deg
     ALIGN_SETTLE = 2.0          # seconds to let ship/compass settle after pitch/yaw
     ALIGN_TIMEOUT = 25.0        # seconds per axis (allows ~6 cycles with settle)
+    # Closed loop holds (ClosedLoopAlignEnable, see _hold_axes and AxisController)
+    CLOSED_LOOP_TARGET = 0.5    # release at a predicted stop within this fraction of the close band
+    CLOSED_LOOP_LATENCY = 0.15  # seconds from a navball frame to its read (detection + compass display lag)
+    CLOSED_LOOP_STOP_LAG = 0.3  # seconds the ship keeps turning at its rate after a release (coast)
+    CLOSED_LOOP_SPOOL = 0.15    # seconds, time constant of the turn rate after a press
+    CLOSED_LOOP_SETTLE = 0.6    # seconds to let the ship stop after a closed loop hold (vs ALIGN_SETTLE)
+    CLOSED_LOOP_PERIOD = 0.03   # seconds between inline navball reads during a hold (without telemetry)
     # Fine align thresholds
     FINE_ALIGN_CLOSE = 2.0      # degrees -- "already aligned" for target circle
     FINE_ALIGN_OK = 3.0         # degrees -- "close enough" after correction
@@ -1359,6 +1854,7 @@ class EDAutopilot:
     # Target arc detection
     MIN_ARC_PIXELS = 100        # minimum orange pixels to consider as arc
     ARC_STD_THRESHOLD = 12      # radius std below this = arc shape (not text)
+    ARC_RING_SCORE = 0.15       # annulus ring score above this = arc (TargetCircleEngine 'annulus')
     # Evasion pitch angles and cruise time
     OCCLUSION_PITCH = 65
     BODY_EVADE_PITCH = 90
@@ -1371,6 +1867,9 @@ class EDAutopilot:
     DOCK_PRE_PITCH = 1.0        # seconds pitch up before boost toward station
     # Voting
     VOTE_COUNT = 3              # 3-of-3 consensus checks
+    # Max age of the shared screen frame -- compass, target and sun reads within one tick use one grab
+    FRAME_TTL = 0.05
+    CAPTURE_RING_SIZE = 8       # frames kept by the background capture thread (CaptureThreadEnable)
     # Turn rate at 0% throttle vs blue zone (50%) -- assumed ~65%
     ZERO_THROTTLE_RATE_FACTOR = 0.60
     # Debug
@@ -1395,6 +1894,7 @@ class EDAutopilot:
 
         self.ap_ckb('log+vce', 'Compass Align')
         self.set_speed_0()
+        cycle = self._log_begin('compass')
         prev_off = None
         self._flip_count = 0
 
@@ -1410,7 +1910,7 @@ class EDAutopilot:
                 prev_off = None
                 continue
 
-            off = self.get_nav_offset(scr_reg)
+            off = self._fused_offset(self.read_nav_offset(scr_reg), self.nav_est)
             if off is None:
                 self.ap_ckb('log', 'Unable to detect compass. Rolling to new position.')
                 self.roll_clockwise_anticlockwise(90)
@@ -1445,11 +1945,13 @@ class EDAutopilot:
             # Already aligned?
             if abs(off['pit']) < close and abs(off['yaw']) < close:
                 self.ap_ckb('log', 'Compass Align complete')
+                self._log_end(cycle, True)
                 return True
 
             # Coarse roll to vertical centerline when dot is diagonal AND far enough from center
             roll_off_centerline = min(abs(off['roll']), 180 - abs(off['roll']))
-            if abs(off['yaw']) > self.ROLE_TRESHHOLD and roll_off_centerline > self.ROLE_YAW_PITCH_CLOSE:
+            if not self._align_planner and abs(off['yaw']) > self.ROLE_TRESHHOLD \
+                    and roll_off_centerline > self.ROLE_YAW_PITCH_CLOSE:
                 logger.info(f"Compass: roll {roll_off_centerline:.1f}deg off centerline, coarse roll")
                 self.ap_ckb('log', 'Coarse roll')
                 off = self._roll_to_centerline(scr_reg, off, close=self.ROLE_YAW_PITCH_CLOSE)
@@ -1470,7 +1972,12 @@ class EDAutopilot:
             align_tries += 1
             logger.info(f"Compass: alignment attempt {align_tries}/{max_align_tries}")
 
-            if abs(off['pit']) > abs(off['yaw']):
+            if self._align_planner:
+                # Pitch and yaw (or roll and pitch) at once, the planner rolls when that is faster
+                off = self._plan_to_center(scr_reg, off, close)
+                if off is None:
+                    continue
+            elif abs(off['pit']) > abs(off['yaw']):
                 off = self._pitch_to_center(scr_reg, off, close)
                 if off is None:
                     continue
@@ -1486,7 +1993,7 @@ class EDAutopilot:
                     continue
 
             # Verify alignment with 3-of-3 avg to filter navball jitter
-            med = self._avg_offset(scr_reg, self.get_nav_offset)
+            med = self._avg_offset(scr_reg, self.read_nav_offset)
             if med is not None:
                 logger.info(f"Compass after align: avg pit={med['pit']:.1f} yaw={med['yaw']:.1f}")
             if med is not None and abs(med['pit']) < close and abs(med['yaw']) < close:
@@ -1495,14 +2002,17 @@ class EDAutopilot:
                     logger.info("Compass close enough, switching to target circle fine align")
                     self.target_fine_align(scr_reg)
                 self.ap_ckb('log', 'Compass Align complete')
+                self._log_end(cycle, True)
                 return True
 
             # Single nudge on worst axis, then accept
             self.nudge_align(scr_reg)
             self.ap_ckb('log', 'Compass Align complete')
+            self._log_end(cycle, False)  # Accepted outside the band
             return True
 
         self.ap_ckb('log+vce', 'Compass Align failed - exhausted all retries')
+        self._log_end(cycle, False)
         return False
 
     def mnvr_to_target(self, scr_reg):
@@ -1523,6 +2033,13 @@ class EDAutopilot:
         self.keys.send('HyperSuperCombination')
         self.set_speed_100()
 
+    def _capture_compass_and_target(self, scr_reg) -> dict:
+        """ Capture the compass and target regions together (one grab when cheaper, see capture_regions).
+        @return: {'compass': native image, 'target': image in _target_fmt}
+        """
+        return scr_reg.capture_regions(self.scr, ['compass', 'target'], {'target': self._target_fmt},
+                                       ttl=self.FRAME_TTL)
+
     def sc_target_align(self, scr_reg) -> ScTargetAlignReturn:
         """ Align to the target, monitoring for disengage and obscured.
         @param scr_reg: The screen region class.
@@ -1547,12 +2064,14 @@ class EDAutopilot:
         tar_off2 = None
         nav_off2 = None
         none_count = 0  # consecutive None reads = likely behind
+        self._target_tracker.reset()  # A new target, the first read searches the whole region
 
         # Try to get the target 5 times before quiting
         for i in range(5):
             # Check Target and Compass
-            nav_off1 = self.get_nav_offset(scr_reg)
-            tar_off1 = self.get_target_offset(scr_reg)
+            images = self._capture_compass_and_target(scr_reg)
+            nav_off1 = self.get_nav_offset(scr_reg, compass_image=images['compass'])
+            tar_off1 = self.get_target_offset(scr_reg, image=images['target'])
             if tar_off1:
                 # Target detected
                 off = tar_off1
@@ -1571,7 +2090,7 @@ class EDAutopilot:
                 target_align_pit_off = target_align_pit_off * target_align_compass_mult
             else:
                 # Neither target nor compass dot found -- confirm with 3-of-3 avg
-                med = self._avg_offset(scr_reg, self.get_nav_offset)
+                med = self._avg_offset(scr_reg, self.read_nav_offset)
                 if med is not None:
                     # Transient miss, dot is actually there -- retry main loop
                     continue
@@ -1579,7 +2098,7 @@ class EDAutopilot:
                 self.ap_ckb('log', 'Target behind (confirmed 3/3 avg), pitching to recover')
                 for _ in range(6):  # max 6x30=180 degrees
                     self.pitch_up_down(30)
-                    dot_hits = sum(1 for _ in range(3) if self.get_nav_offset(scr_reg))
+                    dot_hits = sum(1 for _ in range(3) if self.read_nav_offset(scr_reg))
                     if dot_hits >= 2:
                         break
                 continue
@@ -1634,9 +2153,13 @@ class EDAutopilot:
             yaw_val = off.get('yaw', 0)
             self.ap_ckb('log', f'Align: pit={off["pit"]:+.1f} yaw={yaw_val:+.1f} roll={off["roll"]:+.1f} lim={target_align_outer_lim:.1f}')
 
+            if self._align_planner and off.get('z', 1) >= 0:
+                # One maneuver: pitch + yaw, or roll + pitch (yaw trimmed) when off to the side (the planner takes the faster)
+                self.ap_ckb('log', f'Planned align {off["pit"]:+.1f} {yaw_val:+.1f}')
+                self._move_planned(off['pit'], yaw_val, min_angle=target_align_outer_lim)
             # When close to center, use yaw directly instead of roll+pitch
             # Roll+pitch oscillates when corrections are small
-            if abs(yaw_val) <= 15 and abs(off['pit']) <= 15:
+            elif abs(yaw_val) <= 15 and abs(off['pit']) <= 15:
                 if abs(yaw_val) > target_align_outer_lim:
                     self.ap_ckb('log', f'Yawing {yaw_val:+.1f}')
                     self.yaw_right_left(yaw_val)
@@ -1656,8 +2179,9 @@ class EDAutopilot:
             sleep(1.0)
 
             # Check Target and Compass
-            nav_off2 = self.get_nav_offset(scr_reg)
-            tar_off2 = self.get_target_offset(scr_reg)
+            images = self._capture_compass_and_target(scr_reg)
+            nav_off2 = self.get_nav_offset(scr_reg, compass_image=images['compass'])
+            tar_off2 = self.get_target_offset(scr_reg, image=images['target'])
             if tar_off2:
                 off = tar_off2
                 compass_only_count = 0  # Reset -- we found the target reticle
@@ -1836,34 +2360,14 @@ class EDAutopilot:
     def _move_axis(self, axis, deg):
         """Move on the given axis by deg degrees. Positive = up/right/clockwise."""
         cfg = self._AXIS_CONFIG[axis]
-        abs_deg = abs(deg)
         rate = getattr(self, cfg['rate_attr'])
-        htime = abs_deg / rate
 
         if self.speed_demand is None:
             self.set_speed_25()
 
-        # For small angles, use interpolated rate from ship config lookup table
-        if abs_deg < cfg['threshold']:
-            ship_type = self.ship_configs['Ship_Configs'][self.current_ship_type]
-            if self.speed_demand not in ship_type:
-                ship_type[self.speed_demand] = dict()
-            speed_cfg = ship_type[self.speed_demand]
-            if cfg['lookup_key'] not in speed_cfg:
-                speed_cfg[cfg['lookup_key']] = dict()
-
-            last_deg = 0.0
-            last_val = 0.0
-            for key, value in speed_cfg[cfg['lookup_key']].items():
-                key_deg = float(int(key)) / 10
-                if abs_deg <= key_deg:
-                    ratio_val = scale(abs_deg, last_deg, key_deg, last_val, value)
-                    logger.debug(f"{axis} demand: {deg}, lookup: {key_deg}/{value}, ratio: {round(ratio_val, 2)}")
-                    htime = abs_deg / ratio_val
-                    break
-                else:
-                    last_deg = key_deg
-                    last_val = value
+        # Learned response curve of the ship, else the calibration table (small angles), else the axis rate
+        htime = self._response_curve(axis).hold_for(deg, rate)
+        logger.debug(f"{axis} demand: {deg}, hold: {round(htime, 2)}")
 
         key_name = cfg['pos_key'] if deg > 0.0 else cfg['neg_key']
         self.keys.send(key_name, hold=htime)
@@ -2132,7 +2636,7 @@ class EDAutopilot:
                 # Debug snapshot of what's ahead after SC drop
                 if self.DEBUG_SNAP:
                     try:
-                        snap = scr_reg.capture_region(self.scr, 'center_normalcruise', inv_col=False)
+                        snap = scr_reg.capture_region(self.scr, 'center_normalcruise')
                         if snap is not None:
                             snap_dir = os.path.join('debug-output', 'target-snap')
                             os.makedirs(snap_dir, exist_ok=True)
@@ -2333,6 +2837,16 @@ class EDAutopilot:
     def quit(self):
         if self.overlay != None:
             self.overlay.overlay_quit()
+        if self.scr:
+            self.scr.stop_capture_thread()
+        if self.scrReg:
+            self.scrReg.registry.stop()
+            self.scrReg.change.log_stats()
+            if self.scrReg.recorder is not None:
+                self.scrReg.recorder.close()
+        if self.align_log is not None:
+            self.align_log.close()
+        self.nav_telemetry.stop()
         self.terminate = True
 
     #
@@ -2377,6 +2891,7 @@ class EDAutopilot:
                 self._stop_event.clear()
                 set_focus_elite_window()
                 self.update_overlay()
+                self._start_nav_telemetry()
                 try:
                     self.update_ap_status("SC to Target")
                     self.sc_assist(self.scrReg)
@@ -2384,6 +2899,7 @@ class EDAutopilot:
                     logger.debug("Caught stop exception")
                 except Exception as e:
                     logger.exception("SC Assist trapped generic")
+                self.nav_telemetry.stop()
 
                 logger.debug("Completed sc_assist")
                 if not self.sc_assist_enabled:
@@ -2399,12 +2915,14 @@ class EDAutopilot:
                 self.refuel_cnt = 0
                 self.total_dist_jumped = 0
                 self.total_jumps = 0
+                self._start_nav_telemetry()
                 try:
                     self.waypoint_assist(self.keys, self.scrReg)
                 except EDAP_Interrupt:
                     logger.debug("Caught stop exception")
                 except Exception as e:
                     logger.exception("Waypoint Assist trapped generic")
+                self.nav_telemetry.stop()
 
                 if not self.waypoint_assist_enabled:
                     self.ap_ckb('waypoint_stop')
@@ -2458,6 +2976,8 @@ class EDAutopilot:
 
                         # Load ship configuration with proper hierarchy
                         self.load_ship_configuration(ship)
+                        self.load_compass_calibration(ship)
+                        self.load_response_model(ship)
 
                         # Update GUI with ship config
                         self.ap_ckb('update_ship_cfg')
@@ -2561,6 +3081,7 @@ class EDAutopilot:
             ship_type[self.speed_demand][cfg['rate_key']][cfg['default_angle']] = default_rate
             self.ap_ckb('log', f"Default: {name} Angle: {cfg['default_angle'] // 10}: Rate: {default_rate}")
 
+        self.response.reset_tables()
         self.ap_ckb('log', f"Completed {name} Calibration.")
         self.ap_ckb('log', "Remember to Save if you wish to keep these values!")
 
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from numpy import asarray
+
+from src.core.EDlogger import logger
+from src.screen.ImageFormat import NATIVE_FORMAT, convert_image
+
+"""
+File:NavTelemetry.py
+
+Description:
+  Streaming navball telemetry. A producer thread grabs the compass region at a fixed rate while an
+  assist runs, computes the navball offset and publishes it with the frame timestamp into a latest
+  value slot. The alignment loops read the freshest sample instead of grabbing and detecting inline.
+
+  The slot is one attribute holding an immutable NavSample; publishing is a single assignment, so
+  readers never lock. A Condition is only used by readers that wait for a newer sample.
+  The producer pauses (and empties the slot) while GuiFocus shows a panel or map, the compass is not
+  on screen then.
+"""
+
+
+class NavSample:
+    """ One navball reading (immutable). """
+    __slots__ = ('offset', 'timestamp', 'seq')
+
+    def __init__(self, offset: dict, timestamp: float, seq: int):
+        object.__setattr__(self, 'offset', offset)
+        object.__setattr__(self, 'timestamp', timestamp)
+        object.__setattr__(self, 'seq', seq)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("NavSample is read only")
+
+    def age(self) -> float:
+        """ Seconds since the frame was grabbed. """
+        return time.perf_counter() - self.timestamp
+
+
+class NavTelemetry:
+    """ Producer thread of navball samples.
+    compute(image) runs in the producer thread and gets the native format compass crop; it must use
+    its own buffers (not those of the consumer). With the Screen's capture thread running, its frames are
+    used, else the producer grabs with its own clone of the capture backend.
+    """
+
+    def __init__(self, screen, rect_fn, compute, paused=None, rate: float = 30.0, pause_check: float = 0.25):
+        """
+        @param screen: The Screen.
+        @param rect_fn: Returns the compass region rect [L, T, R, B] in pixels (read each sample, hot reload).
+        @param compute: compute(image) -> offset dict {'x', 'y', 'z', 'pit', 'yaw', 'roll'}, or None.
+        @param paused: Returns True while the producer must not sample (GUI panel open), checked every
+        pause_check seconds.
+        @param rate: Samples per second.
+        """
+        self.screen = screen
+        self.rect_fn = rect_fn
+        self.compute = compute
+        self.paused = paused
+        self.rate = rate
+        self.pause_check = pause_check
+        self.sample: NavSample | None = None  # The latest value slot
+        self.sample_count = 0
+        self.error_count = 0
+        self.is_paused = False
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """ Start the producer, if not running. """
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self.sample = None
+        self._thread = threading.Thread(target=self._loop, name="NavTelemetry", daemon=True)
+        self._thread.start()
+        logger.debug(f"NavTelemetry started at {self.rate} samples/s")
+
+    def stop(self, timeout: float = 1.0):
+        """ Stop the producer and wait for it to exit. The slot is emptied. """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            logger.debug(f"NavTelemetry stopped after {self.sample_count} samples ({self.error_count} errors)")
+        self._publish(None)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest(self, max_age: float | None = None) -> NavSample | None:
+        """ The latest sample, no waiting.
+        @param max_age: If set, None when the sample is older (seconds).
+        """
+        sample = self.sample
+        if sample is None or (max_age is not None and sample.age() > max_age):
+            return None
+        return sample
+
+    def wait_after(self, timestamp: float, timeout: float) -> NavSample | None:
+        """ The first sample of a frame grabbed after timestamp (perf_counter), waiting up to timeout.
+        @return: The sample or None (timeout, paused or stopped).
+        """
+        sample = self.sample
+        if sample is not None and sample.timestamp > timestamp:
+            return sample
+        end = time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                sample = self.sample
+                if sample is not None and sample.timestamp > timestamp:
+                    return sample
+                remaining = end - time.perf_counter()
+                if remaining <= 0 or not self.is_running():
+                    return None
+                self._cond.wait(remaining)
+
+    def fresh(self, max_age: float, timeout: float) -> NavSample | None:
+        """ The latest sample if not older than max_age, else the next one (waiting up to timeout). """
+        sample = self.latest(max_age)
+        if sample is not None:
+            return sample
+        return self.wait_after(time.perf_counter() - max_age, timeout)
+
+    def _publish(self, sample):
+        self.sample = sample
+        with self._cond:
+            self._cond.notify_all()
+
+    def _loop(self):
+        backend = self.screen.backend.clone()
+        next_pause_check = 0.0
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                if self.paused is not None and start >= next_pause_check:
+                    next_pause_check = start + self.pause_check
+                    paused = bool(self.paused())
+                    if paused != self.is_paused:
+                        self.is_paused = paused
+                        logger.debug(f"NavTelemetry {'paused' if paused else 'resumed'}")
+                        if paused:
+                            self._publish(None)
+                if not self.is_paused:
+                    self.sample_once(backend)
+                period = 1.0 / self.rate if self.rate > 0 else 0.0
+                self._stop_event.wait(max(0.0, period - (time.perf_counter() - start)))
+        finally:
+            if backend is not self.screen.backend:
+                backend.close()
+
+    def _grab(self, backend, rect):
+        """ The compass crop and the time it was grabbed, from the capture thread's ring if it runs. """
+        screen = self.screen
+        thread = screen.capture_thread
+        if thread is not None and thread.is_running():
+            frame = thread.ring.latest()
+            last = self.sample
+            if frame is not None and (last is None or frame.timestamp > last.timestamp):
+                image = frame.view(rect[0], rect[1], rect[2], rect[3])
+                if image is not None:
+                    return convert_image(image, frame.fmt, NATIVE_FORMAT), frame.timestamp
+        timestamp = time.perf_counter()
+        image = asarray(backend.grab(screen.monitor_rect(rect[0], rect[1], rect[2], rect[3])))
+        return convert_image(image, backend.fmt, NATIVE_FORMAT), timestamp
+
+    def sample_once(self, backend) -> NavSample | None:
+        """ Grab, compute and publish one sample.
+        @param backend: The capture backend of the calling thread.
+        """
+        try:
+            rect = [int(v) for v in self.rect_fn()]
+            image, timestamp = self._grab(backend, rect)
+            offset = self.compute(image)
+        except Exception as e:
+            self.error_count = self.error_count + 1
+            if self.error_count == 1 or self.error_count % 100 == 0:
+                logger.warning(f"NavTelemetry sample failed ({self.error_count}): {e}")
+            return None
+        if offset is None:
+            return None
+        self.sample_count = self.sample_count + 1
+        sample = NavSample(offset, timestamp, self.sample_count)
+        self._publish(sample)
+        return sample
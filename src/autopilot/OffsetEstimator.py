@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import time
+from math import asin, atan2, cos, degrees, hypot, radians, sin, sqrt
+
+from src.core.EDlogger import logger
+
+"""
+File:OffsetEstimator.py
+
+Description:
+  Temporal filter of the navball (get_nav_offset) and target (get_target_offset) offsets. Instead of
+  averaging 3 or 5 fresh reads before each decision, every read is fused into a per axis Kalman
+  estimate with a motion model: the offset stays where it is except for the key holds sent (degrees =
+  hold time x the ship's axis rate from the ship config) and a slow drift. A decision then needs one
+  new read plus the filter state; more reads are only taken while the estimate is not confident
+  (after a key hold, or after a reset).
+
+  Offsets are in degrees, as returned by get_nav_offset/get_target_offset. Pitch and yaw are
+  filtered, the roll (clock position of the target, 0 = 12 o'clock, clockwise) is computed from
+  them, it is not defined near the center.
+"""
+
+AXES = ('pit', 'yaw')
+
+
+class AxisKalman:
+    """ Scalar Kalman filter of one offset axis. The state is the offset, a command moves it by a
+    known amount with a variance of its own, and time adds drift variance. """
+
+    def __init__(self, meas_var: float, drift_var: float):
+        """
+        @param meas_var: Variance of one read (deg^2).
+        @param drift_var: Variance added per second without commands (deg^2/s).
+        """
+        self.meas_var = meas_var
+        self.drift_var = drift_var
+        self.value: float | None = None
+        self.var = 0.0
+        self.t = 0.0
+
+    def reset(self):
+        self.value = None
+        self.var = 0.0
+
+    def predict(self, t: float):
+        """ Add the drift variance up to time t. """
+        if self.value is not None and t > self.t:
+            self.var = self.var + self.drift_var * (t - self.t)
+        self.t = max(self.t, t)
+
+    def command(self, delta: float, var: float):
+        """ Move the estimate by delta (deg) with variance var. """
+        if self.value is None:
+            return
+        self.value = self.value + delta
+        self.var = self.var + var
+
+    def var_at(self, t: float) -> float:
+        """ Variance at time t (with the drift since the last read). """
+        return self.var + self.drift_var * max(0.0, t - self.t)
+
+    def update(self, z: float, t: float):
+        """ Fuse a read taken at time t. """
+        if self.value is None:
+            self.value = z
+            self.var = self.meas_var
+            self.t = t
+            return
+        self.predict(t)
+        gain = self.var / (self.var + self.meas_var)
+        self.value = self.value + gain * (z - self.value)
+        self.var = (1.0 - gain) * self.var
+
+
+class OffsetEstimator:
+    """ Fused pitch/yaw offset of one source (navball or target). update() takes each read,
+    command() each key hold, estimate() gives the smoothed offset and its confidence.
+    A read further than gate standard deviations from the estimate is an outlier; reject_limit
+    outliers in a row are taken as a real jump (the estimate restarts from the read).
+    """
+
+    def __init__(self, name: str, meas_std: float, drift_std: float = 0.5, command_error: float = 0.35,
+                 gate: float = 4.0, reject_limit: int = 2, spherical: bool = False):
+        """
+        @param name: Name for the log.
+        @param meas_std: Standard deviation of one read in degrees.
+        @param drift_std: Drift of the offset per second without key holds (std, degrees).
+        @param command_error: Error of a commanded move as part of its size (rate and inertia uncertainty).
+        @param gate: Outlier gate in standard deviations of the innovation.
+        @param reject_limit: Outliers in a row that restart the estimate.
+        @param spherical: Navball offsets (pitch/yaw = asin of the dot position); a roll then rotates the
+        dot position on the navball instead of the flat (yaw, pitch) vector.
+        """
+        self.name = name
+        self.meas_std = meas_std
+        self.command_error = command_error
+        self.gate = gate
+        self.reject_limit = reject_limit
+        self.spherical = spherical
+        self.axes = {axis: AxisKalman(meas_std * meas_std, drift_std * drift_std) for axis in AXES}
+        self.reads = 0  # Reads fused since the last reset
+        self.rejects = 0  # Outliers in a row
+        self.outliers = 0
+
+    def reset(self):
+        """ Forget the estimate (target lost, behind, or a maneuver the model does not cover). """
+        for axis in self.axes.values():
+            axis.reset()
+        self.reads = 0
+        self.rejects = 0
+
+    @property
+    def valid(self) -> bool:
+        return self.axes['pit'].value is not None
+
+    def std(self) -> float:
+        """ Standard deviation of the pitch/yaw estimate (the larger), degrees. inf if no estimate. """
+        if not self.valid:
+            return float('inf')
+        t = time.monotonic()
+        return sqrt(max(axis.var_at(t) for axis in self.axes.values()))
+
+    def confident(self, reads: int = 3) -> bool:
+        """ True if the estimate is as good as the average of reads fresh reads. """
+        return self.std() <= self.meas_std / sqrt(reads) * 1.01
+
+    def update(self, off: dict | None, t: float | None = None) -> bool:
+        """ Fuse a read.
+        @param off: {'pit', 'yaw', ...} in degrees, or None (nothing fused).
+        @param t: Time of the read (time.monotonic()), default now.
+        @return: False if the read was rejected as an outlier.
+        """
+        if off is None:
+            return True
+        t = time.monotonic() if t is None else t
+        if self.valid:
+            pit, yaw = self.axes['pit'], self.axes['yaw']
+            pit.predict(t)
+            yaw.predict(t)
+            dist = max(abs(off['pit'] - pit.value) / sqrt(pit.var + pit.meas_var),
+                       abs(off['yaw'] - yaw.value) / sqrt(yaw.var + yaw.meas_var))
+            if dist > self.gate:
+                self.outliers = self.outliers + 1
+                self.rejects = self.rejects + 1
+                if self.rejects < self.reject_limit:
+                    logger.debug(f"OffsetEstimator {self.name}: outlier pit={off['pit']:.1f} yaw={off['yaw']:.1f} "
+                                 f"({dist:.1f} std)")
+                    return False
+                logger.debug(f"OffsetEstimator {self.name}: {self.rejects} outliers in a row, restarting")
+                self.reset()
+        self.rejects = 0
+        for key in AXES:
+            self.axes[key].update(off[key], t)
+        self.reads = self.reads + 1
+        return True
+
+    def command(self, axis: str, deg: float):
+        """ A key hold was sent.
+        @param axis: 'pitch', 'yaw' or 'roll' (as EDAutopilot._AXIS_CONFIG).
+        @param deg: Expected ship rotation in degrees, positive = up/right/clockwise. The offset of the
+        target moves the other way.
+        """
+        if not self.valid or deg == 0.0:
+            return
+        var = (self.command_error * deg) ** 2
+        if axis == 'pitch':
+            self.axes['pit'].command(-deg, var)
+        elif axis == 'yaw':
+            self.axes['yaw'].command(-deg, var)
+        elif axis == 'roll':
+            self._roll(deg, var)
+
+    def _roll(self, deg: float, var: float):
+        """ A clockwise roll of the ship by deg turns the target position anticlockwise around the center. """
+        pit, yaw = self.axes['pit'], self.axes['yaw']
+        if self.spherical:
+            x, y = sin(radians(yaw.value)), sin(radians(pit.value))
+        else:
+            x, y = yaw.value, pit.value
+        c, s = cos(radians(deg)), sin(radians(deg))
+        x, y = x * c - y * s, y * c + x * s
+        if self.spherical:
+            x, y = degrees(asin(max(-1.0, min(1.0, x)))), degrees(asin(max(-1.0, min(1.0, y))))
+        # The rotated position is as uncertain as the arc the roll error sweeps at its distance
+        arc_var = var * radians(hypot(yaw.value, pit.value)) ** 2
+        yaw.command(x - yaw.value, arc_var)
+        pit.command(y - pit.value, arc_var)
+
+    def estimate(self) -> dict | None:
+        """ The fused offset.
+        @return: {'pit', 'yaw', 'roll', 'std', 'confidence', 'reads'} or None if there is no estimate.
+        'std' is in degrees, 'confidence' in 0..1 (one read = 0.5, two = 0.67, three = 0.75 ...).
+        """
+        if not self.valid:
+            return None
+        pit, yaw = self.axes['pit'].value, self.axes['yaw'].value
+        if self.spherical:
+            roll = degrees(atan2(sin(radians(yaw)), sin(radians(pit))))  # Clock position of the dot
+        else:
+            roll = degrees(atan2(yaw, pit))
+        std = self.std()
+        var = self.meas_std * self.meas_std
+        return {'pit': round(pit, 2), 'yaw': round(yaw, 2), 'roll': round(roll, 2),
+                'std': round(std, 3), 'confidence': round(var / (var + std * std), 3), 'reads': self.reads}
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import numpy as np
+
+"""
+File:ResponseModel.py
+
+Description:
+  Per ship response curves of the flight keys: the degrees the ship turns for a key hold, per speed
+  demand (throttle) and axis. _move_axis walked the calibration table of the ship config
+  (ship_configs.json, {speed demand: {PitchRate: {angle x 10: rate}}}) item by item on every call, and
+  that table only came from the manual axis calibration, so the alignment holds of every other ship used
+  the one axis rate of the config.
+
+  AxisResponse learns the curve online: every (hold time, measured angle) pair of a normal alignment is
+  added to a hold time bin, and older pairs decay (DECAY per new pair), so the curve follows the ship
+  (a different loadout, a change of the game). The bins are compiled into numpy arrays of increasing
+  angles and hold times, np.interp then gives the hold of an angle and the angle of a hold. Angles not
+  covered by enough learned pairs use the calibration table (compiled to arrays as well), else the axis
+  rate. ShipResponse holds the curves of a ship, stored in its ship config ('Response').
+"""
+
+HOLD_BINS = np.geomspace(0.05, 8.0, 17)  # Hold time bin edges in seconds (16 bins, ~37% wide each)
+DECAY = 0.99  # Weight of the learned pairs kept per new pair (~100 pairs make one time constant)
+MIN_WEIGHT = 0.5  # Min weight of a bin to be a curve point
+MIN_POINTS = 2  # Min curve points before the learned curve is used
+
+
+class AxisResponse:
+    """ Learned hold time to angle curve of one axis at one speed demand, with the calibration table
+    of the ship config as the fallback. """
+
+    def __init__(self):
+        bins = len(HOLD_BINS) - 1
+        self.weight = np.zeros(bins)
+        self.hold_sum = np.zeros(bins)  # Weighted sums of the pairs of each bin
+        self.angle_sum = np.zeros(bins)
+        self.pairs = 0  # Pairs learned since the start (not decayed)
+        self.table = None  # Calibration table compiled (degs, rates, threshold), None = not compiled yet
+        self._holds = None  # Compiled learned curve, None = to compile
+        self._angles = None
+
+    def observe(self, hold: float, angle: float, weight: float = 1.0) -> bool:
+        """ Learn a measured turn.
+        @param hold: Seconds the key was held.
+        @param angle: Degrees the ship turned in the direction of the key (negative for read noise).
+        @param weight: Weight of the pair (decays with each later pair).
+        @return: False if the hold is out of the bins (not learned).
+        """
+        i = int(np.searchsorted(HOLD_BINS, hold, side='right')) - 1
+        if i < 0 or i >= len(self.weight):
+            return False
+        self.weight *= DECAY
+        self.hold_sum *= DECAY
+        self.angle_sum *= DECAY
+        self.weight[i] += weight
+        self.hold_sum[i] += weight * hold
+        self.angle_sum[i] += weight * angle
+        self.pairs = self.pairs + 1
+        self._holds = None
+        return True
+
+    def _compile(self):
+        """ The bin means as increasing (hold, angle) arrays from (0, 0), bins that turn less than a
+        shorter one (read noise) dropped. """
+        used = self.weight >= MIN_WEIGHT
+        holds = self.hold_sum[used] / self.weight[used]
+        angles = self.angle_sum[used] / self.weight[used]
+        keep = angles > np.maximum.accumulate(np.concatenate(([0.0], angles[:-1])))
+        self._holds = np.concatenate(([0.0], holds[keep]))
+        self._angles = np.concatenate(([0.0], angles[keep]))
+
+    def curve(self) -> tuple[np.ndarray, np.ndarray]:
+        """ The learned curve (hold times, angles), increasing, starting at (0, 0). """
+        if self._holds is None:
+            self._compile()
+        return self._holds, self._angles
+
+    @property
+    def learned(self) -> bool:
+        return len(self.curve()[0]) > MIN_POINTS
+
+    def set_table(self, table, threshold: float):
+        """ Compile a calibration table of the ship config.
+        @param table: {angle x 10: rate in deg/s} (keys int or str), may be empty.
+        @param threshold: Angles up to this (deg) use the table, as _move_axis did.
+        """
+        items = sorted((float(int(key)) / 10, float(rate)) for key, rate in (table or {}).items())
+        degs = np.array([0.0] + [deg for deg, _ in items])
+        rates = np.array([0.0] + [rate for _, rate in items])
+        self.table = (degs, rates, threshold)
+
+    def _table_rate(self, angle: float) -> float | None:
+        """ The calibrated rate of an angle, interpolated from 0 deg/s at 0 deg, or None. """
+        if self.table is None:
+            return None
+        degs, rates, threshold = self.table
+        if len(degs) < 2 or angle >= threshold or angle > degs[-1] or angle <= 0.0:
+            return None
+        rate = float(np.interp(angle, degs, rates))
+        return rate if rate > 0.0 else None
+
+    def hold_for(self, angle: float, rate: float) -> float:
+        """ Seconds to hold the key to turn angle degrees.
+        @param rate: The configured axis rate (deg/s), for angles past the learned curve and the table.
+        """
+        angle = abs(angle)
+        if self.learned:
+            holds, angles = self.curve()
+            if angle <= angles[-1]:
+                return float(np.interp(angle, angles, holds))
+            return float(holds[-1] + (angle - angles[-1]) / rate)
+        table_rate = self._table_rate(angle)
+        return angle / (rate if table_rate is None else table_rate)
+
+    def angle_for(self, hold: float, rate: float) -> float:
+        """ Degrees the ship turns for a hold of hold seconds (the inverse of hold_for). """
+        if self.learned:
+            holds, angles = self.curve()
+            if hold <= holds[-1]:
+                return float(np.interp(hold, holds, angles))
+            return float(angles[-1] + (hold - holds[-1]) * rate)
+        return hold * rate
+
+    def to_list(self) -> list[list[float]]:
+        """ The learned bins to store, [[mean hold, mean angle, weight], ...]. """
+        used = np.flatnonzero(self.weight > 1e-3)
+        return [[round(float(self.hold_sum[i] / self.weight[i]), 3), round(float(self.angle_sum[i] / self.weight[i]), 2),
+                 round(float(self.weight[i]), 3)] for i in used]
+
+    def from_list(self, bins):
+        """ Use stored bins (see to_list), the bins are refilled by their mean hold time. """
+        self.weight[:] = 0.0
+        self.hold_sum[:] = 0.0
+        self.angle_sum[:] = 0.0
+        for hold, angle, weight in bins or []:
+            i = int(np.searchsorted(HOLD_BINS, hold, side='right')) - 1
+            if 0 <= i < len(self.weight) and weight > 0:
+                self.weight[i] += weight
+                self.hold_sum[i] += weight * hold
+                self.angle_sum[i] += weight * angle
+        self._holds = None
+
+
+class ShipResponse:
+    """ The response curves of a ship: {speed demand: {axis: AxisResponse}}. """
+
+    def __init__(self):
+        self.curves = {}
+        self.changed = False  # Learned since the last load/save
+
+    def curve(self, speed_demand: str, axis: str) -> AxisResponse:
+        """ The curve of an axis ('pitch', 'yaw' or 'roll') at a speed demand (i.e. 'SCSpeed0'), created empty. """
+        axes = self.curves.setdefault(speed_demand, {})
+        curve = axes.get(axis)
+        if curve is None:
+            curve = axes[axis] = AxisResponse()
+        return curve
+
+    def observe(self, speed_demand: str, axis: str, hold: float, angle: float) -> bool:
+        learned = self.curve(speed_demand, axis).observe(hold, angle)
+        self.changed = self.changed or learned
+        return learned
+
+    def reset_tables(self):
+        """ Compile the calibration tables again on their next use (after a calibration or a load). """
+        for axes in self.curves.values():
+            for curve in axes.values():
+                curve.table = None
+
+    def load(self, stored):
+        """ Use the stored curves of a ship config ({speed demand: {axis: bins}}), or none. """
+        self.curves = {}
+        for speed_demand, axes in (stored or {}).items():
+            for axis, bins in axes.items():
+                self.curve(speed_demand, axis).from_list(bins)
+        self.changed = False
+
+    def to_dict(self) -> dict:
+        """ The curves to store in the ship config. """
+        stored = {}
+        for speed_demand, axes in self.curves.items():
+            for axis, curve in axes.items():
+                bins = curve.to_list()
+                if bins:
+                    stored.setdefault(speed_demand, {})[axis] = bins
+        return stored
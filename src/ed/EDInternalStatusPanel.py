@@ -75,7 +75,7 @@ class EDInternalStatusPanel:
 
         # Get the nav panel image based on the region
         image = self.screen.get_screen(self.panel_quad_pix.get_left(), self.panel_quad_pix.get_top(),
-                                       self.panel_quad_pix.get_right(), self.panel_quad_pix.get_bottom(), rgb=False)
+                                       self.panel_quad_pix.get_right(), self.panel_quad_pix.get_bottom())
         cv2.imwrite(f'test/status-panel/out/nav_panel_original.png', image)
 
         # Offset the panel co-ords to match the cropped image (i.e. starting at 0,0)
@@ -4,14 +4,13 @@ import json
 from os import environ, listdir
 import os
 from os.path import getmtime, isfile, join
-from time import sleep
+from time import monotonic, sleep
 from typing import Any, final
 from xml.etree.ElementTree import parse
 
-import win32gui
 import xmltodict
 
-from src.screen.Screen import set_focus_elite_window
+from src.screen.WindowTracker import WindowTracker, get_window_tracker
 from src.core import directinput
 from src.core.EDlogger import logger
 
@@ -26,13 +25,21 @@ Constraints:  This file will use the latest modified *.binds file
 @final
 class EDKeys:
 
-    def __init__(self, cb):
+    def __init__(self, cb, window: WindowTracker | None = None):
+        """
+        @param cb: The GUI callback.
+        @param window: The ED window tracker, default the shared tracker.
+        """
         self.ap_ckb = cb
+        self.window = window if window is not None else get_window_tracker()
         self.key_mod_delay = 0.01  # Delay for key modifiers to ensure modifier is detected before/after the key
         self.key_def_hold_time = 0.2  # Default hold time for a key press
         self.key_repeat_delay = 0.1  # Delay between key press repeats
         self.activate_window = True
         self._last_focus_check = 0  # timestamp of last focus check
+        self._listeners = []
+        self._pressed = {}  # key binding -> time of a press (state 1) not released yet
+        self._mods_down = {}  # modifier scancode -> number of pressed keys holding it
 
         self.keys_to_obtain = [
             # Flight
@@ -331,6 +338,64 @@ class EDKeys:
         """Check if a keybinding exists."""
         return self.keys.get(key_binding) is not None
 
+    def add_listener(self, fn):
+        """ Call fn(key_binding, held) after a key was released, held = the seconds it was down in total
+        (all repeats). A press (state 1) is reported with its release (state 0). """
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, key_binding, hold, repeat, state):
+        if state == 1:
+            self._pressed[key_binding] = monotonic()
+            return
+        if state == 0:
+            pressed = self._pressed.pop(key_binding, None)
+            held = 0.0 if pressed is None else monotonic() - pressed
+        else:
+            held = (hold if hold else self.key_def_hold_time) * repeat
+        for fn in list(self._listeners):
+            fn(key_binding, held)
+
+    def _binding(self, key_binding):
+        """ The key of a binding, focusing the Elite window first (checked every 5 seconds).
+        Raises Exception if the binding is missing. """
+        key = self.keys.get(key_binding)
+        if key is None:
+            logger.warning('SEND=NONE !!!!!!!!')
+            self.ap_ckb('log', f"WARNING: Unable to retrieve keybinding for {key_binding}.")
+            raise Exception(
+                f"Unable to retrieve keybinding for {key_binding}. Advise user to check game settings for keyboard bindings.")
+
+        # Focus Elite window before sending keys (only check every 5 seconds to avoid disrupting holds).
+        # The check is a handle compare on the cached window, focus is only set if ED lost it.
+        import time as _time
+        if self.activate_window and (_time.time() - self._last_focus_check) > 5.0:
+            self._last_focus_check = _time.time()
+            self.window.focus()
+        return key
+
+    def _press_key(self, key):
+        for mod in key['mods']:
+            count = self._mods_down.get(mod, 0)
+            self._mods_down[mod] = count + 1
+            if count == 0:  # Already down for a key held at the same time (i.e. both bound with Shift)
+                directinput.PressKey(mod)
+                sleep(self.key_mod_delay)
+        directinput.PressKey(key['key'])
+
+    def _release_key(self, key):
+        directinput.ReleaseKey(key['key'])
+        for mod in key['mods']:
+            count = self._mods_down.pop(mod, 0) - 1
+            if count > 0:  # Still needed by another key held down, released with the last of them
+                self._mods_down[mod] = count
+                continue
+            sleep(self.key_mod_delay)
+            directinput.ReleaseKey(mod)
+
     def send(self, key_binding, hold=None, repeat=1, repeat_delay=None, state=None):
         """ Send a key based on the defined keybind
         @param key_binding: The key bind name (i.e. UseBoostJuice).
@@ -342,30 +407,14 @@ class EDKeys:
             1 - press (but don't release).
             0 - release (a previous press state).
         """
-        key = self.keys.get(key_binding)
-        if key is None:
-            logger.warning('SEND=NONE !!!!!!!!')
-            self.ap_ckb('log', f"WARNING: Unable to retrieve keybinding for {key_binding}.")
-            raise Exception(
-                f"Unable to retrieve keybinding for {key_binding}. Advise user to check game settings for keyboard bindings.")
-
+        key = self._binding(key_binding)
         key_name = self.reversed_dict.get(key['key'], "Key not found")
         logger.info(f"send: {key_binding} -> {key_name} (scancode={key['key']}, hold={hold}, state={state})")
 
-        # Focus Elite window before sending keys (only check every 5 seconds to avoid disrupting holds)
-        import time as _time
-        if self.activate_window and (_time.time() - self._last_focus_check) > 5.0:
-            self._last_focus_check = _time.time()
-            set_focus_elite_window()
-
         for i in range(repeat):
 
             if state is None or state == 1:
-                for mod in key['mods']:
-                    directinput.PressKey(mod)
-                    sleep(self.key_mod_delay)
-
-                directinput.PressKey(key['key'])
+                self._press_key(key)
 
             if state is None:
                 if hold:
@@ -379,17 +428,68 @@ class EDKeys:
                 sleep(0.1)
 
             if state is None or state == 0:
-                directinput.ReleaseKey(key['key'])
-
-                for mod in key['mods']:
-                    sleep(self.key_mod_delay)
-                    directinput.ReleaseKey(mod)
+                self._release_key(key)
 
             if repeat_delay:
                 sleep(repeat_delay)
             else:
                 sleep(self.key_repeat_delay)
 
+        self._notify(key_binding, hold, repeat, state)
+
+    def press(self, key_binding):
+        """ Press a key and return at once (no hold, no repeat delay), for a hold that ends on a
+        condition (i.e. the closed loop axis holds of the autopilot). release() releases it, the
+        listeners get the hold time then, as with send(state=1) and send(state=0).
+        @param key_binding: The key bind name (i.e. PitchUpButton).
+        """
+        key = self._binding(key_binding)
+        logger.info(f"press: {key_binding} -> {self.reversed_dict.get(key['key'], 'Key not found')}")
+        self._press_key(key)
+        self._notify(key_binding, None, 1, 1)
+
+    def release(self, key_binding):
+        """ Release a key pressed with press(), return at once. """
+        key = self._binding(key_binding)
+        self._release_key(key)
+        held = self.held(key_binding)
+        logger.info(f"release: {key_binding} after {held:.2f}s")
+        self._notify(key_binding, None, 1, 0)
+
+    def send_holds(self, holds: dict):
+        """ Hold several keys at once (overlapping holds on different keys, i.e. pitch and yaw together):
+        all are pressed, each is released after its own hold time. Returns when the last one is released,
+        a key still down on an exception is released. A modifier shared by several keys stays down until
+        the last of them is released.
+        @param holds: {key_binding: hold time in seconds}.
+        """
+        scancodes = [self.keys[name]['key'] for name in holds if name in self.keys]
+        if len(set(scancodes)) < len(scancodes):
+            raise Exception(f"send_holds: {list(holds)} share a key, they cannot be held at once.")
+        start = monotonic()
+        down = []
+        try:
+            for key_binding in holds:
+                self.press(key_binding)
+                down.append(key_binding)
+            for key_binding, hold in sorted(holds.items(), key=lambda item: item[1]):
+                wait = start + hold - monotonic()
+                if wait > 0:
+                    sleep(wait)
+                self.release(key_binding)
+                down.remove(key_binding)
+        finally:
+            for key_binding in down:
+                self.release(key_binding)
+
+    def held(self, key_binding) -> float:
+        """ Seconds a key pressed with press() (or send(state=1)) is down, 0 if it is not. """
+        pressed = self._pressed.get(key_binding)
+        return 0.0 if pressed is None else monotonic() - pressed
+
+    def is_pressed(self, key_binding) -> bool:
+        return key_binding in self._pressed
+
     def get_collisions(self, key_name: str) -> list[str]:
         """ Get key name collisions (keys used for more than one binding).
         @param key_name: The key name (i.e. UI_Up, UI_Down).
@@ -8,6 +8,7 @@ import numpy as np
 
 from src.core.EDAP_data import GuiFocusExternalPanel
 from src.core.EDlogger import logger
+from src.screen.ChangeDetector import RegionChangeDetector
 from src.screen.Screen_Regions import Quad, Point
 from src.ed.StatusParser import StatusParser
 from src.ed import MenuNav
@@ -66,9 +67,12 @@ class EDNavigationPanel:
 
     def __init__(self, ed_ap, screen, keys, cb):
         self.screen = screen
+        # Shared with the screen regions, so hit rates are reported together
+        self.change = ed_ap.scrReg.change if ed_ap is not None else RegionChangeDetector()
         self.keys = keys
         self.ap_ckb = cb
         self.status_parser = StatusParser()
+        self.classifier = None  # ColorClassifier of the orange bracket mask (ColorLUTEnable), else HSV + inRange
 
     # -- Target row detection -------------------------------------------------
 
@@ -115,23 +119,16 @@ class EDNavigationPanel:
 
         x1, y1, x2, y2 = self.NAV_LIST_BOX
         crop = img[y1:y2, x1:x2]
-        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
-        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        # Template scores are reused while the list is unchanged (i.e. waiting in the panel)
+        score_orange, score_inv = self.change.lookup('nav_list_box:bracket_scores', crop, self._bracket_scores)
 
         # Method 1: orange mask bracket detection (inverted logic)
-        orange = cv2.inRange(hsv, np.array([10, 100, 120]), np.array([30, 255, 255]))
-        res1 = cv2.matchTemplate(orange, self._bracket_template, cv2.TM_CCOEFF_NORMED)
-        _, score_orange, _, _ = cv2.minMaxLoc(res1)
-
         if score_orange > self.ORANGE_BRACKET_HIGH:
             seen_bracket[0] = True
 
         orange_hit = seen_bracket[0] and score_orange < self.ORANGE_BRACKET_LOW
 
         # Method 2: inverted '>' on grayscale (positive detection)
-        res2 = cv2.matchTemplate(gray, self._bracket_gt_inv, cv2.TM_CCOEFF_NORMED)
-        _, score_inv, _, _ = cv2.minMaxLoc(res2)
-
         inv_hit = score_inv >= self.INV_BRACKET_THRESHOLD
 
         is_target = orange_hit or inv_hit
@@ -139,6 +136,24 @@ class EDNavigationPanel:
 
         return is_target
 
+    def _bracket_scores(self, crop) -> tuple[float, float]:
+        """ Template match scores of the orange '<' bracket and the inverted '>' in the nav list.
+        @return: (score_orange, score_inv)
+        """
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+
+        if self.classifier is not None:
+            orange = self.classifier.mask('nav_panel_orange', self.classifier(crop))
+        else:
+            hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+            orange = cv2.inRange(hsv, np.array([10, 100, 120]), np.array([30, 255, 255]))
+        res1 = cv2.matchTemplate(orange, self._bracket_template, cv2.TM_CCOEFF_NORMED)
+        _, score_orange, _, _ = cv2.minMaxLoc(res1)
+
+        res2 = cv2.matchTemplate(gray, self._bracket_gt_inv, cv2.TM_CCOEFF_NORMED)
+        _, score_inv, _, _ = cv2.minMaxLoc(res2)
+        return score_orange, score_inv
+
     # -- MenuNav delegates ----------------------------------------------------
 
     def activate_sc_assist(self) -> bool:
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from src.screen.Pyramid import PyramidCircleFinder
+
+"""
+File:Annulus.py
+
+Description:
+  Matched filter detection of the target circle. The target reticle is a ring of a known radius band
+  (EDAutopilot.TARGET_CIRCLE_R_MIN/MAX), so instead of a Hough transform the color mask is correlated
+  with an annulus kernel: +1 over the radius band, -1 over the inner disc (a filled blob or a block
+  of text scores ~0, a ring scores by how much of it is visible). The peak is the circle center.
+
+  The search correlates the mask subsampled by step (INTER_AREA, a 2 px line keeps its weight) with
+  the kernel of that step (filter2D, DFT based for kernels this large), then refines the strongest
+  peaks with a full resolution correlation in a small window (matchTemplate) and a parabolic sub pixel
+  fit. Scores are normalized to a complete 2 px ring of the mid radius, so a score is roughly the
+  visible fraction of the ring: a partial arc still has a clear peak, and score_at() measures the arc
+  around a known center (the target arc check).
+
+  Kernels are cached per radius band and step, i.e. per resolution.
+"""
+
+INNER_GAP = 3  # Pixels between the inner disc and the radius band of the kernel
+BAND_SLACK = 1  # Pixels added on each side of the radius band
+
+
+@lru_cache(maxsize=16)
+def annulus_kernel(r_min: float, r_max: float, step: int = 1) -> tuple[np.ndarray, float]:
+    """ The annulus kernel of a radius band and its score of a complete ring (the normalization).
+    Cached per band and step (the radii are those of the resolution).
+    @param r_min: Min radius in full resolution pixels.
+    @param r_max: Max radius in full resolution pixels.
+    @param step: Subsample factor of the mask the kernel is applied to.
+    @return: (float32 kernel of odd size, score of a 2 px ring of the mid radius)
+    """
+    scale = 1.0 / step
+    half = int(np.ceil(r_max * scale + BAND_SLACK))
+    y, x = np.mgrid[-half:half + 1, -half:half + 1]
+    d = np.hypot(x, y)
+    band = (d >= r_min * scale - BAND_SLACK) & (d <= r_max * scale + BAND_SLACK)
+    inner = d <= r_min * scale - INNER_GAP
+    kernel = np.zeros(d.shape, dtype=np.float32)
+    kernel[band] = 1.0 / np.count_nonzero(band)
+    kernel[inner] = -1.0 / max(1, np.count_nonzero(inner))
+    kernel.setflags(write=False)
+
+    # Score of a complete ring, drawn at full resolution and subsampled as the masks are
+    size = (2 * half + 3) * step
+    ring = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(ring, (size // 2, size // 2), int(round((r_min + r_max) / 2)), 255, 2)
+    if step > 1:
+        ring = cv2.resize(ring, (size // step, size // step), interpolation=cv2.INTER_AREA)
+    full = float(cv2.matchTemplate(ring.astype(np.float32) * (1.0 / 255), kernel, cv2.TM_CCORR).max())
+    return kernel, full
+
+
+def _parabola(a: float, b: float, c: float) -> float:
+    """ Sub pixel offset of the peak b between its neighbours a and c. """
+    d = a - 2.0 * b + c
+    return 0.5 * (a - c) / d if d < 0 else 0.0
+
+
+class AnnulusCircleFinder(PyramidCircleFinder):
+    """ Finds the ring of a color and radius band with an annulus matched filter. Same interface as
+    PyramidCircleFinder (find, find_near, masks, color classes), so CircleTracker tracks it too. """
+
+    def __init__(self, lower, upper, r_min: int, r_max: int, step: int = 4, margin: int = 6,
+                 max_candidates: int = 3, min_score: float = 0.25):
+        """
+        @param lower: Lower HSV bound of the circle color (inclusive).
+        @param upper: Upper HSV bound of the circle color (inclusive).
+        @param r_min: Min radius in full resolution pixels.
+        @param r_max: Max radius in full resolution pixels.
+        @param step: Subsample factor of the coarse correlation, 1 = full resolution (slow, the reference).
+        @param margin: Extra pixels around a coarse peak for the refine window.
+        @param max_candidates: Coarse peaks refined (strongest first) before giving up.
+        @param min_score: Min score (~visible fraction of the ring) of a circle.
+        """
+        super().__init__(lower, upper, r_min, r_max, step=step, margin=margin, max_candidates=max_candidates)
+        self.min_score = min_score
+        self.score = 0.0  # Score of the last circle found
+
+    def _kernel(self, step: int = 1) -> tuple[np.ndarray, float]:
+        return annulus_kernel(float(self.r_min), float(self.r_max), step)
+
+    @staticmethod
+    def _float(mask):
+        return mask.astype(np.float32) * (1.0 / 255)
+
+    def _radius(self, mask, x: float, y: float) -> float:
+        """ Median distance from (x, y) of the mask pixels in the radius band. """
+        ys, xs = np.nonzero(mask)
+        d = np.hypot(xs - x, ys - y)
+        d = d[(d >= self.r_min - 2) & (d <= self.r_max + 2)]
+        return float(np.median(d)) if d.size else (self.r_min + self.r_max) / 2.0
+
+    def _refine(self, mask, x: float, y: float, reach: int) -> tuple[float, float, float] | None:
+        """ Full resolution correlation in the window of +/- reach around (x, y) of the mask.
+        @return: (x, y, r) in mask pixels, or None if its score is below min_score.
+        """
+        kernel, full = self._kernel()
+        half = kernel.shape[0] // 2
+        img_h, img_w = mask.shape[:2]
+        left, top = max(0, int(x - reach - half)), max(0, int(y - reach - half))
+        window = mask[top:min(img_h, int(y + reach + half) + 1), left:min(img_w, int(x + reach + half) + 1)]
+        # Zero padding of half the kernel on all sides: a score per window pixel, so a center near the
+        # image edge (a circle partly out of the region) can come out of the correlation
+        padded = cv2.copyMakeBorder(self._float(window), half, half, half, half, cv2.BORDER_CONSTANT, value=0)
+        scores = cv2.matchTemplate(padded, kernel, cv2.TM_CCORR) * (1.0 / full)
+        # Centers within +/- reach of (x, y) only, the rest of the window is only the ring around them
+        x0, y0 = max(0, int(x - reach) - left), max(0, int(y - reach) - top)
+        x1, y1 = min(window.shape[1], int(x + reach) + 1 - left), min(window.shape[0], int(y + reach) + 1 - top)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        _, score, _, (px, py) = cv2.minMaxLoc(scores[y0:y1, x0:x1])
+        if score < self.min_score:
+            return None
+        px, py = px + x0, py + y0
+        dx = _parabola(scores[py, px - 1], score, scores[py, px + 1]) if 0 < px < scores.shape[1] - 1 else 0.0
+        dy = _parabola(scores[py - 1, px], score, scores[py + 1, px]) if 0 < py < scores.shape[0] - 1 else 0.0
+        cx, cy = left + px + dx, top + py + dy
+        self.score = float(score)
+        return float(cx), float(cy), self._radius(window, cx - left, cy - top)
+
+    def peaks(self, mask, step: int):
+        """ Local maxima of the correlation of the mask subsampled by step, strongest first.
+        @return: N x 3 array of (x, y, score), x and y in full resolution pixels.
+        """
+        kernel, full = self._kernel(step)
+        img_h, img_w = mask.shape[:2]
+        small = mask if step <= 1 else cv2.resize(mask, (img_w // step, img_h // step), interpolation=cv2.INTER_AREA)
+        scores = cv2.filter2D(self._float(small), -1, kernel, borderType=cv2.BORDER_CONSTANT) * (1.0 / full)
+        # Coarse scores are a bit lower (the subsampled ring is blurred), refine decides
+        is_peak = (scores == cv2.dilate(scores, None)) & (scores >= self.min_score * 0.75)
+        ys, xs = np.nonzero(is_peak)
+        values = scores[ys, xs]
+        order = np.argsort(-values, kind='stable')[:self.max_candidates]
+        offset = (step - 1) / 2.0  # Center of the subsampled pixel
+        return np.stack([xs[order] * step + offset, ys[order] * step + offset, values[order]], axis=1)
+
+    def find_mask(self, mask) -> tuple[float, float, float] | None:
+        """ The strongest ring of a color mask (0/255).
+        @return: (center x, center y, radius) in full resolution pixels, or None.
+        """
+        step = max(1, self.step)
+        for x, y, _ in self.peaks(mask, step):
+            self.refine_count = self.refine_count + 1
+            circle = self._refine(mask, x, y, step + self.margin // 2)
+            if circle is not None:
+                return circle
+            self.reject_count = self.reject_count + 1
+        self.score = 0.0
+        return None
+
+    def find(self, image) -> tuple[float, float, float] | None:
+        """ The strongest ring of the image (not the one closest to the center as with Hough).
+        @return: (center x, center y, radius) in full resolution pixels, or None.
+        """
+        return self.find_mask(self.color_mask(image))
+
+    def find_full(self, image) -> tuple[float, float, float] | None:
+        """ The correlation of the whole mask at full resolution (the reference of the coarse search). """
+        mask = self.color_mask(image)
+        for x, y, _ in self.peaks(mask, 1):
+            circle = self._refine(mask, x, y, 1)
+            if circle is not None:
+                return circle
+        return None
+
+    def find_near(self, image, x: float, y: float, reach: int) -> tuple[float, float, float] | None:
+        """ Full resolution search in the window of +/- reach pixels around (x, y), the strongest ring
+        whose center is in it. The color mask of the window is kept in window_mask.
+        @return: (center x, center y, radius) in image pixels, or None.
+        """
+        img_h, img_w = image.shape[:2]
+        left, top = max(0, int(x - reach)), max(0, int(y - reach))
+        window = image[top:min(img_h, int(y + reach) + 1), left:min(img_w, int(x + reach) + 1)]
+        self.window_mask = self.color_mask(window)
+        half = self._kernel()[0].shape[0] // 2
+        # The center may be anywhere in the window, up to the kernel radius from its edges
+        circle = self._refine(self.window_mask, x - left, y - top, max(0, reach - half))
+        if circle is None:
+            return None
+        return circle[0] + left, circle[1] + top, circle[2]
+
+    def score_at(self, mask, x: float, y: float) -> float:
+        """ Score of the ring centered at (x, y) of a mask (0/255), zero outside the mask: ~ the visible
+        fraction of a ring of the radius band around that point. """
+        kernel, full = self._kernel()
+        half = kernel.shape[0] // 2
+        cx, cy = int(round(x)), int(round(y))
+        img_h, img_w = mask.shape[:2]
+        left, top = max(0, cx - half), max(0, cy - half)
+        right, bottom = min(img_w, cx + half + 1), min(img_h, cy + half + 1)
+        if right <= left or bottom <= top:
+            return 0.0
+        k = kernel[top - (cy - half):bottom - (cy - half), left - (cx - half):right - (cx - half)]
+        return float(np.sum(self._float(mask[top:bottom, left:right]) * k)) / full
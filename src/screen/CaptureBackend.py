@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import cv2
+import mss
+import numpy as np
+
+from src.core.EDlogger import logger
+from src.screen.ImageFormat import FMT_BGR, FMT_BGRA, FMT_GRAY, NATIVE_FORMAT, convert_image
+from src.screen.SessionRecorder import SESSION_FILE, RecordedSession, SessionFrames
+
+"""
+File:CaptureBackend.py
+
+Description:
+  Screen capture backends used by Screen. MssBackend grabs the live desktop, ReplayBackend streams
+  recorded frames (image directory or SessionRecorder folder) and SyntheticBackend draws frames with a callback, so the vision
+  code can run headless (i.e. on Linux, in tests and benchmarks).
+
+  grab() takes an mss style monitor dict {'left', 'top', 'width', 'height'} in desktop pixels. The
+  replay and synthetic backends have no desktop, their frame is the ED client area at (0, 0).
+"""
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg', '.tif', '.tiff')
+
+
+class CaptureBackend:
+    """ Interface of a capture backend. """
+    fmt = NATIVE_FORMAT  # Pixel format of the grabbed images
+
+    @property
+    def monitors(self) -> list[dict]:
+        """ mss style monitor list, index 0 is the whole desktop. """
+        raise NotImplementedError
+
+    def size(self) -> tuple[int, int] | None:
+        """ (width, height) of the client area if the backend defines it, or None to locate the
+        ED window on the desktop. """
+        return None
+
+    def grab(self, monitor: dict):
+        """ Grab the given rect. Returns an array-like (h, w, channels) image in self.fmt. """
+        raise NotImplementedError
+
+    def clone(self) -> CaptureBackend:
+        """ A backend to use from another thread (i.e. the capture thread). """
+        return self
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    """ Live desktop capture with mss. mss instances must not be shared between threads. """
+    fmt = FMT_BGRA
+
+    def __init__(self):
+        self.sct = mss.mss()
+
+    @property
+    def monitors(self) -> list[dict]:
+        return self.sct.monitors
+
+    def grab(self, monitor: dict):
+        return self.sct.grab(monitor)
+
+    def clone(self) -> CaptureBackend:
+        return MssBackend()
+
+    def close(self):
+        self.sct.close()
+
+
+class _FrameSource(CaptureBackend):
+    """ Base of the headless backends, a single monitor the size of the frames. """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+
+    @property
+    def monitors(self) -> list[dict]:
+        mon = {'left': 0, 'top': 0, 'width': self.width, 'height': self.height}
+        return [mon, dict(mon)]
+
+    def size(self) -> tuple[int, int] | None:
+        return self.width, self.height
+
+    def current_frame(self):
+        """ The full frame to cut grabs from. """
+        raise NotImplementedError
+
+    def grab(self, monitor: dict):
+        image = self.current_frame()
+        left = int(monitor['left'])
+        top = int(monitor['top'])
+        # Copy like a real grab, callers may keep or modify the image
+        return image[top:top + int(monitor['height']), left:left + int(monitor['width'])].copy()
+
+
+class ReplayBackend(_FrameSource):
+    """ Streams recorded frames from a directory of images, a SessionRecorder folder, or a sequence
+    of frames and timestamps. An image directory may hold an index.json
+    ([{"file": ..., "timestamp": ...}, ...]) with the recorded times, otherwise the files are played
+    in name order at 'interval' seconds apart.
+
+    speed > 0 plays at the recorded timing scaled by speed (2.0 = twice as fast).
+    speed = 0 shows the same frame until advance() is called, to step through as fast as the
+    consumer goes.
+    """
+    fmt = FMT_BGRA
+
+    def __init__(self, source, timestamps: list[float] | None = None, speed: float = 1.0,
+                 loop: bool = False, interval: float = 1.0 / 30.0):
+        """
+        @param source: A directory path, or a sequence of images (BGR or BGRA), read on demand.
+        @param timestamps: Recorded time of each image (seconds) when source is a list.
+        @param speed: Playback speed factor, 0 to step manually with advance().
+        @param loop: Restart at the first frame after the last one.
+        @param interval: Seconds between frames when there are no recorded times.
+        """
+        self.speed = speed
+        self.loop = loop
+        self._files = None
+        self._images = None
+        if isinstance(source, (str, os.PathLike)) and os.path.exists(os.path.join(source, SESSION_FILE)):
+            source = SessionFrames(RecordedSession(str(source)))
+            timestamps = source.timestamps
+        if isinstance(source, (str, os.PathLike)):
+            self._files, times = self._read_directory(str(source))
+            count = len(self._files)
+        else:
+            self._images = source if hasattr(source, '__getitem__') else list(source)
+            times = timestamps
+            count = len(self._images)
+        if count == 0:
+            raise ValueError(f"ReplayBackend: no frames in {source if self._files is None else 'directory'}")
+
+        if times is None:
+            times = [i * interval for i in range(count)]
+        self.timestamps = [t - times[0] for t in times]
+        self.frame_count = count
+        self.index = 0
+        self._cache_index = -1
+        self._cache_image = None
+        self._start = time.perf_counter()
+
+        first = self._load(0)
+        super().__init__(first.shape[1], first.shape[0])
+
+    @staticmethod
+    def _read_directory(path: str):
+        """ Returns the frame files and their recorded times (or None) of a directory. """
+        index_file = os.path.join(path, 'index.json')
+        if os.path.exists(index_file):
+            with open(index_file, 'r') as fp:
+                index = json.load(fp)
+            files = [os.path.join(path, item['file']) for item in index]
+            times = [float(item['timestamp']) for item in index]
+            return files, times
+
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(IMAGE_EXTENSIONS))
+        return files, None
+
+    def _load(self, index: int):
+        """ The frame at index in BGRA, the last one is cached. """
+        if index == self._cache_index:
+            return self._cache_image
+        if self._files is not None:
+            image = cv2.imread(self._files[index], cv2.IMREAD_UNCHANGED)
+            if image is None:
+                raise ValueError(f"ReplayBackend: can not read {self._files[index]}")
+        else:
+            image = self._images[index]
+        if image.ndim == 2 or image.shape[2] == 3:
+            image = convert_image(image, FMT_BGR if image.ndim == 3 else FMT_GRAY, FMT_BGRA)
+        self._cache_index = index
+        self._cache_image = image
+        return image
+
+    def restart(self):
+        """ Play again from the first frame. """
+        self.index = 0
+        self._start = time.perf_counter()
+
+    def advance(self) -> bool:
+        """ Step to the next frame (for speed = 0).
+        @return: False if already at the last frame (and not looping).
+        """
+        if self.index + 1 < self.frame_count:
+            self.index = self.index + 1
+            return True
+        if self.loop:
+            self.index = 0
+            return True
+        return False
+
+    def at_end(self) -> bool:
+        """ Is the last frame shown (never when looping). """
+        if self.loop:
+            return False
+        if self.speed > 0:
+            return (time.perf_counter() - self._start) * self.speed >= self.timestamps[-1]
+        return self.index == self.frame_count - 1
+
+    def _clock_index(self) -> int:
+        """ The frame index for the current playback time. """
+        elapsed = (time.perf_counter() - self._start) * self.speed
+        duration = self.timestamps[-1]
+        if self.loop and duration > 0:
+            elapsed = elapsed % duration
+        # Last frame recorded at or before the playback time
+        return max(0, int(np.searchsorted(self.timestamps, elapsed, side='right')) - 1)
+
+    def current_frame(self):
+        if self.speed > 0:
+            self.index = self._clock_index()
+        return self._load(self.index)
+
+
+class SyntheticBackend(_FrameSource):
+    """ Frames drawn by a callback, i.e. a compass with the nav dot at a known position.
+    The callback gets the time in seconds since the backend was created and returns the full
+    client area image (height, width, channels) in the given format.
+    """
+    def __init__(self, callback, width: int, height: int, fmt: str = FMT_BGR):
+        """
+        @param callback: func(t: float) -> image.
+        @param width: Width of the images in pixels.
+        @param height: Height of the images in pixels.
+        @param fmt: Pixel format of the images returned by the callback.
+        """
+        super().__init__(width, height)
+        self.callback = callback
+        self.fmt = fmt
+        self._start = time.perf_counter()
+
+    def current_frame(self):
+        image = self.callback(time.perf_counter() - self._start)
+        if image.shape[0] != self.height or image.shape[1] != self.width:
+            logger.warning(f"SyntheticBackend: callback image {image.shape[1]}x{image.shape[0]} "
+                           f"is not {self.width}x{self.height}")
+        return image
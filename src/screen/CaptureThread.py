@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from src.core.EDlogger import logger
+from src.screen.Frame import FrameRing
+
+"""
+File:CaptureThread.py
+
+Description:
+  Optional producer thread that continuously grabs the screen frame rect (the union of the
+  active regions) from the Screen's capture backend at a fixed rate into a FrameRing.
+  Consumers read the latest frame or the first frame newer than a time without blocking on a grab.
+"""
+
+
+class CaptureThread:
+    """ Grabs screen.frame_rect (or the full client area) rate times per second into a FrameRing.
+    The thread uses its own clone of the capture backend, mss handles are not shared between threads.
+    """
+    def __init__(self, screen, rate: float = 30.0, size: int = 8):
+        """
+        @param screen: The Screen, gives the frame rect and the client area position.
+        @param rate: Captures per second.
+        @param size: Number of frames in the ring buffer.
+        """
+        self.screen = screen
+        self.rate = rate
+        self.ring = FrameRing(size, screen.backend.fmt)
+        self.grab_count = 0
+        self.error_count = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """ Start the capture thread, if not running. """
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="ScreenCapture", daemon=True)
+        self._thread.start()
+        logger.debug(f"CaptureThread started at {self.rate} fps, ring size {self.ring.size}")
+
+    def stop(self, timeout: float = 1.0):
+        """ Stop the capture thread and wait for it to exit. """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            logger.debug(f"CaptureThread stopped after {self.grab_count} grabs ({self.error_count} errors)")
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _capture_loop(self):
+        backend = self.screen.backend.clone()
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                self.capture_once(backend)
+                period = 1.0 / self.rate if self.rate > 0 else 0.0
+                self._stop_event.wait(max(0.0, period - (time.perf_counter() - start)))
+        finally:
+            if backend is not self.screen.backend:
+                backend.close()
+
+    def capture_once(self, backend):
+        """ Grab the frame rect once into the ring.
+        @param backend: The capture backend of the calling thread.
+        """
+        rect = self.screen.frame_rect
+        if rect is not None:
+            left, top, right, bottom = [int(v) for v in rect]
+        else:
+            left, top, right, bottom = 0, 0, self.screen.screen_width, self.screen.screen_height
+        try:
+            timestamp = time.perf_counter()
+            shot = backend.grab(self.screen.monitor_rect(left, top, right, bottom))
+            # Copied straight from the grab buffer into the preallocated slot
+            self.ring.write(shot, left, top, timestamp)
+            self.grab_count = self.grab_count + 1
+        except Exception as e:
+            self.error_count = self.error_count + 1
+            if self.error_count == 1 or self.error_count % 100 == 0:
+                logger.warning(f"CaptureThread grab failed ({self.error_count}): {e}")
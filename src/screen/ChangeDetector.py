@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import math
+
+import cv2
+import numpy as np
+
+from src.core.EDlogger import logger
+
+"""
+File:ChangeDetector.py
+
+Description:
+  Per region change detection. Keeps a cheap fingerprint (a subsampled copy) of the last image of
+  each key and the detector result computed from it. When the next image's fingerprint is within
+  the tolerance (mean absolute difference), the cached result is returned instead of re-running
+  the HSV conversion, masking and matching. Common while sitting in a menu or during long
+  supercruise legs.
+"""
+
+
+class RegionChangeDetector:
+    """ Caches detector results per key while the captured region is unchanged. """
+
+    def __init__(self, tolerance: float = 0.5, max_samples: int = 1024, enabled: bool = True):
+        """
+        @param tolerance: Max mean absolute difference (0-255 units) of the fingerprints to still count
+        as unchanged. 0 = pixel identical samples only.
+        @param max_samples: Approximate number of pixels sampled per fingerprint.
+        @param enabled: False to always run the detectors (results are not cached).
+        """
+        self.tolerance = tolerance
+        self.max_samples = max_samples
+        self.enabled = enabled
+        self._entries = {}  # key -> (fingerprint, result)
+        self._hits = {}
+        self._misses = {}
+
+    def fingerprint(self, image):
+        """ Subsampled copy of the image, about max_samples pixels. """
+        h, w = image.shape[:2]
+        step = max(1, int(math.sqrt(h * w / self.max_samples)))
+        return np.array(image[::step, ::step])  # Always a copy, the image may be a reused buffer
+
+    def is_unchanged(self, key: str, image) -> bool:
+        """ Is the image the same (within tolerance) as the last one seen for the key. """
+        entry = self._entries.get(key)
+        return entry is not None and self._same(self.fingerprint(image), entry[0])
+
+    def _same(self, fp, last) -> bool:
+        if fp.shape != last.shape or fp.dtype != last.dtype:
+            return False
+        return cv2.norm(fp, last, cv2.NORM_L1) <= self.tolerance * fp.size
+
+    def lookup(self, key: str, image, detect_fn):
+        """ The result of detect_fn(image), cached while the image of the key is unchanged.
+        Cached results are shared, do not modify them in place.
+        @param key: Cache key, i.e. the region and detector name.
+        @param image: The captured region image.
+        @param detect_fn: func(image) -> result.
+        """
+        if not self.enabled or image is None:
+            return detect_fn(image)
+
+        fp = self.fingerprint(image)
+        entry = self._entries.get(key)
+        if entry is not None and self._same(fp, entry[0]):
+            self._hits[key] = self._hits.get(key, 0) + 1
+            return entry[1]
+
+        result = detect_fn(image)
+        self._entries[key] = (fp, result)
+        self._misses[key] = self._misses.get(key, 0) + 1
+        return result
+
+    def invalidate(self, key: str | None = None):
+        """ Drop the cached result of a key, or of all keys. """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def hit_rate(self, key: str) -> float:
+        """ Fraction of lookups of the key served from the cache. """
+        hits = self._hits.get(key, 0)
+        total = hits + self._misses.get(key, 0)
+        return hits / total if total > 0 else 0.0
+
+    def stats(self) -> dict:
+        """ {key: {'hits': n, 'misses': n, 'hit_rate': r}} of all keys. """
+        keys = set(self._hits) | set(self._misses)
+        return {key: {'hits': self._hits.get(key, 0), 'misses': self._misses.get(key, 0),
+                      'hit_rate': self.hit_rate(key)} for key in sorted(keys)}
+
+    def log_stats(self):
+        for key, s in self.stats().items():
+            logger.info(f"Change detect '{key}': {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%})")
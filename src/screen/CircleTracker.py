@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.core.EDlogger import logger
+from src.screen.Pyramid import PyramidCircleFinder
+
+"""
+File:CircleTracker.py
+
+Description:
+  Region of interest tracking of the target circle. During an alignment the circle moves a few
+  pixels between two reads, yet _find_target_circle searched the whole 634x540 target region each
+  time. CircleTracker remembers the last circle and searches a window of r_max + margin +
+  track_margin around it first (~140x140 pixels at 1080p, a tenth of the Hough work). Only when the
+  circle is not confirmed there it searches the whole region with its PyramidCircleFinder (full
+  resolution or coarse to fine), so a lost or new target costs one full search.
+
+  confidence is the ring support of the last circle: the fraction of the points along it that lie
+  on the circle color mask (0 = lost, ~1 = a complete ring). A window hit below min_support (i.e.
+  a Hough circle in HUD text next to a fading target) is not trusted, the full search decides.
+"""
+
+SUPPORT_SAMPLES = 48  # Points along the circle of the ring support
+SUPPORT_SLACK = 2  # Radial search in pixels for the ring line (center and radius errors of the Hough fit)
+SUPPORT_LEVEL = 64  # Blurred mask value counted as on the ring
+
+
+class CircleTracker:
+    """ Tracks the circle of a PyramidCircleFinder from read to read. Not thread safe (the finder's
+    buffers), one per reading thread. """
+
+    def __init__(self, finder: PyramidCircleFinder, track_margin: int = 16, min_support: float = 0.3):
+        """
+        @param finder: Finds the circle, in a window (find_near) or in the whole image (find).
+        @param track_margin: Pixels the circle may move between two reads and still be found in the window.
+        @param min_support: Min ring support of a window hit, else the whole image is searched.
+        """
+        self.finder = finder
+        self.track_margin = track_margin
+        self.min_support = min_support
+        self.circle: tuple[float, float, float] | None = None  # Last circle (x, y, r) in image pixels
+        self.confidence = 0.0  # Ring support of the last circle, 0 = lost
+        self.window: tuple[int, int, int, int] | None = None  # Last search window (left, top, width, height)
+        self.tracked_count = 0  # Reads found in the window
+        self.full_count = 0  # Reads that searched the whole image
+        angles = np.linspace(0.0, 2.0 * np.pi, SUPPORT_SAMPLES, endpoint=False)
+        self._unit = np.stack([np.cos(angles), np.sin(angles)], axis=1)  # SUPPORT_SAMPLES x 2
+        self._offsets = np.arange(-SUPPORT_SLACK, SUPPORT_SLACK + 1, dtype=np.float64)
+
+    @property
+    def window_size(self) -> tuple[int, int] | None:
+        """ (width, height) of the last search window, the image size after a full search. """
+        return None if self.window is None else self.window[2:]
+
+    def reset(self):
+        """ Forget the circle, the next read searches the whole image. """
+        self.circle = None
+        self.confidence = 0.0
+
+    def support(self, mask, x: float, y: float, r: float) -> float:
+        """ Fraction of the points along the circle with the mask set within SUPPORT_SLACK pixels.
+        @param mask: The (blurred) circle color mask, x and y in its pixels.
+        """
+        h, w = mask.shape[:2]
+        radii = r + self._offsets  # Radial search around each point
+        xs = np.rint(x + self._unit[:, 0:1] * radii).astype(np.intp)
+        ys = np.rint(y + self._unit[:, 1:2] * radii).astype(np.intp)
+        inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        values = np.zeros(xs.shape, dtype=np.uint8)
+        values[inside] = mask[ys[inside], xs[inside]]
+        return float(np.count_nonzero(values.max(axis=1) >= SUPPORT_LEVEL)) / SUPPORT_SAMPLES
+
+    def _window_support(self, image, circle) -> float:
+        """ Ring support of a circle found by a full search, on the mask of a window around it. """
+        x, y, r = circle
+        reach = int(r) + SUPPORT_SLACK + 2
+        left, top = max(0, int(x - reach)), max(0, int(y - reach))
+        window = image[top:int(y + reach) + 1, left:int(x + reach) + 1]
+        return self.support(self.finder.mask(window), x - left, y - top, r)
+
+    def track(self, image) -> tuple[float, float, float] | None:
+        """ The circle, searched around the last one first.
+        @return: (center x, center y, radius) in image pixels, or None if not found (lost).
+        """
+        img_h, img_w = image.shape[:2]
+        if self.circle is not None:
+            x, y, r = self.circle
+            reach = self.finder.r_max + self.finder.margin + self.track_margin
+            left, top = max(0, int(x - reach)), max(0, int(y - reach))
+            self.window = (left, top, min(img_w, int(x + reach) + 1) - left, min(img_h, int(y + reach) + 1) - top)
+            circle = self.finder.find_near(image, x, y, reach)
+            if circle is not None:
+                support = self.support(self.finder.window_mask, circle[0] - left, circle[1] - top, circle[2])
+                if support >= self.min_support:
+                    self.circle = circle
+                    self.confidence = support
+                    self.tracked_count = self.tracked_count + 1
+                    return circle
+            logger.debug(f"CircleTracker: not in window {self.window} around ({x:.0f},{y:.0f}), full search")
+
+        self.full_count = self.full_count + 1
+        self.window = (0, 0, img_w, img_h)
+        circle = self.finder.find(image)
+        if circle is None:
+            self.reset()
+            return None
+        self.circle = circle
+        self.confidence = self._window_support(image, circle)
+        return circle
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from src.core.EDlogger import logger
+from src.screen.RegionFilter import RegionFilter
+
+"""
+File:ColorLUT.py
+
+Description:
+  Color classification with a precomputed lookup table. Every HSV color filter of the autopilot is
+  a cvtColor(BGR2HSV) plus one inRange per color; a detector that needs two colors makes three
+  full image passes. ColorClasses precomputes, once per set of ranges, the class bits of every one of
+  the 16M 24 bit colors (bit i set = the color is in range i), so a class image of all the ranges is
+  one table lookup per pixel, and each mask is a 256 entry cv2.LUT of the class image.
+
+  The table is exact: a mask is bit for bit the cvtColor + inRange mask (quantized 5 or 6 bit tables
+  miss the narrow S/V edges of the HUD colors). It is 16 MB and built in ~0.3 s, once per process
+  (get_color_classes). Up to 8 ranges per table (one byte per color).
+
+  The table index is the pixel's first three bytes (c0 | c1 << 8 | c2 << 16), so channel order is
+  kept as given, as by ColorRangeFilter. A range with swap_rb is looked up with R and B swapped: the
+  target range tuned on FMT_RGB images then applies directly to the native BGRA capture.
+"""
+
+MAX_CLASSES = 8
+
+# The HSV ranges of the screen detectors, name: (lower, upper[, swap_rb])
+STANDARD_RANGES = {
+    'orange': ((0, 130, 123), (25, 235, 220)),  # Screen_Regions.orange_color_range, center_text
+    'orange_2': ((16, 165, 220), (98, 255, 255)),  # Screen_Regions.orange_2_color_range, target region/arc
+    'target': ((16, 165, 220), (98, 255, 255), True),  # orange_2 on the native capture (tuned on FMT_RGB)
+    'blue_sco': ((10, 0, 0), (100, 150, 255)),  # Screen_Regions.blue_sco_color_range, disengage/sco
+    'cyan_sc_assist': ((80, 80, 80), (110, 255, 255)),  # Screen_Regions.cyan_sc_assist_range
+    'nav_ring': ((5, 100, 100), (25, 255, 255)),  # Compass ring (NavDotLocator, ring votes)
+    'nav_dot': ((75, 40, 170), (105, 255, 255)),  # Navball dot core (NavDotLocator)
+    'nav_panel_orange': ((10, 100, 120), (30, 255, 255)),  # Nav panel '<' bracket (EDNavigationPanel)
+}
+
+
+class ColorClasses:
+    """ Exact 24 bit color to class bits table of up to 8 HSV ranges. The table is built on first
+    use (or with build()), it is read only afterwards and shared by all threads. """
+
+    def __init__(self, ranges: dict):
+        """
+        @param ranges: {name: (lower, upper)} or {name: (lower, upper, swap_rb)}, HSV bounds inclusive.
+        """
+        if len(ranges) > MAX_CLASSES:
+            raise ValueError(f"ColorClasses: {len(ranges)} ranges, max {MAX_CLASSES}")
+        self.names = list(ranges)
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.ranges = {}
+        for name, rng in ranges.items():
+            swap_rb = bool(rng[2]) if len(rng) > 2 else False
+            self.ranges[name] = (np.array(rng[0], dtype=np.uint8), np.array(rng[1], dtype=np.uint8), swap_rb)
+        self._mask_tables = {}
+        self._table = None
+        self._lock = threading.Lock()
+
+    @property
+    def table(self) -> np.ndarray:
+        """ The class bits of each color, indexed by c0 | c1 << 8 | c2 << 16 (16M bytes). """
+        if self._table is None:
+            self.build()
+        return self._table
+
+    def is_built(self) -> bool:
+        return self._table is not None
+
+    def build(self):
+        """ Build the table, if not built yet (cvtColor + inRange of all colors, in chunks). """
+        with self._lock:
+            if self._table is not None:
+                return
+            start = time.perf_counter()
+            table = np.zeros(1 << 24, dtype=np.uint8)
+            rows = 16  # Values of c2 per chunk
+            chunk = np.empty((rows * 256, 256, 3), dtype=np.uint8)
+            chunk[..., 0] = np.arange(256, dtype=np.uint8)[None, :]
+            chunk[..., 1] = np.tile(np.arange(256, dtype=np.uint8), rows)[:, None]
+            swap = any(rng[2] for rng in self.ranges.values())
+            bit = np.empty(chunk.shape[:2], dtype=np.uint8)
+            for c2 in range(0, 256, rows):
+                chunk[..., 2] = np.repeat(np.arange(c2, c2 + rows, dtype=np.uint8), 256)[:, None]
+                hsv = cv2.cvtColor(chunk, cv2.COLOR_BGR2HSV)
+                hsv_swapped = cv2.cvtColor(chunk, cv2.COLOR_RGB2HSV) if swap else None
+                out = table[c2 << 16:(c2 + rows) << 16].reshape(chunk.shape[:2])
+                for name, (lower, upper, swap_rb) in self.ranges.items():
+                    mask = cv2.inRange(hsv_swapped if swap_rb else hsv, lower, upper)
+                    cv2.bitwise_and(mask, self.bits[name], dst=bit)
+                    cv2.bitwise_or(out, bit, dst=out)
+            self._table = table
+            logger.debug(f"ColorClasses: {len(self.names)} classes built in {time.perf_counter() - start:.2f}s")
+
+    def find(self, lower, upper, swap_rb: bool = False) -> str | None:
+        """ The name of the class with this range, or None. """
+        lower = np.asarray(lower, dtype=np.uint8)
+        upper = np.asarray(upper, dtype=np.uint8)
+        for name, (lo, up, swap) in self.ranges.items():
+            if swap == swap_rb and np.array_equal(lo, lower) and np.array_equal(up, upper):
+                return name
+        return None
+
+    def mask_table(self, names) -> np.ndarray:
+        """ The 256 entry cv2.LUT table of class bits to mask (255 if any of the names is set).
+        @param names: A class name or a tuple of names.
+        """
+        key = names if isinstance(names, tuple) else (names,)
+        lut = self._mask_tables.get(key)
+        if lut is None:
+            bits = 0
+            for name in key:
+                bits = bits | self.bits[name]
+            lut = np.where(np.arange(256) & bits, 255, 0).astype(np.uint8)
+            self._mask_tables[key] = lut
+        return lut
+
+
+class ColorClassifier(RegionFilter):
+    """ Class image of a BGRA or BGR (any channel order) image, one lookup per pixel. After a call,
+    mask(name) cuts a mask from it. Buffers per instance, use one per thread. """
+
+    def __init__(self, classes: ColorClasses | None = None, scale: float = 1.0, step: int = 1):
+        """
+        @param classes: The ColorClasses, defaults to the shared one (get_color_classes).
+        """
+        super().__init__(scale, step)
+        self.classes = classes or get_color_classes()
+        self.class_image = None
+
+    def _index(self, image):
+        """ The table index of each pixel (c0 | c1 << 8 | c2 << 16) into a buffer. """
+        if image.ndim != 3 or image.shape[2] not in (3, 4):
+            raise ValueError(f"ColorClassifier: color image expected, got shape {image.shape}")
+        if image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA, dst=self._buffer('bgra', image.shape[:2] + (4,)))
+        elif image.strides[1:] != (4, 1):
+            image = np.ascontiguousarray(image)
+        packed = image.view('<u4')[..., 0]  # Rows may be strided (a window of a frame), pixels are not
+        # intp indices, numpy's take converts any other index type first
+        return np.bitwise_and(packed, 0xFFFFFF, out=self._buffer('index', image.shape[:2], np.intp))
+
+    def __call__(self, image):
+        """ Classify the (scaled) image.
+        @return: The class image (bit i = in range i of the ColorClasses), a buffer.
+        """
+        index = self._index(self._scaled(image))
+        self.class_image = self.classes.table.take(index, out=self._buffer('classes', index.shape), mode='wrap')
+        return self.class_image
+
+    def mask(self, names, class_image=None):
+        """ The in range mask (0/255) of a class of the last call, into a buffer per name.
+        @param names: A class name, or a tuple of names for the union of their ranges.
+        @param class_image: Cut from this class image (or a window of it) instead, into a new array.
+        """
+        lut = self.classes.mask_table(names)
+        if class_image is not None:
+            return cv2.LUT(class_image, lut)
+        key = names if isinstance(names, str) else '|'.join(names)
+        return cv2.LUT(self.class_image, lut, dst=self._buffer(f"mask:{key}", self.class_image.shape))
+
+
+class ColorClassFilter(ColorClassifier):
+    """ The in range mask of one class, the table lookup equivalent of ColorRangeFilter. """
+
+    def __init__(self, name: str, classes: ColorClasses | None = None, scale: float = 1.0, step: int = 1):
+        super().__init__(classes, scale, step)
+        self.name = name
+
+    def __call__(self, image):
+        super().__call__(image)
+        return self.mask(self.name)
+
+
+_default_classes = None
+
+
+def get_color_classes() -> ColorClasses:
+    """ The shared ColorClasses of STANDARD_RANGES, created on first use (the table is built lazily). """
+    global _default_classes
+    if _default_classes is None:
+        _default_classes = ColorClasses(STANDARD_RANGES)
+    return _default_classes
+
+
+def set_color_classes(classes: ColorClasses | None):
+    """ Replace the shared ColorClasses. None = create the standard one on next use. """
+    global _default_classes
+    _default_classes = classes
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from math import asin, atan, degrees
+
+import cv2
+import numpy as np
+
+from src.core.EDlogger import logger
+from src.screen.ColorLUT import ColorClassifier
+from src.screen.RegionFilter import RegionFilter
+
+"""
+File:Compass.py
+
+Description:
+  Compass (navball) ring detection and its persistent calibration. The ring center is fixed for a
+  resolution and cockpit HUD, so it is estimated once with a vote of several captures, stored per
+  ship and resolution in ship_configs.json, and afterwards only checked now and then with one
+  HoughCircles on a capture already taken. A navball read is then one grab plus the dot centroid.
+
+  Ring positions are in client area pixels (not compass region pixels), so a calibration survives
+  an edit of the compass region rect.
+
+  NavDotLocator finds the navball dot on the native resolution crop. The sub-pixel position comes
+  from the intensity weighted moments of the dot (anti aliased edge pixels weigh by their coverage),
+  not from a 2x upscale and the moments of a binary mask. With color classes (use_classes) the ring and
+  dot masks come from one table lookup (see ColorLUT), HSV is then only converted in the dot window.
+"""
+
+RING_RADIUS = 30.0  # Radius of the compass ring in pixels at 1920x1080
+RING_MIN_RADIUS = 27.5  # Smaller Hough circles are not the ring
+RING_MAX_OFFSET = 7.5  # Max distance in x and y of the ring center from the compass region center
+
+
+def find_ring(ring_mask, scale: float = 1.0) -> tuple[float, float, float] | None:
+    """ Find the compass ring in a mask of the compass region, the circle closest to the region center.
+    @param ring_mask: The ring color mask of the compass region, resized by scale.
+    @param scale: The resize factor of the mask, the result is divided by it.
+    @return: (x, y, radius) in compass region pixels, or None if no ring (radius too small, or center too
+    far off the region center).
+    """
+    h, w = ring_mask.shape[:2]
+    blurred = cv2.GaussianBlur(ring_mask, (5, 5), 1)
+    circles = cv2.HoughCircles(blurred, cv2.HOUGH_GRADIENT, dp=1.2, minDist=w // 2, param1=50, param2=20,
+                               minRadius=w // 5, maxRadius=w // 2)
+    if circles is None:
+        return None
+    best = min(circles[0], key=lambda c: (c[0] - w / 2) ** 2 + (c[1] - h / 2) ** 2)
+    # Reject: radius too small OR center too far from ROI center
+    if (best[2] < RING_MIN_RADIUS * scale or abs(best[0] - w / 2) >= RING_MAX_OFFSET * scale
+            or abs(best[1] - h / 2) >= RING_MAX_OFFSET * scale):
+        return None
+    # Pixel centers of the resized mask back to region pixel centers
+    return (float(best[0]) + 0.5) / scale - 0.5, (float(best[1]) + 0.5) / scale - 0.5, float(best[2]) / scale
+
+
+def navball_offset(dot, ring_center, ring_r: float = RING_RADIUS, cor_x: float = 0.0, cor_y: float = 0.0) -> dict:
+    """ The navball offset of a dot position.
+    @param dot: (x, y) of the front dot in compass image pixels, or None if there is no front dot (behind).
+    @param ring_center: (x, y) of the ring center in the same pixels.
+    @param ring_r: The ring radius in the same pixels.
+    @param cor_x, cor_y: Nav point correction of x and y (part of the radius).
+    @return: {'x': x.xx, 'y': y.yy, 'z': -1|+1, 'roll': r.rr, 'pit': p.pp, 'yaw': y.yy}, see
+    EDAutopilot.get_nav_offset.
+    """
+    if dot is None:
+        return {'x': 0, 'y': 0, 'z': -1, 'roll': 180.0, 'pit': 180.0, 'yaw': 0}
+
+    # Dot offset from ring center, normalized to ring radius
+    x_pct = (dot[0] - ring_center[0]) / ring_r - cor_x
+    x_pct = max(min(x_pct, 1.0), -1.0)
+    y_pct = -(dot[1] - ring_center[1]) / ring_r - cor_y  # flip Y (screen Y is inverted)
+    y_pct = max(min(y_pct, 1.0), -1.0)
+
+    # Calc angle in degrees starting at 0 deg at 12 o'clock and increasing clockwise
+    # so 3 o'clock is +90° and 9 o'clock is -90°.
+    roll_deg = 0.0
+    if x_pct > 0.0:
+        roll_deg = 90 - degrees(atan(y_pct / x_pct))
+    elif x_pct < 0.0:
+        roll_deg = -90 - degrees(atan(y_pct / x_pct))
+    elif y_pct < 0.0:
+        roll_deg = 180.0
+
+    # Spherical angle mapping: navball is a sphere rendered flat (orthographic projection)
+    # dot position = sin(angle), so angle = asin(position)
+    pit_deg = degrees(asin(y_pct))
+    yaw_deg = degrees(asin(x_pct))
+    return {'x': round(x_pct, 4), 'y': round(y_pct, 4), 'z': 1.0,
+            'roll': round(roll_deg, 2), 'pit': round(pit_deg, 2), 'yaw': round(yaw_deg, 2)}
+
+
+class CompassCalibrator:
+    """ Persistent compass ring center with periodic validation.
+    calibrate() sets the center from a vote of ring hits (median of at least min_votes of votes captures).
+    Every validate_every reads (due) one hit of the current capture is compared with the center;
+    drift_confirm drifts of more than drift_px in a row drop the center, so the next read calibrates again.
+    """
+
+    def __init__(self, votes: int = 5, min_votes: int = 3, validate_every: int = 25, drift_px: float = 1.5,
+                 drift_confirm: int = 2):
+        """
+        @param votes: Captures of a calibration.
+        @param min_votes: Ring hits needed for a calibration.
+        @param validate_every: Reads between two validations.
+        @param drift_px: Max distance in pixels of a validation hit from the center.
+        @param drift_confirm: Drifted validations in a row that drop the center.
+        """
+        self.votes = votes
+        self.min_votes = min_votes
+        self.validate_every = validate_every
+        self.drift_px = drift_px
+        self.drift_confirm = drift_confirm
+        self.center: tuple[float, float] | None = None  # Ring center in client area pixels
+        self.radius = RING_RADIUS
+        self.calibrations = 0
+        self.validations = 0
+        self._reads = 0
+        self._drifts = 0
+
+    def set_center(self, center):
+        """ Use a stored calibration.
+        @param center: [x, y] or [x, y, radius] in client area pixels, or None to calibrate on the next read.
+        """
+        self._reads = 0
+        self._drifts = 0
+        if not center:
+            self.center = None
+            return
+        self.center = (float(center[0]), float(center[1]))
+        self.radius = float(center[2]) if len(center) > 2 else RING_RADIUS
+
+    def to_list(self) -> list[float] | None:
+        """ The calibration to store, [x, y, radius], or None. """
+        if self.center is None:
+            return None
+        return [round(self.center[0], 2), round(self.center[1], 2), round(self.radius, 2)]
+
+    def invalidate(self):
+        """ Calibrate again on the next read. """
+        self.set_center(None)
+
+    def calibrate(self, hits) -> bool:
+        """ Set the center to the median of the ring hits.
+        @param hits: (x, y, radius) ring hits in client area pixels, one per capture.
+        @return: True if there were enough hits.
+        """
+        if len(hits) < self.min_votes:
+            logger.debug(f"CompassCalibrator: {len(hits)}/{self.votes} valid, not calibrated")
+            return False
+        xs = sorted(h[0] for h in hits)
+        ys = sorted(h[1] for h in hits)
+        self.set_center((xs[len(xs) // 2], ys[len(ys) // 2], sum(h[2] for h in hits) / len(hits)))
+        self.calibrations = self.calibrations + 1
+        logger.info(f"CompassCalibrator: ring center {self.to_list()} from {len(hits)}/{self.votes} votes")
+        return True
+
+    def due(self) -> bool:
+        """ Count a read, True if it should be validated (run one ring detection on it). """
+        self._reads = self._reads + 1
+        return self.center is not None and (self._reads >= self.validate_every or self._drifts > 0)
+
+    def validate(self, hit) -> bool:
+        """ Compare a ring hit of the current capture with the center.
+        @param hit: (x, y, radius) in client area pixels, or None if the ring was not found (not counted).
+        @return: False if the center was dropped (drift confirmed).
+        """
+        if hit is None or self.center is None:
+            return self.center is not None
+        self._reads = 0
+        self.validations = self.validations + 1
+        dist = ((hit[0] - self.center[0]) ** 2 + (hit[1] - self.center[1]) ** 2) ** 0.5
+        if dist <= self.drift_px:
+            self._drifts = 0
+            return True
+        self._drifts = self._drifts + 1
+        logger.debug(f"CompassCalibrator: ring at ({hit[0]:.1f},{hit[1]:.1f}) is {dist:.1f}px off the center "
+                     f"({self._drifts}/{self.drift_confirm})")
+        if self._drifts >= self.drift_confirm:
+            logger.info(f"CompassCalibrator: ring center drifted to ({hit[0]:.1f},{hit[1]:.1f}), recalibrating")
+            self.invalidate()
+            return False
+        return True
+
+
+class NavDotLocator(RegionFilter):
+    """ Sub-pixel position of the front (cyan) navball dot in a native resolution compass crop.
+    The dot blob is the largest connected component of the dot color mask minus the ring mask. Its
+    position is the centroid of the V channel above the local background, over the cyan hue pixels of
+    the blob's bounding box plus margin. After a call bgr, hsv, ring_mask and dot_mask hold the
+    intermediate images (buffers, valid until the next call). With color classes, bgr is the input image
+    and hsv the dot window only.
+    """
+
+    def __init__(self, dot_lower=(75, 40, 170), dot_upper=(105, 255, 255), ring_lower=(5, 100, 100),
+                 ring_upper=(25, 255, 255), hue_range: tuple[int, int] = (70, 110), margin: int = 2,
+                 min_area: int = 2, max_area_ratio: float = 0.3):
+        """
+        @param dot_lower, dot_upper: HSV range of the dot core.
+        @param ring_lower, ring_upper: HSV range of the compass ring, removed from the dot mask.
+        @param hue_range: Hue range of the weighted pixels, wider than the core for the anti aliased edge.
+        @param margin: Pixels added around the blob's bounding box for the weights.
+        @param min_area: Min blob size in pixels.
+        @param max_area_ratio: Max blob size as part of the crop.
+        """
+        super().__init__()
+        self.dot_lower = np.array(dot_lower, dtype=np.uint8)
+        self.dot_upper = np.array(dot_upper, dtype=np.uint8)
+        self.ring_lower = np.array(ring_lower, dtype=np.uint8)
+        self.ring_upper = np.array(ring_upper, dtype=np.uint8)
+        self.hue_lower = np.array([hue_range[0], 0, 0], dtype=np.uint8)
+        self.hue_upper = np.array([hue_range[1], 255, 255], dtype=np.uint8)
+        self.margin = margin
+        self.min_area = min_area
+        self.max_area_ratio = max_area_ratio
+        self.bgr = None
+        self.hsv = None
+        self.ring_mask = None
+        self.dot_mask = None
+        self.area = 0  # Pixels of the last dot blob
+        self.classifier = None  # ColorClassifier of the ring and dot masks, see use_classes
+
+    def use_classes(self, classes) -> bool:
+        """ Take the ring and dot masks from a color class lookup instead of HSV + inRange.
+        @param classes: A ColorClasses with the ring and dot ranges, or None for HSV + inRange.
+        @return: False if the classes do not have both ranges (HSV + inRange is used).
+        """
+        self.classifier = None
+        if classes is None:
+            return True
+        ring = classes.find(self.ring_lower, self.ring_upper)
+        dot = classes.find(self.dot_lower, self.dot_upper)
+        if ring is None or dot is None:
+            return False
+        self.classifier = ColorClassifier(classes)
+        self._class_names = (ring, dot)
+        return True
+
+    def _masks(self, image):
+        """ Ring mask and dot mask of the crop (into buffers). """
+        if self.classifier is not None:
+            self.bgr = image
+            self.hsv = None
+            self.classifier(image)
+            ring, dot = self._class_names
+            return self.classifier.mask(ring), self.classifier.mask(dot)
+        self.bgr = self._bgr(image)
+        h, w = self.bgr.shape[:2]
+        self.hsv = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV, dst=self._buffer('hsv', self.bgr.shape))
+        ring = cv2.inRange(self.hsv, self.ring_lower, self.ring_upper, dst=self._buffer('ring', (h, w)))
+        return ring, cv2.inRange(self.hsv, self.dot_lower, self.dot_upper, dst=self._buffer('dot', (h, w)))
+
+    def __call__(self, image) -> tuple[float, float] | None:
+        """ Locate the dot.
+        @param image: The compass crop (BGRA or BGR), native resolution.
+        @return: (x, y) sub-pixel dot center in crop pixels, or None if there is no front dot.
+        """
+        self.ring_mask, dot = self._masks(image)
+        h, w = dot.shape[:2]
+        self.dot_mask = cv2.subtract(dot, self.ring_mask, dst=dot)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(self.dot_mask, connectivity=8)
+        if count < 2:
+            return None
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        areas = np.where(areas < w * h * self.max_area_ratio, areas, 0)
+        blob = int(np.argmax(areas)) + 1
+        self.area = int(stats[blob, cv2.CC_STAT_AREA])
+        if self.area < self.min_area or areas[blob - 1] == 0:
+            return None
+
+        x, y, bw, bh = stats[blob, :4]
+        left, top = max(0, x - self.margin), max(0, y - self.margin)
+        rows, cols = slice(top, min(h, y + bh + self.margin)), slice(left, min(w, x + bw + self.margin))
+        if self.hsv is None:
+            self.hsv = cv2.cvtColor(self.bgr[rows, cols], cv2.COLOR_BGR2HSV)  # BGRA is read as BGR
+            window = self.hsv
+        else:
+            window = self.hsv[rows, cols]
+        cyan = cv2.inRange(window, self.hue_lower, self.hue_upper)
+        value = cv2.extractChannel(window, 2)
+        background = cv2.mean(value, mask=cv2.bitwise_not(cyan))[0] if cv2.countNonZero(cyan) < cyan.size else 0
+        weights = cv2.min(cv2.subtract(value, int(round(background))), cyan)
+        m = cv2.moments(weights)
+        if m['m00'] <= 0:
+            return None
+        return left + m['m10'] / m['m00'], top + m['m01'] / m['m00']
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+
+from src.screen.ImageFormat import NATIVE_FORMAT
+
+"""
+File:Frame.py
+
+Description:
+  A captured screen frame with its id and timestamp, and a ring buffer of preallocated
+  frames filled by the capture thread.
+"""
+
+
+class Frame:
+    """ A single screen grab shared by all region reads of one control tick.
+    The image is kept in its native format (mss BGRA), consumers convert their views as needed.
+    left/top are the position of the image within the ED client area, in pixels.
+    volatile is True when the image lives in a ring buffer slot the capture thread reuses,
+    so views must be copied (or checked with FrameRing.is_current) before they are kept.
+    """
+    def __init__(self, image, frame_id: int, timestamp: float, left: int = 0, top: int = 0,
+                 fmt: str = NATIVE_FORMAT, volatile: bool = False):
+        self.image = image
+        self.fmt = fmt
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.left = left
+        self.top = top
+        self.volatile = volatile
+        self.height, self.width = image.shape[:2]
+
+    def age(self) -> float:
+        """ Seconds since the frame was captured. """
+        return time.perf_counter() - self.timestamp
+
+    def contains(self, x_left, y_top, x_right, y_bot) -> bool:
+        """ Does this frame cover the given client area rect (in pixels). """
+        return (x_left >= self.left and y_top >= self.top and
+                x_right <= self.left + self.width and y_bot <= self.top + self.height)
+
+    def view(self, x_left, y_top, x_right, y_bot):
+        """ Returns a numpy view (no copy) of the given client area rect (in pixels), or None if the
+        rect is not covered by this frame. Do not modify the returned image in place. """
+        if not self.contains(x_left, y_top, x_right, y_bot):
+            return None
+        return self.image[int(y_top) - self.top:int(y_bot) - self.top,
+                          int(x_left) - self.left:int(x_right) - self.left]
+
+
+class FrameRing:
+    """ Fixed size ring buffer of preallocated frames, one writer (the capture thread) and any
+    number of readers. Readers never block on a capture, they get the latest frame or the first
+    frame newer than a given time. The frames handed out are views of the ring slots (volatile).
+    """
+    def __init__(self, size: int = 8, fmt: str = NATIVE_FORMAT):
+        """
+        @param size: Number of frames kept.
+        @param fmt: Pixel format of the written images.
+        """
+        self.size = size
+        self.fmt = fmt
+        self._slots = []  # Preallocated images, allocated on the first write
+        self._shape = None
+        self._ids = [0] * size  # Frame id per slot, 0 = empty or being written
+        self._times = [0.0] * size  # Timestamp per slot
+        self._origins = [(0, 0)] * size  # (left, top) per slot
+        self._next = 0  # Next slot to write
+        self._frame_id = 0
+        self._cond = threading.Condition()
+
+    def _alloc(self, shape):
+        """ (Re)allocate all slots for the given image shape. Called with the lock held. """
+        self._slots = [np.empty(shape, dtype=np.uint8) for _ in range(self.size)]
+        self._shape = shape
+        self._ids = [0] * self.size
+        self._next = 0
+
+    def write(self, image, left: int = 0, top: int = 0, timestamp: float | None = None) -> int:
+        """ Copy an image into the next slot and publish it.
+        @param image: The captured image (any array-like of the slot shape, i.e. an mss ScreenShot).
+        @param left: Position of the image within the client area, in pixels.
+        @param top: Position of the image within the client area, in pixels.
+        @param timestamp: Capture time (perf_counter), defaults to now.
+        @return: The frame id.
+        """
+        image = np.asarray(image)
+        with self._cond:
+            if image.shape != self._shape:
+                self._alloc(image.shape)
+            slot = self._next
+            self._ids[slot] = 0  # Readers skip the slot while it is written
+        np.copyto(self._slots[slot], image)
+        with self._cond:
+            self._frame_id = self._frame_id + 1
+            self._ids[slot] = self._frame_id
+            self._times[slot] = time.perf_counter() if timestamp is None else timestamp
+            self._origins[slot] = (left, top)
+            self._next = (slot + 1) % self.size
+            self._cond.notify_all()
+            return self._frame_id
+
+    def _frame(self, slot: int) -> Frame:
+        left, top = self._origins[slot]
+        return Frame(self._slots[slot], self._ids[slot], self._times[slot], left, top, self.fmt, volatile=True)
+
+    def latest(self) -> Frame | None:
+        """ The most recent frame, or None if nothing was captured yet. """
+        with self._cond:
+            slot = (self._next - 1) % self.size
+            if self._ids[slot] == 0:
+                return None
+            return self._frame(slot)
+
+    def first_after(self, timestamp: float) -> Frame | None:
+        """ The oldest frame captured after the given time, or None if there is none yet. """
+        with self._cond:
+            best = None
+            for slot in range(self.size):
+                if self._ids[slot] != 0 and self._times[slot] > timestamp:
+                    if best is None or self._times[slot] < self._times[best]:
+                        best = slot
+            return None if best is None else self._frame(best)
+
+    def wait_after(self, timestamp: float, timeout: float) -> Frame | None:
+        """ The oldest frame captured after the given time, waiting up to timeout seconds for it.
+        @return: The frame, or None on timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                frame = self.first_after(timestamp)
+                remaining = deadline - time.perf_counter()
+                if frame is not None or remaining <= 0:
+                    return frame
+                self._cond.wait(remaining)
+
+    def is_current(self, frame: Frame) -> bool:
+        """ Is the frame still held in its slot (not yet overwritten by the writer). """
+        with self._cond:
+            return frame.frame_id in self._ids
+
+    def clear(self):
+        """ Drop all frames (i.e. after the captured rect changed). """
+        with self._cond:
+            self._ids = [0] * self.size
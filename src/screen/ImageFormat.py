@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import cv2
+
+"""
+File:ImageFormat.py
+
+Description:
+  Pixel formats of captured images and the single step conversions between them.
+  mss grabs BGRA, so captures stay in BGRA and are converted at most once, and only
+  when a consumer asks for a different format.
+"""
+
+FMT_BGRA = 'BGRA'  # Native mss capture format
+FMT_BGR = 'BGR'    # Regular OpenCV 3 channel image (i.e. from cv2.imread)
+FMT_RGB = 'RGB'    # Red and blue swapped. What the old Screen.get_screen(rgb=True) produced.
+FMT_GRAY = 'GRAY'  # Single channel grayscale
+
+NATIVE_FORMAT = FMT_BGRA
+
+_CONVERSIONS = {
+    (FMT_BGRA, FMT_BGR): cv2.COLOR_BGRA2BGR,
+    (FMT_BGRA, FMT_RGB): cv2.COLOR_BGRA2RGB,
+    (FMT_BGRA, FMT_GRAY): cv2.COLOR_BGRA2GRAY,
+    (FMT_BGR, FMT_BGRA): cv2.COLOR_BGR2BGRA,
+    (FMT_BGR, FMT_RGB): cv2.COLOR_BGR2RGB,
+    (FMT_BGR, FMT_GRAY): cv2.COLOR_BGR2GRAY,
+    (FMT_RGB, FMT_BGRA): cv2.COLOR_RGB2BGRA,
+    (FMT_RGB, FMT_BGR): cv2.COLOR_RGB2BGR,
+    (FMT_RGB, FMT_GRAY): cv2.COLOR_RGB2GRAY,
+    (FMT_GRAY, FMT_BGRA): cv2.COLOR_GRAY2BGRA,
+    (FMT_GRAY, FMT_BGR): cv2.COLOR_GRAY2BGR,
+    (FMT_GRAY, FMT_RGB): cv2.COLOR_GRAY2RGB,
+}
+
+
+def convert_image(image, src_fmt: str, dst_fmt: str):
+    """ Convert an image between pixel formats with a single cvtColor call.
+    @param image: The image to convert.
+    @param src_fmt: The format of the image (i.e. FMT_BGRA).
+    @param dst_fmt: The format wanted.
+    @return: The converted image, or the same image (no copy) if the formats match.
+    """
+    if image is None or src_fmt == dst_fmt:
+        return image
+    code = _CONVERSIONS.get((src_fmt, dst_fmt))
+    if code is None:
+        raise ValueError(f"Unsupported image format conversion {src_fmt} -> {dst_fmt}")
+    return cv2.cvtColor(image, code)
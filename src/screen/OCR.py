@@ -151,8 +151,8 @@ class OCR:
         if coords is None:
             return -1
 
-        # Get average x position of highlighted pixels
-        avg_x = np.mean(coords[:, 0, 0])
+        # Get average x position of highlighted pixels (points are (N, 1, 2) in OpenCV 4, (N, 2) in OpenCV 5)
+        avg_x = np.mean(coords.reshape(-1, 2)[:, 0])
 
         # Map x position to tab index
         tab_width = img_w / num_tabs
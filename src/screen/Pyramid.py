@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+"""
+File:Pyramid.py
+
+Description:
+  Coarse to fine (pyramid) detection for the large screen regions. The coarse pass runs on the
+  region subsampled by step (every step-th pixel of every step-th row, so a 2 or 3 pixel wide HUD
+  line survives at step 2 and is dilated back at step 4), which cuts the color conversions and
+  the Hough transform by step^2. The hits are then refined at full resolution in a small window
+  around them, so the result has the full resolution accuracy.
+
+  PyramidCircleFinder is the circle search of EDAutopilot._find_target_circle, the white percent
+  of the sun region uses a step on its ThresholdFilter (see Screen_Regions.set_pyramid_step).
+"""
+
+
+def downsample(image, step: int, dst=None):
+    """ Every step-th pixel of every step-th row (nearest neighbour resize, ~5x faster than a numpy
+    strided copy).
+    @param step: The subsample factor, 1 = the image itself.
+    @param dst: Optional output buffer of shape (h // step, w // step, ...).
+    """
+    if step <= 1:
+        return image
+    h, w = image.shape[:2]
+    return cv2.resize(image, (w // step, h // step), dst=dst, interpolation=cv2.INTER_NEAREST)
+
+
+def sorted_by_center(circles, width: float, height: float):
+    """ HoughCircles candidates (N x 3) sorted by distance to the image center. """
+    d = (circles[:, 0] - width / 2) ** 2 + (circles[:, 1] - height / 2) ** 2
+    return circles[np.argsort(d, kind='stable')]
+
+
+class PyramidCircleFinder:
+    """ Finds the HSV colored circle closest to the image center, full resolution or coarse to fine. """
+
+    def __init__(self, lower, upper, r_min: int, r_max: int, step: int = 1, margin: int = 6,
+                 max_candidates: int = 3, dp: float = 1.2, param1: int = 50, param2: int = 20):
+        """
+        @param lower: Lower HSV bound of the circle color (inclusive).
+        @param upper: Upper HSV bound of the circle color (inclusive).
+        @param r_min: Min radius in full resolution pixels.
+        @param r_max: Max radius in full resolution pixels.
+        @param step: Subsample factor of the coarse pass, 1 = full resolution only.
+        @param margin: Extra pixels around the coarse circle for the refine window.
+        @param max_candidates: Coarse candidates refined (closest to the center first) before giving up.
+        @param dp, param1, param2: HoughCircles parameters of the full resolution search.
+        """
+        self.lower = np.array(lower, dtype=np.uint8)
+        self.upper = np.array(upper, dtype=np.uint8)
+        self.r_min = r_min
+        self.r_max = r_max
+        self.step = step
+        self.margin = margin
+        self.max_candidates = max_candidates
+        self.dp = dp
+        self.param1 = param1
+        self.param2 = param2
+        self.refine_count = 0  # Refine windows searched
+        self.reject_count = 0  # Coarse candidates not confirmed at full resolution
+        self.window_mask = None  # Blurred mask of the last find_near window
+        self.classifier = None  # ColorClassifier of the circle color, see use_classes
+        self.class_name = None
+
+    def use_classes(self, classes, name: str | None):
+        """ Take the circle color mask from a color class lookup instead of HSV + inRange.
+        @param classes: A ColorClasses, or None for HSV + inRange.
+        @param name: The class of the circle color (its range may be swap_rb, for a native capture).
+        """
+        from src.screen.ColorLUT import ColorClassifier  # ColorLUT imports RegionFilter, which imports this module
+        self.classifier = ColorClassifier(classes) if classes is not None and name is not None else None
+        self.class_name = name
+
+    def color_mask(self, image):
+        """ In range mask of the image (a new array). """
+        if self.classifier is not None:
+            return self.classifier.mask(self.class_name, self.classifier(image))
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        return cv2.inRange(hsv, self.lower, self.upper)
+
+    def mask(self, image, blur: int = 5):
+        """ Blurred in range mask of the image. """
+        return cv2.GaussianBlur(self.color_mask(image), (blur, blur), 1)
+
+    def _hough(self, mask, min_dist: int, r_min: int, r_max: int, param2: int):
+        circles = cv2.HoughCircles(mask, cv2.HOUGH_GRADIENT, dp=self.dp, minDist=max(1, min_dist),
+                                   param1=self.param1, param2=param2, minRadius=r_min, maxRadius=r_max)
+        return None if circles is None else circles[0]
+
+    def find_full(self, image) -> tuple[float, float, float] | None:
+        """ Full resolution search, the circle closest to the image center.
+        @return: (center x, center y, radius) or None.
+        """
+        img_h, img_w = image.shape[:2]
+        circles = self._hough(self.mask(image), img_w // 2, self.r_min, self.r_max, self.param2)
+        if circles is None:
+            return None
+        cx, cy, r = sorted_by_center(circles, img_w, img_h)[0]
+        return float(cx), float(cy), float(r)
+
+    def find_coarse(self, image):
+        """ Circle candidates of the subsampled image, closest to the center first, in full resolution pixels.
+        @return: N x 3 array of (x, y, r), or None.
+        """
+        step = self.step
+        small = downsample(image, step)
+        mask = self.color_mask(small)
+        if step > 2:
+            mask = cv2.dilate(mask, None)  # Reconnect the line broken by the subsample
+        mask = cv2.GaussianBlur(mask, (3, 3), 1)
+        h, w = small.shape[:2]
+        circles = self._hough(mask, self.r_min // step, self.r_min // step - 1, -(-self.r_max // step) + 1,
+                              max(8, self.param2 // step))
+        if circles is None:
+            return None
+        return sorted_by_center(circles, w, h)[:self.max_candidates] * step
+
+    def find(self, image) -> tuple[float, float, float] | None:
+        """ The circle closest to the image center. With step > 1 the coarse candidates are refined at
+        full resolution, closest first, the first confirmed one is returned.
+        @return: (center x, center y, radius) in full resolution pixels, or None.
+        """
+        if self.step <= 1:
+            return self.find_full(image)
+        candidates = self.find_coarse(image)
+        if candidates is None:
+            return None
+
+        reach = self.r_max + self.margin + self.step
+        for cx, cy, _ in candidates:
+            self.refine_count = self.refine_count + 1
+            circle = self.find_near(image, cx, cy, reach)
+            if circle is None:
+                self.reject_count = self.reject_count + 1
+                continue
+            return circle
+        return None
+
+    def find_near(self, image, x: float, y: float, reach: int) -> tuple[float, float, float] | None:
+        """ Full resolution search in the window of +/- reach pixels around (x, y), the circle closest
+        to (x, y). The blurred mask of the window is kept in window_mask.
+        @return: (center x, center y, radius) in image pixels, or None.
+        """
+        img_h, img_w = image.shape[:2]
+        left = max(0, int(x - reach))
+        top = max(0, int(y - reach))
+        window = image[top:min(img_h, int(y + reach) + 1), left:min(img_w, int(x + reach) + 1)]
+        self.window_mask = self.mask(window)
+        circles = self._hough(self.window_mask, window.shape[1] // 2, self.r_min, self.r_max, self.param2)
+        if circles is None:
+            return None
+        d = (circles[:, 0] + left - x) ** 2 + (circles[:, 1] + top - y) ** 2
+        cx, cy, r = circles[int(np.argmin(d))]
+        return float(cx) + left, float(cy) + top, float(r)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from src.screen.Pyramid import downsample
+
+"""
+File:RegionFilter.py
+
+Description:
+  Precompiled region filter pipelines. Screen_Regions compiles its _REGION_FILTERS table into one
+  pipeline per region at load time. A pipeline holds its OpenCV objects (i.e. the CLAHE instance),
+  its constants as numpy arrays and preallocated buffers sized to the region, and runs every step
+  with dst= into those buffers, so filtering a region allocates nothing.
+
+  The filtered image returned is a buffer of the pipeline, valid until its next call. Copy it to
+  keep it. A pipeline is not thread safe, use one per thread.
+
+  Channel order is kept as given: a 4 channel (BGRA) image only drops its alpha channel, a 3
+  channel image is used as is (the HSV ranges of some regions are tuned on R/B swapped images).
+"""
+
+
+class RegionFilter:
+    """ Base pipeline. Buffers are allocated on the first call (or up front with prepare) and
+    reallocated only if a larger image comes (smaller ones get a view of the buffer). """
+
+    def __init__(self, scale: float = 1.0, step: int = 1):
+        """
+        @param scale: Resize factor applied first (INTER_LINEAR), 1.0 = none.
+        @param step: Subsample factor applied before the resize (coarse pyramid level), 1 = none.
+        """
+        self.scale = scale
+        self.step = step
+        self._buffers = {}  # name: the buffer of the last shape
+        self._bases = {}  # name: the flat memory of the buffers, the largest size so far
+
+    def _buffer(self, name: str, shape, dtype=np.uint8) -> np.ndarray:
+        """ The named buffer with the given shape (and dtype). It grows to the largest shape asked for,
+        a smaller shape is a contiguous view of it, so a filter alternating between a region and windows
+        of it (i.e. CircleTracker) does not reallocate. """
+        shape = tuple(shape)
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            size = int(np.prod(shape))
+            base = self._bases.get(name)
+            if base is None or base.size < size or base.dtype != dtype:
+                base = np.empty(size, dtype=dtype)
+                self._bases[name] = base
+            buf = base[:size].reshape(shape)
+            self._buffers[name] = buf
+        return buf
+
+    def prepare(self, width: int, height: int, channels: int = 4):
+        """ Allocate the buffers for a region size up front, by filtering a blank image. """
+        self(np.zeros((height, width, channels), dtype=np.uint8))
+
+    def _scaled(self, image):
+        if self.step > 1:
+            h, w = image.shape[:2]
+            dst = self._buffer('step', (h // self.step, w // self.step) + image.shape[2:])
+            image = downsample(image, self.step, dst)
+        if self.scale == 1.0:
+            return image
+        h, w = image.shape[:2]
+        size = (int(round(w * self.scale)), int(round(h * self.scale)))
+        dst = self._buffer('scaled', (size[1], size[0]) + image.shape[2:])
+        return cv2.resize(image, size, dst=dst, interpolation=cv2.INTER_LINEAR)
+
+    def _bgr(self, image):
+        """ The image with 3 channels, alpha dropped into a buffer if needed. """
+        if image.ndim == 3 and image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR, dst=self._buffer('bgr', image.shape[:2] + (3,)))
+        return image
+
+    def _gray(self, image):
+        """ The image converted to gray into a buffer (as is if already gray). """
+        if image.ndim == 2:
+            return image
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(image, code, dst=self._buffer('gray', image.shape[:2]))
+
+    def __call__(self, image):
+        raise NotImplementedError
+
+
+class EqualizeFilter(RegionFilter):
+    """ Gray + CLAHE histogram equalization, improves contrast. """
+
+    def __init__(self, clip_limit: float = 2.0, tile_grid_size: tuple[int, int] = (8, 8), scale: float = 1.0,
+                 step: int = 1):
+        super().__init__(scale, step)
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+
+    def __call__(self, image):
+        gray = self._gray(self._scaled(image))
+        return self.clahe.apply(gray, dst=self._buffer('out', gray.shape))
+
+
+class ColorRangeFilter(RegionFilter):
+    """ HSV in range mask. After a call, hsv holds the HSV image of the (scaled) input. """
+
+    def __init__(self, lower, upper, scale: float = 1.0, step: int = 1):
+        """
+        @param lower: Lower HSV bound (inclusive).
+        @param upper: Upper HSV bound (inclusive).
+        """
+        super().__init__(scale, step)
+        self.lower = np.array(lower, dtype=np.uint8)
+        self.upper = np.array(upper, dtype=np.uint8)
+        self.hsv = None
+        self.bgr = None
+
+    def __call__(self, image):
+        self.bgr = self._bgr(self._scaled(image))
+        self.hsv = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV, dst=self._buffer('hsv', self.bgr.shape))
+        return cv2.inRange(self.hsv, self.lower, self.upper, dst=self._buffer('out', self.hsv.shape[:2]))
+
+
+class ThresholdFilter(RegionFilter):
+    """ Gray + binary threshold. thresh may be changed between calls. """
+
+    def __init__(self, thresh: int, scale: float = 1.0, step: int = 1):
+        super().__init__(scale, step)
+        self.thresh = thresh
+
+    def __call__(self, image):
+        gray = self._gray(self._scaled(image))
+        _, out = cv2.threshold(gray, self.thresh, 255, cv2.THRESH_BINARY, dst=self._buffer('out', gray.shape))
+        return out
+
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+"""
+File:RegionGeometry.py
+
+Description:
+  Precomputed geometry of a screen region relative to the screen center. The HUD of the target (the
+  target circle and its arc) is centered on the screen, so the arc and ring tests need the distance
+  and the angle of every region pixel from the screen center. They were recomputed per call with
+  np.sqrt over the mask pixels, and the center was hard coded to the 1080p one (960, 540).
+
+  RegionGeometry holds the screen center in region pixels and, built on first use, float32 maps of
+  the radius and angle of each pixel, an angle bin map and annulus masks of HUD radii (given at 1080p,
+  scaled to the resolution). Ring statistics then are masked reductions over the cached maps
+  (meanStdDev, countNonZero, calcHist). Screen_Regions.geometry() caches one per region, rect and
+  resolution.
+"""
+
+HUD_HEIGHT = 1080  # Screen height the HUD radii are given at
+ANGLE_BINS = 36  # Angle bins of the arc coverage (10 degrees each)
+
+
+class RegionGeometry:
+    """ Radius and angle maps of a region from the screen center. Read only once built, the maps
+    are shared by all threads. """
+
+    def __init__(self, rect, screen_size: tuple[int, int]):
+        """
+        @param rect: The region [L, T, R, B] in screen pixels.
+        @param screen_size: (width, height) of the screen in pixels.
+        """
+        self.rect = [int(v) for v in rect]
+        self.screen_size = (int(screen_size[0]), int(screen_size[1]))
+        self.width = self.rect[2] - self.rect[0]
+        self.height = self.rect[3] - self.rect[1]
+        # The screen center in region pixels (960, 540 at 1080p, as the detectors used)
+        self.center = (self.screen_size[0] / 2.0 - self.rect[0], self.screen_size[1] / 2.0 - self.rect[1])
+        self.scale = self.screen_size[1] / HUD_HEIGHT  # HUD pixels per 1080p pixel
+        self._radius = None
+        self._angle = None
+        self._angle_bins = None
+        self._annuli = {}
+
+    def _build(self):
+        xs = np.arange(self.width, dtype=np.float32) - np.float32(self.center[0])
+        ys = np.arange(self.height, dtype=np.float32) - np.float32(self.center[1])
+        dx, dy = np.meshgrid(xs, ys)
+        radius, angle = cv2.cartToPolar(dx, dy)  # Angle in radians 0..2pi, clockwise from +x (y is down)
+        radius.setflags(write=False)
+        angle.setflags(write=False)
+        self._angle = angle
+        self._radius = radius
+
+    @property
+    def radius(self) -> np.ndarray:
+        """ float32 map of the distance of each pixel from the screen center. """
+        if self._radius is None:
+            self._build()
+        return self._radius
+
+    @property
+    def angle(self) -> np.ndarray:
+        """ float32 map of the angle (radians, 0..2pi, clockwise from right) of each pixel around the
+        screen center. """
+        if self._angle is None:
+            self._build()
+        return self._angle
+
+    @property
+    def angle_bins(self) -> np.ndarray:
+        """ uint8 map of the ANGLE_BINS angle bin of each pixel. """
+        if self._angle_bins is None:
+            bins = np.minimum(self.angle * np.float32(ANGLE_BINS / (2 * np.pi)), ANGLE_BINS - 1).astype(np.uint8)
+            bins.setflags(write=False)
+            self._angle_bins = bins
+        return self._angle_bins
+
+    def annulus(self, r_min: float, r_max: float) -> np.ndarray:
+        """ uint8 mask (0/255) of the pixels between two HUD radii from the screen center. Cached.
+        @param r_min: Min radius in 1080p pixels (scaled to the resolution).
+        @param r_max: Max radius in 1080p pixels (scaled to the resolution).
+        """
+        key = (float(r_min), float(r_max))
+        mask = self._annuli.get(key)
+        if mask is None:
+            lower, upper = r_min * self.scale, r_max * self.scale
+            mask = cv2.inRange(self.radius, lower, upper)
+            mask.setflags(write=False)
+            self._annuli[key] = mask
+        return mask
+
+    def radius_stats(self, mask) -> tuple[int, float, float]:
+        """ Distance from the screen center of the set pixels of a mask.
+        @param mask: uint8 mask of the region size.
+        @return: (pixel count, mean radius, radius std), (0, 0, 0) for an empty mask.
+        """
+        count = cv2.countNonZero(mask)
+        if count == 0:
+            return 0, 0.0, 0.0
+        mean, std = cv2.meanStdDev(self.radius, mask=mask)
+        return count, float(mean[0, 0]), float(std[0, 0])
+
+    def arc_coverage(self, mask, r_min: float, r_max: float) -> float:
+        """ Fraction of the ANGLE_BINS angles around the screen center with mask pixels between two HUD
+        radii, ~ the visible fraction of a ring of that band (an arc clipped by the region counts its
+        part only).
+        @param r_min: Min radius in 1080p pixels.
+        @param r_max: Max radius in 1080p pixels.
+        """
+        band = cv2.bitwise_and(mask, self.annulus(r_min, r_max))
+        hist = cv2.calcHist([self.angle_bins], [0], band, [ANGLE_BINS], [0, ANGLE_BINS])
+        return float(np.count_nonzero(hist)) / ANGLE_BINS
+
+    def center_offset(self, x: float, y: float) -> tuple[float, float]:
+        """ Position of a region pixel relative to the screen center, in percent of the half screen.
+        @return: (x, y) in -100..+100, 0 = screen center, y up positive.
+        """
+        half_w, half_h = self.screen_size[0] / 2.0, self.screen_size[1] / 2.0
+        return (x - self.center[0]) / half_w * 100.0, -(y - self.center[1]) / half_h * 100.0
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import threading
+from types import MappingProxyType
+
+from src.core.EDlogger import logger
+
+"""
+File:RegionRegistry.py
+
+Description:
+  Loads all screen region configs (configs/screen_regions/res_W_H/*.json) and the OCR calibration
+  (configs/ocr_calibration.json) once, and watches them for changes. The regions of a resolution
+  and ship are published as an immutable, versioned RegionSnapshot with the pixel slices of every
+  region precomputed. A changed file (i.e. saved by configs/calibrate/paint_regions.py) is parsed
+  again and bumps the version. Readers (Screen_Regions, load_calibrated_regions) never lock, they
+  take the current snapshot, a new one replaces it as a whole.
+
+  The files are watched by polling their modification time, from poll() or from the watcher thread
+  (start/stop). A file that fails to parse (i.e. saved half way) keeps its previous contents.
+"""
+
+
+def _freeze(value):
+    """ Read only copy of parsed JSON, dicts as MappingProxyType and lists as tuples. """
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class RegionSnapshot:
+    """ Immutable regions of one resolution and ship at a registry version. """
+
+    __slots__ = ('version', 'resolution', 'ship_type', 'path', 'regions', 'slices')
+
+    def __init__(self, version: int, resolution: tuple[int, int], ship_type, path: str, regions: dict):
+        """
+        @param regions: {region name: [L, T, R, B]} in pixels of the client area.
+        """
+        rects = {name: tuple(rect) for name, rect in regions.items()}
+        slices = {}
+        for name, rect in rects.items():
+            left, top, right, bottom = [int(v) for v in rect]
+            slices[name] = (slice(top, bottom), slice(left, right))
+        set_attr = object.__setattr__
+        set_attr(self, 'version', version)
+        set_attr(self, 'resolution', resolution)
+        set_attr(self, 'ship_type', ship_type)
+        set_attr(self, 'path', path)
+        set_attr(self, 'regions', MappingProxyType(rects))
+        set_attr(self, 'slices', MappingProxyType(slices))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RegionSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RegionSnapshot is immutable")
+
+    def __repr__(self):
+        return f"RegionSnapshot(v{self.version}, {self.resolution}, {self.path}, {len(self.regions)} regions)"
+
+
+class RegionRegistry:
+    """ The parsed region config and calibration files, with one snapshot per (width, height, ship). """
+
+    def __init__(self, regions_dir: str = 'configs/screen_regions',
+                 calibration_file: str = 'configs/ocr_calibration.json', poll_interval: float = 1.0):
+        """
+        @param regions_dir: Folder with one res_W_H sub folder per resolution.
+        @param calibration_file: The OCR calibration json file.
+        @param poll_interval: Seconds between file checks of the watcher thread.
+        """
+        self.regions_dir = regions_dir
+        self.calibration_file = calibration_file
+        self.poll_interval = poll_interval
+        self.version = 0
+        self.parse_count = 0  # Number of files parsed, i.e. for tests and stats
+        self._files = {}  # path -> ((mtime_ns, size), frozen contents)
+        self._snapshots = {}  # (width, height, ship_type) -> RegionSnapshot, replaced as a whole
+        self._lock = threading.Lock()  # Writers only
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.poll()
+
+    def add_listener(self, fn):
+        """ Call fn(version) from the polling thread after changed files were loaded. """
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _watched_files(self) -> list[str]:
+        paths = sorted(glob.glob(os.path.join(self.regions_dir, 'res_*_*', '*.json')))
+        if os.path.exists(self.calibration_file):
+            paths.append(self.calibration_file)
+        return paths
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self) -> bool:
+        """ Parse the new and changed files, drop the removed ones. Bumps the version on any change.
+        @return: True if anything changed.
+        """
+        with self._lock:
+            files = dict(self._files)
+            changed = False
+            paths = self._watched_files()
+            for path in set(files) - set(paths):
+                del files[path]
+                changed = True
+                logger.info(f"RegionRegistry: {path} removed")
+            for path in paths:
+                stamp = self._stamp(path)
+                old = files.get(path)
+                if stamp is None or (old is not None and old[0] == stamp):
+                    continue
+                try:
+                    with open(path, 'r') as f:
+                        data = json.load(f)
+                    self.parse_count = self.parse_count + 1
+                except (OSError, ValueError) as e:
+                    logger.warning(f"RegionRegistry: cannot load {path}, keeping the previous version: {e}")
+                    continue
+                files[path] = (stamp, _freeze(data))
+                changed = True
+                if old is not None:
+                    logger.info(f"RegionRegistry: reloaded {path}")
+            if not changed:
+                return False
+            self._files = files
+            self._snapshots = {}
+            self.version = self.version + 1
+            version = self.version
+
+        for fn in list(self._listeners):
+            fn(version)
+        return True
+
+    def calibration(self):
+        """ The OCR calibration {key: {'rect': (L, T, R, B)}} (read only), empty if there is no file. """
+        entry = self._files.get(self.calibration_file)
+        return entry[1] if entry is not None else MappingProxyType({})
+
+    def snapshot(self, width: int, height: int, ship_type=None) -> RegionSnapshot | None:
+        """ The current regions of a resolution, from the ship specific config if there is one, else
+        from default.json. Built once per version, lock free if already built.
+        @return: The snapshot, or None if there is no config for the resolution.
+        """
+        key = (width, height, ship_type)
+        snap = self._snapshots.get(key)
+        if snap is not None:
+            return snap
+
+        with self._lock:
+            files = self._files
+            base_dir = os.path.join(self.regions_dir, f'res_{width}_{height}')
+            candidates = []
+            if ship_type:
+                candidates.append(os.path.join(base_dir, f'{ship_type}.json'))
+            candidates.append(os.path.join(base_dir, 'default.json'))
+            for path in candidates:
+                if path in files:
+                    regions = {name: info['rect'] for name, info in files[path][1]['regions'].items()}
+                    snap = RegionSnapshot(self.version, (width, height), ship_type, path, regions)
+                    self._snapshots = {**self._snapshots, key: snap}
+                    return snap
+        return None
+
+    def start(self):
+        """ Start the watcher thread, if not running. """
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="RegionWatcher", daemon=True)
+        self._thread.start()
+        logger.debug(f"RegionRegistry watching {self.regions_dir} every {self.poll_interval}s")
+
+    def stop(self, timeout: float = 1.0):
+        """ Stop the watcher thread and wait for it to exit. """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"RegionRegistry: poll failed: {e}")
+
+
+_default_registry = None
+
+
+def get_region_registry() -> RegionRegistry:
+    """ The shared registry of the configs folder, created (and loaded) on first use. """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = RegionRegistry()
+    return _default_registry
+
+
+def set_region_registry(registry: RegionRegistry | None):
+    """ Replace the shared registry, i.e. with one of a test folder. None = create a new one on next use. """
+    global _default_registry
+    _default_registry = registry
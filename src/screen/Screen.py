@@ -1,16 +1,19 @@
 from __future__ import annotations
+import threading
+import time
 import typing
 from copy import copy
 
-import cv2
-import win32con
-import win32gui
-from numpy import array
-import mss
+from numpy import asarray
 import json
 
 from src.core.EDlogger import logger
-from src.screen.Screen_Regions import Quad
+from src.screen.CaptureBackend import CaptureBackend, MssBackend
+from src.screen.CaptureThread import CaptureThread
+from src.screen.Frame import Frame
+from src.screen.ImageFormat import FMT_BGR, NATIVE_FORMAT, convert_image
+from src.screen.Screen_Regions import Quad, regions_pct_to_pix
+from src.screen.WindowTracker import WindowTracker, elite_dangerous_window, get_window_tracker
 
 """
 File:Screen.py    
@@ -27,43 +30,11 @@ Author: sumzer0@yahoo.com
 #    bbox = win32gui.GetWindowRect(hwnd)     will also then give me the resolution of the image
 #     img = ImageGrab.grab(bbox)
 
-elite_dangerous_window = "Elite - Dangerous (CLIENT)"
-
 
 def set_focus_elite_window():
     """ set focus to the ED window, if ED does not have focus then the keystrokes will go to the window
-    that does have focus. Uses Alt key trick to bypass Windows SetForegroundWindow restrictions. """
-    ed_title = "Elite - Dangerous (CLIENT)"
-
-    fg_hwnd = win32gui.GetForegroundWindow()
-    fg_title = win32gui.GetWindowText(fg_hwnd)
-    if fg_title == ed_title:
-        return
-
-    handle = win32gui.FindWindow(0, ed_title)
-    if handle == 0:
-        logger.warning("set_focus: ED window not found!")
-        return
-
-    try:
-        import ctypes
-        # Attach to foreground thread so we're allowed to call SetForegroundWindow
-        current_thread = ctypes.windll.kernel32.GetCurrentThreadId()
-        fg_thread = ctypes.windll.user32.GetWindowThreadProcessId(fg_hwnd, None)
-        if current_thread != fg_thread:
-            ctypes.windll.user32.AttachThreadInput(current_thread, fg_thread, True)
-        win32gui.ShowWindow(handle, win32con.SW_NORMAL)
-        win32gui.SetForegroundWindow(handle)
-        if current_thread != fg_thread:
-            ctypes.windll.user32.AttachThreadInput(current_thread, fg_thread, False)
-        # Verify
-        new_fg = win32gui.GetWindowText(win32gui.GetForegroundWindow())
-        if new_fg != ed_title:
-            logger.warning(f"set_focus: FAILED, foreground is '{new_fg}'")
-        else:
-            logger.info(f"set_focus: ED focused successfully")
-    except Exception as ex:
-        logger.warning(f"set_focus_elite_window failed: {ex}")
+    that does have focus. Uses the cached window handle of the shared WindowTracker. """
+    get_window_tracker().focus()
 
 
 def crop_image_by_pct(image, quad: Quad):
@@ -71,13 +42,11 @@ def crop_image_by_pct(image, quad: Quad):
     Rect is an array of crop % [0.10, 0.20, 0.90, 0.95] = [Left, Top, Right, Bottom]
     Returns the cropped image. """
     # Existing size
-    h, w, ch = image.shape
-    # Make a local copy
-    q = copy(quad)
-    # Scale from percent to pixels
-    q.scale_from_origin(w, h)
+    h, w = image.shape[:2]
+    # Scale from percent to pixels, no copy of the quad
+    left, top, right, bottom = quad.to_pixel_rect(w, h)
     # Crop image
-    cropped = crop_image_pix(image, q)
+    cropped = image[top:bottom, left:right]  # i.e. [y:y+h, x:x+w]
     return cropped
 
 
@@ -91,11 +60,21 @@ def crop_image_pix(image, quad: Quad):
 
 
 class Screen:
-    def __init__(self, cb):
+    CAPTURE_WAIT = 0.5  # Max seconds to wait for a frame from the capture thread
+
+    def __init__(self, cb, backend: CaptureBackend | None = None, window: WindowTracker | None = None):
+        """
+        @param cb: The GUI callback.
+        @param backend: The capture backend, default live capture with mss. Replay and synthetic
+        backends define the client area themselves, no ED window is needed.
+        @param window: The ED window tracker, default the shared tracker.
+        """
         self.ap_ckb = cb
-        self.mss = mss.mss()
+        self.backend = backend if backend is not None else MssBackend()
+        self.window = window if window is not None else get_window_tracker()
         self.using_screen = True  # True to use screen, false to use an image. Set screen_image to the image
         self._screen_image = None  # Screen image captured from screen, or loaded by user for testing.
+        self._screen_image_fmt = FMT_BGR  # Pixel format of _screen_image
         self.screen_width = 0
         self.screen_height = 0
         self.screen_left = 0
@@ -104,8 +83,22 @@ class Screen:
         self.aspect_ratio = 0
         self.mon = None
 
+        # Frame cache. All region reads within the TTL are served as views of one grab.
+        self.frame_rect = None  # [L, T, R, B] in pixels grabbed for the cached frame, None = full client area
+        self._frame = None  # The last cached Frame
+        self._frame_id = 0  # Incrementing id of the cached frames
+        self._frame_lock = threading.Lock()
+        self.capture_thread = None  # Optional CaptureThread filling a ring buffer of frames
+        self.last_frame_id = 0  # Frame id and timestamp of the last get_screen_region, for the session recorder
+        self.last_frame_time = 0.0
+
+        self._load_scales()
+        if self.backend.size() is not None:
+            self.set_backend(self.backend)
+            return
+
         # Find ED window position to determine which monitor it is on
-        ed_rect = self.get_elite_window_rect()
+        ed_rect = self.window.get_window_rect()
         if ed_rect is None:
             msg = f"Could not find window '{elite_dangerous_window}'. Once Elite Dangerous is running, restart EDAP."
             self.ap_ckb('log', f"ERROR: {msg}")
@@ -114,10 +107,10 @@ class Screen:
             logger.debug(f'Found Elite Dangerous window position: {ed_rect}')
 
         # Use ED window client area for screen dimensions (handles windowed/borderless correctly)
-        ed_client_rect = self.get_elite_client_rect()
+        ed_client_rect = self.window.get_client_rect()
 
         # Examine all monitors to determine match with ED
-        self.mons = self.mss.monitors
+        self.mons = self.backend.monitors
         mon_num = 0
         default = True
         for item in self.mons:
@@ -127,7 +120,7 @@ class Screen:
                     if item['left'] == ed_rect[0] and item['top'] == ed_rect[1]:
                         # Get information of monitor
                         self.monitor_number = mon_num
-                        self.mon = self.mss.monitors[self.monitor_number]
+                        self.mon = self.mons[self.monitor_number]
                         default = False
 
                         # Use ED client area dimensions instead of monitor dimensions
@@ -151,7 +144,7 @@ class Screen:
             # Store the first monitor incase we need it as default
             if mon_num == 1:
                 self.monitor_number = mon_num
-                self.mon = self.mss.monitors[self.monitor_number]
+                self.mon = self.mons[self.monitor_number]
                 if ed_client_rect is not None:
                     self.screen_width = ed_client_rect[2] - ed_client_rect[0]
                     self.screen_height = ed_client_rect[3] - ed_client_rect[1]
@@ -174,6 +167,11 @@ class Screen:
             self.ap_ckb('log', f"ERROR: {msg}")
             logger.error(msg)
 
+        self._update_scale()
+        self.window.add_listener(self._on_window_changed)
+
+    def _load_scales(self):
+        """ Load the resolution to scale table. """
         # Add new screen resolutions here with tested scale factors
         # this table will be default, overwritten when loading resolution.json file
         self.scales = {  # scaleX, scaleY
@@ -201,6 +199,8 @@ class Screen:
             self.scales = ss
             logger.debug("read json:"+str(ss))
 
+    def _update_scale(self):
+        """ Set scaleX/Y for the current screen size. """
         # try to find the resolution/scale values in table
         # if not, then take current screen size and divide it out by 3440 x1440
         try:
@@ -217,58 +217,74 @@ class Screen:
         #     self.scaleX = self.scales['Calibrated'][0]
         # if self.scales['Calibrated'][1] != -1.0:
         #     self.scaleY = self.scales['Calibrated'][1]
-        
+
         logger.debug('screen size: w='+str(self.screen_width)+" h="+str(self.screen_height))
         logger.debug('screen position: x='+str(self.screen_left)+" y="+str(self.screen_top))
         logger.debug('Default scale X, Y: '+str(self.scaleX)+", "+str(self.scaleY))
 
+    def set_backend(self, backend: CaptureBackend):
+        """ Capture from another backend. Backends defining their size (replay, synthetic) set the
+        client area to that size at (0, 0).
+        @param backend: The new backend.
+        """
+        self.stop_capture_thread()
+        self.backend = backend
+        self.using_screen = True
+        backend_size = backend.size()
+        if backend_size is not None:
+            self.screen_width, self.screen_height = backend_size
+            self.screen_left = 0
+            self.screen_top = 0
+            self.monitor_number = 1
+            self.mons = backend.monitors
+            self.mon = self.mons[1]
+            self.aspect_ratio = self.screen_width / self.screen_height
+            self._update_scale()
+        self.invalidate_frame()
+
     @staticmethod
     def get_elite_window_rect() -> typing.Tuple[int, int, int, int] | None:
         """ Gets the ED window rectangle.
         Returns (left, top, right, bottom) or None.
         """
-        hwnd = win32gui.FindWindow(None, elite_dangerous_window)
-        if hwnd:
-            rect = win32gui.GetWindowRect(hwnd)
-            return rect
-        else:
-            return None
+        return get_window_tracker().get_window_rect()
 
     @staticmethod
     def get_elite_client_rect() -> typing.Tuple[int, int, int, int] | None:
         """ Gets the ED client area rectangle (game content, excluding title bar/borders).
         Returns (left, top, right, bottom) in screen coordinates, or None.
         """
-        hwnd = win32gui.FindWindow(None, elite_dangerous_window)
-        if hwnd:
-            try:
-                client_rect = win32gui.GetClientRect(hwnd)  # relative to window
-                # Convert to screen coordinates
-                import ctypes
-                class POINT(ctypes.Structure):
-                    _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
-                pt = POINT(0, 0)
-                ctypes.windll.user32.ClientToScreen(hwnd, ctypes.byref(pt))
-                left = pt.x
-                top = pt.y
-                right = left + client_rect[2]
-                bottom = top + client_rect[3]
-                logger.debug(f'ED client rect: ({left},{top},{right},{bottom})')
-                return (left, top, right, bottom)
-            except Exception as e:
-                logger.warning(f'get_elite_client_rect failed: {e}')
-                return None
-        return None
+        return get_window_tracker().get_client_rect()
 
     @staticmethod
     def elite_window_exists() -> bool:
         """ Does the ED Client Window exist (i.e. is ED running)
         """
-        hwnd = win32gui.FindWindow(None, elite_dangerous_window)
-        if hwnd:
-            return True
-        else:
-            return False
+        return get_window_tracker().exists()
+
+    def _on_window_changed(self, old_rect, new_rect):
+        """ WindowTracker listener. Follows a moved window, a resize needs the regions reloaded. """
+        if new_rect is None or not self.using_screen or self.backend.size() is not None:
+            return
+        width = new_rect[2] - new_rect[0]
+        height = new_rect[3] - new_rect[1]
+        if (width, height) != (self.screen_width, self.screen_height):
+            msg = (f"Elite Dangerous window resized from {self.screen_width}x{self.screen_height} to "
+                   f"{width}x{height}. Restart EDAP.")
+            self.ap_ckb('log', f"WARNING: {msg}")
+            logger.warning(msg)
+            return
+        self.screen_left = new_rect[0]
+        self.screen_top = new_rect[1]
+        mon_num = self.window.monitor_index(self.mons)
+        if mon_num is not None:
+            self.monitor_number = mon_num
+            self.mon = self.mons[mon_num]
+        logger.info(f'ED client area moved to ({self.screen_left},{self.screen_top})')
+        # Drop frames grabbed at the old position. No lock, may be called from a grab holding it.
+        self._frame = None
+        if self.capture_thread is not None:
+            self.capture_thread.ring.clear()
 
     def write_config(self, data, fileName='./configs/resolution.json'):
         if data is None:
@@ -290,43 +306,173 @@ class Screen:
         return s
 
     # reg defines a box as a percentage of screen width and height
-    def get_screen_region(self, reg, rgb=True):
-        image = self.get_screen(int(reg[0]), int(reg[1]), int(reg[2]), int(reg[3]), rgb)
+    def get_screen_region(self, reg, fmt: str = NATIVE_FORMAT, ttl: float = 0.0, newer_than: float | None = None):
+        """ Get screen region from co-ords in pixels [L, T, R, B].
+        @param reg: The region rect in pixels.
+        @param fmt: The pixel format wanted (see ImageFormat). Converted at most once.
+        @param ttl: If > 0, the region is cut from the cached frame when the frame is not older than this
+        (in seconds), so several regions read within one control tick come from the same grab.
+        @param newer_than: If set and the capture thread runs, the region is cut from the first frame
+        captured after this time (perf_counter). Without the capture thread a direct grab is newer anyway.
+        """
+        frame = None
+        thread = self.capture_thread  # The ring of volatile frames, kept if the thread is stopped meanwhile
+        if newer_than is not None and self._capture_running():
+            frame = thread.ring.wait_after(newer_than, self.CAPTURE_WAIT)
+        elif ttl > 0.0:
+            frame = self.get_frame(ttl)
+        if frame is not None:
+            image = frame.view(reg[0], reg[1], reg[2], reg[3])
+            if image is not None:
+                if frame.volatile and fmt == frame.fmt:
+                    # Ring buffer slots get reused by the capture thread, keep a copy
+                    image = image.copy()
+                else:
+                    image = convert_image(image, frame.fmt, fmt)
+                # The slot may have been rewritten while copying (i.e. the oldest frame of a full ring),
+                # then the copy is torn and a direct grab is taken instead
+                if not frame.volatile or thread is None or thread.ring.is_current(frame):
+                    self.last_frame_id = frame.frame_id
+                    self.last_frame_time = frame.timestamp
+                    return image
+                logger.debug("get_screen_region: frame overwritten while read, grabbing directly")
+
+        self._frame_id = self._frame_id + 1
+        self.last_frame_id = self._frame_id
+        self.last_frame_time = time.perf_counter()
+        image = self.get_screen(int(reg[0]), int(reg[1]), int(reg[2]), int(reg[3]), fmt)
         return image
 
-    def get_screen(self, x_left, y_top, x_right, y_bot, rgb=True):    # if absolute need to scale??
-        """ Get screen from co-ords in pixels."""
-        monitor = {
+    def set_frame_rect(self, rect):
+        """ Set the area grabbed for the cached frame, normally the union of the active regions.
+        @param rect: [L, T, R, B] in pixels, or None for the full client area.
+        """
+        with self._frame_lock:
+            self.frame_rect = rect
+            self._frame = None
+        if self.capture_thread is not None:
+            self.capture_thread.ring.clear()
+
+    def invalidate_frame(self):
+        """ Drop the cached frame, so the next cached read grabs a new one. """
+        with self._frame_lock:
+            self._frame = None
+
+    def get_frame(self, ttl: float = 0.0, force: bool = False) -> Frame:
+        """ Get the cached frame, grabbing a new one if it is older than the TTL.
+        With the capture thread running, its latest frame is used when fresh enough (no grab at all).
+        @param ttl: Max age in seconds of the cached frame to accept.
+        @param force: Always grab a new frame.
+        @return: The Frame (image in its native format, see Frame.fmt).
+        """
+        if not force and self._capture_running():
+            frame = self.capture_thread.ring.latest()
+            if frame is not None and frame.age() <= ttl:
+                return frame
+
+        with self._frame_lock:
+            frame = self._frame
+            if force or frame is None or frame.age() > ttl:
+                frame = self._grab_frame()
+                self._frame = frame
+            return frame
+
+    def peek_frame(self, ttl: float) -> Frame | None:
+        """ The capture thread's latest or the cached frame if not older than the TTL, never grabs.
+        @param ttl: Max age in seconds of the frame to accept.
+        """
+        if self._capture_running():
+            frame = self.capture_thread.ring.latest()
+            if frame is not None and frame.age() <= ttl:
+                return frame
+        frame = self._frame
+        if frame is not None and frame.age() <= ttl:
+            return frame
+        return None
+
+    def get_frame_after(self, timestamp: float, timeout: float = CAPTURE_WAIT) -> Frame:
+        """ Get the first frame captured after the given time.
+        With the capture thread running this usually returns at once (the frame is already in the
+        ring), otherwise it waits up to timeout for it. Without the capture thread it grabs a new frame.
+        @param timestamp: The time (perf_counter) the frame must be newer than.
+        @param timeout: Max seconds to wait for the capture thread.
+        """
+        if self._capture_running():
+            frame = self.capture_thread.ring.wait_after(timestamp, timeout)
+            if frame is not None:
+                return frame
+            logger.debug("get_frame_after: no frame from capture thread, grabbing directly")
+        return self.get_frame(force=True)
+
+    def start_capture_thread(self, rate: float = 30.0, size: int = 8):
+        """ Start (or retune) the background capture thread. Not used with a static test image.
+        @param rate: Captures per second.
+        @param size: Number of frames in the ring buffer.
+        """
+        if self.capture_thread is not None and self.capture_thread.ring.size != size:
+            self.stop_capture_thread()
+        if self.capture_thread is None:
+            self.capture_thread = CaptureThread(self, rate, size)
+        self.capture_thread.rate = rate
+        self.capture_thread.start()
+
+    def stop_capture_thread(self):
+        """ Stop the background capture thread, reads go back to direct grabs. """
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.capture_thread = None
+
+    def _capture_running(self) -> bool:
+        return self.using_screen and self.capture_thread is not None and self.capture_thread.is_running()
+
+    def monitor_rect(self, x_left, y_top, x_right, y_bot) -> dict:
+        """ The mss monitor dict of a client area rect in pixels. """
+        return {
             "top": self.screen_top + int(y_top),
             "left": self.screen_left + int(x_left),
             "width": int(x_right - x_left),
             "height": int(y_bot - y_top),
             "mon": self.monitor_number,
         }
-        image = array(self.mss.grab(monitor))
-        # TODO - mss.grab returns the image in BGR format, so no need to convert to RGB2BGR
-        if rgb:
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-        return image
-        
-    def get_screen_rect_pct(self, rect):
+
+    def _grab_frame(self) -> Frame:
+        """ Grab the frame rect (or the full client area) as a new Frame. """
+        self._frame_id = self._frame_id + 1
+        if not self.using_screen and self._screen_image is not None:
+            return Frame(self._screen_image, self._frame_id, time.perf_counter(), fmt=self._screen_image_fmt)
+
+        if self.frame_rect is not None:
+            left, top, right, bottom = [int(v) for v in self.frame_rect]
+        else:
+            left, top, right, bottom = 0, 0, self.screen_width, self.screen_height
+        image = self.get_screen(left, top, right, bottom, self.backend.fmt)
+        return Frame(image, self._frame_id, time.perf_counter(), left, top, self.backend.fmt)
+
+    def get_screen(self, x_left, y_top, x_right, y_bot, fmt: str = NATIVE_FORMAT):    # if absolute need to scale??
+        """ Get screen from co-ords in pixels.
+        @param fmt: The pixel format wanted. mss grabs BGRA, any other format costs one conversion.
+        """
+        if self.backend.size() is None:
+            self.window.poll()  # Follow a moved window, revalidates at most every poll interval
+        image = asarray(self.backend.grab(self.monitor_rect(x_left, y_top, x_right, y_bot)))
+        return convert_image(image, self.backend.fmt, fmt)
+
+    def get_screen_rect_pct(self, rect, fmt: str = FMT_BGR):
         """ Grabs a screenshot and returns the selected region as an image.
         @param rect: A rect array ([L, T, R, B]) in percent (0.0 - 1.0)
+        @param fmt: The pixel format wanted.
         @return: An image defined by the region.
         """
         if self.using_screen:
             abs_rect = self.screen_rect_to_abs(rect)
-            image = self.get_screen(abs_rect[0], abs_rect[1], abs_rect[2], abs_rect[3])
-            # TODO delete this line when COLOR_RGB2BGR is removed from get_screen()
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            return image
+            return self.get_screen(abs_rect[0], abs_rect[1], abs_rect[2], abs_rect[3], fmt)
         else:
             if self._screen_image is None:
                 return None
 
             q = Quad.from_rect(rect)
             image = crop_image_by_pct(self._screen_image, q)
-            return image
+            return convert_image(image, self._screen_image_fmt, fmt)
 
     def screen_rect_to_abs(self, rect):
         """ Converts and array of real percentage screen values to int absolutes.
@@ -337,6 +483,13 @@ class Screen:
                     int(rect[2] * self.screen_width), int(rect[3] * self.screen_height)]
         return abs_rect
 
+    def screen_regions_pct_to_pix(self, reg: dict) -> dict:
+        """ Converts the rects of all regions from percent to int pixel slices of the client area at once.
+        @param reg: Dictionary of regions with a 'rect' [L, T, R, B] in percent (0.0 - 1.0) each.
+        @return: {region name: (slice(top, bottom), slice(left, right))}
+        """
+        return regions_pct_to_pix(reg, self.screen_width, self.screen_height)
+
     def screen_region_pct_to_pix(self, quad: Quad) -> Quad:
         """ Converts and array of real percentage screen values to int absolutes.
         @param quad: A rect array ([L, T, R, B]) in percent (0.0 - 1.0)
@@ -346,30 +499,31 @@ class Screen:
         q.scale_from_origin(self.screen_width, self.screen_height)
         return q
 
-    def get_screen_full(self):
+    def get_screen_full(self, fmt: str = FMT_BGR):
         """ Grabs a full screenshot and returns the image.
+        @param fmt: The pixel format wanted.
         """
         if self.using_screen:
-            image = self.get_screen(0, 0, self.screen_width, self.screen_height)
-            # TODO delete this line when COLOR_RGB2BGR is removed from get_screen()
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            return image
+            return self.get_screen(0, 0, self.screen_width, self.screen_height, fmt)
         else:
             if self._screen_image is None:
                 return None
 
-            return self._screen_image
+            return convert_image(self._screen_image, self._screen_image_fmt, fmt)
 
-    def set_screen_image(self, image):
+    def set_screen_image(self, image, fmt: str = FMT_BGR):
         """ Use an image instead of a screen capture. Sets the image and also sets the
         screen width and height to the image properties.
         @param image: The image to use.
+        @param fmt: The pixel format of the image (cv2.imread gives BGR).
         """
         self.using_screen = False
         self._screen_image = image
+        self._screen_image_fmt = fmt
+        self.invalidate_frame()
 
         # Existing size
-        h, w, ch = image.shape
+        h, w = image.shape[:2]
 
         # Set the screen size to the original image size, not the region size
         self.screen_width = w
@@ -1,12 +1,17 @@
 import json
 import logging
 import os
-from copy import copy
 from typing import TypedDict
 
 import numpy as np
 from numpy import array, sum
-import cv2
+
+from src.screen.ChangeDetector import RegionChangeDetector
+from src.screen.ColorLUT import ColorClassFilter
+from src.screen.ImageFormat import FMT_RGB, NATIVE_FORMAT, convert_image
+from src.screen.RegionFilter import ColorRangeFilter, EqualizeFilter, ThresholdFilter
+from src.screen.RegionGeometry import RegionGeometry
+from src.screen.RegionRegistry import get_region_registry
 
 logger = logging.getLogger('Screen_Regions')
 """
@@ -32,25 +37,26 @@ def scale_region(region_rect, sub_region_rect) -> [float, float, float, float]:
     return r.to_rect_list()
 
 
-def load_calibrated_regions(prefix: str, reg: dict):
+def load_calibrated_regions(prefix: str, reg: dict, registry=None):
     """ Read the custom region sizes from the calibration json file.
     @param prefix: The dictionary key prefix (i.e. 'EDStationServicesInShip')
     @param reg: Dictionary of regions which is modified.
+    @param registry: The RegionRegistry with the calibration, defaults to the shared one (the file is
+    parsed only when it changed, not per call).
     """
     if not prefix or prefix == '' or not reg:
         return
 
-    calibration_file = 'configs/ocr_calibration.json'
-    if os.path.exists(calibration_file):
-        with open(calibration_file, 'r') as f:
-            calibrated_regions = json.load(f)
-
+    registry = registry or get_region_registry()
+    registry.poll()  # Edits are seen without the watcher (RegionHotReload off), only a stat when unchanged
+    calibrated_regions = registry.calibration()
+    if calibrated_regions:
         # Go through all regions in this class
         for key1, value1 in reg.items():
             calibrated_key = f"{prefix}.{key1}"
             if calibrated_key in calibrated_regions:
                 # Use region details from the calibration file.
-                reg[key1]['rect'] = calibrated_regions[calibrated_key]['rect']
+                reg[key1]['rect'] = list(calibrated_regions[calibrated_key]['rect'])
 
                 # Check if this region has any sub-regions
                 for key2, value2 in reg.items():
@@ -61,6 +67,43 @@ def load_calibrated_regions(prefix: str, reg: dict):
                                                          calibrated_regions[calibrated_sub_key]['rect'])
 
 
+def rect_area(rect) -> int:
+    """ Area of a [L, T, R, B] rect in pixels. """
+    return max(0, rect[2] - rect[0]) * max(0, rect[3] - rect[1])
+
+
+def rect_union(rects) -> list[int]:
+    """ Bounding rect [L, T, R, B] of the given rects. """
+    return [min(r[0] for r in rects), min(r[1] for r in rects),
+            max(r[2] for r in rects), max(r[3] for r in rects)]
+
+
+def plan_region_grabs(rects, grab_overhead_px: int) -> list[tuple[list[int], list[int]]]:
+    """ Cluster rects into as few grabs as is cheaper. The cost of a grab is modeled as a fixed
+    overhead plus its area, both in pixels. Greedy: keep merging the pair of clusters whose merge
+    saves the most, until no merge saves anything.
+    @param rects: The [L, T, R, B] rects in pixels.
+    @param grab_overhead_px: The fixed cost of one grab, in pixels (see test/bench_ScreenCapture.py).
+    @return: [(bounding rect, [indices into rects])] one per grab.
+    """
+    clusters = [(list(rect), [i]) for i, rect in enumerate(rects)]
+    while len(clusters) > 1:
+        best = None
+        for a in range(len(clusters)):
+            for b in range(a + 1, len(clusters)):
+                union = rect_union([clusters[a][0], clusters[b][0]])
+                saving = (grab_overhead_px + rect_area(clusters[a][0]) + rect_area(clusters[b][0])
+                          - rect_area(union))
+                if saving > 0 and (best is None or saving > best[0]):
+                    best = (saving, a, b, union)
+        if best is None:
+            break
+        _, a, b, union = best
+        merged = (union, clusters[a][1] + clusters[b][1])
+        clusters = [c for i, c in enumerate(clusters) if i not in (a, b)] + [merged]
+    return clusters
+
+
 class SubRegion(TypedDict):
     """ """
     rect: list[float]
@@ -210,7 +253,7 @@ def load_ocr_calibration_data() -> dict[str, MyRegion]:
 
 
 class Screen_Regions:
-    # Map region names to their filter callback and color range
+    # Map region names to their filter pipeline (see _compile_filter) and color range
     _REGION_FILTERS = {
         'compass':       ('equalize',       None),
         'target':        ('filter_by_color', 'orange_2_color_range'),
@@ -224,11 +267,26 @@ class Screen_Regions:
         'center_text':   ('filter_by_color', 'orange_color_range'),
     }
 
-    def __init__(self, screen, ship_type=None):
+    PYRAMID_SUN_BAND = 2  # sun_percent: coarse percents within this of 'near' are computed at full resolution
+    GRAB_OVERHEAD_PX = 150000  # Fixed cost of one grab in pixels, for capture_regions (~1.5ms GDI grab vs ~0.01ms/kpx)
+
+    def __init__(self, screen, ship_type=None, registry=None):
+        """
+        @param screen: The Screen, gives the resolution.
+        @param ship_type: Ship specific region config to use if there is one (see _load_regions).
+        @param registry: The RegionRegistry to read the regions from, defaults to the shared one.
+        """
         self.screen = screen
+        self.ship_type = ship_type
+        self.registry = registry or get_region_registry()
+        self.snapshot = None  # RegionSnapshot the regions were built from
+        self._version = -1  # Registry version last checked
         self.regions_loaded = False
 
         self.sun_threshold = 125
+        self.pyramid_step = 1  # Subsample factor of the coarse sun detection, 1 = full resolution (set_pyramid_step)
+        self._sun_coarse = None  # ThresholdFilter of the coarse sun detection
+        self.color_classes = None  # ColorClasses of the color filter pipelines, None = HSV + inRange (set_color_classes)
 
         # HSV color ranges for filtering
         self.orange_color_range   = [array([0, 130, 123]),  array([25, 235, 220])]
@@ -238,135 +296,281 @@ class Screen_Regions:
         self.cyan_sc_assist_range = [array([80, 80, 80]), array([110, 255, 255])]
 
         self.reg = {}
+        self.recorder = None  # Optional SessionRecorder, gets every captured region image
+        self.change = RegionChangeDetector()  # Cached detector results of unchanged regions
+        self._grab_plans = {}  # tuple of region names -> plan_region_grabs result
+        self._geometry = {}  # region name -> RegionGeometry of its rect and the resolution
         self._load_regions(ship_type)
 
     def _load_regions(self, ship_type=None):
-        """Load screen regions from JSON config file.
+        """Load screen regions from the registry snapshot of the resolution.
         Tries ship-specific config first, falls back to default.json.
+        The new reg dict is built aside and swapped in whole, readers never see it half built.
         """
         w = self.screen.screen_width
         h = self.screen.screen_height
-        base_dir = f'configs/screen_regions/res_{w}_{h}'
-
-        config_data = None
-        # Try ship-specific config, then default
-        candidates = []
-        if ship_type:
-            candidates.append(os.path.join(base_dir, f'{ship_type}.json'))
-        candidates.append(os.path.join(base_dir, 'default.json'))
-
-        for path in candidates:
-            if os.path.exists(path):
-                with open(path, 'r') as f:
-                    config_data = json.load(f)
-                logger.info(f"Loaded screen regions from {path}")
-                break
-
-        if not config_data:
+        self.ship_type = ship_type
+        self._version = self.registry.version
+        snapshot = self.registry.snapshot(w, h, ship_type)
+
+        if snapshot is None:
             logger.warning(f"No screen region config found for resolution {w}x{h}")
+            self.snapshot = None
             self.regions_loaded = False
             return
 
         # Build reg dict from config + filter definitions
-        self.reg = {}
-        for name, region_info in config_data['regions'].items():
-            rect = region_info['rect']
+        reg = {}
+        for name, rect in snapshot.regions.items():
+            rect = list(rect)
             width = rect[2] - rect[0]
             height = rect[3] - rect[1]
 
-            filter_cb = None
-            filter_range = None
-            if name in self._REGION_FILTERS:
-                cb_name, range_name = self._REGION_FILTERS[name]
-                filter_cb = getattr(self, cb_name)
-                if range_name:
-                    filter_range = getattr(self, range_name)
-
-            self.reg[name] = {
+            reg[name] = {
                 'rect': rect,
                 'width': width,
                 'height': height,
-                'filterCB': filter_cb,
-                'filter': filter_range,
+                'slice': snapshot.slices[name],  # (rows, cols) of the region in a client area image
+                'pipeline': self._compile_filter(name, width, height),
             }
 
+        self.reg = reg
+        self._grab_plans = {}
+        self._geometry = {}
+        self.snapshot = snapshot
+        self.change.invalidate()
+        logger.info(f"Loaded screen regions from {snapshot.path} (v{snapshot.version})")
+
+        # Grab the union of all regions for the shared frame, instead of the full client area
+        self.screen.set_frame_rect(self.get_regions_union(self.reg.keys()))
+
         self.regions_loaded = True
 
+    def refresh_regions(self) -> bool:
+        """ Rebuild the regions if the registry loaded changed config files since they were built.
+        One int compare when nothing changed, called by the capture functions.
+        @return: True if the regions were rebuilt.
+        """
+        if self._version == self.registry.version:
+            return False
+        snapshot = self.registry.snapshot(self.screen.screen_width, self.screen.screen_height, self.ship_type)
+        if snapshot is not None and self.snapshot is not None and snapshot.regions == self.snapshot.regions:
+            self._version = snapshot.version  # Other files changed, same regions
+            self.snapshot = snapshot
+            return False
+        self._load_regions(self.ship_type)
+        return True
+
+    def _compile_filter(self, region_name, width, height):
+        """ Compile the region's _REGION_FILTERS entry into a RegionFilter pipeline with buffers sized
+        to the region, or None if the region has no filter. """
+        if region_name not in self._REGION_FILTERS:
+            return None
+        cb_name, range_name = self._REGION_FILTERS[region_name]
+        if cb_name == 'equalize':
+            pipeline = EqualizeFilter()
+        elif cb_name == 'filter_by_color':
+            color_range = getattr(self, range_name)
+            class_name = None
+            if self.color_classes is not None:
+                class_name = self.color_classes.find(color_range[0], color_range[1])
+            if class_name is not None:
+                pipeline = ColorClassFilter(class_name, self.color_classes)
+            else:
+                pipeline = ColorRangeFilter(color_range[0], color_range[1])
+        elif cb_name == 'filter_sun':
+            pipeline = ThresholdFilter(self.sun_threshold)
+        else:
+            logger.warning(f"No filter pipeline for '{cb_name}' of region '{region_name}'")
+            return None
+        pipeline.prepare(int(width), int(height))
+        return pipeline
+
     def reload_regions(self, ship_type=None):
-        """Reload regions, e.g. when ship changes."""
+        """Reload regions, e.g. when ship changes. Checks the config files for changes first."""
+        self.registry.poll()
         self._load_regions(ship_type)
 
-    def capture_region(self, screen, region_name, inv_col=True):
+    def get_regions_union(self, region_names):
+        """ Get the bounding rect of the named regions.
+        @param region_names: The region names.
+        @return: [L, T, R, B] in pixels, or None if no regions.
+        """
+        rects = [self.reg[name]['rect'] for name in region_names if name in self.reg]
+        if not rects:
+            return None
+        return rect_union(rects)
+
+    def geometry(self, region_name) -> RegionGeometry:
+        """ The radius and angle maps of a region from the screen center (see RegionGeometry). Cached per
+        region, rect and resolution, the maps are built on first use.
+        """
+        rect = self.reg[region_name]['rect']
+        size = (self.screen.screen_width, self.screen.screen_height)
+        geometry = self._geometry.get(region_name)
+        if geometry is None or geometry.rect != [int(v) for v in rect] or geometry.screen_size != size:
+            geometry = RegionGeometry(rect, size)
+            self._geometry[region_name] = geometry
+        return geometry
+
+    def get_grab_plan(self, region_names) -> list[tuple[list[int], list[str]]]:
+        """ The grabs to capture the named regions with, see plan_region_grabs. Cached per set of names.
+        @return: [(bounding rect [L, T, R, B], [region names])] one per grab.
+        """
+        key = tuple(region_names)
+        plan = self._grab_plans.get(key)
+        if plan is None:
+            rects = [[int(v) for v in self.reg[name]['rect']] for name in key]
+            plan = [(rect, [key[i] for i in indices])
+                    for rect, indices in plan_region_grabs(rects, self.GRAB_OVERHEAD_PX)]
+            self._grab_plans[key] = plan
+            logger.debug(f"Grab plan for {list(key)}: {plan}")
+        return plan
+
+    def capture_regions(self, screen, region_names, fmt: str | dict = NATIVE_FORMAT, ttl: float = 0.0,
+                        newer_than: float | None = None) -> dict:
+        """ Grab several regions at once, with one grab per cluster of nearby regions (see get_grab_plan).
+        The region images are views of the cluster image, they share its frame id and timestamp.
+        @param region_names: The region names.
+        @param fmt: The pixel format wanted, for all regions or as {region name: format} (missing = native).
+        When the formats differ each region in another format than native costs one conversion.
+        @param ttl: If > 0, cut the regions from the shared frame if it is not older than this (in seconds),
+        never grabs the whole shared frame for it.
+        @param newer_than: If set, cut the regions from the first frame captured after this time (perf_counter).
+        @return: {region name: unfiltered image}
+        """
+        self.refresh_regions()
+        if isinstance(fmt, dict):
+            formats = {name: fmt.get(name, NATIVE_FORMAT) for name in region_names}
+        else:
+            formats = {name: fmt for name in region_names}
+        grab_fmt = formats[region_names[0]] if len(set(formats.values())) == 1 else NATIVE_FORMAT
+        if ttl > 0.0 and screen.peek_frame(ttl) is None:
+            ttl = 0.0  # No fresh frame, a grab of the clusters only is cheaper than a new shared frame
+
+        images = {}
+        for rect, names in self.get_grab_plan(region_names):
+            block = screen.get_screen_region(rect, grab_fmt, ttl, newer_than)
+            for name in names:
+                rows, cols = self.reg[name]['slice']
+                image = block[rows.start - rect[1]:rows.stop - rect[1], cols.start - rect[0]:cols.stop - rect[0]]
+                image = convert_image(image, grab_fmt, formats[name])
+                if self.recorder is not None:
+                    self._record(screen, name, image, formats[name])
+                images[name] = image
+        return images
+
+    def capture_region(self, screen, region_name, fmt: str = NATIVE_FORMAT, ttl: float = 0.0,
+                       newer_than: float | None = None):
         """ Just grab the screen based on the region name/rect.
+        @param fmt: The pixel format wanted (see ImageFormat), defaults to the native BGRA.
+        @param ttl: If > 0, cut the region from the shared frame if not older than this (in seconds).
+        @param newer_than: If set, cut the region from the first frame captured after this time (perf_counter).
         Returns an unfiltered image. """
-        return screen.get_screen_region(self.reg[region_name]['rect'], inv_col)
-
-    def capture_region_filtered(self, screen, region_name, inv_col=True):
+        self.refresh_regions()
+        image = screen.get_screen_region(self.reg[region_name]['rect'], fmt, ttl, newer_than)
+        if self.recorder is not None:
+            self._record(screen, region_name, image, fmt)
+        return image
+
+    def _record(self, screen, region_name, image, fmt):
+        """ Pass a captured region image to the session recorder. """
+        try:
+            self.recorder.record(region_name, image, fmt, screen.last_frame_id, screen.last_frame_time,
+                                 self.reg[region_name]['rect'])
+        except Exception as e:
+            logger.warning(f"Session recording of '{region_name}' failed: {e}")
+
+    def capture_region_filtered(self, screen, region_name, fmt: str = NATIVE_FORMAT, ttl: float = 0.0):
         """ Grab screen region and call its filter routine.
-        Returns the filtered image. """
-        scr = screen.get_screen_region(self.reg[region_name]['rect'], inv_col)
-        if self.reg[region_name]['filterCB'] is None:
-            # return the screen region untouched in BGRA format.
-            return scr
-        else:
-            # return the screen region in the format returned by the filter.
-            return self.reg[region_name]['filterCB'](scr, self.reg[region_name]['filter'])
-
-    def equalize(self, image=None, noOp=None):
-        # Load the image in greyscale
-        img_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        # create a CLAHE object (Arguments are optional).  Histogram equalization, improves constrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        img_out = clahe.apply(img_gray)
-
-        return img_out
-
-    def filter_by_color(self, image, color_range):
-        """Filters an image based on a given color range.
-        Returns the filtered image. Pixels within the color range are returned
-        their original color, otherwise black."""
-        # converting from BGR to HSV color space
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        # filter passed in color low, high
-        filtered = cv2.inRange(hsv, color_range[0], color_range[1])
-
-        return filtered
-
-    # not used
-    def filter_bright(self, image=None, noOp=None):
-        equalized = self.equalize(image)
-        equalized = cv2.cvtColor(equalized, cv2.COLOR_GRAY2BGR)  #hhhmm, equalize() already converts to gray
-        equalized = cv2.cvtColor(equalized, cv2.COLOR_BGR2HSV)
-        filtered = cv2.inRange(equalized, array([0, 0, 215]), array([0, 0, 255]))  #only high value
-
-        return filtered
+        @param fmt: The pixel format passed to the filter (see ImageFormat), defaults to the native BGRA.
+        @param ttl: If > 0, cut the region from the shared frame if not older than this (in seconds).
+        Returns the filtered image, a buffer of the region's pipeline valid until its next call. """
+        self.refresh_regions()
+        scr = screen.get_screen_region(self.reg[region_name]['rect'], fmt, ttl)
+        if self.recorder is not None:
+            self._record(screen, region_name, scr, fmt)
+        # the filtered image, or the screen region untouched in the requested format.
+        return self.filter_region(region_name, scr)
 
     def set_sun_threshold(self, thresh):
         self.sun_threshold = thresh
+        pipeline = self.reg.get('sun', {}).get('pipeline')
+        if pipeline is not None:
+            pipeline.thresh = thresh
+        if self._sun_coarse is not None:
+            self._sun_coarse.thresh = thresh
+        self.change.invalidate()  # Cached sun percents are of the old threshold
+
+    def set_pyramid_step(self, step: int):
+        """ Set the coarse to fine (pyramid) mode of sun_percent.
+        @param step: Subsample factor of the coarse pass (2 or 4), 1 = full resolution only.
+        """
+        self.pyramid_step = step
+        self._sun_coarse = ThresholdFilter(self.sun_threshold, step=step) if step > 1 else None
+        self.change.invalidate()
 
-    # need to compare filter_sun with filter_bright
-    def filter_sun(self, image=None, noOp=None):
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        # set low end of filter to 25 to pick up the dull red Class L stars
-        (thresh, blackAndWhiteImage) = cv2.threshold(hsv, self.sun_threshold, 255, cv2.THRESH_BINARY)
-
-        return blackAndWhiteImage
+    def set_color_classes(self, classes):
+        """ Compile the color filter pipelines as color class lookups (see ColorLUT), the masks are the same.
+        @param classes: The ColorClasses, ranges it does not have keep HSV + inRange. None = HSV + inRange.
+        """
+        self.color_classes = classes
+        for name, region in self.reg.items():
+            region['pipeline'] = self._compile_filter(name, region['width'], region['height'])
+        self.change.invalidate()
 
     # percent the image is white
-    def sun_percent(self, screen):
-        blackAndWhiteImage = self.capture_region_filtered(screen, 'sun')
+    def filter_region(self, region_name, image):
+        """ Apply the region's filter pipeline to an image, or return it untouched if it has none.
+        The filtered image is a buffer of the pipeline, valid until its next call. """
+        pipeline = self.reg[region_name].get('pipeline')
+        if pipeline is None:
+            return image
+        return pipeline(image)
+
+    def detect_region(self, screen, region_name, detect_fn, fmt: str = NATIVE_FORMAT, ttl: float = 0.0):
+        """ Grab a region, filter it and run a detector on the filtered image. While the region is
+        unchanged (see RegionChangeDetector) the cached detector result is returned instead.
+        @param detect_fn: func(filtered_image) -> result. Also the cache key, with the region name.
+        @param fmt: The pixel format passed to the filter.
+        @param ttl: If > 0, cut the region from the shared frame if not older than this (in seconds).
+        @return: The detector result.
+        """
+        image = self.capture_region(screen, region_name, fmt, ttl)
+        key = f"{region_name}:{detect_fn.__name__}"
+        return self.change.lookup(key, image, lambda img: detect_fn(self.filter_region(region_name, img)))
 
-        wht = sum(blackAndWhiteImage == 255)
-        blk = sum(blackAndWhiteImage != 255)
+    @staticmethod
+    def white_percent(black_and_white_image) -> int:
+        """ Percentage of white (255) pixels in a mask. """
+        wht = sum(black_and_white_image == 255)
+        blk = sum(black_and_white_image != 255)
+        return int((wht / (wht + blk)) * 100)
+
+    def sun_percent(self, screen, ttl: float = 0.0, near: int | None = None):
+        """ Percentage of bright pixels in the sun region. In pyramid mode (set_pyramid_step) it is
+        estimated on the subsampled region, and computed at full resolution only if the estimate is
+        within PYRAMID_SUN_BAND of near.
+        @param near: The percent the caller decides on (i.e. 5 for sun dead ahead), None = never refine.
+        """
+        # Sun threshold is tuned on the R/B swapped image the capture used to return
+        coarse = self._sun_coarse
+        if coarse is None:
+            return self.detect_region(screen, 'sun', self.white_percent, FMT_RGB, ttl)
 
-        result = int((wht / (wht + blk)) * 100)
+        def sun_pyramid(image):
+            percent = self.white_percent(coarse(image))
+            if near is not None and abs(percent - near) <= self.PYRAMID_SUN_BAND:
+                percent = self.white_percent(self.filter_region('sun', image))
+            return percent
 
-        return result
+        image = self.capture_region(screen, 'sun', FMT_RGB, ttl)
+        return self.change.lookup(f"sun:sun_pyramid:{near}", image, sun_pyramid)
 
 
 class Point:
     """Creates a point on a coordinate plane with values x and y."""
+    __slots__ = ('x', 'y')
 
     def __init__(self, x, y):
         """Defines x and y variables"""
@@ -399,79 +603,116 @@ class Point:
 class Quad:
     """ Represents a quadrilateral (a four-sided polygon that has four edges and four vertices).
     It can be classified into various types, such as squares, rectangles, trapezoids, and rhombuses.
+    The points are stored as one float64 (4, 2) array (pts), transforms are vectorized in place and
+    the bounds are cached until the next transform. pt1-pt4 return Point copies of the rows.
     """
+    __slots__ = ('pts', '_bounds')
 
     def __init__(self, p1: Point = None, p2: Point = None, p3: Point = None, p4: Point = None):
-        self.pt1: Point = p1
-        self.pt2: Point = p2
-        self.pt3: Point = p3
-        self.pt4: Point = p4
+        self.pts = np.zeros((4, 2), dtype=np.float64)
+        self._bounds = None  # [left, top, right, bottom], None = not computed
+        for i, pt in enumerate((p1, p2, p3, p4)):
+            if pt is not None:
+                self.pts[i] = (pt.x, pt.y)
+
+    def __copy__(self):
+        """ Copies the points, so transforming a copy leaves the original unchanged. """
+        q = Quad.__new__(Quad)
+        q.pts = self.pts.copy()
+        q._bounds = self._bounds
+        return q
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def _get_pt(self, i: int) -> Point:
+        return Point(float(self.pts[i, 0]), float(self.pts[i, 1]))
+
+    def _set_pt(self, i: int, pt: Point):
+        self.pts[i] = (pt.x, pt.y)
+        self._bounds = None
+
+    pt1 = property(lambda self: self._get_pt(0), lambda self, pt: self._set_pt(0, pt))
+    pt2 = property(lambda self: self._get_pt(1), lambda self, pt: self._set_pt(1, pt))
+    pt3 = property(lambda self: self._get_pt(2), lambda self, pt: self._set_pt(2, pt))
+    pt4 = property(lambda self: self._get_pt(3), lambda self, pt: self._set_pt(3, pt))
 
     @classmethod
     def from_list(cls, pt_list: [[float, float], [float, float], [float, float], [float, float]]):
         """ Creates a quad from a list of points as
         [[left, top], [right, top], [right, bottom], [left, bottom]]."""
-        return cls(Point.from_list(pt_list[0]), Point.from_list(pt_list[1]),
-                   Point.from_list(pt_list[2]), Point.from_list(pt_list[3]))
+        q = cls()
+        q.pts[:] = pt_list
+        return q
 
     @classmethod
     def from_rect(cls, pt_list: [float, float, float, float]):
         """ Creates a quad from a list of points as [left, top, right, bottom] """
-        return cls(Point(pt_list[0], pt_list[1]), Point(pt_list[2], pt_list[1]),
-                   Point(pt_list[2], pt_list[3]), Point(pt_list[0], pt_list[3]))
+        left, top, right, bottom = pt_list
+        q = cls()
+        q.pts[:] = ((left, top), (right, top), (right, bottom), (left, bottom))
+        return q
 
     def to_rect_list(self, round_dp: int = -1) -> [float, float, float, float]:
         """ Returns the bounds of the quadrilateral as a list of values [left, top, right, bottom].
         @param: round_dp: If >=0, the number of decimal places to round numbers to, otherwise no rounding.
         """
         if round_dp < 0:
-            return [self.get_left(), self.get_top(), self.get_right(), self.get_bottom()]
+            return list(self._get_bounds())
         else:
-            return [round(self.get_left(), round_dp), round(self.get_top(), round_dp),
-                    round(self.get_right(), round_dp), round(self.get_bottom(), round_dp)]
+            return [round(v, round_dp) for v in self._get_bounds()]
+
+    def to_pixel_rect(self, fx: float = 1.0, fy: float = 1.0) -> [int, int, int, int]:
+        """ The bounds scaled by fx, fy (i.e. the image size for a quad in percent) and truncated to int
+        pixels, as [left, top, right, bottom]. Same as copy, scale_from_origin and int() of the bounds,
+        without the copy. """
+        left, top, right, bottom = self._get_bounds()
+        return [int(left * fx), int(top * fy), int(right * fx), int(bottom * fy)]
 
     def to_list(self) -> [[float, float], [float, float], [float, float], [float, float]]:
         """ Returns the list of points of the quadrilateral as
         [[left, top], [right, top], [right, bottom], [left, bottom]]."""
-        return [self.pt1.to_list(), self.pt2.to_list(), self.pt3.to_list(), self.pt4.to_list()]
+        return self.pts.tolist()
+
+    def _get_bounds(self) -> list[float]:
+        """ The cached [left, top, right, bottom]. """
+        if self._bounds is None:
+            self._bounds = np.concatenate((self.pts.min(axis=0), self.pts.max(axis=0))).tolist()
+        return self._bounds
 
     def get_top_left(self) -> Point:
         """ Returns the top left point. """
-        pt = self.pt1
-        if self.pt2.x < pt.x and self.pt2.y < pt.y:
-            pt = self.pt2
-        if self.pt3.x < pt.x and self.pt3.y < pt.y:
-            pt = self.pt3
-        if self.pt4.x < pt.x and self.pt4.y < pt.y:
-            pt = self.pt4
-        return copy(pt)
+        pts = self.pts
+        best = 0
+        for i in range(1, 4):
+            if pts[i, 0] < pts[best, 0] and pts[i, 1] < pts[best, 1]:
+                best = i
+        return self._get_pt(best)
 
     def get_bottom_right(self) -> Point:
         """ Returns the bottom right point. """
-        pt = self.pt1
-        if self.pt2.x > pt.x and self.pt2.y > pt.y:
-            pt = self.pt2
-        if self.pt3.x > pt.x and self.pt3.y > pt.y:
-            pt = self.pt3
-        if self.pt4.x > pt.x and self.pt4.y > pt.y:
-            pt = self.pt4
-        return copy(pt)
+        pts = self.pts
+        best = 0
+        for i in range(1, 4):
+            if pts[i, 0] > pts[best, 0] and pts[i, 1] > pts[best, 1]:
+                best = i
+        return self._get_pt(best)
 
     def get_left(self) -> float:
         """ Returns the value of the left most point. """
-        return min(self.pt1.x, self.pt2.x, self.pt3.x, self.pt4.x)
+        return self._get_bounds()[0]
 
     def get_top(self) -> float:
         """ Returns the value of the top most point. """
-        return min(self.pt1.y, self.pt2.y, self.pt3.y, self.pt4.y)
+        return self._get_bounds()[1]
 
     def get_right(self) -> float:
         """ Returns the value of the right most point. """
-        return max(self.pt1.x, self.pt2.x, self.pt3.x, self.pt4.x)
+        return self._get_bounds()[2]
 
     def get_bottom(self) -> float:
         """ Returns the value of the bottom most point. """
-        return max(self.pt1.y, self.pt2.y, self.pt3.y, self.pt4.y)
+        return self._get_bounds()[3]
 
     def get_width(self):
         """Returns the maximum width."""
@@ -487,8 +728,7 @@ class Quad:
         return Point(self.get_left(), self.get_top()), Point(self.get_right(), self.get_bottom())
 
     def get_center(self) -> Point:
-        cx = (self.pt1.x + self.pt2.x + self.pt3.x + self.pt4.x) / 4
-        cy = (self.pt1.y + self.pt2.y + self.pt3.y + self.pt4.y) / 4
+        cx, cy = self.pts.mean(axis=0).tolist()
         return Point(cx, cy)
 
     def scale(self, fx: float, fy: float):
@@ -496,22 +736,20 @@ class Quad:
         @param fy: Scaling in the Y direction.
         @param fx: Scaling in the X direction.
         """
-        center = self.get_center()
-        self.pt1 = self._scale_point(self.pt1, center, fx, fy)
-        self.pt2 = self._scale_point(self.pt2, center, fx, fy)
-        self.pt3 = self._scale_point(self.pt3, center, fx, fy)
-        self.pt4 = self._scale_point(self.pt4, center, fx, fy)
+        center = self.pts.mean(axis=0)
+        self.pts -= center
+        self.pts *= (fx, fy)
+        self.pts += center
+        self._bounds = None
 
     def inflate(self, x: float, y: float):
         """ Scales the quad from the center.
         @param fy: Scaling in the Y direction.
         @param fx: Scaling in the X direction.
         """
-        center = self.get_center()
-        self.pt1 = self._inflate_point(self.pt1, center, x, y)
-        self.pt2 = self._inflate_point(self.pt2, center, x, y)
-        self.pt3 = self._inflate_point(self.pt3, center, x, y)
-        self.pt4 = self._inflate_point(self.pt4, center, x, y)
+        center = self.pts.mean(axis=0)
+        self.pts += np.where(self.pts < center, -1.0, 1.0) * (x, y)
+        self._bounds = None
 
     def subregion_from_quad(self, quad):
         """ Crops the quad as region specified by the % (0.0-1.0) inputs.
@@ -520,63 +758,47 @@ class Quad:
         Example: An input of [0.0, 0.0, 0.25, 0.25] returns the top left quarter of the quad.
         @param quad: A quad.
         """
-        new_l = (quad.get_left() * self.get_width()) + self.get_left()
-        new_t = (quad.get_top() * self.get_height()) + self.get_top()
-        new_r = (quad.get_right() * self.get_width()) + self.get_left()
-        new_b = (quad.get_bottom() * self.get_height()) + self.get_top()
-
-        self.pt1 = Point(new_l, new_t)
-        self.pt2 = Point(new_r, new_t)
-        self.pt3 = Point(new_r, new_b)
-        self.pt4 = Point(new_l, new_b)
+        left, top, right, bottom = self._get_bounds()
+        sub = np.array(quad.to_rect_list()) * (right - left, bottom - top, right - left, bottom - top)
+        sub += (left, top, left, top)
+        new_l, new_t, new_r, new_b = sub.tolist()
+        self.pts[:] = ((new_l, new_t), (new_r, new_t), (new_r, new_b), (new_l, new_b))
+        self._bounds = None
 
     def scale_from_origin(self, fx: float, fy: float):
         """ Scales the quad from the origin (0,0).
         @param fy: Scaling in the Y direction.
         @param fx: Scaling in the X direction.
         """
-        origin = Point(0, 0)
-        self.pt1 = self._scale_point(self.pt1, origin, fx, fy)
-        self.pt2 = self._scale_point(self.pt2, origin, fx, fy)
-        self.pt3 = self._scale_point(self.pt3, origin, fx, fy)
-        self.pt4 = self._scale_point(self.pt4, origin, fx, fy)
+        self.pts *= (fx, fy)
+        self._bounds = None
 
     def offset(self, dx: float, dy: float):
         """ Offsets (moves) the quad by the given amount.
         @param dx: The amount to move in the x direction.
         @param dy: The amount to move in the y direction.
         """
-        self.pt1 = self._offset_point(self.pt1, dx, dy)
-        self.pt2 = self._offset_point(self.pt2, dx, dy)
-        self.pt3 = self._offset_point(self.pt3, dx, dy)
-        self.pt4 = self._offset_point(self.pt4, dx, dy)
-
-    @staticmethod
-    def _scale_point(pt: Point, center: Point, fx: float, fy: float) -> Point:
-        return Point(
-            center.x + (pt.x - center.x) * fx,
-            center.y + (pt.y - center.y) * fy
-        )
-
-    @staticmethod
-    def _inflate_point(pt: Point, center: Point, x: float, y: float) -> Point:
-        x1 = x
-        y1 = y
-        if pt.x < center.x:
-            x1 = -x
-        if pt.y < center.y:
-            y1 = -y
-        return Point(pt.x + x1, pt.y + y1)
-
-    @staticmethod
-    def _offset_point(pt: Point, dx: float, dy: float) -> Point:
-        """ Offsets the point.
-        Using this instead of calling offset on the point directly allows shallow copy of the quad."""
-        return Point(pt.x + dx, pt.y + dy)
+        self.pts += (dx, dy)
+        self._bounds = None
 
     def __str__(self):
         return (f"Quadrilateral:\n"
-                f" pt1: ({self.pt1.x}, {self.pt1.y})\n"
-                f" pt2: ({self.pt2.x}, {self.pt2.y})\n"
-                f" pt3: ({self.pt3.x}, {self.pt3.y})\n"
-                f" pt4: ({self.pt4.x}, {self.pt4.y})")
+                f" pt1: ({self.pts[0, 0]}, {self.pts[0, 1]})\n"
+                f" pt2: ({self.pts[1, 0]}, {self.pts[1, 1]})\n"
+                f" pt3: ({self.pts[2, 0]}, {self.pts[2, 1]})\n"
+                f" pt4: ({self.pts[3, 0]}, {self.pts[3, 1]})")
+
+
+def regions_pct_to_pix(reg: dict, width: int, height: int) -> dict:
+    """ Converts the rects of all regions from percent (0.0 - 1.0) to int pixels at once.
+    @param reg: Dictionary of regions with a 'rect' [L, T, R, B] in percent each.
+    @param width: The image width in pixels.
+    @param height: The image height in pixels.
+    @return: {region name: (slice(top, bottom), slice(left, right))}, i.e. image[slices] crops the region.
+    """
+    names = list(reg.keys())
+    if not names:
+        return {}
+    rects = np.array([reg[name]['rect'] for name in names], dtype=np.float64)
+    pix = (rects * (width, height, width, height)).astype(np.int64).tolist()  # Truncates like int()
+    return {name: (slice(t, b), slice(l, r)) for name, (l, t, r, b) in zip(names, pix)}
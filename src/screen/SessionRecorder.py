@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.core.EDlogger import logger
+from src.screen.ImageFormat import FMT_BGRA, convert_image
+
+"""
+File:SessionRecorder.py
+
+Description:
+  Records every captured region image with its frame id, timestamp and the Status.json flags
+  to a folder, for post mortem analysis and as a regression/benchmark corpus for the detectors.
+
+  Each region is stored in a fixed shape numpy memmap (<region>.npy, shape (capacity, h, w, c)),
+  the records in index.npy (structured memmap) and the layout in session.json. Recording is an
+  np.copyto into the memmap and one index row, no encoding or text formatting on the hot path.
+  Both are rings, when full the oldest frames are overwritten.
+
+  RecordedSession reads a folder back zero-copy (read only memmaps). SessionFrames composes the
+  region images back to full client area frames, i.e. for ReplayBackend.
+"""
+
+INDEX_DTYPE = np.dtype([
+    ('seq', '<i8'),        # Record number, 1 based, 0 = unused row
+    ('region', '<u2'),     # Index into session.json 'regions'
+    ('slot', '<u4'),       # Slot in the region memmap
+    ('frame_id', '<i8'),   # Screen frame id (same id = same grab)
+    ('timestamp', '<f8'),  # perf_counter at capture
+    ('flags', '<u4'),      # Status.json Flags
+    ('flags2', '<u4'),     # Status.json Flags2
+    ('gui_focus', '<u1'),  # Status.json GuiFocus
+])
+
+SESSION_FILE = 'session.json'
+INDEX_FILE = 'index.npy'
+
+
+class SessionRecorder:
+    """ Appends captured region images to a memory mapped frame store. """
+
+    def __init__(self, folder: str, status=None, capacity: int = 3000, index_capacity: int = 50000,
+                 screen_size: tuple[int, int] | None = None):
+        """
+        @param folder: Output folder, created if missing.
+        @param status: StatusParser to read the flags from (its cached data, no file read), or None.
+        @param capacity: Frames kept per region.
+        @param index_capacity: Index rows kept.
+        @param screen_size: (width, height) of the client area, to compose full frames on replay.
+        """
+        self.folder = folder
+        self.status = status
+        self.capacity = capacity
+        self.index_capacity = index_capacity
+        self.record_count = 0
+        self.dropped_count = 0
+        self._regions = {}  # name -> dict(id, store, shape, fmt, rect, next)
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._index = np.lib.format.open_memmap(os.path.join(folder, INDEX_FILE), mode='w+',
+                                                dtype=INDEX_DTYPE, shape=(index_capacity,))
+        self._meta = {
+            'version': 1,
+            'start_time': time.time(),
+            'start_perf_counter': time.perf_counter(),
+            'screen_size': list(screen_size) if screen_size is not None else None,
+            'capacity': capacity,
+            'index_capacity': index_capacity,
+            'regions': [],
+        }
+        self._write_meta()
+        logger.info(f"SessionRecorder: recording to {folder}")
+
+    def _write_meta(self):
+        self._meta['record_count'] = self.record_count
+        with open(os.path.join(self.folder, SESSION_FILE), 'w') as fp:
+            json.dump(self._meta, fp, indent=4)
+
+    def _add_region(self, name: str, image, fmt: str, rect) -> dict:
+        """ Create the memmap of a new region, sized by its first image. """
+        region = {
+            'id': len(self._meta['regions']),
+            'store': np.lib.format.open_memmap(os.path.join(self.folder, f"{name}.npy"), mode='w+',
+                                               dtype=image.dtype, shape=(self.capacity,) + image.shape),
+            'shape': image.shape,
+            'fmt': fmt,
+            'next': 0,
+        }
+        self._regions[name] = region
+        self._meta['regions'].append({'name': name, 'file': f"{name}.npy", 'shape': list(image.shape),
+                                      'fmt': fmt, 'rect': [int(v) for v in rect] if rect is not None else None})
+        self._write_meta()
+        return region
+
+    def _status_flags(self) -> tuple[int, int, int]:
+        data = self.status.current_data if self.status is not None else None
+        if not data:
+            return 0, 0, 0
+        return data.get('Flags', 0) or 0, data.get('Flags2', 0) or 0, data.get('GuiFocus', 0) or 0
+
+    def record(self, name: str, image, fmt: str, frame_id: int, timestamp: float, rect=None):
+        """ Append one region image.
+        @param name: The region name.
+        @param image: The region image.
+        @param fmt: Pixel format of the image. The region keeps the format of its first image,
+        later images in another format are converted.
+        @param frame_id: Screen frame id of the grab.
+        @param timestamp: perf_counter of the grab.
+        @param rect: [L, T, R, B] of the region in the client area, stored with the first image.
+        """
+        if image is None:
+            return
+        with self._lock:
+            region = self._regions.get(name)
+            if region is None:
+                region = self._add_region(name, image, fmt, rect)
+            if fmt != region['fmt']:
+                image = convert_image(image, fmt, region['fmt'])
+            if image.shape != region['shape']:
+                # i.e. resolution changed, the store has a fixed shape
+                self.dropped_count = self.dropped_count + 1
+                if self.dropped_count == 1:
+                    logger.warning(f"SessionRecorder: '{name}' image {image.shape} does not match {region['shape']}, dropped")
+                return
+
+            slot = region['next']
+            region['next'] = (slot + 1) % self.capacity
+            np.copyto(region['store'][slot], image)
+
+            self.record_count = self.record_count + 1
+            flags, flags2, gui_focus = self._status_flags()
+            self._index[(self.record_count - 1) % self.index_capacity] = (
+                self.record_count, region['id'], slot, frame_id, timestamp, flags, flags2, gui_focus)
+
+    def flush(self):
+        """ Write the memmaps and the record count to disk. """
+        with self._lock:
+            for region in self._regions.values():
+                region['store'].flush()
+            self._index.flush()
+            self._write_meta()
+
+    def close(self):
+        self.flush()
+        logger.info(f"SessionRecorder: {self.record_count} records in {self.folder} ({self.dropped_count} dropped)")
+
+
+class RecordedSession:
+    """ A recorded session folder, read back zero-copy. """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        with open(os.path.join(folder, SESSION_FILE), 'r') as fp:
+            self.meta = json.load(fp)
+        self.regions = [r['name'] for r in self.meta['regions']]
+        self.stores = {r['name']: np.load(os.path.join(folder, r['file']), mmap_mode='r')
+                       for r in self.meta['regions']}
+        index = np.load(os.path.join(folder, INDEX_FILE), mmap_mode='r')
+        index = index[index['seq'] > 0]
+        index = index[np.argsort(index['seq'], kind='stable')]
+        # Drop records whose region slot was overwritten by a later record (ring wrapped)
+        key = index['region'].astype(np.int64) * (int(self.meta['capacity']) + 1) + index['slot']
+        _, last = np.unique(key[::-1], return_index=True)
+        keep = np.zeros(len(index), dtype=bool)
+        keep[len(index) - 1 - last] = True
+        self.index = index[keep]
+
+    def __len__(self):
+        return len(self.index)
+
+    def region_info(self, name: str) -> dict:
+        return self.meta['regions'][self.regions.index(name)]
+
+    def image(self, record):
+        """ The region image of an index record (read only memmap view). """
+        return self.stores[self.regions[record['region']]][record['slot']]
+
+    def records(self, name: str | None = None):
+        """ Index records, in recording order, optionally of one region. """
+        if name is None:
+            return self.index
+        return self.index[self.index['region'] == self.regions.index(name)]
+
+    def frames(self, name: str):
+        """ Yields (record, image) of a region in recording order. """
+        for record in self.records(name):
+            yield record, self.image(record)
+
+
+class SessionFrames:
+    """ Full client area frames composed from a recorded session, as a lazy sequence for
+    ReplayBackend. Records with the same frame id make one frame, regions not captured in a frame
+    keep their last image.
+    """
+    def __init__(self, session: RecordedSession, screen_size: tuple[int, int] | None = None):
+        """
+        @param session: The recorded session.
+        @param screen_size: (width, height), defaults to the recorded screen size.
+        """
+        self.session = session
+        size = screen_size or session.meta.get('screen_size')
+        if size is None:
+            raise ValueError("SessionFrames: the session has no screen size, pass screen_size")
+        self.width, self.height = int(size[0]), int(size[1])
+
+        index = session.index
+        starts = np.flatnonzero(np.r_[True, index['frame_id'][1:] != index['frame_id'][:-1]]) if len(index) else []
+        self.timestamps = [float(index['timestamp'][i]) for i in starts]
+        # Latest record of each region at the end of each frame (-1 = none yet)
+        self._latest = np.full((len(starts), len(session.regions)), -1, dtype=np.int64)
+        current = np.full(len(session.regions), -1, dtype=np.int64)
+        bounds = list(starts) + [len(index)]
+        for frame in range(len(starts)):
+            for i in range(bounds[frame], bounds[frame + 1]):
+                current[index['region'][i]] = i
+            self._latest[frame] = current
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, frame: int):
+        image = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        for region_id, i in enumerate(self._latest[frame]):
+            if i < 0:
+                continue
+            info = self.session.meta['regions'][region_id]
+            if info['rect'] is None:
+                continue
+            left, top, right, bottom = info['rect']
+            image[top:bottom, left:right] = convert_image(self.session.image(self.session.index[i]),
+                                                         info['fmt'], FMT_BGRA)
+        return image
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import threading
+import time
+import typing
+from sys import platform
+
+if platform == "win32":
+    import ctypes
+    import win32con
+    import win32gui
+
+from src.core.EDlogger import logger
+
+"""
+File:WindowTracker.py
+
+Description:
+  Tracks the Elite Dangerous window. The window handle is resolved once by title (FindWindow) and
+  the window rect, client rect (in screen coordinates) and monitor are cached. The cache is
+  revalidated at most every poll_interval seconds with cheap calls (IsWindow, GetWindowRect,
+  GetClientRect), or on invalidate(). When the window moved, was resized or was recreated (ED
+  restarted) the listeners are called with the old and new client rect.
+
+  FakeWindowTracker has the same interface without any Win32 calls, for tests on any platform.
+"""
+
+elite_dangerous_window = "Elite - Dangerous (CLIENT)"
+
+Rect = typing.Tuple[int, int, int, int]  # (left, top, right, bottom)
+
+
+class WindowTracker:
+    """ Cached handle and geometry of the ED window. """
+
+    def __init__(self, title: str = elite_dangerous_window, poll_interval: float = 1.0):
+        """
+        @param title: The window title to find.
+        @param poll_interval: Max age in seconds of the cached geometry before it is revalidated.
+        """
+        self.title = title
+        self.poll_interval = poll_interval
+        self.hwnd = 0
+        self.window_rect: Rect | None = None
+        self.client_rect: Rect | None = None
+        self.refresh_count = 0  # Number of geometry refreshes, i.e. for tests and stats
+        self._checked = 0.0  # perf_counter of the last validation, 0 = invalid
+        self._listeners = []
+        self._monitors = None  # (monitors, window_rect, index) of the last monitor lookup
+        self._lock = threading.RLock()
+
+    def add_listener(self, fn):
+        """ Call fn(old_client_rect, new_client_rect) when the window moved, was resized or recreated.
+        Rects are None while the window does not exist.
+        """
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def invalidate(self):
+        """ Revalidate the handle and geometry on the next access. """
+        self._checked = 0.0
+
+    def poll(self) -> bool:
+        """ Revalidate the cache if older than the poll interval. Cheap to call on every grab.
+        @return: True if the window exists.
+        """
+        if self._checked == 0.0 or (time.perf_counter() - self._checked) > self.poll_interval:
+            self.refresh()
+        return self.hwnd != 0
+
+    def refresh(self):
+        """ Revalidate the handle and geometry now, notify listeners on a change. """
+        with self._lock:
+            old_client = self.client_rect
+            old_hwnd = hwnd = self.hwnd
+            first = self.refresh_count == 0
+            if hwnd == 0 or not self._is_window(hwnd):
+                hwnd = self._find_window()
+            if hwnd != self.hwnd:
+                logger.debug(f"WindowTracker: '{self.title}' handle {self.hwnd} -> {hwnd}")
+            self.hwnd = hwnd
+            self.window_rect, self.client_rect = self._read_rects(hwnd) if hwnd else (None, None)
+            self.refresh_count = self.refresh_count + 1
+            self._checked = time.perf_counter()
+
+        if not first and (self.client_rect != old_client or self.hwnd != old_hwnd):
+            logger.info(f"WindowTracker: ED window changed {old_client} -> {self.client_rect}")
+            for fn in list(self._listeners):
+                fn(old_client, self.client_rect)
+
+    def get_window_rect(self) -> Rect | None:
+        """ The window rect (left, top, right, bottom), or None. """
+        self.poll()
+        return self.window_rect
+
+    def get_client_rect(self) -> Rect | None:
+        """ The client area (left, top, right, bottom) in screen coordinates, or None. """
+        self.poll()
+        return self.client_rect
+
+    def exists(self) -> bool:
+        """ Does the ED window exist (i.e. is ED running). """
+        return self.poll()
+
+    def monitor_index(self, monitors: list) -> int | None:
+        """ Index of the mss monitor containing the center of the window, cached per window position.
+        @param monitors: The mss monitor dicts (index 0 is the complete desktop and is skipped).
+        """
+        rect = self.get_window_rect()
+        if rect is None:
+            return None
+        cached = self._monitors
+        if cached is not None and cached[0] is monitors and cached[1] == rect:
+            return cached[2]
+        cx = (rect[0] + rect[2]) // 2
+        cy = (rect[1] + rect[3]) // 2
+        index = None
+        for i, mon in enumerate(monitors):
+            if i == 0:
+                continue
+            if mon['left'] <= cx < mon['left'] + mon['width'] and mon['top'] <= cy < mon['top'] + mon['height']:
+                index = i
+                break
+        self._monitors = (monitors, rect, index)
+        return index
+
+    def is_foreground(self) -> bool:
+        """ Does the ED window have focus. One handle compare, no title lookup. """
+        if not self.poll():
+            return False
+        return self._foreground_window() == self.hwnd
+
+    def focus(self) -> bool:
+        """ Set focus to the ED window, if ED does not have focus then the keystrokes will go to the window
+        that does have focus. Attaches to the foreground thread to bypass the SetForegroundWindow restrictions.
+        @return: True if ED has focus.
+        """
+        if self.is_foreground():
+            return True
+        if self.hwnd == 0:
+            logger.warning("set_focus: ED window not found!")
+            return False
+        return self._set_foreground(self.hwnd)
+
+    # Win32 access, overridden by FakeWindowTracker
+
+    def _find_window(self) -> int:
+        if platform != "win32":
+            return 0
+        return win32gui.FindWindow(None, self.title) or 0
+
+    @staticmethod
+    def _is_window(hwnd: int) -> bool:
+        if platform != "win32":
+            return False
+        return bool(win32gui.IsWindow(hwnd))
+
+    @staticmethod
+    def _read_rects(hwnd: int) -> tuple[Rect | None, Rect | None]:
+        """ The window rect and the client rect in screen coordinates. """
+        try:
+            window_rect = tuple(win32gui.GetWindowRect(hwnd))
+            client = win32gui.GetClientRect(hwnd)  # relative to the client area
+            left, top = win32gui.ClientToScreen(hwnd, (0, 0))
+            return window_rect, (left, top, left + client[2], top + client[3])
+        except Exception as e:
+            logger.warning(f'WindowTracker: reading window rects failed: {e}')
+            return None, None
+
+    @staticmethod
+    def _foreground_window() -> int:
+        if platform != "win32":
+            return 0
+        return win32gui.GetForegroundWindow()
+
+    def _set_foreground(self, hwnd: int) -> bool:
+        if platform != "win32":
+            return False
+        try:
+            fg_hwnd = win32gui.GetForegroundWindow()
+            # Attach to foreground thread so we're allowed to call SetForegroundWindow
+            current_thread = ctypes.windll.kernel32.GetCurrentThreadId()
+            fg_thread = ctypes.windll.user32.GetWindowThreadProcessId(fg_hwnd, None)
+            if current_thread != fg_thread:
+                ctypes.windll.user32.AttachThreadInput(current_thread, fg_thread, True)
+            win32gui.ShowWindow(hwnd, win32con.SW_NORMAL)
+            win32gui.SetForegroundWindow(hwnd)
+            if current_thread != fg_thread:
+                ctypes.windll.user32.AttachThreadInput(current_thread, fg_thread, False)
+            # Verify
+            new_fg = win32gui.GetForegroundWindow()
+            if new_fg != hwnd:
+                logger.warning(f"set_focus: FAILED, foreground is '{win32gui.GetWindowText(new_fg)}'")
+                return False
+            logger.info(f"set_focus: ED focused successfully")
+            return True
+        except Exception as ex:
+            logger.warning(f"set_focus_elite_window failed: {ex}")
+            return False
+
+
+class FakeWindowTracker(WindowTracker):
+    """ WindowTracker without Win32 calls. Move, resize, close or recreate the window from a test. """
+
+    def __init__(self, client_rect: Rect | None = (0, 0, 1920, 1080), border: int = 0,
+                 foreground: bool = True, poll_interval: float = 0.0):
+        """
+        @param client_rect: The initial client rect, None = no window.
+        @param border: Window border in pixels around the client area.
+        @param foreground: Does the window start with focus.
+        """
+        super().__init__(poll_interval=poll_interval)
+        self.border = border
+        self.foreground = foreground
+        self.focus_count = 0  # Number of focus attempts
+        self.find_count = 0  # Number of FindWindow equivalents
+        self._handles = 0  # Handles given out so far
+        self._fake_hwnd = 0
+        self._fake_rect = client_rect
+        if client_rect is not None:
+            self.recreate()
+
+    def set_client_rect(self, client_rect: Rect | None):
+        """ Move or resize the window, None closes it. Seen on the next poll. """
+        self._fake_rect = client_rect
+        if client_rect is None:
+            self._fake_hwnd = 0
+        elif self._fake_hwnd == 0:
+            self.recreate()
+
+    def recreate(self):
+        """ Simulate ED restarting, the window gets a new handle. """
+        self._handles = self._handles + 1
+        self._fake_hwnd = self._handles
+
+    def _find_window(self) -> int:
+        self.find_count = self.find_count + 1
+        return self._fake_hwnd
+
+    def _is_window(self, hwnd: int) -> bool:
+        return hwnd != 0 and hwnd == self._fake_hwnd
+
+    def _read_rects(self, hwnd: int) -> tuple[Rect | None, Rect | None]:
+        if self._fake_rect is None:
+            return None, None
+        left, top, right, bottom = self._fake_rect
+        b = self.border
+        return (left - b, top - b, right + b, bottom + b), tuple(self._fake_rect)
+
+    def _foreground_window(self) -> int:
+        return self.hwnd if self.foreground else 0
+
+    def _set_foreground(self, hwnd: int) -> bool:
+        self.focus_count = self.focus_count + 1
+        self.foreground = True
+        return True
+
+
+_default_tracker: WindowTracker | None = None
+
+
+def get_window_tracker() -> WindowTracker:
+    """ The shared tracker of the ED window, created on first use. """
+    global _default_tracker
+    if _default_tracker is None:
+        _default_tracker = WindowTracker()
+    return _default_tracker
+
+
+def set_window_tracker(tracker: WindowTracker | None):
+    """ Replace the shared tracker, i.e. with a FakeWindowTracker in tests. None = create a new one on next use. """
+    global _default_tracker
+    _default_tracker = tracker
@@ -0,0 +1,116 @@
+"""Annulus matched filter target circle benchmark.
+
+Compares the HoughCircles engine of _find_target_circle (full resolution and pyramid step 2) with the
+annulus matched filter (AnnulusCircleFinder, steps 4 and 2): latency p50/p95 and hit rate. On a recorded
+session (see SessionRecorder) the hit rate is the agreement with the full resolution Hough search (both
+none, or centers within 4 px), on the synthetic frames of bench_PyramidDetect it is against the true
+circle (within 3 px), plus partial arcs (90-180 degrees of the ring). Also compares the target arc check
+of is_target_arc_visible (radius spread) with the annulus ring score on the arc frames of bench_Vision.
+Does NOT require Elite Dangerous to be running.
+
+Usage:
+    ./venv/Scripts/python -m test.bench_Annulus [recorded session folder]
+"""
+from __future__ import annotations
+
+import sys
+
+import cv2
+import numpy as np
+
+from src.screen.Annulus import AnnulusCircleFinder
+from src.screen.Pyramid import PyramidCircleFinder
+from src.screen.RegionGeometry import RegionGeometry
+from test.bench_PyramidDetect import (SYNTHETIC_FRAMES, TARGET_HSV, TARGET_R, circle_agreement, make_target_frame,
+                                      recorded_images, stats, target_color, timed)
+from test.bench_Vision import make_arc_frame
+
+HIT_PX = 3.0
+ARC_STD_THRESHOLD = 12  # EDAutopilot.ARC_STD_THRESHOLD
+ARC_RING_SCORE = 0.15  # EDAutopilot.ARC_RING_SCORE
+ARC_RECT = (910, 492, 1013, 587)  # target_arc region at 1920x1080
+SCREEN_CENTER = (960, 540)
+SCREEN_SIZE = (1920, 1080)
+
+
+def engines() -> dict:
+    lower, upper = TARGET_HSV
+    return {
+        'hough full res': PyramidCircleFinder(lower, upper, TARGET_R[0], TARGET_R[1]),
+        'hough step 2': PyramidCircleFinder(lower, upper, TARGET_R[0], TARGET_R[1], step=2),
+        'annulus step 4': AnnulusCircleFinder(lower, upper, TARGET_R[0], TARGET_R[1], step=4),
+        'annulus step 2': AnnulusCircleFinder(lower, upper, TARGET_R[0], TARGET_R[1], step=2),
+    }
+
+
+def make_partial_frame(seed: int, size: tuple[int, int] = (634, 540)):
+    """ Target region with only 90-180 degrees of the ring visible (i.e. behind a HUD panel). """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    image = (rng.random((h, w, 3)) * 30).astype(np.uint8)
+    cx, cy = float(rng.uniform(80, w - 80)), float(rng.uniform(80, h - 80))
+    start = float(rng.uniform(0, 360))
+    cv2.ellipse(image, (int(cx * 16), int(cy * 16)), (int(rng.uniform(44.5, 47.5) * 16),) * 2, 0, start,
+                start + float(rng.uniform(90, 180)), target_color(), 2, cv2.LINE_AA, 4)
+    return image, (cx, cy)
+
+
+def hit_rate(found, truth) -> float:
+    hits = [c is not None and np.hypot(c[0] - t[0], c[1] - t[1]) <= HIT_PX for c, t in zip(found, truth)]
+    return float(np.mean(hits))
+
+
+def bench_engines(title: str, images, truth=None):
+    print(f"\n=== {title}, {len(images)} frames {images[0].shape[1]}x{images[0].shape[0]} ===")
+    reference = None
+    for name, finder in engines().items():
+        found, times = timed(finder.find, images)
+        if truth is not None:
+            err = [np.hypot(c[0] - t[0], c[1] - t[1]) for c, t in zip(found, truth) if c is not None]
+            quality = (f"hit rate {hit_rate(found, truth) * 100:5.1f}%   error p95 "
+                       f"{np.percentile(err, 95) if err else float('nan'):.2f} px")
+        elif reference is None:
+            reference = found
+            quality = f"found {sum(c is not None for c in found)}/{len(found)} (reference)"
+        else:
+            agree, max_d = circle_agreement(reference, found)
+            quality = f"agreement {agree * 100:5.1f}% (max {max_d:.1f} px)"
+        print(f"  {name:16s} {stats(times)}   {quality}")
+
+
+def bench_arc(count: int = SYNTHETIC_FRAMES):
+    frames = [make_arc_frame(seed, SCREEN_CENTER, list(ARC_RECT)) for seed in range(count)]
+    print(f"\n=== target arc check, {count} frames ({sum(label for _, label in frames)} arcs) ===")
+    finder = AnnulusCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1])
+    geometry = RegionGeometry(ARC_RECT, SCREEN_SIZE)
+    cx, cy = geometry.center
+    masks = [cv2.inRange(cv2.cvtColor(image, cv2.COLOR_BGR2HSV), TARGET_HSV[0], TARGET_HSV[1]) for image, _ in frames]
+
+    def spread(mask):
+        count, _, std = geometry.radius_stats(mask)
+        return count >= 100 and std < ARC_STD_THRESHOLD
+
+    for name, check in (('radius spread', spread), ('annulus score', lambda m: finder.score_at(m, cx, cy) >= ARC_RING_SCORE)):
+        results, times = timed(check, masks)
+        accuracy = np.mean([r == label for r, (_, label) in zip(results, frames)])
+        print(f"  {name:16s} {stats(times)}   accuracy {accuracy * 100:5.1f}%")
+
+
+def main():
+    if len(sys.argv) > 1:
+        targets = recorded_images(sys.argv[1], 'target')
+        if not targets:
+            print(f"No target regions recorded in {sys.argv[1]}")
+            return
+        bench_engines('target circle', targets)
+        return
+
+    frames = [make_target_frame(seed) for seed in range(SYNTHETIC_FRAMES)]
+    bench_engines('target circle', [image for image, _ in frames], [circle[:2] for _, circle in frames])
+    partial = [make_partial_frame(seed) for seed in range(SYNTHETIC_FRAMES)]
+    bench_engines('partial target arcs', [image for image, _ in partial], [center for _, center in partial])
+    bench_arc()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Color class table benchmark.
+
+Compares the HSV color masks (cvtColor + inRange per color) with the color class table of ColorLUT
+(one lookup per pixel, a 256 entry LUT per mask): latency p50/p95 and mask equality, for the target
+region (FMT_RGB conversion + HSV vs the swap_rb class on the native capture), the navball ring and
+dot masks of the compass corpus and the whole NavDotLocator. Runs on the 'target' and 'compass'
+regions of a recorded session (see SessionRecorder) if a folder is given, else on the synthetic
+target frames of bench_PyramidDetect and the compass corpus of bench_NavballDot.
+Does NOT require Elite Dangerous to be running.
+
+Usage:
+    ./venv/Scripts/python -m test.bench_ColorLUT [recorded session folder]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.screen.ColorLUT import ColorClasses, ColorClassifier, STANDARD_RANGES
+from src.screen.Compass import NavDotLocator
+from src.screen.ImageFormat import FMT_BGRA, FMT_RGB, convert_image
+from src.screen.SessionRecorder import RecordedSession
+from test.bench_NavballDot import load_corpus
+from test.bench_PyramidDetect import SYNTHETIC_FRAMES, TARGET_HSV, make_target_frame, stats, timed
+
+RING_HSV = ((5, 100, 100), (25, 255, 255))
+DOT_HSV = ((75, 40, 170), (105, 255, 255))
+
+
+def recorded_images(folder: str, region: str):
+    """ The images of a region of a recorded session in the native format. """
+    session = RecordedSession(folder)
+    if region not in session.regions:
+        return []
+    fmt = session.region_info(region)['fmt']
+    return [convert_image(np.array(image), fmt, FMT_BGRA) for _, image in session.frames(region)]
+
+
+def equal_count(a, b) -> int:
+    return sum(bool(np.array_equal(x, y)) for x, y in zip(a, b))
+
+
+def bench_target(images, classes):
+    print(f"\n=== target mask, {len(images)} frames {images[0].shape[1]}x{images[0].shape[0]} (native) ===")
+
+    def hsv_mask(img):
+        hsv = cv2.cvtColor(convert_image(img, FMT_BGRA, FMT_RGB), cv2.COLOR_BGR2HSV)
+        return cv2.inRange(hsv, TARGET_HSV[0], TARGET_HSV[1])
+
+    classifier = ColorClassifier(classes)
+    legacy, legacy_times = timed(hsv_mask, images)
+    table, times = timed(lambda img: classifier.mask('target', classifier(img)), images)
+    print(f"  RGB + HSV + inRange     {stats(legacy_times)}")
+    print(f"  class table             {stats(times)}   speedup {np.median(legacy_times) / np.median(times):4.1f}x"
+          f"   identical {equal_count(legacy, table)}/{len(images)}")
+
+
+def bench_compass(images, classes):
+    print(f"\n=== navball ring + dot masks, {len(images)} crops {images[0].shape[1]}x{images[0].shape[0]} ===")
+
+    def hsv_masks(img):
+        hsv = cv2.cvtColor(cv2.cvtColor(img, cv2.COLOR_BGRA2BGR), cv2.COLOR_BGR2HSV)
+        return np.stack([cv2.inRange(hsv, RING_HSV[0], RING_HSV[1]), cv2.inRange(hsv, DOT_HSV[0], DOT_HSV[1])])
+
+    classifier = ColorClassifier(classes)
+
+    def table_masks(img):
+        classifier(img)
+        return np.stack([classifier.mask('nav_ring'), classifier.mask('nav_dot')])
+
+    legacy, legacy_times = timed(hsv_masks, images * 5)
+    table, times = timed(table_masks, images * 5)
+    print(f"  HSV + 2 inRange         {stats(legacy_times)}")
+    print(f"  class table             {stats(times)}   speedup {np.median(legacy_times) / np.median(times):4.1f}x"
+          f"   identical {equal_count(legacy, table)}/{len(legacy)}")
+
+    hsv_locate, table_locate = NavDotLocator(), NavDotLocator()
+    table_locate.use_classes(classes)
+    legacy, legacy_times = timed(hsv_locate, images * 5)
+    table, times = timed(table_locate, images * 5)
+    same = sum(a == b for a, b in zip(legacy, table))
+    print(f"  NavDotLocator HSV       {stats(legacy_times)}")
+    print(f"  NavDotLocator table     {stats(times)}   speedup {np.median(legacy_times) / np.median(times):4.1f}x"
+          f"   same dot {same}/{len(legacy)}")
+
+
+def main():
+    classes = ColorClasses(STANDARD_RANGES)
+    start = time.perf_counter()
+    classes.build()
+    print(f"Table of {len(classes.names)} classes built in {time.perf_counter() - start:.2f} s")
+
+    if len(sys.argv) > 1:
+        targets = recorded_images(sys.argv[1], 'target')
+        compasses = recorded_images(sys.argv[1], 'compass')
+        if targets:
+            bench_target(targets, classes)
+        if compasses:
+            bench_compass(compasses, classes)
+        if not targets and not compasses:
+            print(f"No target or compass regions recorded in {sys.argv[1]}")
+        return
+
+    # The synthetic target frames are FMT_RGB (as the detector gets them), back to the native capture
+    targets = [convert_image(make_target_frame(seed)[0], FMT_RGB, FMT_BGRA) for seed in range(SYNTHETIC_FRAMES)]
+    bench_target(targets, classes)
+    bench_compass(list(load_corpus()['images']), classes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Navball dot localization benchmark.
+
+Compares the legacy dot detection of EDAutopilot.get_nav_offset (2x upscale, HSV masks, contour
+moments) with NavDotLocator (native resolution, intensity weighted moments) on the compass corpus
+test/compass/navball_corpus.npz: pitch/yaw error against the ground truth and latency.
+The corpus is synthetic: 76x76 compass crops rendered at 8x and area downsampled (anti aliased ring
+and dot on a textured cockpit background, sensor noise), with the true ring center, dot center and
+pitch/yaw. Rebuild it with --write-corpus.
+Does NOT require Elite Dangerous to be running.
+
+Usage:
+    ./venv/Scripts/python -m test.bench_NavballDot [--write-corpus]
+"""
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.screen.Compass import RING_RADIUS, NavDotLocator
+from src.screen.RegionFilter import ColorRangeFilter
+
+CORPUS_FILE = os.path.join(os.path.dirname(__file__), 'compass', 'navball_corpus.npz')
+CROP = 76  # Compass region size at 1920x1080
+SUPERSAMPLE = 8
+DOT_BGR = (204, 204, 140)  # HSV ~(90, 80, 204)
+RING_BGR = (0, 140, 255)
+FRONT_SAMPLES = 200
+BEHIND_SAMPLES = 20
+
+
+def render_crop(seed: int, front: bool = True):
+    """ Render one compass crop.
+    @return: (BGRA image, ring center (x, y), dot center (x, y) or None, (pitch, yaw) deg or None), positions in
+    crop pixels (pixel centers at integers).
+    """
+    rng = np.random.default_rng(seed)
+    s = SUPERSAMPLE
+    texture = cv2.resize(rng.normal(0, 1, (CROP // 4 + 1, CROP // 4 + 1)), (CROP * s, CROP * s),
+                         interpolation=cv2.INTER_CUBIC)
+    base = np.array([40, 70, 110], dtype=np.float64)  # Brown cockpit
+    image = np.clip(base * (1 + 0.25 * texture[..., np.newaxis]), 0, 255).astype(np.uint8)
+
+    ring = (CROP / 2 + rng.uniform(-1, 1), CROP / 2 + rng.uniform(-1, 1))
+    cv2.circle(image, (int(ring[0] * s * 16), int(ring[1] * s * 16)), int(RING_RADIUS * s * 16), RING_BGR,
+               2 * s, cv2.LINE_AA, 4)
+    dot, angles = None, None
+    while True:
+        x, y = rng.uniform(-0.85, 0.85, 2)
+        if x * x + y * y < 0.85 ** 2:
+            break
+    if front:
+        dot = (ring[0] + RING_RADIUS * x, ring[1] - RING_RADIUS * y)
+        cv2.circle(image, (int(dot[0] * s * 16), int(dot[1] * s * 16)), int(rng.uniform(2.0, 3.0) * s * 16),
+                   DOT_BGR, -1, cv2.LINE_AA, 4)
+        angles = (math.degrees(math.asin(y)), math.degrees(math.asin(x)))
+    else:
+        cv2.circle(image, (int((ring[0] + RING_RADIUS * x) * s * 16), int((ring[1] - RING_RADIUS * y) * s * 16)),
+                   int(2.5 * s * 16), DOT_BGR, s // 2, cv2.LINE_AA, 4)  # Hollow = behind, out of the dot range
+        image = cv2.GaussianBlur(image, (0, 0), s / 2)
+
+    small = cv2.resize(image, (CROP, CROP), interpolation=cv2.INTER_AREA).astype(np.float64)
+    small = np.clip(small + rng.normal(0, 3, small.shape), 0, 255).astype(np.uint8)
+
+    def to_crop(p):
+        return None if p is None else ((p[0] * s + 0.5) / s - 0.5, (p[1] * s + 0.5) / s - 0.5)
+
+    return cv2.cvtColor(small, cv2.COLOR_BGR2BGRA), to_crop(ring), to_crop(dot), angles
+
+
+def write_corpus(path: str = CORPUS_FILE):
+    images, rings, dots, angles = [], [], [], []
+    for seed in range(FRONT_SAMPLES + BEHIND_SAMPLES):
+        image, ring, dot, ang = render_crop(seed, front=seed < FRONT_SAMPLES)
+        images.append(image)
+        rings.append(ring)
+        dots.append(dot if dot is not None else (np.nan, np.nan))
+        angles.append(ang if ang is not None else (np.nan, np.nan))
+    np.savez_compressed(path, images=np.array(images), rings=np.array(rings), dots=np.array(dots),
+                        angles=np.array(angles))
+    print(f"Wrote {len(images)} crops to {path}")
+
+
+def load_corpus(path: str = CORPUS_FILE) -> dict:
+    """ {'images': N x 76 x 76 x 4, 'rings': N x 2, 'dots': N x 2, 'angles': N x 2 (pitch, yaw)}, NaN = behind. """
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+class LegacyDot:
+    """ The dot detection of get_nav_offset before NavDotLocator: 2x upscale, ring and dot HSV masks,
+    largest contour, binary moments. Returns crop pixels (the 2x pixel centers mapped back). """
+
+    def __init__(self):
+        self.ring_filter = ColorRangeFilter((5, 100, 100), (25, 255, 255), scale=2.0)
+
+    def __call__(self, image):
+        orange_mask = self.ring_filter(image)
+        hsv = self.ring_filter.hsv
+        h, w = hsv.shape[:2]
+        front_mask = cv2.inRange(hsv, (75, 40, 170), (105, 255, 255))
+        front_mask = cv2.bitwise_and(front_mask, cv2.bitwise_not(orange_mask))
+        contours, _ = cv2.findContours(front_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        valid = [c for c in contours if 2 < cv2.contourArea(c) < w * h * 0.3]
+        if not valid:
+            return None
+        m = cv2.moments(max(valid, key=cv2.contourArea))
+        if m['m00'] <= 0:
+            return None
+        return (m['m10'] / m['m00'] + 0.5) / 2 - 0.5, (m['m01'] / m['m00'] + 0.5) / 2 - 0.5
+
+
+def dot_angles(dot, ring) -> tuple[float, float]:
+    """ (pitch, yaw) in degrees of a dot position, as get_nav_offset (front hemisphere, no correction). """
+    x = max(-1.0, min(1.0, (dot[0] - ring[0]) / RING_RADIUS))
+    y = max(-1.0, min(1.0, -(dot[1] - ring[1]) / RING_RADIUS))
+    return math.degrees(math.asin(y)), math.degrees(math.asin(x))
+
+
+def evaluate(locate, corpus) -> dict:
+    """ Run a dot locator over the corpus.
+    @return: {'errors': max(|pitch err|, |yaw err|) per found front dot (deg), 'missed': front dots not found,
+    'false': behind crops with a dot, 'times': ms per call}
+    """
+    errors, times, missed, false = [], [], 0, 0
+    for image, ring, angles in zip(corpus['images'], corpus['rings'], corpus['angles']):
+        start = time.perf_counter()
+        dot = locate(image)
+        times.append((time.perf_counter() - start) * 1000.0)
+        if np.isnan(angles[0]):
+            false += dot is not None
+        elif dot is None:
+            missed += 1
+        else:
+            pitch, yaw = dot_angles(dot, ring)
+            errors.append(max(abs(pitch - angles[0]), abs(yaw - angles[1])))
+    return {'errors': np.array(errors), 'missed': missed, 'false': false, 'times': np.array(times)}
+
+
+def main():
+    if '--write-corpus' in sys.argv:
+        write_corpus()
+        return
+    corpus = load_corpus()
+    print(f"\n=== navball dot, {len(corpus['images'])} crops {CROP}x{CROP} ===")
+    base = None
+    for name, locate in (("legacy 2x + contour", LegacyDot()), ("native weighted", NavDotLocator())):
+        locate(corpus['images'][0])  # warm up
+        res = evaluate(locate, corpus)
+        ms = float(np.median(res['times']))
+        base = ms if base is None else base
+        err = res['errors']
+        print(f"  {name:<20} error p50 {np.percentile(err, 50):.3f} p95 {np.percentile(err, 95):.3f}"
+              f" max {err.max():.3f} deg   missed {res['missed']} false {res['false']}"
+              f"   p50 {ms:.3f} ms  p95 {np.percentile(res['times'], 95):.3f} ms  ({base / ms:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
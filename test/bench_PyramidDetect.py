@@ -0,0 +1,172 @@
+"""Pyramid (coarse to fine) detection benchmark.
+
+Compares the full resolution target circle search and sun percent with the pyramid mode (subsample
+step 2 and 4, refined at full resolution): latency p50/p95 and detection agreement with the full
+resolution path. Runs on the 'target' and 'sun' regions of a recorded session (see SessionRecorder)
+if a folder is given, else on synthetic frames (orange circle, HUD text and arcs on a star field,
+and a bright sun disc).
+Does NOT require Elite Dangerous to be running.
+
+Usage:
+    ./venv/Scripts/python -m test.bench_PyramidDetect [recorded session folder]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.screen.ImageFormat import FMT_RGB, convert_image
+from src.screen.Pyramid import PyramidCircleFinder
+from src.screen.RegionFilter import ThresholdFilter
+from src.screen.SessionRecorder import RecordedSession
+
+TARGET_HSV = ((16, 165, 220), (98, 255, 255))  # EDAutopilot._find_target_circle
+TARGET_R = (44, 48)  # EDAutopilot.TARGET_CIRCLE_R_MIN/MAX
+SUN_THRESHOLD = 125
+AGREE_PX = 4.0  # Hough centers of the two paths are each within ~2 px of the truth
+STEPS = [2, 4]
+SYNTHETIC_FRAMES = 200
+
+
+def target_color() -> tuple[int, int, int]:
+    """ A pixel value inside the target HSV range. """
+    return tuple(int(v) for v in cv2.cvtColor(np.uint8([[[30, 220, 240]]]), cv2.COLOR_HSV2BGR)[0, 0])
+
+
+def make_target_frame(seed: int, size: tuple[int, int] = (634, 540)):
+    """ Synthetic target region: star field, orange circle (r 44.5-47.5, 2 px, anti aliased at sub pixel
+    position), HUD text and an orbit arc in the same color.
+    @return: (image, (cx, cy, r)) with the true circle.
+    """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    color = target_color()
+    image = (rng.random((h, w, 3)) * 30).astype(np.uint8)
+    for _ in range(60):
+        cv2.circle(image, (int(rng.integers(0, w)), int(rng.integers(0, h))), 1, (200, 200, 200), -1)
+    cx, cy, r = float(rng.uniform(80, w - 80)), float(rng.uniform(80, h - 80)), float(rng.uniform(44.5, 47.5))
+    cv2.circle(image, (int(cx * 16), int(cy * 16)), int(r * 16), color, 2, cv2.LINE_AA, 4)
+    cv2.putText(image, 'DEATH=ADDER', (int(rng.integers(0, w - 230)), int(rng.integers(20, h - 20))),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    cv2.ellipse(image, (int(rng.integers(0, w)), int(rng.integers(0, h))), (300, 60), 10, 0, 180, color, 1)
+    return image, (cx, cy, r)
+
+
+def make_sun_frame(seed: int, size: tuple[int, int] = (768, 410)):
+    """ Synthetic sun region: star field and a bright disc with a soft glow of random size. """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    image = (rng.random((h, w, 3)) * 40).astype(np.uint8)
+    center = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+    radius = int(rng.integers(0, 180))
+    cv2.circle(image, center, radius + 30, (90, 110, 130), -1)
+    cv2.circle(image, center, radius, (230, 240, 255), -1)
+    return cv2.GaussianBlur(image, (9, 9), 3)
+
+
+def recorded_images(folder: str, region: str):
+    """ The images of a region of a recorded session in FMT_RGB (as the detectors get them). """
+    session = RecordedSession(folder)
+    if region not in session.regions:
+        return []
+    fmt = session.region_info(region)['fmt']
+    return [convert_image(np.array(image), fmt, FMT_RGB) for _, image in session.frames(region)]
+
+
+def white_percent(mask) -> int:
+    wht = int(np.count_nonzero(mask == 255))
+    return int(wht * 100 / mask.size)
+
+
+def timed(func, items):
+    """ Results and per call times in ms of func over items. """
+    results, times = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(func(item))
+        times.append((time.perf_counter() - start) * 1000.0)
+    return results, np.array(times)
+
+
+def stats(times) -> str:
+    return f"p50 {np.percentile(times, 50):6.3f} ms  p95 {np.percentile(times, 95):6.3f} ms"
+
+
+def circle_agreement(full, coarse) -> tuple[float, float]:
+    """ Fraction of frames where both paths agree (both none, or centers within AGREE_PX), and the max
+    distance between agreeing centers. """
+    agree, max_d = 0, 0.0
+    for a, b in zip(full, coarse):
+        if a is None or b is None:
+            agree += a is None and b is None
+            continue
+        d = float(np.hypot(a[0] - b[0], a[1] - b[1]))
+        if d <= AGREE_PX:
+            agree += 1
+            max_d = max(max_d, d)
+    return agree / max(1, len(full)), max_d
+
+
+def bench_target(images, truth=None):
+    print(f"\n=== target circle, {len(images)} frames {images[0].shape[1]}x{images[0].shape[0]} ===")
+    full_finder = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1])
+    full, full_times = timed(full_finder.find, images)
+    print(f"  full res           {stats(full_times)}")
+    if truth:
+        err = [np.hypot(a[0] - t[0], a[1] - t[1]) for a, t in zip(full, truth) if a is not None]
+        print(f"    error vs truth: p95 {np.percentile(err, 95):.2f} px, found {len(err)}/{len(truth)}")
+    for step in STEPS:
+        finder = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+        coarse, times = timed(finder.find, images)
+        agree, max_d = circle_agreement(full, coarse)
+        print(f"  pyramid step {step}     {stats(times)}   speedup {np.median(full_times) / np.median(times):4.1f}x"
+              f"   agreement {agree * 100:5.1f}% (max {max_d:.1f} px)   refines {finder.refine_count}"
+              f" rejected {finder.reject_count}")
+        if truth:
+            err = [np.hypot(a[0] - t[0], a[1] - t[1]) for a, t in zip(coarse, truth) if a is not None]
+            print(f"    error vs truth: p95 {np.percentile(err, 95):.2f} px, found {len(err)}/{len(truth)}")
+
+
+def bench_sun(images, near: int = 5, band: int = 2):
+    print(f"\n=== sun percent, {len(images)} frames {images[0].shape[1]}x{images[0].shape[0]} ===")
+    full_filter = ThresholdFilter(SUN_THRESHOLD)
+    full, full_times = timed(lambda img: white_percent(full_filter(img)), images)
+    print(f"  full res           {stats(full_times)}")
+    for step in STEPS:
+        coarse_filter = ThresholdFilter(SUN_THRESHOLD, step=step)
+
+        def pyramid(img):
+            percent = white_percent(coarse_filter(img))
+            if abs(percent - near) <= band:
+                percent = white_percent(full_filter(img))
+            return percent
+
+        coarse, times = timed(pyramid, images)
+        decisions = np.mean([(a > near) == (b > near) for a, b in zip(full, coarse)])
+        max_err = max(abs(a - b) for a, b in zip(full, coarse))
+        print(f"  pyramid step {step}     {stats(times)}   speedup {np.median(full_times) / np.median(times):4.1f}x"
+              f"   decision agreement {decisions * 100:5.1f}%   max error {max_err}%")
+
+
+def main():
+    if len(sys.argv) > 1:
+        targets = recorded_images(sys.argv[1], 'target')
+        suns = recorded_images(sys.argv[1], 'sun')
+        if targets:
+            bench_target(targets)
+        if suns:
+            bench_sun(suns)
+        if not targets and not suns:
+            print(f"No target or sun regions recorded in {sys.argv[1]}")
+        return
+
+    frames = [make_target_frame(seed) for seed in range(SYNTHETIC_FRAMES)]
+    bench_target([image for image, _ in frames], [circle for _, circle in frames])
+    bench_sun([make_sun_frame(seed) for seed in range(SYNTHETIC_FRAMES)])
+
+
+if __name__ == '__main__':
+    main()
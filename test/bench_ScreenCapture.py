@@ -0,0 +1,106 @@
+"""Screen capture conversion micro-benchmark.
+
+Compares the old double conversion (RGB2BGR in get_screen, BGR2RGB in get_screen_rect_pct)
+with the single BGRA2BGR conversion and the zero conversion native BGRA path.
+Runs on synthetic BGRA frames, plus live mss grabs of the primary monitor if mss is available.
+The live run also fits the fixed cost of one grab, used by Screen_Regions.capture_regions.
+Does NOT require Elite Dangerous to be running.
+
+Usage:
+    ./venv/Scripts/python -m test.bench_ScreenCapture
+"""
+from __future__ import annotations
+
+import time
+
+import cv2
+import numpy as np
+
+from src.screen.ImageFormat import FMT_BGR, FMT_BGRA, FMT_RGB, convert_image
+
+RESOLUTIONS = [(1920, 1080), (2560, 1440), (3440, 1440), (3840, 2160)]
+ITERATIONS = 200
+
+
+def _old_path(image):
+    """ get_screen(rgb=True) followed by the undo in get_screen_rect_pct/get_screen_full. """
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+PATHS = [
+    ("old RGB2BGR+BGR2RGB", _old_path),
+    ("BGRA->BGR (1 conv)", lambda img: convert_image(img, FMT_BGRA, FMT_BGR)),
+    ("BGRA->RGB (1 conv)", lambda img: convert_image(img, FMT_BGRA, FMT_RGB)),
+    ("native BGRA (0 conv)", lambda img: convert_image(img, FMT_BGRA, FMT_BGRA)),
+]
+
+
+def time_ms(func, image, iterations: int = ITERATIONS) -> float:
+    """ Mean time of func(image) in ms. """
+    func(image)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(image)
+    return (time.perf_counter() - start) * 1000.0 / iterations
+
+
+def bench_synthetic():
+    rng = np.random.default_rng(0)
+    for w, h in RESOLUTIONS:
+        image = rng.integers(0, 256, (h, w, 4), dtype=np.uint8)
+        print(f"\n=== {w}x{h} synthetic BGRA ===")
+        base = None
+        for name, func in PATHS:
+            ms = time_ms(func, image)
+            base = ms if base is None else base
+            print(f"  {name:<22} {ms:7.3f} ms/grab   saved {base - ms:7.3f} ms")
+
+
+def bench_live():
+    try:
+        import mss
+    except ImportError:
+        print("\nmss not installed, skipping live grab benchmark")
+        return
+
+    with mss.mss() as sct:
+        mon = sct.monitors[1]
+        regions = [("1920x1080", {"left": mon["left"], "top": mon["top"],
+                                  "width": min(1920, mon["width"]), "height": min(1080, mon["height"])}),
+                   ("full screen", mon)]
+        for label, region in regions:
+            grab_ms = time_ms(lambda _: np.array(sct.grab(region)), None, 50)
+            print(f"\n=== live {label} ({region['width']}x{region['height']}) grab {grab_ms:.3f} ms ===")
+            image = np.array(sct.grab(region))
+            base = None
+            for name, func in PATHS:
+                ms = time_ms(func, image)
+                base = ms if base is None else base
+                print(f"  {name:<22} {grab_ms + ms:7.3f} ms/grab   saved {base - ms:7.3f} ms")
+
+
+def bench_grab_overhead():
+    """ Fit grab time = overhead + area * per pixel, for Screen_Regions.GRAB_OVERHEAD_PX. """
+    try:
+        import mss
+    except ImportError:
+        return
+
+    with mss.mss() as sct:
+        mon = sct.monitors[1]
+        small = {"left": mon["left"], "top": mon["top"], "width": 16, "height": 16}
+        side = min(1000, mon["width"], mon["height"])
+        large = {"left": mon["left"], "top": mon["top"], "width": side, "height": side}
+        small_ms = time_ms(lambda _: np.array(sct.grab(small)), None, 100)
+        large_ms = time_ms(lambda _: np.array(sct.grab(large)), None, 50)
+        px_ms = (large_ms - small_ms) / (side * side - 16 * 16)
+        print(f"\n=== grab cost: 16x16 {small_ms:.3f} ms, {side}x{side} {large_ms:.3f} ms ===")
+        if px_ms > 0:
+            print(f"  overhead ~ {small_ms / px_ms:,.0f} px (Screen_Regions.GRAB_OVERHEAD_PX)")
+
+
+if __name__ == '__main__':
+    bench_synthetic()
+    bench_live()
+    bench_grab_overhead()
@@ -0,0 +1,549 @@
+"""Offline vision benchmark and accuracy regression suite.
+
+Feeds labeled frames through the production detectors, headless: EDAutopilot.get_nav_offset,
+_find_target_circle (single frames, and the frames of an alignment for the tracker) and
+is_target_arc_visible (an EDAutopilot holding only its vision state, see EDAutopilot._init_vision),
+Screen_Regions.sun_percent, EDNavigationPanel._is_target_row_selected and
+OCR.detect_highlighted_tab_index. Each frame is drawn into a 1920x1080 client area served by a
+SyntheticBackend, so the detectors grab, cut and convert their regions as in the game.
+Reports latency p50/p95/p99, numpy/OpenCV allocations per call (tracemalloc peak) and accuracy against
+the labels, and exits with 1 when a case misses its accuracy limits or its p95 latency regressed
+against the baseline of this machine (test/vision/baseline.json, written with --update-baseline).
+
+The frames are synthetic (labels known by construction): the compass corpus of bench_NavballDot,
+the target frames of bench_PyramidDetect, a drifting target circle, arcs and HUD text around the
+screen center, sun discs, nav panel lists with the '<' bracket or the selected row, and tab bars. A recorded session (see
+SessionRecorder) can be used instead with --session: its region images are labeled once with
+--write-labels (the results of the current code, labels.json in the session folder), later runs
+measure the agreement with them.
+Does NOT require Elite Dangerous to be running.
+
+Usage:
+    ./venv/Scripts/python -m test.bench_Vision [--frames N] [--case name ...] [--engine annulus] [--update-baseline]
+    ./venv/Scripts/python -m test.bench_Vision --session <folder> [--write-labels]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import SyntheticBackend
+from src.screen.ColorLUT import ColorClassifier
+from src.screen.ImageFormat import FMT_BGR, FMT_BGRA, FMT_RGB, convert_image
+from src.screen.OCR import OCR
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+from src.screen.SessionRecorder import RecordedSession
+from test.bench_NavballDot import load_corpus
+from test.bench_PyramidDetect import make_sun_frame, make_target_frame, target_color
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'vision', 'baseline.json')
+LABELS_FILE = 'labels.json'
+SCREEN_SIZE = (1920, 1080)
+LATENCY_TOLERANCE = 1.5  # p95 may grow by this factor over the baseline (timing noise of one machine)
+LATENCY_SLACK_MS = 0.05  # ... plus this, for the sub-millisecond cases
+DEFAULT_FRAMES = 100
+NAV_PANEL_ORANGE = (0, 140, 255)  # BGR, inside the nav panel orange HSV range
+TAB_ORANGE = (0, 120, 255)  # BGR, inside the tab highlight HSV range
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class VisionHarness:
+    """ The detectors on drawn frames: a Screen on a SyntheticBackend showing one BGRA client area image,
+    the Screen_Regions of the default 1920x1080 regions and a headless EDAutopilot (created on first use,
+    only this harness imports the autopilot and the panels). """
+
+    def __init__(self, color_lut: bool = True, engine: str = 'hough'):
+        """
+        @param color_lut: The ColorLUTEnable setting of the autopilot detectors.
+        @param engine: The TargetCircleEngine setting.
+        """
+        self.color_lut = color_lut
+        self.engine = engine
+        self.frame = np.zeros((SCREEN_SIZE[1], SCREEN_SIZE[0], 4), dtype=np.uint8)
+        self.scr = Screen(dummy_cb, SyntheticBackend(lambda t: self.frame, SCREEN_SIZE[0], SCREEN_SIZE[1], FMT_BGRA))
+        self.scr_reg = Screen_Regions(self.scr)
+        self._ap = None
+        self._nav_panel = None
+        self._ocr = None
+
+    def rect(self, region: str) -> list[int]:
+        return [int(v) for v in self.scr_reg.reg[region]['rect']]
+
+    def show(self, patches):
+        """ Clear the client area and draw images into it.
+        @param patches: [(x, y, BGRA or BGR image)], top left corner in client area pixels.
+        """
+        self.frame[:] = 0
+        self.frame[..., 3] = 255
+        for x, y, image in patches:
+            h, w = image.shape[:2]
+            if image.shape[2] == 3:
+                image = convert_image(image, FMT_BGR, FMT_BGRA)
+            self.frame[y:y + h, x:x + w] = image
+        self.scr.invalidate_frame()  # The detectors read the cached frame (FRAME_TTL)
+
+    @property
+    def ap(self):
+        """ An EDAutopilot without game, journal, keys, overlay or threads, only its vision state. """
+        if self._ap is None:
+            from src.autopilot.ED_AP import EDAutopilot
+            ap = EDAutopilot.__new__(EDAutopilot)
+            ap.scr = self.scr
+            ap.scrReg = self.scr_reg
+            ap.ver_fov = 56.25
+            ap.hor_fov = round(ap.ver_fov * SCREEN_SIZE[0] / SCREEN_SIZE[1], 4)
+            ap.debug_overlay = False
+            ap.cv_view = False
+            ap.nav_panel = self.nav_panel
+            ap._init_vision()
+            ap.save_compass_calibration = lambda: None  # Never write ship_configs.json
+            ap._set_color_lut(self.color_lut)
+            if self.engine != ap._target_engine:
+                ap._set_target_engine(self.engine)
+            self._ap = ap
+        return self._ap
+
+    @property
+    def nav_panel(self):
+        """ An EDNavigationPanel without keys or status file, only its target row detection. """
+        if self._nav_panel is None:
+            from src.ed.EDNavigationPanel import EDNavigationPanel
+            panel = EDNavigationPanel.__new__(EDNavigationPanel)
+            panel.screen = self.scr
+            panel.change = self.scr_reg.change
+            panel.keys = None
+            panel.ap_ckb = dummy_cb
+            panel.status_parser = None
+            panel.classifier = ColorClassifier() if self.color_lut else None
+            self._nav_panel = panel
+        return self._nav_panel
+
+    @property
+    def ocr(self) -> OCR:
+        if self._ocr is None:
+            self._ocr = OCR(None, self.scr)
+        return self._ocr
+
+
+class VisionCase:
+    """ One detector under test: labeled items, how to show and run an item and how to score a result. """
+
+    def __init__(self, name: str, items: list, show, call, check, min_accuracy: float = 1.0,
+                 max_error: float | None = None, error_unit: str = ''):
+        """
+        @param items: [(item, label)].
+        @param show: show(item) draws the item into the harness frame (not timed).
+        @param call: call(item) -> result, the detector call (timed).
+        @param check: check(result, label) -> (correct, error or None).
+        @param min_accuracy: Fraction of correct results needed.
+        @param max_error: Max p95 of the errors, None = not checked.
+        """
+        self.name = name
+        self.items = items
+        self.show = show
+        self.call = call
+        self.check = check
+        self.min_accuracy = min_accuracy
+        self.max_error = max_error
+        self.error_unit = error_unit
+
+    def run(self) -> dict:
+        """ Time, trace and score every item.
+        @return: {'p50', 'p95', 'p99' (ms), 'alloc_kib' (p50 peak per call), 'accuracy', 'error_p95', 'results'}
+        """
+        times, allocs, results = [], [], []
+        self.show(self.items[0][0])
+        self.call(self.items[0][0])  # Warm up: buffers, tables, templates
+        for item, _ in self.items:
+            self.show(item)
+            start = time.perf_counter()
+            results.append(self.call(item))
+            times.append((time.perf_counter() - start) * 1000.0)
+        tracemalloc.start()
+        try:
+            for item, _ in self.items[:20]:
+                self.show(item)
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                self.call(item)
+                allocs.append((tracemalloc.get_traced_memory()[1] - base) / 1024.0)
+        finally:
+            tracemalloc.stop()
+        scores = [self.check(result, label) for result, (_, label) in zip(results, self.items)]
+        errors = [error for _, error in scores if error is not None]
+        return {'p50': float(np.percentile(times, 50)), 'p95': float(np.percentile(times, 95)),
+                'p99': float(np.percentile(times, 99)), 'alloc_kib': float(np.median(allocs)),
+                'accuracy': sum(ok for ok, _ in scores) / len(scores),
+                'error_p95': float(np.percentile(errors, 95)) if errors else None, 'results': results}
+
+
+# -- Labeled synthetic items ---------------------------------------------------------------------------
+
+def nav_offset_case(h: VisionHarness, frames: int) -> VisionCase:
+    """ get_nav_offset on the compass corpus, the ring center set to the crop's ring (as calibrated). """
+    corpus = load_corpus()
+    left, top = h.rect('compass')[:2]
+    count = min(frames, len(corpus['images']))
+    indices = np.linspace(0, len(corpus['images']) - 1, count).astype(int)
+    items = [((corpus['images'][i], corpus['rings'][i]),
+              None if np.isnan(corpus['angles'][i][0]) else tuple(corpus['angles'][i])) for i in indices]
+
+    def show(item):
+        image, ring = item
+        h.ap.compass_cal.set_center((float(ring[0]) + left, float(ring[1]) + top))
+        h.show([(left, top, image)])
+
+    def check(result, label):
+        if result is None:
+            return False, None
+        if label is None:
+            return result['z'] < 0, None
+        error = max(abs(result['pit'] - label[0]), abs(result['yaw'] - label[1]))
+        return result['z'] > 0 and error < 1.0, error
+
+    return VisionCase('nav_offset', items, show, lambda _: h.ap.get_nav_offset(h.scr_reg), check, max_error=0.5,
+                      error_unit='deg')
+
+
+def check_circle(result, label):
+    if result is None:
+        return False, None
+    error = float(np.hypot(result[0] - label[0], result[1] - label[1]))
+    return error <= 3.0, error
+
+
+def target_circle_case(h: VisionHarness, frames: int) -> VisionCase:
+    """ _find_target_circle on independent synthetic target frames, grabbed in the detector's format
+    (the tracker reset before each, so every read is a search of the whole region). """
+    left, top = h.rect('target')[:2]
+    items = []
+    for seed in range(frames):
+        image, (cx, cy, _) = make_target_frame(seed)  # FMT_RGB, as the HSV range is tuned
+        items.append((convert_image(image, FMT_RGB, FMT_BGRA), (cx, cy)))
+
+    def show(image):
+        h.ap._target_tracker.reset()
+        h.show([(left, top, image)])
+
+    def call(_):
+        image = h.scr_reg.capture_region(h.scr, 'target', h.ap._target_fmt, ttl=h.ap.FRAME_TTL)
+        return h.ap._find_target_circle(image)
+
+    return VisionCase('target_circle', items, show, call, check_circle, min_accuracy=0.95, max_error=2.5,
+                      error_unit='px')
+
+
+def make_track_frames(count: int, seed: int = 0, size: tuple[int, int] = (634, 540), speed: float = 5.0):
+    """ Target region frames of an alignment: the circle drifts up to speed pixels per frame, its label
+    text moves with it, the orbit arc stays. @return: [(FMT_RGB image, (cx, cy))] """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    color = target_color()
+    arc_center = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+    cx, cy = float(rng.uniform(150, w - 150)), float(rng.uniform(150, h - 150))
+    frames = []
+    for _ in range(count):
+        cx = float(np.clip(cx + rng.uniform(-speed, speed), 80, w - 80))
+        cy = float(np.clip(cy + rng.uniform(-speed, speed), 80, h - 80))
+        image = (rng.random((h, w, 3)) * 30).astype(np.uint8)
+        cv2.circle(image, (int(cx * 16), int(cy * 16)), int(rng.uniform(44.5, 47.5) * 16), color, 2, cv2.LINE_AA, 4)
+        cv2.putText(image, 'DEATH=ADDER', (int(cx) + 55, int(cy) + 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        cv2.ellipse(image, arc_center, (300, 60), 10, 0, 180, color, 1)
+        frames.append((image, (cx, cy)))
+    return frames
+
+
+def target_track_case(h: VisionHarness, frames: int) -> VisionCase:
+    """ _find_target_circle over the frames of an alignment, the steady state of the tracker. """
+    left, top = h.rect('target')[:2]
+    items = [(convert_image(image, FMT_RGB, FMT_BGRA), label) for image, label in make_track_frames(frames)]
+
+    def call(_):
+        image = h.scr_reg.capture_region(h.scr, 'target', h.ap._target_fmt, ttl=h.ap.FRAME_TTL)
+        return h.ap._find_target_circle(image)
+
+    return VisionCase('target_track', items, lambda image: h.show([(left, top, image)]), call, check_circle,
+                      min_accuracy=0.95, max_error=2.5, error_unit='px')
+
+
+def make_arc_frame(seed: int, center: tuple[int, int], rect: list[int]):
+    """ The target_arc region with a partial target circle around the screen center (True), or a HUD label
+    in the same color (False). """
+    rng = np.random.default_rng(seed)
+    w, h = rect[2] - rect[0], rect[3] - rect[1]
+    image = (rng.random((h, w, 3)) * 30).astype(np.uint8)
+    color = target_color()
+    cx, cy = (center[0] - rect[0]) * 16, (center[1] - rect[1]) * 16
+    is_arc = seed % 2 == 0
+    if is_arc:
+        start = float(rng.uniform(0, 360))
+        cv2.ellipse(image, (cx, cy), (int(rng.uniform(44.5, 47.5) * 16),) * 2, 0, start,
+                    start + float(rng.uniform(90, 300)), color, 2, cv2.LINE_AA, 4)
+    else:
+        cv2.putText(image, 'NAV BEACON', (int(rng.integers(0, 20)), int(rng.integers(15, h))),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return image, is_arc
+
+
+def target_arc_case(h: VisionHarness, frames: int) -> VisionCase:
+    rect = h.rect('target_arc')
+    center = (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2)
+    items = [make_arc_frame(seed, center, rect) for seed in range(frames)]
+    # Most labels close to the center pass the radius spread test too (ARC_STD_THRESHOLD): the floor is the
+    # current rate, the baseline catches drops from it
+    return VisionCase('target_arc', items, lambda image: h.show([(rect[0], rect[1], image)]),
+                      lambda _: h.ap.is_target_arc_visible(h.scr_reg),
+                      lambda result, label: (result == label, None), min_accuracy=0.55)
+
+
+def sun_percent_case(h: VisionHarness, frames: int) -> VisionCase:
+    """ sun_percent on sun discs, labeled with the percent of the plain threshold of the region. """
+    left, top = h.rect('sun')[:2]
+    items = []
+    for seed in range(frames):
+        image = make_sun_frame(seed)  # FMT_RGB, as the threshold is tuned
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        label = int(np.count_nonzero(gray > h.scr_reg.sun_threshold) * 100 / gray.size)
+        items.append((convert_image(image, FMT_RGB, FMT_BGRA), label))
+    return VisionCase('sun_percent', items, lambda image: h.show([(left, top, image)]),
+                      lambda _: h.scr_reg.sun_percent(h.scr),
+                      lambda result, label: (result == label, float(abs(result - label))), max_error=0.0,
+                      error_unit='%')
+
+
+def make_nav_list(seed: int, template, is_target: bool):
+    """ The nav panel list box: 11 rows of names, one with the orange '<' bracket (not the target), or the
+    selected orange row with the dark '>' (the target). """
+    rng = np.random.default_rng(seed)
+    image = np.full((400, 936, 3), (25, 20, 18), dtype=np.uint8)
+    row_h = 400 // 11
+    for row in range(11):
+        cv2.putText(image, f"SYSTEM {int(rng.integers(100, 999))}", (60, row * row_h + 27),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (150, 150, 150), 1, cv2.LINE_AA)
+    y, x = int(rng.integers(0, 11)) * row_h + 4, int(rng.integers(10, 30))
+    th, tw = template.shape[:2]
+    if is_target:
+        cv2.rectangle(image, (0, y - 2), (935, y + th + 2), (0, 110, 230), -1)
+        image[y:y + th, x:x + tw][cv2.flip(template, 1) > 128] = (10, 10, 10)
+    else:
+        image[y:y + th, x:x + tw][template > 128] = NAV_PANEL_ORANGE
+    image = cv2.GaussianBlur(image, (3, 3), 0.6)
+    noise = rng.normal(0, 4, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def nav_row_case(h: VisionHarness, frames: int) -> VisionCase:
+    panel = h.nav_panel
+    panel._load_templates()
+    x1, y1 = panel.NAV_LIST_BOX[:2]
+    items = [(make_nav_list(seed, panel._bracket_template, seed % 2 == 1), seed % 2 == 1) for seed in range(frames)]
+    return VisionCase('nav_row', items, lambda image: h.show([(x1, y1, image)]),
+                      lambda _: panel._is_target_row_selected([False]),
+                      lambda result, label: (result == label, None))
+
+
+def make_tab_bar(seed: int, tabs: int = 5):
+    """ A tab bar with one orange (active) tab. @return: (BGR image, active index) """
+    rng = np.random.default_rng(seed)
+    width, height = int(rng.integers(500, 900)), 32
+    image = np.full((height, width, 3), (40, 35, 30), dtype=np.uint8)
+    active = int(rng.integers(0, tabs))
+    tab_w = width / tabs
+    for i in range(tabs):
+        x0, x1 = int(i * tab_w) + 3, int((i + 1) * tab_w) - 3
+        color = TAB_ORANGE if i == active else (70, 60, 55)
+        cv2.rectangle(image, (x0, 3), (x1, height - 4), color, -1)
+        cv2.putText(image, f"TAB{i}", (x0 + 8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                    (10, 10, 10) if i == active else (160, 150, 140), 1)
+    return image, active
+
+
+def tab_index_case(h: VisionHarness, frames: int) -> VisionCase:
+    items = [make_tab_bar(seed) for seed in range(frames)]
+    return VisionCase('tab_index', items, lambda image: None,
+                      lambda image: h.ocr.detect_highlighted_tab_index(image, 5),
+                      lambda result, label: (result == label, None))
+
+
+CASES = {
+    'nav_offset': nav_offset_case,
+    'target_circle': target_circle_case,
+    'target_track': target_track_case,
+    'target_arc': target_arc_case,
+    'sun_percent': sun_percent_case,
+    'nav_row': nav_row_case,
+    'tab_index': tab_index_case,
+}
+
+
+# -- Recorded sessions ---------------------------------------------------------------------------------
+
+def agree(result, label) -> tuple[bool, float | None]:
+    """ Agreement of a result with the label recorded by an earlier run (see --write-labels). """
+    if result is None or label is None:
+        return result is None and label is None, None
+    if isinstance(result, dict):
+        if (result['z'] > 0) != (label['z'] > 0):
+            return False, None
+        error = max(abs(result['pit'] - label['pit']), abs(result['yaw'] - label['yaw']))
+        return error <= 0.25, error
+    if isinstance(result, (tuple, list)):
+        error = float(np.hypot(result[0] - label[0], result[1] - label[1]))
+        return error <= 1.0, error
+    return result == label, None
+
+
+def session_cases(h: VisionHarness, folder: str, frames: int) -> list[VisionCase]:
+    """ The detector calls of the synthetic cases on the region images of a recorded session, labeled by
+    labels.json of the folder (no labels: every result counts as wrong). """
+    session = RecordedSession(folder)
+    labels_path = os.path.join(folder, LABELS_FILE)
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, 'r') as fp:
+            labels = json.load(fp)
+
+    def target_call(_):
+        return h.ap._find_target_circle(h.scr_reg.capture_region(h.scr, 'target', h.ap._target_fmt,
+                                                                  ttl=h.ap.FRAME_TTL))
+
+    calls = {
+        'compass': ('nav_offset', lambda _: h.ap.get_nav_offset(h.scr_reg)),
+        'target': ('target_circle', target_call),
+        'target_arc': ('target_arc', lambda _: h.ap.is_target_arc_visible(h.scr_reg)),
+        'sun': ('sun_percent', lambda _: h.scr_reg.sun_percent(h.scr)),
+    }
+    cases = []
+    for region, (name, call) in calls.items():
+        if region not in session.regions or region not in h.scr_reg.reg:
+            continue
+        fmt = session.region_info(region)['fmt']
+        images = [convert_image(np.array(image), fmt, FMT_BGRA) for _, image in session.frames(region)][:frames]
+        left, top = h.rect(region)[:2]
+        region_labels = labels.get(name, [None] * len(images))
+        items = list(zip(images, region_labels))
+        cases.append(VisionCase(name, items, lambda image, x=left, y=top: h.show([(x, y, image)]), call, agree,
+                                min_accuracy=0.95))
+    return cases
+
+
+def write_labels(folder: str, reports: dict):
+    labels = {}
+    for name, report in reports.items():
+        labels[name] = [list(r) if isinstance(r, tuple) else r for r in report['results']]
+    with open(os.path.join(folder, LABELS_FILE), 'w') as fp:
+        json.dump(labels, fp)
+    print(f"Labels of {list(labels)} written to {os.path.join(folder, LABELS_FILE)}")
+
+
+# -- Report and regression check -----------------------------------------------------------------------
+
+def check_report(case: VisionCase, report: dict, baseline: dict | None) -> list[str]:
+    """ The regressions of a case: accuracy below its limits, or p95 latency over the baseline. """
+    failures = []
+    if report['accuracy'] < case.min_accuracy:
+        failures.append(f"{case.name}: accuracy {report['accuracy'] * 100:.1f}% < {case.min_accuracy * 100:.0f}%")
+    if case.max_error is not None and report['error_p95'] is not None and report['error_p95'] > case.max_error:
+        failures.append(f"{case.name}: error p95 {report['error_p95']:.3f} {case.error_unit} > {case.max_error}")
+    if baseline is not None and case.name in baseline:
+        budget = baseline[case.name]['p95'] * LATENCY_TOLERANCE + LATENCY_SLACK_MS
+        if report['p95'] > budget:
+            failures.append(f"{case.name}: p95 {report['p95']:.3f} ms > {budget:.3f} ms "
+                            f"(baseline {baseline[case.name]['p95']:.3f} ms)")
+        if report['accuracy'] < baseline[case.name]['accuracy']:
+            failures.append(f"{case.name}: accuracy {report['accuracy'] * 100:.1f}% < baseline "
+                            f"{baseline[case.name]['accuracy'] * 100:.1f}%")
+    return failures
+
+
+def print_report(case: VisionCase, report: dict):
+    error = '' if report['error_p95'] is None else f"   error p95 {report['error_p95']:.3f} {case.error_unit}"
+    print(f"  {case.name:14s} p50 {report['p50']:7.3f} ms  p95 {report['p95']:7.3f} ms  p99 {report['p99']:7.3f} ms"
+          f"   alloc {report['alloc_kib']:8.1f} KiB   accuracy {report['accuracy'] * 100:5.1f}%{error}"
+          f"   ({len(case.items)} items)")
+
+
+def baseline_path(color_lut: bool = True, engine: str = 'hough') -> str:
+    """ The baseline file of a detector setting, baseline.json for the defaults. """
+    suffix = ('' if color_lut else '_nolut') + ('' if engine == 'hough' else f"_{engine}")
+    return BASELINE_FILE if not suffix else BASELINE_FILE.replace('.json', f"{suffix}.json")
+
+
+def load_baseline(path: str = BASELINE_FILE) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as fp:
+        return json.load(fp)
+
+
+def save_baseline(reports: dict, path: str = BASELINE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = load_baseline(path) or {}
+    for name, report in reports.items():
+        baseline[name] = {key: report[key] for key in ('p50', 'p95', 'p99', 'alloc_kib', 'accuracy')}
+    with open(path, 'w') as fp:
+        json.dump(baseline, fp, indent=4)
+    print(f"Baseline of {list(reports)} written to {path}")
+
+
+def run_cases(cases: list[VisionCase], baseline: dict | None = None) -> tuple[dict, list[str]]:
+    """ Run and print the cases.
+    @return: ({case name: report}, [regressions])
+    """
+    reports, failures = {}, []
+    for case in cases:
+        report = case.run()
+        reports[case.name] = report
+        print_report(case, report)
+        failures.extend(check_report(case, report, baseline))
+    return reports, failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline vision benchmark and accuracy regression suite")
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help="Items per case")
+    parser.add_argument('--case', nargs='*', choices=list(CASES), help="Cases to run, default all")
+    parser.add_argument('--no-lut', action='store_true', help="Autopilot detectors with ColorLUTEnable off")
+    parser.add_argument('--engine', choices=['hough', 'annulus'], default='hough', help="TargetCircleEngine")
+    parser.add_argument('--session', help="Recorded session folder instead of the synthetic frames")
+    parser.add_argument('--write-labels', action='store_true', help="Label the session with the current results")
+    parser.add_argument('--update-baseline', action='store_true', help="Write the latency/accuracy baseline")
+    args = parser.parse_args()
+
+    harness = VisionHarness(color_lut=not args.no_lut, engine=args.engine)
+    if args.session:
+        cases = session_cases(harness, args.session, args.frames)
+        if args.case:
+            cases = [case for case in cases if case.name in args.case]
+        print(f"=== vision suite, session {args.session} ===")
+        reports, failures = run_cases(cases)
+        if args.write_labels:
+            write_labels(args.session, reports)
+            return 0
+    else:
+        names = args.case or list(CASES)
+        path = baseline_path(harness.color_lut, harness.engine)
+        baseline = None if args.update_baseline else load_baseline(path)
+        print(f"=== vision suite, {args.frames} items per case, baseline {'none' if baseline is None else path} ===")
+        reports, failures = run_cases([CASES[name](harness, args.frames) for name in names], baseline)
+        if args.update_baseline:
+            save_baseline(reports, path)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Standalone alignment log test.
+
+Does NOT require Elite Dangerous to be running (records synthetic alignment steps and cycles).
+Tests AlignLog: steps belong to the innermost open cycle, the ring drops the oldest rows not flushed,
+flushes write columnar npz chunks that load() reads back in order, and summarize() reports the time to
+align and the overshoot rates per ship.
+
+Usage:
+    python -m pytest test/test_AlignLog.py -s
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.autopilot.AlignLog import AlignLog, format_report, load, overshoots, summarize
+
+
+class AlignLogTestCase(unittest.TestCase):
+
+    def test_cycles_and_chunks(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log = AlignLog(folder, flush_interval=1e9)
+            compass = log.begin('compass', 'Python', 'SCSpeed0')
+            log.step('pit', 20.0, 1.2, 2.0, 6.0, 0.02, ship='Python', throttle='SCSpeed0')
+            target = log.begin('target', 'Python', 'SCSpeed0')
+            log.step('yaw', 3.0, 0.3, 2.0, -0.5, 0.01, source='target', ship='Python', throttle='SCSpeed0')
+            log.end(target, True)
+            log.flush()
+            log.step('pit', 6.0, 0.5, 2.0, ship='Python', throttle='SCSpeed0')  # Not read after
+            log.end(compass, True)
+            log.begin('nudge', 'Python', 'SCSpeed0')  # Left open by an exception
+            log.end(log.begin('compass', 'Python', 'SCSpeed0'), False)
+            log.close()
+            self.assertEqual(len(os.listdir(folder)), 2)
+
+            steps, cycles = load(folder)
+            self.assertEqual(list(steps['cycle']), [1, 2, 1])
+            self.assertEqual(list(steps['source']), ['compass', 'target', 'compass'])
+            self.assertTrue(np.isnan(steps['after'][2]) and np.isnan(steps['latency'][2]))
+            self.assertEqual(list(cycles['routine']), ['target', 'compass', 'compass'])
+            self.assertEqual(list(cycles['steps']), [1, 2, 0])
+            self.assertEqual(list(cycles['ok']), [True, True, False])
+            self.assertEqual(len(log._open), 1)  # The nudge of the exception
+
+    def test_ring_drops_oldest(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log = AlignLog(folder, capacity=4, flush_interval=1e9)
+            for i in range(6):
+                log.step('yaw', float(i), 0.5, 2.0, 0.0)
+            log.close()
+            steps, cycles = load(folder)
+            self.assertEqual(list(steps['before']), [2.0, 3.0, 4.0, 5.0])
+            self.assertEqual(log.steps.dropped, 2)
+            self.assertEqual(len(cycles), 0)
+
+    def test_flush_interval(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log = AlignLog(folder, flush_interval=0.0)  # A chunk per record
+            log.step('pit', 10.0, 0.5, 2.0, 2.0)
+            log.step('pit', 2.0, 0.5, 2.0, 1.0)
+            self.assertEqual(log.chunk_count, 2)
+            log.close()  # Nothing left to flush
+            self.assertEqual(len(os.listdir(folder)), 2)
+            self.assertEqual(list(load(folder)[0]['before']), [10.0, 2.0])
+
+    def test_summarize(self):
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as folder:
+            log = AlignLog(folder, flush_interval=1e9)
+            for ship, overshoot in (('Python', 0.25), ('Cobra', 0.0)):
+                for i in range(20):
+                    cycle = log.begin('compass', ship, 'SCSpeed0')
+                    before = rng.uniform(5, 30) * rng.choice([-1, 1])
+                    after = -before * 0.2 if i < 20 * overshoot else before * 0.2
+                    log.step('pit', before, 1.0, 2.0, after, 0.02, ship=ship, throttle='SCSpeed0')
+                    log.step('plan', 10.0, 1.0, 2.0, 2.0, 0.02, ship=ship, throttle='SCSpeed0')
+                    log.end(cycle, i % 10 != 0)
+            log.close()
+            steps, cycles = load(folder)
+
+        self.assertEqual(int(overshoots(steps).sum()), 5)
+        report = summarize(steps, cycles)
+        self.assertEqual(list(report), ['Cobra', 'Python'])
+        self.assertAlmostEqual(report['Python']['axes']['pit']['overshoot'], 0.25)
+        self.assertEqual(report['Cobra']['axes']['pit']['overshoot'], 0.0)
+        self.assertTrue(np.isnan(report['Python']['axes']['plan']['overshoot']))
+        compass = report['Python']['cycles']['compass']
+        self.assertEqual((compass['count'], compass['ok'], compass['steps']), (20, 0.9, 2.0))
+        self.assertLessEqual(compass['p50'], compass['p90'])
+        print('\n' + format_report(report))
+
+
+if __name__ == '__main__':
+    unittest.main()
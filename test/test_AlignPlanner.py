@@ -0,0 +1,173 @@
+"""Standalone alignment planner test.
+
+Does NOT require Elite Dangerous to be running (a simulated ship: per axis spool up and coast, the target
+direction turned on the sphere, navball read noise).
+Tests AlignPlanner: the rotation conventions match the navball (pitch up, yaw right, roll clockwise), plans
+end on the target for any offset in front, and aligning with overlapping holds takes at least a third less
+time than the pitch then yaw alignment of compass_align on the simulated ship.
+
+Usage:
+    python -m pytest test/test_AlignPlanner.py -s
+"""
+import unittest
+from math import cos, radians, sin
+
+import numpy as np
+
+from src.autopilot.AlignPlanner import AlignPlanner, direction, offset, turn
+
+RATES = {'pitch': 19.8, 'yaw': 4.8, 'roll': 48.0}  # A medium ship at zero throttle, deg/s
+SPOOL = 0.4  # Time constant of the turn rate after a press
+COAST = 0.2  # Time constant of the turn rate after the release
+NOISE = 0.5  # Navball read noise, degrees
+CLOSE = 4.0  # EDAutopilot.ALIGN_CLOSE
+SETTLE = 2.0  # EDAutopilot.ALIGN_SETTLE
+MIN_HOLD, MAX_HOLD = 0.5, 4.0  # EDAutopilot.MIN_HOLD_TIME, MAX_HOLD_TIME
+ALIGN_TIMEOUT = 25.0
+
+
+def approach_pct(remaining: float) -> float:
+    """ EDAutopilot._approach_pct """
+    return 0.4 if remaining < 10 else 0.6 if remaining < 20 else 0.8
+
+
+class ShipSim:
+    """ Target direction in the ship frame (x right, y up, z forward), turned by the axis keys. Each axis
+    spools up to its rate while held and coasts down after the release. """
+
+    def __init__(self, pit: float, yaw: float, rates: dict = None, seed: int = 0, spool: float = SPOOL,
+                 coast: float = COAST):
+        self.d = direction(pit, yaw)
+        self.rates = rates or RATES
+        self.spool = spool
+        self.coast = coast
+        self.rng = np.random.default_rng(seed)
+
+    def _step(self, dt: float, vel: dict):
+        x, y, z = self.d
+        a, b, c = (radians(vel[axis] * dt) for axis in ('pitch', 'yaw', 'roll'))
+        y, z = y * cos(a) - z * sin(a), y * sin(a) + z * cos(a)  # Pitch up: the target moves down
+        x, z = x * cos(b) - z * sin(b), x * sin(b) + z * cos(b)  # Yaw right: the target moves left
+        x, y = x * cos(c) - y * sin(c), x * sin(c) + y * cos(c)  # Roll clockwise: the target turns anticlockwise
+        self.d = np.array([x, y, z]) / np.linalg.norm([x, y, z])
+
+    def hold(self, holds: dict):
+        """ Hold the axes at once until each release, then coast to a stop.
+        @param holds: {axis: (sign, seconds)}.
+        """
+        spool, coast = self.spool, self.coast
+        dt = 0.002
+        vel = {axis: 0.0 for axis in ('pitch', 'yaw', 'roll')}
+        t = 0.0
+        while True:
+            t = t + dt
+            for axis in vel:
+                sign, held = holds.get(axis, (0.0, 0.0))
+                if t <= held:
+                    vel[axis] = vel[axis] + (sign * self.rates[axis] - vel[axis]) * min(1.0, dt / spool) if spool > 0 \
+                        else sign * self.rates[axis]
+                else:
+                    vel[axis] = vel[axis] - vel[axis] * min(1.0, dt / coast) if coast > 0 else 0.0
+            self._step(dt, vel)
+            if t > max(held for _, held in holds.values()) and all(abs(v) < 0.01 for v in vel.values()):
+                return
+
+    def read(self) -> tuple[float, float]:
+        pit, yaw, _ = offset(self.d)
+        return pit + self.rng.normal(0, NOISE), yaw + self.rng.normal(0, NOISE)
+
+
+def sequential_align(ship: ShipSim) -> float:
+    """ compass_align: _align_axis on the larger axis, then on the other, until both are in the band.
+    @return: Seconds of holds and settles.
+    """
+    t = 0.0
+    for _ in range(5):
+        pit, yaw = ship.read()
+        if abs(pit) < CLOSE and abs(yaw) < CLOSE:
+            break
+        for axis in (('pitch', 'yaw') if abs(pit) > abs(yaw) else ('yaw', 'pitch')):
+            start = t
+            while t - start < ALIGN_TIMEOUT:
+                off = ship.read()[0 if axis == 'pitch' else 1]
+                if abs(off) < CLOSE:
+                    break
+                hold = max(MIN_HOLD, min(MAX_HOLD, abs(off) * approach_pct(abs(off)) / ship.rates[axis]))
+                ship.hold({axis: (np.sign(off), hold)})
+                t = t + hold + SETTLE
+    return t
+
+
+def planned_align(ship: ShipSim, planner: AlignPlanner) -> float:
+    """ compass_align with AlignPlannerEnable (_plan_to_center).
+    @return: Seconds of holds and settles.
+    """
+    t = 0.0
+    while t < ALIGN_TIMEOUT * 2:
+        pit, yaw = ship.read()
+        if abs(pit) < CLOSE and abs(yaw) < CLOSE:
+            break
+        remaining = np.degrees(np.arccos(direction(pit, yaw)[2]))
+        pct = approach_pct(remaining)
+        angles = planner.plan(pit * pct, yaw * pct, min_angle=CLOSE * pct / 2)
+        if not angles:
+            break
+        holds = {axis: (np.sign(angle), max(MIN_HOLD, min(MAX_HOLD, planner.hold(axis, angle))))
+                 for axis, angle in angles.items()}
+        ship.hold(holds)
+        t = t + max(held for _, held in holds.values()) + SETTLE
+    return t
+
+
+class AlignPlannerTestCase(unittest.TestCase):
+
+    def test_conventions(self):
+        # turn() applies the same rotations as the simulated ship (no spool or coast: constant rates)
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            pit, yaw = rng.uniform(-40, 40, 2)
+            angles = dict(zip(('pitch', 'yaw', 'roll'), rng.uniform(-40, 40, 3)))
+            ship = ShipSim(pit, yaw, spool=0.0, coast=0.0)
+            ship.hold({axis: (np.sign(angle), abs(angle) / RATES[axis]) for axis, angle in angles.items()})
+            np.testing.assert_allclose(turn(direction(pit, yaw), angles, RATES), ship.d, atol=2e-3)
+        # A target at 3 o'clock: yaw right, or roll clockwise 90 and pitch up
+        d = direction(0.0, 20.0)
+        self.assertAlmostEqual(offset(turn(d, {'yaw': 20.0}, RATES))[1], 0.0, places=6)
+        pit, yaw, front = offset(turn(d, {'roll': 90.0}, RATES))
+        self.assertAlmostEqual(pit, 20.0, places=6)
+        self.assertAlmostEqual(yaw, 0.0, places=6)
+
+    def test_plan_ends_on_target(self):
+        planner = AlignPlanner(RATES)
+        rng = np.random.default_rng(1)
+        rolled = 0
+        for _ in range(300):
+            pit, yaw = rng.uniform(-80, 80, 2)
+            angles = planner.plan(pit, yaw)
+            end_pit, end_yaw, front = offset(turn(direction(pit, yaw), angles, RATES))
+            self.assertTrue(front)
+            self.assertLess(max(abs(end_pit), abs(end_yaw)), 0.1, f"{pit:.1f} {yaw:.1f} {angles}")
+            self.assertLessEqual(planner.duration(angles), planner.duration(planner.plan(pit, yaw, roll=False)))
+            rolled = rolled + ('roll' in angles)
+        self.assertGreater(rolled, 100)  # The slow yaw axis makes a rolled plan the faster one off the centerline
+        self.assertEqual(planner.plan(0.0, 0.0), {})
+        self.assertEqual(list(planner.plan(10.0, 0.5, roll=False, min_angle=1.0)), ['pitch'])
+
+    def test_faster_than_sequential(self):
+        planner = AlignPlanner(RATES)
+        rng = np.random.default_rng(2)
+        seq, plan = [], []
+        for seed in range(40):
+            pit, yaw = rng.uniform(-45, 45, 2)
+            seq.append(sequential_align(ShipSim(pit, yaw, seed=seed)))
+            ship = ShipSim(pit, yaw, seed=seed)
+            plan.append(planned_align(ship, planner))
+            end_pit, end_yaw, _ = offset(ship.d)
+            self.assertLess(max(abs(end_pit), abs(end_yaw)), CLOSE + 3 * NOISE)
+        print(f"\nalign time: pitch then yaw {np.mean(seq):.1f}s, planned {np.mean(plan):.1f}s "
+              f"({(1 - np.mean(plan) / np.mean(seq)) * 100:.0f}% less)")
+        self.assertLess(np.mean(plan), np.mean(seq) * 2 / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Standalone annulus matched filter test.
+
+Does NOT require Elite Dangerous to be running (synthetic frames, see test/bench_PyramidDetect.py).
+Tests the annulus finder locates the target circle to sub pixel accuracy, finds partial arcs, its ring
+score tells a target arc from HUD text, its kernels are cached, and CircleTracker tracks with it.
+
+Usage:
+    python -m pytest test/test_Annulus.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.Annulus import AnnulusCircleFinder, annulus_kernel
+from src.screen.CircleTracker import CircleTracker
+from test.bench_Annulus import make_partial_frame
+from test.bench_PyramidDetect import TARGET_HSV, TARGET_R, make_target_frame, target_color
+from test.bench_Vision import make_track_frames
+
+
+def finder(step=4):
+    return AnnulusCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+
+
+class AnnulusTestCase(unittest.TestCase):
+
+    def test_find_circle(self):
+        for step in (2, 4):
+            annulus = finder(step)
+            errors = []
+            for seed in range(20):
+                image, (cx, cy, r) = make_target_frame(seed)
+                found = annulus.find(image)
+                self.assertIsNotNone(found, f"step {step} seed {seed}")
+                errors.append(np.hypot(found[0] - cx, found[1] - cy))
+                self.assertAlmostEqual(found[2], r, delta=2.0)
+                self.assertGreater(annulus.score, 0.5)
+            self.assertLess(max(errors), 3.0)
+            self.assertLess(np.median(errors), 1.0)
+
+    def test_partial_arc(self):
+        annulus = finder()
+        hits = 0
+        for seed in range(20):
+            image, (cx, cy) = make_partial_frame(seed)
+            found = annulus.find(image)
+            hits = hits + (found is not None and np.hypot(found[0] - cx, found[1] - cy) < 3.0)
+        self.assertGreaterEqual(hits, 18)
+
+    def test_edges(self):
+        # Rings centered near or past the edges and corners of the region (partly out of it)
+        image, _ = make_target_frame(0)
+        img_h, img_w = image.shape[:2]
+        for cx, cy in ((img_w - 25, img_h // 2), (TARGET_R[1], img_h // 2), (30, img_h // 2), (5, img_h // 2),
+                       (img_w // 2, 15), (img_w // 2, img_h - 15), (25, 25), (img_w - 20, img_h - 20)):
+            image[:] = 0
+            cv2.circle(image, (cx, cy), 46, target_color(), 2)
+            for step in (2, 4):
+                found = finder(step).find(image)
+                self.assertIsNotNone(found, f"({cx}, {cy}) step {step}")
+                self.assertLess(np.hypot(found[0] - cx, found[1] - cy), 1.5, f"({cx}, {cy}) step {step}")
+            # Tracking: the window around the last position is cut by the edge as well
+            found = finder().find_near(image, cx + 5, cy - 4, TARGET_R[1] + 6 + 16)  # CircleTracker reach
+            self.assertIsNotNone(found, f"({cx}, {cy}) near")
+            self.assertLess(np.hypot(found[0] - cx, found[1] - cy), 1.5, f"({cx}, {cy}) near")
+
+    def test_no_circle(self):
+        image, _ = make_target_frame(0)
+        image[:] = 0
+        # The HUD text and orbit line of the target color are no ring
+        cv2.putText(image, 'DEATH=ADDER', (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.7, target_color(), 2)
+        cv2.putText(image, '1.2KM', (300, 300), cv2.FONT_HERSHEY_SIMPLEX, 0.7, target_color(), 2)
+        cv2.ellipse(image, (320, 270), (300, 60), 10, 0, 180, target_color(), 1)
+        self.assertIsNone(finder().find(image))
+
+    def test_score_at(self):
+        annulus = finder()
+        mask = np.zeros((200, 200), dtype=np.uint8)
+        cv2.circle(mask, (100, 100), 46, 255, 2)
+        self.assertAlmostEqual(annulus.score_at(mask, 100, 100), 1.0, delta=0.15)
+        self.assertLess(annulus.score_at(mask, 130, 100), 0.3)
+        half = mask.copy()
+        half[:, 100:] = 0
+        self.assertAlmostEqual(annulus.score_at(half, 100, 100), 0.5, delta=0.1)
+        text = np.zeros_like(mask)
+        cv2.putText(text, 'SHIELDS', (40, 110), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 255, 2)
+        self.assertLess(annulus.score_at(text, 100, 100), 0.15)
+        self.assertEqual(annulus.score_at(mask, -200, -200), 0.0)
+
+    def test_kernel_cache(self):
+        kernel, full = annulus_kernel(44.0, 48.0, 4)
+        self.assertIs(annulus_kernel(44.0, 48.0, 4)[0], kernel)
+        self.assertEqual(kernel.shape[0] % 2, 1)
+        self.assertFalse(kernel.flags.writeable)
+        self.assertAlmostEqual(float(kernel[kernel > 0].sum()), 1.0, places=4)
+        self.assertAlmostEqual(float(kernel[kernel < 0].sum()), -1.0, places=4)
+        self.assertGreater(full, 0.0)
+
+    def test_tracker(self):
+        tracker = CircleTracker(finder())
+        for image, (cx, cy) in make_track_frames(30, seed=3):
+            found = tracker.track(image)
+            self.assertIsNotNone(found)
+            self.assertLess(np.hypot(found[0] - cx, found[1] - cy), 3.0)
+        self.assertEqual(tracker.full_count, 1)
+        self.assertEqual(tracker.tracked_count, 29)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Standalone closed loop axis hold test.
+
+Does NOT require Elite Dangerous to be running (a simulated ship axis: first order spool up and coast,
+navball display lag and read noise).
+Tests AxisController releases the key so the axis stops inside the alignment band, faster than the
+open loop hold + settle of _align_axis, and releases on an overshoot and at max_hold.
+
+Usage:
+    python -m pytest test/test_AxisController.py -s
+"""
+import unittest
+
+import numpy as np
+
+from src.autopilot.AxisController import AxisController
+
+SAMPLE_PERIOD = 1 / 30  # NavTelemetryRate
+DISPLAY_LAG = 0.1  # The navball shows the ship this much later
+SPOOL = 0.15  # Time constant of the turn rate after a press
+COAST = 0.3  # Time constant of the turn rate after the release
+CLOSE = 4.0  # EDAutopilot.ALIGN_CLOSE
+
+
+def simulate(ctl: AxisController, dist: float, rate: float, noise: float = 1.0, seed: int = 0, direction: float = 1.0):
+    """ Hold until the controller releases, then coast to a stop.
+    @return: (distance the axis stops at, seconds held, seconds until stopped)
+    """
+    rng = np.random.default_rng(seed)
+    dt = 0.005
+    history = [(0.0, dist)]
+    pos, vel, t = dist, 0.0, 0.0
+    ctl.start(0.0, dist)
+    next_sample, released = SAMPLE_PERIOD, None
+    while released is None:
+        t = t + dt
+        vel = vel + (direction * rate - vel) * dt / SPOOL
+        pos = pos - vel * dt
+        history.append((t, pos))
+        if t >= next_sample:
+            next_sample = next_sample + SAMPLE_PERIOD
+            seen = np.interp(t - DISPLAY_LAG, *zip(*history))
+            if ctl.update(t, abs(seen) + rng.normal(0, noise)):
+                released = t
+    while abs(vel) > 0.05 * rate:
+        t = t + dt
+        vel = vel - vel * dt / COAST
+        pos = pos - vel * dt
+    return pos, released, t
+
+
+def controller(rate, **kwargs):
+    return AxisController('pit', rate, CLOSE * 0.5, latency=DISPLAY_LAG + SAMPLE_PERIOD, stop_lag=COAST,
+                          spool=SPOOL, **kwargs)
+
+
+class AxisControllerTestCase(unittest.TestCase):
+
+    def test_stops_in_band(self):
+        for rate in (20.0, 4.8):  # Pitch and yaw of a medium ship at zero throttle
+            for dist in (8.0, 15.0, 30.0, 60.0):
+                misses = 0
+                for seed in range(10):
+                    ctl = controller(rate, max_hold=4 * dist / rate)
+                    stop, held, _ = simulate(ctl, dist, rate, seed=seed)
+                    misses = misses + (abs(stop) >= CLOSE)
+                    self.assertEqual(ctl.reason, 'target', f"rate {rate} dist {dist}")
+                self.assertLessEqual(misses, 1, f"rate {rate} dist {dist}")
+
+    def test_faster_than_open_loop(self):
+        rate, dist = 20.0, 30.0
+        _, held, stopped = simulate(controller(rate), dist, rate)
+        open_loop = min(4.0, max(0.5, dist * 0.8 / rate)) + 2.0  # _align_axis: one hold + ALIGN_SETTLE
+        self.assertLess(stopped, open_loop - 1.0)
+
+    def test_overshoot(self):
+        ctl = controller(20.0, max_hold=4.0)
+        ctl.start(0.0, 10.0)
+        released = False
+        for i, dist in enumerate(list(range(10, 0, -1)) + list(range(0, 20))):  # Past the center at 20 deg/s
+            ctl.target = -100.0  # Never reached, only the overshoot releases
+            released = ctl.update(i * 0.05, float(dist))
+            if released:
+                break
+        self.assertTrue(released)
+        self.assertEqual(ctl.reason, 'overshoot')
+
+    def test_min_and_max_hold(self):
+        ctl = controller(20.0, min_hold=0.5, max_hold=1.0)
+        ctl.start(0.0, 1.0)
+        self.assertFalse(ctl.update(0.1, 1.0))  # Inside the band, but the min hold
+        self.assertTrue(ctl.update(0.5, 1.0))
+        self.assertEqual(ctl.reason, 'target')
+        ctl = controller(20.0, max_hold=1.0)
+        ctl.start(0.0, 50.0)
+        self.assertFalse(ctl.update(0.5))
+        self.assertTrue(ctl.update(1.0))  # No samples (lost navball), released at max_hold
+        self.assertEqual(ctl.reason, 'max_hold')
+        ctl.start(0.0, 50.0)
+        self.assertFalse(ctl.update(0.2, 50.0))
+        self.assertTrue(ctl.expired(1.2))  # By the clock, the frame times stalled
+        self.assertTrue(ctl.update(0.2, 50.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
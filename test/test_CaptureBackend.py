@@ -0,0 +1,156 @@
+"""Standalone capture backend test.
+
+Does NOT require Elite Dangerous to be running (replay and synthetic backends, headless).
+Tests replay timing and stepping, the synthetic callback and Screen on a headless backend.
+
+Usage:
+    python -m pytest test/test_CaptureBackend.py -s
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend, SyntheticBackend
+from src.screen.ImageFormat import FMT_BGR, FMT_BGRA
+from src.screen.Screen import Screen
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+def make_frames(count, width=64, height=48):
+    """ BGR frames with the blue channel set to the frame number. """
+    frames = []
+    for i in range(count):
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        image[:, :, 0] = i
+        frames.append(image)
+    return frames
+
+
+class ReplayBackendTestCase(unittest.TestCase):
+
+    def test_step_mode(self):
+        replay = ReplayBackend(make_frames(3), speed=0)
+        self.assertEqual(replay.size(), (64, 48))
+        mon = {'left': 10, 'top': 5, 'width': 20, 'height': 10}
+        shot = replay.grab(mon)
+        self.assertEqual(shot.shape, (10, 20, 4))
+        self.assertEqual(shot[0, 0, 0], 0)
+        self.assertTrue(replay.advance())
+        self.assertEqual(replay.grab(mon)[0, 0, 0], 1)
+        self.assertTrue(replay.advance())
+        self.assertTrue(replay.at_end())
+        self.assertFalse(replay.advance())
+
+    def test_loop(self):
+        replay = ReplayBackend(make_frames(2), speed=0, loop=True)
+        replay.advance()
+        replay.advance()
+        self.assertEqual(replay.index, 0)
+        self.assertFalse(replay.at_end())
+
+    def test_recorded_timing(self):
+        # Frames recorded 10s apart, played 100x faster
+        replay = ReplayBackend(make_frames(3), timestamps=[100.0, 110.0, 120.0], speed=100.0)
+        mon = {'left': 0, 'top': 0, 'width': 1, 'height': 1}
+        self.assertEqual(replay.grab(mon)[0, 0, 0], 0)
+        time.sleep(0.12)
+        self.assertEqual(replay.grab(mon)[0, 0, 0], 1)
+        time.sleep(0.1)
+        self.assertEqual(replay.grab(mon)[0, 0, 0], 2)
+        self.assertTrue(replay.at_end())
+
+    def test_directory_with_index(self):
+        with tempfile.TemporaryDirectory() as folder:
+            index = []
+            for i, image in enumerate(make_frames(3)):
+                name = f"frame_{i}.png"
+                cv2.imwrite(os.path.join(folder, name), image)
+                index.append({'file': name, 'timestamp': 5.0 + i * 0.5})
+            with open(os.path.join(folder, 'index.json'), 'w') as fp:
+                json.dump(index, fp)
+
+            replay = ReplayBackend(folder, speed=0)
+            self.assertEqual(replay.frame_count, 3)
+            self.assertEqual(replay.timestamps, [0.0, 0.5, 1.0])
+            replay.advance()
+            self.assertEqual(replay.grab({'left': 0, 'top': 0, 'width': 2, 'height': 2})[0, 0, 0], 1)
+
+    def test_empty_directory(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with self.assertRaises(ValueError):
+                ReplayBackend(folder)
+
+
+class SyntheticBackendTestCase(unittest.TestCase):
+
+    def test_callback(self):
+        calls = []
+
+        def draw(t):
+            calls.append(t)
+            image = np.zeros((40, 80, 3), dtype=np.uint8)
+            cv2.circle(image, (40, 20), 5, (0, 255, 0), -1)
+            return image
+
+        synth = SyntheticBackend(draw, 80, 40, FMT_BGR)
+        shot = synth.grab({'left': 35, 'top': 15, 'width': 10, 'height': 10})
+        self.assertEqual(shot.shape, (10, 10, 3))
+        self.assertEqual(shot[5, 5, 1], 255)
+        self.assertEqual(len(calls), 1)
+
+
+class HeadlessScreenTestCase(unittest.TestCase):
+
+    def test_screen_on_replay(self):
+        scr = Screen(dummy_cb, ReplayBackend(make_frames(2, 1920, 1080), speed=0))
+        self.assertEqual((scr.screen_width, scr.screen_height), (1920, 1080))
+        self.assertEqual(scr.scaleX, 0.75)
+        self.assertEqual(scr.get_screen(0, 0, 10, 10).shape, (10, 10, 4))
+        self.assertEqual(scr.get_screen_full().shape, (1080, 1920, 3))
+        frame = scr.get_frame(ttl=1.0)
+        self.assertEqual(frame.fmt, FMT_BGRA)
+        self.assertEqual(frame.image.shape, (1080, 1920, 4))
+
+    def test_screen_on_synthetic(self):
+        synth = SyntheticBackend(lambda t: np.full((720, 1280, 3), 9, dtype=np.uint8), 1280, 720, FMT_BGR)
+        scr = Screen(dummy_cb, synth)
+        image = scr.get_screen_region([100, 100, 200, 150], FMT_BGRA)
+        self.assertEqual(image.shape, (50, 100, 4))
+        self.assertEqual(image[0, 0, 0], 9)
+
+    def test_capture_thread_on_replay(self):
+        scr = Screen(dummy_cb, ReplayBackend(make_frames(1, 320, 240), speed=0))
+        scr.set_frame_rect([10, 10, 110, 60])
+        scr.start_capture_thread(rate=100, size=4)
+        try:
+            t = time.perf_counter()
+            image = scr.get_screen_region([20, 20, 40, 30], newer_than=t)
+            self.assertEqual(image.shape, (10, 20, 4))
+            self.assertGreater(scr.capture_thread.ring.latest().timestamp, t)
+        finally:
+            scr.stop_capture_thread()
+
+    def test_overwritten_frame_grabs_directly(self):
+        scr = Screen(dummy_cb, ReplayBackend(make_frames(1, 320, 240), speed=0))
+        scr.start_capture_thread(rate=100, size=2)
+        try:
+            ring = scr.capture_thread.ring
+            self.assertIsNotNone(ring.wait_after(0.0, 1.0))
+            ring.is_current = lambda frame: False  # The writer reused the slot while the region was copied
+            image = scr.get_screen_region([20, 20, 40, 30], newer_than=0.0)
+            self.assertEqual(image.shape, (10, 20, 4))
+            self.assertEqual(scr.last_frame_id, scr._frame_id)  # A direct grab, not the ring frame
+        finally:
+            scr.stop_capture_thread()
+
+
+if __name__ == '__main__':
+    unittest.main()
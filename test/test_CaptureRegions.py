@@ -0,0 +1,113 @@
+"""Standalone batched region capture test.
+
+Does NOT require Elite Dangerous to be running (replay backend with synthetic frames).
+Tests the grab clustering cost model and Screen_Regions.capture_regions slices and formats.
+
+Usage:
+    python -m pytest test/test_CaptureRegions.py -s
+"""
+import unittest
+
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.ImageFormat import FMT_BGR, FMT_BGRA, FMT_RGB
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions, plan_region_grabs
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class CountingReplay(ReplayBackend):
+    """ Replay backend counting the grabs and their sizes. """
+
+    def __init__(self, frames):
+        super().__init__(frames, speed=0)
+        self.grabs = []
+
+    def grab(self, monitor):
+        self.grabs.append((monitor['width'], monitor['height']))
+        return super().grab(monitor)
+
+
+def make_frame():
+    """ 1920x1080 BGR frame, B = x / 8, G = y / 5, R = 7. """
+    xs = (np.arange(1920) // 8).astype(np.uint8)
+    ys = (np.arange(1080) // 5).astype(np.uint8)
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    image[:, :, 0] = xs[np.newaxis, :]
+    image[:, :, 1] = ys[:, np.newaxis]
+    image[:, :, 2] = 7
+    return image
+
+
+class PlanRegionGrabsTestCase(unittest.TestCase):
+
+    def test_overlapping_merged(self):
+        plan = plan_region_grabs([[0, 0, 100, 100], [50, 50, 150, 150]], grab_overhead_px=5000)
+        self.assertEqual(plan, [([0, 0, 150, 150], [0, 1])])
+
+    def test_far_apart_kept(self):
+        plan = plan_region_grabs([[0, 0, 10, 10], [1000, 1000, 1010, 1010]], grab_overhead_px=1000)
+        self.assertEqual(len(plan), 2)
+
+    def test_overhead_decides(self):
+        # compass and target_arc at 1920x1080: union 326x372 vs 76x76 + 103x95
+        rects = [[687, 788, 763, 864], [910, 492, 1013, 587]]
+        self.assertEqual(len(plan_region_grabs(rects, grab_overhead_px=50000)), 2)
+        self.assertEqual(len(plan_region_grabs(rects, grab_overhead_px=150000)), 1)
+
+    def test_clusters(self):
+        rects = [[0, 0, 10, 10], [10, 0, 20, 10], [500, 500, 510, 510], [510, 500, 520, 510]]
+        plan = sorted(plan_region_grabs(rects, grab_overhead_px=200), key=lambda c: c[0])
+        self.assertEqual(plan, [([0, 0, 20, 10], [0, 1]), ([500, 500, 520, 510], [2, 3])])
+
+
+class CaptureRegionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = CountingReplay([make_frame()])
+        self.scr = Screen(dummy_cb, self.backend)
+        self.scr_reg = Screen_Regions(self.scr)
+
+    def test_one_grab_views(self):
+        self.scr_reg.GRAB_OVERHEAD_PX = 150000
+        images = self.scr_reg.capture_regions(self.scr, ['compass', 'target'])
+        self.assertEqual(self.backend.grabs, [(634, 594)])  # union of compass and target
+        compass = images['compass']
+        self.assertEqual(compass.shape, (76, 76, 4))
+        self.assertEqual(compass[0, 0, 0], 687 // 8)
+        self.assertEqual(compass[0, 0, 1], 788 // 5)
+        self.assertIs(compass.base, images['target'].base)  # Zero-copy slices of one grab
+        self.assertTrue(np.array_equal(compass, self.scr_reg.capture_region(self.scr, 'compass')))
+
+    def test_separate_grabs(self):
+        self.scr_reg.GRAB_OVERHEAD_PX = 0
+        images = self.scr_reg.capture_regions(self.scr, ['compass', 'target_arc'])
+        self.assertEqual(sorted(self.backend.grabs), [(76, 76), (103, 95)])
+        self.assertEqual(images['target_arc'][0, 0, 0], 910 // 8)
+
+    def test_mixed_formats(self):
+        images = self.scr_reg.capture_regions(self.scr, ['compass', 'target'], {'target': FMT_RGB})
+        self.assertEqual(images['compass'].shape[2], 4)
+        self.assertEqual(images['target'][0, 0, 0], 7)  # R first
+        self.assertEqual(images['target'][0, 0, 2], 633 // 8)
+        images = self.scr_reg.capture_regions(self.scr, ['compass', 'sun'], FMT_BGR)
+        self.assertEqual(images['sun'].shape, (410, 768, 3))
+
+    def test_shared_frame_used(self):
+        self.scr.get_frame(ttl=1.0)
+        grabs = len(self.backend.grabs)
+        images = self.scr_reg.capture_regions(self.scr, ['compass', 'target'], FMT_BGRA, ttl=1.0)
+        self.assertEqual(len(self.backend.grabs), grabs)  # Served from the cached frame
+        self.assertEqual(images['compass'][0, 0, 1], 788 // 5)
+
+    def test_no_shared_frame_grabs_clusters(self):
+        self.scr_reg.capture_regions(self.scr, ['compass'], ttl=1.0)
+        self.assertEqual(self.backend.grabs, [(76, 76)])  # Not the whole shared frame
+
+
+if __name__ == '__main__':
+    unittest.main()
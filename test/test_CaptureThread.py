@@ -0,0 +1,123 @@
+"""Standalone capture thread and frame ring buffer test.
+
+Does NOT require Elite Dangerous to be running (grabs come from a fake mss instance).
+Tests ring buffer slot reuse, latest / first frame after a time, and the capture loop.
+
+Usage:
+    python -m pytest test/test_CaptureThread.py -s
+"""
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from src.screen.CaptureThread import CaptureThread
+from src.screen.Frame import FrameRing
+
+
+class FakeMss:
+    """ Returns BGRA frames filled with the grab count. """
+    fmt = 'BGRA'
+
+    def __init__(self):
+        self.count = 0
+
+    def grab(self, mon):
+        self.count = self.count + 1
+        return np.full((mon['height'], mon['width'], 4), self.count % 256, dtype=np.uint8)
+
+
+class FakeScreen:
+    """ Just what CaptureThread needs from Screen. """
+    backend = FakeMss()
+    frame_rect = [10, 20, 50, 40]
+    screen_width = 1920
+    screen_height = 1080
+
+    @staticmethod
+    def monitor_rect(x_left, y_top, x_right, y_bot):
+        return {"left": x_left, "top": y_top, "width": x_right - x_left, "height": y_bot - y_top}
+
+
+class FrameRingTestCase(unittest.TestCase):
+
+    def test_empty(self):
+        ring = FrameRing(4)
+        self.assertIsNone(ring.latest())
+        self.assertIsNone(ring.first_after(0.0))
+        self.assertIsNone(ring.wait_after(0.0, 0.01))
+
+    def test_latest_and_first_after(self):
+        ring = FrameRing(4)
+        for i in range(1, 4):
+            ring.write(np.full((2, 3, 4), i, dtype=np.uint8), 5, 6, timestamp=float(i))
+        latest = ring.latest()
+        self.assertEqual(latest.frame_id, 3)
+        self.assertEqual(latest.image[0, 0, 0], 3)
+        self.assertEqual((latest.left, latest.top), (5, 6))
+        self.assertTrue(latest.volatile)
+        self.assertEqual(ring.first_after(1.5).frame_id, 2)
+        self.assertIsNone(ring.first_after(3.0))
+
+    def test_slots_reused(self):
+        ring = FrameRing(2)
+        slots = set()
+        for i in range(1, 6):
+            ring.write(np.full((2, 2, 4), i, dtype=np.uint8), timestamp=float(i))
+            slots.add(id(ring.latest().image))
+        first = ring.first_after(0.0)
+        self.assertEqual(first.frame_id, 4)  # Older frames were overwritten
+        self.assertEqual(len(slots), 2)
+
+    def test_is_current(self):
+        ring = FrameRing(2)
+        ring.write(np.zeros((2, 2, 4), dtype=np.uint8))
+        frame = ring.latest()
+        self.assertTrue(ring.is_current(frame))
+        ring.write(np.zeros((2, 2, 4), dtype=np.uint8))
+        ring.write(np.zeros((2, 2, 4), dtype=np.uint8))
+        self.assertFalse(ring.is_current(frame))
+
+    def test_shape_change_reallocates(self):
+        ring = FrameRing(2)
+        ring.write(np.zeros((2, 2, 4), dtype=np.uint8))
+        ring.write(np.zeros((3, 5, 4), dtype=np.uint8))
+        self.assertEqual(ring.latest().image.shape, (3, 5, 4))
+        self.assertEqual(ring.first_after(0.0).frame_id, 2)
+
+    def test_wait_after(self):
+        ring = FrameRing(4)
+        t = time.perf_counter()
+        writer = threading.Timer(0.05, lambda: ring.write(np.ones((2, 2, 4), dtype=np.uint8)))
+        writer.start()
+        frame = ring.wait_after(t, 1.0)
+        writer.join()
+        self.assertIsNotNone(frame)
+        self.assertGreater(frame.timestamp, t)
+
+
+class CaptureThreadTestCase(unittest.TestCase):
+
+    def test_capture_once(self):
+        cap = CaptureThread(FakeScreen(), rate=30, size=4)
+        cap.capture_once(FakeMss())
+        frame = cap.ring.latest()
+        self.assertEqual(frame.image.shape, (20, 40, 4))
+        self.assertEqual((frame.left, frame.top), (10, 20))
+        self.assertEqual(frame.view(20, 25, 30, 35).shape, (10, 10, 4))
+        self.assertEqual(cap.grab_count, 1)
+
+    def test_grab_error_counted(self):
+        class BrokenMss:
+            def grab(self, mon):
+                raise RuntimeError("no screen")
+
+        cap = CaptureThread(FakeScreen())
+        cap.capture_once(BrokenMss())
+        self.assertEqual(cap.error_count, 1)
+        self.assertIsNone(cap.ring.latest())
+
+
+if __name__ == '__main__':
+    unittest.main()
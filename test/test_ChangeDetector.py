@@ -0,0 +1,113 @@
+"""Standalone region change detection test.
+
+Does NOT require Elite Dangerous to be running (synthetic images and a replay backend).
+Tests cached detector results on unchanged regions, change detection and hit rates.
+
+Usage:
+    python -m pytest test/test_ChangeDetector.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.ChangeDetector import RegionChangeDetector
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class CountingDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, image):
+        self.calls = self.calls + 1
+        return int(image.sum())
+
+
+class RegionChangeDetectorTestCase(unittest.TestCase):
+
+    def test_unchanged_is_cached(self):
+        change = RegionChangeDetector()
+        detect = CountingDetector()
+        image = np.random.default_rng(1).integers(0, 256, (100, 200, 4), dtype=np.uint8)
+        first = change.lookup('r', image, detect)
+        second = change.lookup('r', image.copy(), detect)
+        self.assertEqual(first, second)
+        self.assertEqual(detect.calls, 1)
+        self.assertEqual(change.stats()['r'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_change_detected(self):
+        change = RegionChangeDetector()
+        detect = CountingDetector()
+        image = np.zeros((100, 200, 3), dtype=np.uint8)
+        change.lookup('r', image, detect)
+        moved = image.copy()
+        cv2.circle(moved, (100, 50), 20, (255, 255, 255), -1)
+        change.lookup('r', moved, detect)
+        self.assertEqual(detect.calls, 2)
+
+    def test_small_region_full_resolution(self):
+        # sc_assist_ind is 25x6, a single changed pixel must be seen
+        change = RegionChangeDetector(tolerance=0.0)
+        detect = CountingDetector()
+        image = np.zeros((6, 25, 4), dtype=np.uint8)
+        change.lookup('r', image, detect)
+        image2 = image.copy()
+        image2[3, 12] = 255
+        self.assertFalse(change.is_unchanged('r', image2))
+        change.lookup('r', image2, detect)
+        self.assertEqual(detect.calls, 2)
+
+    def test_fingerprint_is_a_copy(self):
+        change = RegionChangeDetector()
+        detect = CountingDetector()
+        buffer = np.zeros((6, 25, 4), dtype=np.uint8)
+        change.lookup('r', buffer, detect)
+        buffer[:] = 200  # i.e. a reused ring buffer slot
+        change.lookup('r', buffer, detect)
+        self.assertEqual(detect.calls, 2)
+
+    def test_disabled_and_invalidate(self):
+        change = RegionChangeDetector(enabled=False)
+        detect = CountingDetector()
+        image = np.zeros((10, 10, 3), dtype=np.uint8)
+        change.lookup('r', image, detect)
+        change.lookup('r', image, detect)
+        self.assertEqual(detect.calls, 2)
+
+        change.enabled = True
+        change.lookup('r', image, detect)
+        change.invalidate('r')
+        change.lookup('r', image, detect)
+        self.assertEqual(detect.calls, 4)
+
+
+class SunPercentChangeTestCase(unittest.TestCase):
+
+    def test_sun_percent_cached(self):
+        dark = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        sun = dark.copy()
+        cv2.circle(sun, (960, 530), 150, (255, 255, 255), -1)
+        replay = ReplayBackend([dark, dark, sun], speed=0)
+        scr = Screen(dummy_cb, replay)
+        scr_reg = Screen_Regions(scr)
+
+        results = []
+        for _ in range(3):
+            results.append(scr_reg.sun_percent(scr))
+            replay.advance()
+        self.assertEqual(results[0], 0)
+        self.assertEqual(results[1], 0)
+        self.assertGreater(results[2], 5)
+        stats = scr_reg.change.stats()['sun:white_percent']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
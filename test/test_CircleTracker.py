@@ -0,0 +1,65 @@
+"""Standalone target circle tracker test.
+
+Does NOT require Elite Dangerous to be running (synthetic frames, see test/bench_Vision.py).
+Tests the tracker follows a drifting circle in its window as accurately as the full search, falls back
+to the full search when the circle jumps or disappears, and reports its confidence and window.
+
+Usage:
+    python -m pytest test/test_CircleTracker.py -s
+"""
+import unittest
+
+import numpy as np
+
+from src.screen.CircleTracker import CircleTracker
+from src.screen.Pyramid import PyramidCircleFinder
+from test.bench_PyramidDetect import TARGET_HSV, TARGET_R, make_target_frame
+from test.bench_Vision import make_track_frames
+
+
+def finder(step=1):
+    return PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+
+
+class CircleTrackerTestCase(unittest.TestCase):
+
+    def test_drifting_circle(self):
+        for step in (1, 2):
+            tracker = CircleTracker(finder(step))
+            for image, (cx, cy) in make_track_frames(40, seed=step):
+                found = tracker.track(image)
+                self.assertIsNotNone(found)
+                self.assertLess(np.hypot(found[0] - cx, found[1] - cy), 3.0)
+                self.assertGreater(tracker.confidence, 0.8)
+            self.assertEqual(tracker.full_count, 1)
+            self.assertEqual(tracker.tracked_count, 39)
+            reach = 2 * (TARGET_R[1] + tracker.finder.margin + tracker.track_margin) + 1
+            self.assertLessEqual(max(tracker.window_size), reach)
+
+    def test_jump_and_loss(self):
+        tracker = CircleTracker(finder())
+        first, _ = make_target_frame(0)
+        second, (cx, cy, _) = make_target_frame(1)
+        tracker.track(first)
+        found = tracker.track(second)  # Far from the first one: window miss, then the full search
+        self.assertLess(np.hypot(found[0] - cx, found[1] - cy), 3.0)
+        self.assertEqual((tracker.full_count, tracker.tracked_count), (2, 0))
+        self.assertEqual(tracker.window_size, (second.shape[1], second.shape[0]))
+
+        self.assertIsNone(tracker.track(np.zeros_like(second)))
+        self.assertEqual(tracker.confidence, 0.0)
+        self.assertIsNone(tracker.circle)
+
+    def test_support(self):
+        tracker = CircleTracker(finder())
+        image, (cx, cy, r) = make_target_frame(2)
+        mask = tracker.finder.mask(image)
+        self.assertGreater(tracker.support(mask, cx, cy, r), 0.9)
+        self.assertLess(tracker.support(mask, cx + 20, cy, r), 0.3)
+        half = mask.copy()
+        half[:, int(cx):] = 0
+        self.assertAlmostEqual(tracker.support(half, cx, cy, r), 0.5, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
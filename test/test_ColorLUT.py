@@ -0,0 +1,116 @@
+"""Standalone color class table test.
+
+Does NOT require Elite Dangerous to be running (synthetic images and a replay backend).
+Tests the color class table gives bit for bit the cvtColor + inRange masks (all colors, any channel
+order, windows of a frame, R/B swapped ranges) and that the region pipelines, the navball dot and the
+target circle search give the same results with it.
+
+Usage:
+    python -m pytest test/test_ColorLUT.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.ColorLUT import ColorClasses, ColorClassFilter, ColorClassifier, get_color_classes
+from src.screen.Compass import NavDotLocator
+from src.screen.ImageFormat import FMT_BGRA, FMT_RGB, convert_image
+from src.screen.Pyramid import PyramidCircleFinder
+from src.screen.RegionFilter import ColorRangeFilter
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+from test.bench_NavballDot import load_corpus
+from test.bench_PyramidDetect import TARGET_HSV, TARGET_R, make_target_frame
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+def random_image(h, w, ch, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, ch), dtype=np.uint8)
+
+
+def hsv_mask(image, lower, upper, swap_rb=False):
+    code = cv2.COLOR_RGB2HSV if swap_rb else cv2.COLOR_BGR2HSV
+    return cv2.inRange(cv2.cvtColor(np.ascontiguousarray(image[..., :3]), code), lower, upper)
+
+
+class ColorClassesTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.classes = get_color_classes()
+
+    def test_all_colors(self):
+        colors = np.arange(1 << 24, dtype=np.uint32).view(np.uint8).reshape(4096, 4096, 4)
+        for name in ('nav_ring', 'target'):
+            lower, upper, swap_rb = self.classes.ranges[name]
+            expected = hsv_mask(colors, lower, upper, swap_rb).ravel() > 0
+            self.assertTrue(np.array_equal((self.classes.table & self.classes.bits[name]) > 0, expected), name)
+
+    def test_masks_match_opencv(self):
+        classifier = ColorClassifier(self.classes)
+        for image in (random_image(60, 80, 4), random_image(60, 80, 3, seed=1)):
+            classifier(image)
+            for name, (lower, upper, swap_rb) in self.classes.ranges.items():
+                self.assertTrue(np.array_equal(classifier.mask(name), hsv_mask(image, lower, upper, swap_rb)), name)
+        union = classifier.mask(('nav_ring', 'nav_dot'))
+        self.assertTrue(np.array_equal(union, cv2.bitwise_or(classifier.mask('nav_ring'), classifier.mask('nav_dot'))))
+
+    def test_window(self):
+        frame = random_image(120, 160, 4, seed=2)
+        window = frame[10:70, 30:100]
+        classifier = ColorClassifier(self.classes)
+        mask = classifier.mask('orange_2', classifier(window))
+        self.assertTrue(np.array_equal(mask, hsv_mask(window, TARGET_HSV[0], TARGET_HSV[1])))
+
+    def test_filter_and_find(self):
+        image = random_image(40, 40, 4, seed=3)
+        lut = ColorClassFilter('nav_ring', self.classes, scale=2.0)
+        hsv = ColorRangeFilter((5, 100, 100), (25, 255, 255), scale=2.0)
+        self.assertTrue(np.array_equal(lut(image), hsv(image)))
+        self.assertEqual(self.classes.find((16, 165, 220), (98, 255, 255)), 'orange_2')
+        self.assertEqual(self.classes.find((16, 165, 220), (98, 255, 255), swap_rb=True), 'target')
+        self.assertIsNone(self.classes.find((0, 0, 0), (1, 1, 1)))
+        with self.assertRaises(ValueError):
+            ColorClasses({str(i): ((0, 0, 0), (1, 1, 1)) for i in range(9)})
+
+
+class ColorLUTDetectorsTestCase(unittest.TestCase):
+
+    def test_nav_dot(self):
+        corpus = load_corpus()
+        hsv, lut = NavDotLocator(), NavDotLocator()
+        self.assertTrue(lut.use_classes(get_color_classes()))
+        for image in corpus['images'][:40]:
+            self.assertEqual(hsv(image), lut(image))
+        self.assertFalse(NavDotLocator(dot_lower=(0, 0, 0)).use_classes(get_color_classes()))
+
+    def test_target_circle_native(self):
+        for step in (1, 2):
+            legacy = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+            finder = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+            finder.use_classes(get_color_classes(), 'target')
+            for seed in range(10):
+                image, _ = make_target_frame(seed)  # FMT_RGB
+                native = convert_image(image, FMT_RGB, FMT_BGRA)
+                self.assertEqual(finder.find(native), legacy.find(image))
+
+    def test_region_pipelines(self):
+        frame = random_image(1080, 1920, 4, seed=5)
+        scr = Screen(dummy_cb, ReplayBackend([frame], speed=0))
+        scr_reg = Screen_Regions(scr)
+        expected = {name: scr_reg.capture_region_filtered(scr, name).copy() for name in ('target', 'sc_assist_ind')}
+        scr_reg.set_color_classes(get_color_classes())
+        self.assertIsInstance(scr_reg.reg['target']['pipeline'], ColorClassFilter)
+        for name, mask in expected.items():
+            self.assertTrue(np.array_equal(scr_reg.capture_region_filtered(scr, name), mask), name)
+        scr_reg.set_color_classes(None)
+        self.assertIsInstance(scr_reg.reg['target']['pipeline'], ColorRangeFilter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Standalone compass ring calibration test.
+
+Does NOT require Elite Dangerous to be running (synthetic ring masks).
+Tests the ring detection and the persistent ring center: vote, stored value, periodic validation and
+recalibration on drift.
+
+Usage:
+    python -m pytest test/test_Compass.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.Compass import CompassCalibrator, find_ring, navball_offset
+
+
+def ring_mask(cx, cy, r=30, size=76, scale=2):
+    """ Ring mask of a compass region resized by scale, ring center (cx, cy) in region pixels. """
+    mask = np.zeros((size * scale, size * scale), dtype=np.uint8)
+    cv2.circle(mask, (int(cx * scale * 16), int(cy * scale * 16)), int(r * scale * 16), 255, 3, cv2.LINE_AA, 4)
+    return mask
+
+
+class FindRingTestCase(unittest.TestCase):
+
+    def test_found(self):
+        hit = find_ring(ring_mask(38.5, 37.0), 2.0)
+        self.assertIsNotNone(hit)
+        self.assertAlmostEqual(hit[0], 38.5, delta=1.0)
+        self.assertAlmostEqual(hit[1], 37.0, delta=1.0)
+        self.assertAlmostEqual(hit[2], 30.0, delta=1.5)
+
+    def test_rejected(self):
+        self.assertIsNone(find_ring(np.zeros((152, 152), dtype=np.uint8), 2.0))
+        self.assertIsNone(find_ring(ring_mask(38, 38, r=20), 2.0))  # Too small
+        self.assertIsNone(find_ring(ring_mask(48, 38), 2.0))  # Too far off the region center
+
+
+class NavballOffsetTestCase(unittest.TestCase):
+
+    def test_offsets(self):
+        off = navball_offset((38.0 + 15.0, 38.0), (38.0, 38.0))  # Half the radius right
+        self.assertEqual((off['x'], off['y'], off['z']), (0.5, 0.0, 1.0))
+        self.assertEqual((off['pit'], off['yaw'], off['roll']), (0.0, 30.0, 90.0))
+        off = navball_offset((38.0, 38.0 + 30.0), (38.0, 38.0))  # Bottom edge
+        self.assertEqual((off['pit'], off['roll']), (-90.0, 180.0))
+        self.assertEqual(navball_offset(None, (38.0, 38.0))['z'], -1)
+
+
+class CompassCalibratorTestCase(unittest.TestCase):
+
+    def test_calibrate_median(self):
+        cal = CompassCalibrator()
+        self.assertFalse(cal.calibrate([(725.0, 826.0, 30.0), (725.5, 826.0, 30.0)]))
+        self.assertIsNone(cal.center)
+        hits = [(725.0, 826.0, 30.0), (740.0, 826.5, 30.0), (725.5, 825.5, 30.0), (724.5, 826.0, 31.0)]
+        self.assertTrue(cal.calibrate(hits))
+        self.assertEqual(cal.center, (725.5, 826.0))  # Outlier voted out
+        self.assertEqual(cal.calibrations, 1)
+
+    def test_persisted(self):
+        cal = CompassCalibrator()
+        cal.calibrate([(725.0, 826.0, 30.0)] * 3)
+        stored = cal.to_list()
+        other = CompassCalibrator()
+        other.set_center(stored)
+        self.assertEqual(other.center, (725.0, 826.0))
+        other.set_center(None)
+        self.assertIsNone(other.to_list())
+
+    def test_validation_period(self):
+        cal = CompassCalibrator(validate_every=10)
+        self.assertFalse(cal.due())  # Not calibrated, nothing to validate
+        cal.set_center([725.0, 826.0])
+        due = [cal.due() for _ in range(10)]
+        self.assertEqual(due, [False] * 9 + [True])
+        self.assertTrue(cal.validate((725.4, 826.3, 30.0)))
+        self.assertFalse(cal.due())  # Period restarts
+        self.assertEqual(cal.validations, 1)
+
+    def test_drift_recalibrates(self):
+        cal = CompassCalibrator(validate_every=5, drift_px=1.5, drift_confirm=2)
+        cal.set_center([725.0, 826.0])
+        self.assertTrue(cal.validate(None))  # Ring not found, not counted
+        self.assertTrue(cal.validate((729.0, 826.0, 30.0)))  # First drift
+        self.assertTrue(cal.due())  # Checked again on the next read
+        self.assertTrue(cal.validate((725.2, 826.0, 30.0)))  # Back, drift reset
+        cal.validate((729.0, 826.0, 30.0))
+        self.assertFalse(cal.validate((729.0, 826.0, 30.0)))
+        self.assertIsNone(cal.center)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Standalone navball dot localization test.
+
+Does NOT require Elite Dangerous to be running (compass corpus test/compass/navball_corpus.npz, see
+test/bench_NavballDot.py).
+Tests the native resolution dot locator is at least as accurate as the former 2x upscale method against the
+ground truth pitch/yaw, finds no dot when the target is behind and reuses its buffers.
+
+Usage:
+    python -m pytest test/test_NavDot.py -s
+"""
+import unittest
+
+import numpy as np
+
+from src.screen.Compass import NavDotLocator
+from test.bench_NavballDot import LegacyDot, evaluate, load_corpus
+
+
+class NavDotLocatorTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = load_corpus()
+
+    def test_accuracy(self):
+        new = evaluate(NavDotLocator(), self.corpus)
+        old = evaluate(LegacyDot(), self.corpus)
+        self.assertEqual(new['missed'], 0)
+        self.assertEqual(new['false'], 0)
+        self.assertLess(np.percentile(new['errors'], 50), 0.2)  # Degrees
+        self.assertLess(np.percentile(new['errors'], 95), 0.4)
+        self.assertLessEqual(np.percentile(new['errors'], 50), np.percentile(old['errors'], 50))
+        self.assertLessEqual(new['errors'].max(), old['errors'].max())
+
+    def test_no_dot(self):
+        locate = NavDotLocator()
+        image = self.corpus['images'][0].copy()
+        image[:] = (110, 70, 40, 255)
+        self.assertIsNone(locate(image))
+
+    def test_buffers_reused(self):
+        locate = NavDotLocator()
+        locate(self.corpus['images'][0])
+        hsv, dot_mask = locate.hsv, locate.dot_mask
+        locate(self.corpus['images'][1])
+        self.assertIs(locate.hsv, hsv)
+        self.assertIs(locate.dot_mask, dot_mask)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Standalone navball telemetry test.
+
+Does NOT require Elite Dangerous to be running (replayed frames with a compass crop of the corpus,
+see test/bench_NavballDot.py).
+Tests the producer thread publishes navball samples into the latest value slot, readers get newer
+samples without locking, and the producer pauses while a panel is open.
+
+Usage:
+    python -m pytest test/test_NavTelemetry.py -s
+"""
+import time
+import unittest
+
+import numpy as np
+
+from src.autopilot.NavTelemetry import NavSample, NavTelemetry
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.Compass import NavDotLocator, navball_offset
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+from test.bench_NavballDot import dot_angles, load_corpus
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class NavTelemetryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        corpus = load_corpus()
+        frame = np.zeros((1080, 1920, 4), dtype=np.uint8)
+        self.scr = Screen(dummy_cb, ReplayBackend([frame], speed=0))
+        self.scr_reg = Screen_Regions(self.scr)
+        self.rect = self.scr_reg.reg['compass']['rect']
+        crop = corpus['images'][0]
+        frame[self.rect[1]:self.rect[1] + crop.shape[0], self.rect[0]:self.rect[0] + crop.shape[1]] = crop
+        self.ring = tuple(corpus['rings'][0])
+        self.angles = corpus['angles'][0]
+        self.locate = NavDotLocator()
+        self.panel_open = False
+        self.telemetry = NavTelemetry(self.scr, lambda: self.rect, self.compute, paused=lambda: self.panel_open,
+                                      rate=100, pause_check=0.0)
+
+    def tearDown(self):
+        self.telemetry.stop()
+
+    def compute(self, image):
+        return navball_offset(self.locate(image), self.ring)
+
+    def test_samples(self):
+        self.assertIsNone(self.telemetry.latest())
+        self.telemetry.start()
+        sample = self.telemetry.wait_after(0.0, 1.0)
+        self.assertIsNotNone(sample)
+        self.assertEqual(sample.offset['z'], 1.0)
+        self.assertAlmostEqual(sample.offset['pit'], self.angles[0], delta=0.5)
+        self.assertAlmostEqual(sample.offset['yaw'], self.angles[1], delta=0.5)
+        newer = self.telemetry.wait_after(sample.timestamp, 1.0)
+        self.assertGreater(newer.seq, sample.seq)
+        self.assertIs(self.telemetry.fresh(1.0, 1.0).__class__, NavSample)
+        with self.assertRaises(AttributeError):
+            sample.seq = 0
+        self.telemetry.stop()
+        self.assertIsNone(self.telemetry.latest())  # Slot emptied, no stale reads after the assist
+        self.assertIsNone(self.telemetry.wait_after(0.0, 0.05))
+
+    def test_paused(self):
+        self.telemetry.start()
+        self.assertIsNotNone(self.telemetry.wait_after(0.0, 1.0))
+        self.panel_open = True
+        time.sleep(0.1)
+        self.assertTrue(self.telemetry.is_paused)
+        count = self.telemetry.sample_count
+        self.assertIsNone(self.telemetry.latest())
+        time.sleep(0.05)
+        self.assertEqual(self.telemetry.sample_count, count)
+        self.panel_open = False
+        self.assertIsNotNone(self.telemetry.wait_after(time.perf_counter(), 1.0))
+
+    def test_matches_inline(self):
+        sample = self.telemetry.sample_once(self.scr.backend)
+        image = self.scr_reg.capture_region(self.scr, 'compass')
+        inline = navball_offset(NavDotLocator()(image), self.ring)
+        self.assertEqual(sample.offset, inline)
+        pit, yaw = dot_angles(self.locate(image), self.ring)
+        self.assertAlmostEqual(sample.offset['pit'], pit, delta=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -106,7 +106,7 @@ class NavballAlignTestCase(unittest.TestCase):
         print(f"  Move dot border-to-border while {label}...")
         for i in range(count):
             # Capture compass region
-            full_img = scr_reg.capture_region(ap.scr, 'compass', inv_col=False)
+            full_img = scr_reg.capture_region(ap.scr, 'compass')
             full_bgr = cv2.cvtColor(full_img, cv2.COLOR_BGRA2BGR) if full_img.shape[2] == 4 else full_img
 
             # Run ML to find compass quad
@@ -0,0 +1,100 @@
+"""Standalone offset filter test.
+
+Does NOT require Elite Dangerous to be running.
+Tests the fused navball/target offset: reads average like the former 3-of-3 average, key holds move the
+estimate and make it uncertain, outliers are rejected and a real jump restarts the estimate.
+
+Usage:
+    python -m pytest test/test_OffsetEstimator.py -s
+"""
+import unittest
+
+from src.autopilot.OffsetEstimator import OffsetEstimator
+
+
+def read(pit, yaw):
+    return {'pit': pit, 'yaw': yaw, 'roll': 0.0}
+
+
+class OffsetEstimatorTestCase(unittest.TestCase):
+
+    def test_reads_average(self):
+        est = OffsetEstimator('test', meas_std=1.5, drift_std=0.0)
+        self.assertIsNone(est.estimate())
+        self.assertFalse(est.confident())
+        est.update(read(4.0, -2.0), t=0.0)
+        self.assertEqual(est.estimate()['confidence'], 0.5)
+        self.assertFalse(est.confident(3))
+        est.update(read(5.0, -1.0), t=0.01)
+        est.update(read(6.0, -3.0), t=0.02)
+        self.assertTrue(est.confident(3))
+        off = est.estimate()
+        self.assertAlmostEqual(off['pit'], 5.0)  # Mean of the reads
+        self.assertAlmostEqual(off['yaw'], -2.0)
+        self.assertEqual(off['confidence'], 0.75)
+        self.assertEqual(off['reads'], 3)
+
+    def test_command(self):
+        est = OffsetEstimator('test', meas_std=1.0, drift_std=0.0)
+        for i in range(5):
+            est.update(read(10.0, 3.0), t=i * 0.01)
+        self.assertTrue(est.confident(5))
+        est.command('pitch', 8.0)  # Pitch up moves the target down
+        est.command('yaw', -2.0)
+        off = est.estimate()
+        self.assertAlmostEqual(off['pit'], 2.0)
+        self.assertAlmostEqual(off['yaw'], 5.0)
+        self.assertFalse(est.confident(3))  # Turn rates are not exact, read again
+        self.assertTrue(est.update(read(3.0, 5.0), t=1.0))  # Within the command error, not an outlier
+        self.assertAlmostEqual(est.estimate()['pit'], 3.0, delta=0.3)  # The read counts most
+
+    def test_roll(self):
+        est = OffsetEstimator('test', meas_std=0.5, drift_std=0.0)
+        est.update(read(0.0, 10.0), t=0.0)  # 3 o'clock
+        self.assertAlmostEqual(est.estimate()['roll'], 90.0)
+        est.command('roll', 90.0)  # Clockwise roll brings it to 12 o'clock
+        off = est.estimate()
+        self.assertAlmostEqual(off['pit'], 10.0)
+        self.assertAlmostEqual(off['yaw'], 0.0)
+        self.assertAlmostEqual(off['roll'], 0.0)
+
+        nav = OffsetEstimator('nav', meas_std=1.5, drift_std=0.0, spherical=True)
+        nav.update(read(0.0, 30.0), t=0.0)
+        nav.command('roll', -90.0)  # Anticlockwise roll brings it to 6 o'clock
+        self.assertAlmostEqual(nav.estimate()['pit'], -30.0)
+        self.assertAlmostEqual(abs(nav.estimate()['roll']), 180.0)
+
+    def test_outliers(self):
+        est = OffsetEstimator('test', meas_std=1.0, drift_std=0.0, reject_limit=2)
+        for i in range(3):
+            est.update(read(1.0, 1.0), t=i * 0.01)
+        self.assertFalse(est.update(read(20.0, 1.0), t=0.1))  # One bad read is dropped
+        self.assertAlmostEqual(est.estimate()['pit'], 1.0)
+        self.assertTrue(est.update(read(1.5, 1.0), t=0.2))
+        self.assertFalse(est.update(read(20.0, 1.0), t=0.3))
+        self.assertTrue(est.update(read(20.0, 1.0), t=0.4))  # Twice in a row, the target really moved
+        self.assertEqual(est.estimate()['pit'], 20.0)
+        self.assertEqual(est.estimate()['reads'], 1)
+        self.assertEqual(est.outliers, 3)
+
+    def test_drift(self):
+        est = OffsetEstimator('test', meas_std=1.0, drift_std=0.5)
+        est.update(read(1.0, 1.0), t=0.0)
+        est.update(read(1.0, 1.0), t=0.0)
+        est.update(read(1.0, 1.0), t=0.0)
+        var = est.axes['pit'].var
+        est.update(read(1.0, 1.0), t=10.0)
+        est.update(read(1.0, 1.0), t=10.0)
+        self.assertGreater(est.axes['pit'].var, var * 0.9)  # 10 s of drift undo the older reads
+
+    def test_reset(self):
+        est = OffsetEstimator('test', meas_std=1.0)
+        est.update(read(1.0, 1.0))
+        est.reset()
+        self.assertIsNone(est.estimate())
+        est.command('pitch', 10.0)  # Nothing to move
+        self.assertIsNone(est.estimate())
+
+
+if __name__ == '__main__':
+    unittest.main()
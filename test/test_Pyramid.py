@@ -0,0 +1,88 @@
+"""Standalone pyramid detection test.
+
+Does NOT require Elite Dangerous to be running (synthetic frames, see test/bench_PyramidDetect.py).
+Tests the coarse to fine target circle search stays as accurate as the full resolution search and the
+pyramid sun percent gives the same decisions.
+
+Usage:
+    python -m pytest test/test_Pyramid.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.Pyramid import PyramidCircleFinder, downsample
+from src.screen.RegionFilter import ThresholdFilter
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+from test.bench_PyramidDetect import AGREE_PX, TARGET_HSV, TARGET_R, make_target_frame
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class PyramidCircleFinderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = [make_target_frame(seed) for seed in range(30)]
+        self.full = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1])
+
+    def test_accuracy(self):
+        for step in (2, 4):
+            finder = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+            for image, (cx, cy, r) in self.frames:
+                found = finder.find(image)
+                full = self.full.find(image)
+                self.assertIsNotNone(found)
+                self.assertLess(np.hypot(found[0] - cx, found[1] - cy), 3.0)  # As the full res search
+                self.assertLessEqual(np.hypot(found[0] - full[0], found[1] - full[1]), AGREE_PX)
+                self.assertTrue(TARGET_R[0] <= found[2] <= TARGET_R[1])
+
+    def test_no_circle(self):
+        image = np.zeros((540, 634, 3), dtype=np.uint8)
+        cv2.putText(image, 'NO TARGET', (200, 270), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 200, 255), 2)
+        for step in (1, 2, 4):
+            finder = PyramidCircleFinder(TARGET_HSV[0], TARGET_HSV[1], TARGET_R[0], TARGET_R[1], step=step)
+            self.assertIsNone(finder.find(image))
+
+    def test_downsample(self):
+        image = np.arange(8 * 12 * 3, dtype=np.uint8).reshape(8, 12, 3)
+        self.assertTrue(np.array_equal(downsample(image, 2), image[::2, ::2]))
+        self.assertIs(downsample(image, 1), image)
+        mask = ThresholdFilter(100, step=2)(image)
+        self.assertEqual(mask.shape, (4, 6))
+
+
+class PyramidSunTestCase(unittest.TestCase):
+
+    def setUp(self):
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        self.scr = Screen(dummy_cb, ReplayBackend([frame], speed=0))
+        self.scr_reg = Screen_Regions(self.scr)
+        rect = self.scr_reg.reg['sun']['rect']
+        self.sun = frame[rect[1]:rect[3], rect[0]:rect[2]]
+
+    def percents(self, radius, near=None):
+        self.sun[:] = 0
+        cv2.circle(self.sun, (384, 205), radius, (255, 255, 255), -1)
+        self.scr_reg.set_pyramid_step(1)
+        full = self.scr_reg.sun_percent(self.scr)
+        self.scr_reg.set_pyramid_step(4)
+        return full, self.scr_reg.sun_percent(self.scr, near=near)
+
+    def test_decisions(self):
+        for radius in (0, 40, 60, 70, 100, 200):
+            full, coarse = self.percents(radius, near=5)
+            self.assertEqual(full > 5, coarse > 5)
+            self.assertLessEqual(abs(full - coarse), 1)
+
+    def test_refined_near_decision(self):
+        full, coarse = self.percents(72, near=5)
+        self.assertEqual(full, coarse)  # Within the band, computed at full resolution
+
+
+if __name__ == '__main__':
+    unittest.main()
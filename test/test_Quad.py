@@ -0,0 +1,88 @@
+"""Standalone Quad/Point geometry test.
+
+Does NOT require Elite Dangerous to be running.
+Tests the array backed Quad keeps the Point based API: bounds, transforms, copies,
+cropping by percent and the bulk percent to pixel conversion.
+
+Usage:
+    python -m pytest test/test_Quad.py -s
+"""
+import unittest
+from copy import copy, deepcopy
+
+import numpy as np
+
+from src.screen.Screen import crop_image_by_pct, crop_image_pix
+from src.screen.Screen_Regions import Point, Quad, regions_pct_to_pix, scale_region
+
+
+class QuadTestCase(unittest.TestCase):
+
+    def test_from_rect_and_bounds(self):
+        q = Quad.from_rect([10, 20, 110, 220])
+        self.assertEqual(q.to_list(), [[10, 20], [110, 20], [110, 220], [10, 220]])
+        self.assertEqual(q.to_rect_list(), [10, 20, 110, 220])
+        self.assertEqual((q.get_width(), q.get_height()), (100, 200))
+        self.assertEqual(q.get_top_left().to_list(), [10, 20])
+        self.assertEqual(q.get_bottom_right().to_list(), [110, 220])
+        self.assertEqual(q.get_center().to_list(), [60, 120])
+        self.assertEqual(q.pt3.get_x(), 110)
+
+    def test_points_api(self):
+        q = Quad(Point(0, 0), Point(10, 1), Point(11, 12), Point(-1, 10))
+        self.assertEqual(q.to_rect_list(), [-1, 0, 11, 12])
+        q.pt4 = Point(0, 10)  # Setting a point drops the cached bounds
+        self.assertEqual(q.get_left(), 0)
+        self.assertEqual(Quad.from_list(q.to_list()).to_list(), q.to_list())
+
+    def test_copy_is_independent(self):
+        q = Quad.from_rect([0.1, 0.2, 0.3, 0.4])
+        q.get_left()
+        for c in (copy(q), deepcopy(q)):
+            c.scale_from_origin(100, 10)
+            self.assertAlmostEqual(c.get_right(), 30)
+            self.assertAlmostEqual(q.get_right(), 0.3)
+
+    def test_transforms(self):
+        q = Quad.from_rect([0, 0, 10, 20])
+        q.scale(2, 0.5)
+        self.assertEqual(q.to_rect_list(), [-5, 5, 15, 15])
+        q.offset(5, -5)
+        self.assertEqual(q.to_rect_list(), [0, 0, 20, 10])
+        q.inflate(1, 2)
+        self.assertEqual(q.to_rect_list(), [-1, -2, 21, 12])
+        q = Quad.from_rect([100, 100, 200, 300])
+        q.subregion_from_quad(Quad.from_rect([0.0, 0.5, 0.25, 1.0]))
+        self.assertEqual(q.to_rect_list(), [100, 200, 125, 300])
+        for value, expected in zip(scale_region([0.1, 0.1, 0.5, 0.9], [0.5, 0.0, 1.0, 0.5]), [0.3, 0.1, 0.5, 0.5]):
+            self.assertAlmostEqual(value, expected)
+
+    def test_round(self):
+        q = Quad.from_rect([0.12345, 0.5, 0.98765, 1.0])
+        self.assertEqual(q.to_rect_list(2), [0.12, 0.5, 0.99, 1.0])
+
+
+class CropTestCase(unittest.TestCase):
+
+    def test_crop_by_pct_matches_pixels(self):
+        image = np.arange(90 * 160 * 3, dtype=np.uint32).reshape(90, 160, 3)
+        q = Quad.from_rect([0.1, 0.25, 0.55, 0.8])
+        crop = crop_image_by_pct(image, q)
+        pix = copy(q)
+        pix.scale_from_origin(160, 90)
+        self.assertTrue(np.array_equal(crop, crop_image_pix(image, pix)))
+        self.assertEqual(crop.shape, (50, 72, 3))
+        self.assertEqual(q.to_rect_list(), [0.1, 0.25, 0.55, 0.8])  # Unchanged
+
+    def test_regions_pct_to_pix(self):
+        reg = {'a': {'rect': [0.0, 0.2, 0.7, 0.35]}, 'b': {'rect': [0.174, 0.2265, 0.75, 0.8528]}}
+        slices = regions_pct_to_pix(reg, 1920, 1080)
+        for name in reg:
+            expected = Quad.from_rect(reg[name]['rect']).to_pixel_rect(1920, 1080)
+            ys, xs = slices[name]
+            self.assertEqual([xs.start, ys.start, xs.stop, ys.stop], expected)
+        self.assertEqual(regions_pct_to_pix({}, 10, 10), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Standalone region filter pipeline test.
+
+Does NOT require Elite Dangerous to be running (synthetic images and a replay backend).
+Tests the precompiled pipelines give the same masks as the plain OpenCV filters (the reference
+implementations below, the filter methods Screen_Regions had before the pipelines), reuse their
+buffers and are compiled per region by Screen_Regions.
+
+Usage:
+    python -m pytest test/test_RegionFilter.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.ImageFormat import FMT_RGB
+from src.screen.RegionFilter import ColorRangeFilter, EqualizeFilter, ThresholdFilter
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+def random_image(h, w, ch, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, ch), dtype=np.uint8)
+
+
+def reference_equalize(image):
+    """ Grayscale and CLAHE, the 'equalize' regions. """
+    return cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+
+
+def reference_filter_by_color(image, color_range):
+    """ HSV and inRange, the 'filter_by_color' regions. """
+    return cv2.inRange(cv2.cvtColor(image, cv2.COLOR_BGR2HSV), color_range[0], color_range[1])
+
+
+def reference_filter_sun(image, thresh):
+    """ Grayscale binary threshold, the 'filter_sun' region. """
+    return cv2.threshold(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), thresh, 255, cv2.THRESH_BINARY)[1]
+
+
+class RegionFilterTestCase(unittest.TestCase):
+
+    def test_color_range_matches_opencv(self):
+        image = random_image(76, 76, 4)
+        pipeline = ColorRangeFilter((5, 100, 100), (25, 255, 255), scale=2.0)
+        expected_hsv = cv2.cvtColor(cv2.cvtColor(cv2.resize(image, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR),
+                                                 cv2.COLOR_BGRA2BGR), cv2.COLOR_BGR2HSV)
+        expected = cv2.inRange(expected_hsv, (5, 100, 100), (25, 255, 255))
+        mask = pipeline(image)
+        self.assertEqual(mask.shape, (152, 152))
+        self.assertTrue(np.array_equal(mask, expected))
+        self.assertTrue(np.array_equal(pipeline.hsv, expected_hsv))
+
+    def test_equalize_and_threshold_match_opencv(self):
+        image = random_image(60, 80, 3, seed=1)
+        self.assertTrue(np.array_equal(EqualizeFilter()(image), reference_equalize(image)))
+        self.assertTrue(np.array_equal(ThresholdFilter(125)(image), reference_filter_sun(image, 125)))
+
+    def test_buffers_reused(self):
+        pipeline = ColorRangeFilter((0, 0, 0), (180, 255, 128))
+        pipeline.prepare(40, 30)
+        first = pipeline(random_image(30, 40, 4, seed=2))
+        second = pipeline(random_image(30, 40, 4, seed=3))
+        self.assertIs(first, second)
+        self.assertIsNot(pipeline(random_image(10, 10, 4)), first)  # New size, new buffers
+
+
+class ScreenRegionsPipelineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        cv2.circle(frame, (960, 530), 150, (255, 255, 255), -1)
+        self.scr = Screen(dummy_cb, ReplayBackend([frame], speed=0))
+        self.scr_reg = Screen_Regions(self.scr)
+
+    def test_compiled(self):
+        self.assertIsInstance(self.scr_reg.reg['compass']['pipeline'], EqualizeFilter)
+        self.assertIsInstance(self.scr_reg.reg['target']['pipeline'], ColorRangeFilter)
+        self.assertIsNone(self.scr_reg.reg['target_arc']['pipeline'])
+
+    def test_sun_threshold(self):
+        image = self.scr_reg.capture_region(self.scr, 'sun', FMT_RGB)
+        self.assertTrue(np.array_equal(self.scr_reg.filter_region('sun', image),
+                                       reference_filter_sun(image, self.scr_reg.sun_threshold)))
+        self.assertGreater(self.scr_reg.sun_percent(self.scr), 5)
+        self.scr_reg.set_sun_threshold(255)
+        self.assertEqual(self.scr_reg.white_percent(self.scr_reg.filter_region('sun', image)), 0)
+        self.assertEqual(self.scr_reg.sun_percent(self.scr), 0)  # Same region, not the cached percent
+
+    def test_regions_match_reference(self):
+        image = random_image(50, 60, 3, seed=4)
+        self.assertTrue(np.array_equal(self.scr_reg.filter_region('target', image),
+                                       reference_filter_by_color(image, self.scr_reg.orange_2_color_range)))
+        self.assertTrue(np.array_equal(self.scr_reg.filter_region('sc_assist_ind', image),
+                                       reference_filter_by_color(image, self.scr_reg.cyan_sc_assist_range)))
+        self.assertTrue(np.array_equal(self.scr_reg.filter_region('compass', image), reference_equalize(image)))
+        self.assertNotIn('filterCB', self.scr_reg.reg['compass'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Standalone region geometry test.
+
+Does NOT require Elite Dangerous to be running (synthetic masks).
+Tests the radius and angle maps from the screen center, the masked radius statistics against the
+per pixel computation they replace, the annulus masks and arc coverage, the screen center offsets at
+other resolutions, and the Screen_Regions cache.
+
+Usage:
+    python -m pytest test/test_RegionGeometry.py -s
+"""
+import unittest
+
+import cv2
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.RegionGeometry import RegionGeometry
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+
+ARC_RECT = [910, 492, 1013, 587]  # target_arc at 1920x1080
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class RegionGeometryTestCase(unittest.TestCase):
+
+    def test_maps(self):
+        geometry = RegionGeometry(ARC_RECT, (1920, 1080))
+        self.assertEqual(geometry.center, (50.0, 48.0))
+        self.assertEqual(geometry.radius.shape, (95, 103))
+        self.assertEqual(geometry.radius.dtype, np.float32)
+        self.assertAlmostEqual(float(geometry.radius[48, 50]), 0.0)
+        self.assertAlmostEqual(float(geometry.radius[0, 0]), np.hypot(50, 48), places=3)
+        self.assertAlmostEqual(float(geometry.angle[48, 100]), 0.0, places=3)  # Right of the center
+        self.assertAlmostEqual(float(geometry.angle[94, 50]), np.pi / 2, places=3)  # Below
+        self.assertEqual(int(geometry.angle_bins[48, 0]), 18)  # Left, 180 degrees
+        self.assertFalse(geometry.radius.flags.writeable)
+        self.assertIs(geometry.radius, geometry.radius)
+
+    def test_radius_stats(self):
+        geometry = RegionGeometry(ARC_RECT, (1920, 1080))
+        rng = np.random.default_rng(0)
+        mask = np.where(rng.random((95, 103)) < 0.05, 255, 0).astype(np.uint8)
+        ys, xs = np.where(mask > 0)
+        dists = np.sqrt((xs + ARC_RECT[0] - 960) ** 2 + (ys + ARC_RECT[1] - 540) ** 2)
+        count, mean, std = geometry.radius_stats(mask)
+        self.assertEqual(count, xs.size)
+        self.assertAlmostEqual(mean, dists.mean(), places=3)
+        self.assertAlmostEqual(std, dists.std(), places=3)
+        self.assertEqual(geometry.radius_stats(np.zeros_like(mask)), (0, 0.0, 0.0))
+
+    def test_annulus_and_coverage(self):
+        geometry = RegionGeometry(ARC_RECT, (1920, 1080))
+        band = geometry.annulus(44, 48)
+        self.assertIs(geometry.annulus(44, 48), band)
+        self.assertTrue(np.all((geometry.radius[band > 0] >= 44) & (geometry.radius[band > 0] <= 48)))
+        mask = np.zeros((95, 103), dtype=np.uint8)
+        cv2.ellipse(mask, (50, 48), (46, 46), 0, 0, 90, 255, 2)  # A quarter of the ring
+        self.assertAlmostEqual(geometry.arc_coverage(mask, 44, 48), 0.25, delta=0.06)
+        cv2.putText(mask, 'AB', (30, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 255, 1)  # Inside the ring, ignored
+        self.assertAlmostEqual(geometry.arc_coverage(mask, 44, 48), 0.25, delta=0.06)
+
+        hud_1440 = RegionGeometry([1240, 640, 1320, 800], (2560, 1440))  # HUD radii scaled by 1440 / 1080
+        band = hud_1440.annulus(44, 48)
+        self.assertAlmostEqual(float(hud_1440.radius[band > 0].min()), 44 * 4 / 3, delta=0.5)
+
+    def test_center_offset(self):
+        geometry = RegionGeometry([633, 270, 1267, 810], (1920, 1080))
+        self.assertEqual(geometry.center_offset(327, 270), (0.0, 0.0))
+        self.assertEqual(geometry.center_offset(327 + 96, 270 - 54), (10.0, 10.0))
+        wide = RegionGeometry([1000, 400, 2440, 1040], (3440, 1440))
+        self.assertEqual(wide.center, (720.0, 320.0))
+        self.assertEqual(wide.center_offset(0, 640), (-100.0 * 720 / 1720, -100.0 * 320 / 720))
+
+    def test_screen_regions_cache(self):
+        scr = Screen(dummy_cb, ReplayBackend([np.zeros((1080, 1920, 3), dtype=np.uint8)], speed=0))
+        scr_reg = Screen_Regions(scr)
+        geometry = scr_reg.geometry('target_arc')
+        self.assertIs(scr_reg.geometry('target_arc'), geometry)
+        self.assertEqual(geometry.center, (960 - scr_reg.reg['target_arc']['rect'][0],
+                                           540 - scr_reg.reg['target_arc']['rect'][1]))
+        scr_reg.reg['target_arc']['rect'] = [900, 480, 1000, 580]  # i.e. a calibrated rect
+        self.assertEqual(scr_reg.geometry('target_arc').center, (60.0, 60.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""Standalone region registry test.
+
+Does NOT require Elite Dangerous to be running (temporary config folder and a replay backend).
+Tests the configs are parsed once, the snapshots are immutable with precomputed slices, and changed
+files are picked up live by Screen_Regions and load_calibrated_regions.
+
+Usage:
+    python -m pytest test/test_RegionRegistry.py -s
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.RegionRegistry import RegionRegistry
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions, load_calibrated_regions
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class RegionRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.res_dir = os.path.join(self.dir, 'screen_regions', 'res_1920_1080')
+        os.makedirs(self.res_dir)
+        self.calibration_file = os.path.join(self.dir, 'ocr_calibration.json')
+        self.write('default.json', {'compass': [687, 788, 763, 864], 'target': [633, 270, 1267, 810]})
+        self.write('python.json', {'compass': [600, 700, 676, 776]})
+        self.write_json(self.calibration_file, {'Panel.list': {'rect': [0.1, 0.2, 0.5, 0.6]},
+                                                'Panel.list.subregion.item': {'rect': [0.0, 0.0, 0.5, 0.5]}})
+        self.registry = RegionRegistry(os.path.join(self.dir, 'screen_regions'), self.calibration_file)
+
+    def tearDown(self):
+        self.registry.stop()
+        shutil.rmtree(self.dir)
+
+    def write_json(self, path, data):
+        stamp = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        os.utime(path, ns=(stamp + 10 ** 9, stamp + 10 ** 9))  # Make sure the mtime changes
+
+    def write(self, name, regions):
+        self.write_json(os.path.join(self.res_dir, name), {'regions': {k: {'rect': v} for k, v in regions.items()}})
+
+    def test_snapshot(self):
+        snap = self.registry.snapshot(1920, 1080)
+        self.assertEqual(snap.regions['compass'], (687, 788, 763, 864))
+        self.assertEqual(snap.slices['compass'], (slice(788, 864), slice(687, 763)))
+        self.assertIs(self.registry.snapshot(1920, 1080), snap)  # Built once
+        self.assertEqual(self.registry.snapshot(1920, 1080, 'python').regions['compass'], (600, 700, 676, 776))
+        self.assertIn('target', self.registry.snapshot(1920, 1080, 'anaconda').regions)  # default.json
+        self.assertIsNone(self.registry.snapshot(1280, 720))
+        with self.assertRaises(AttributeError):
+            snap.version = 5
+        with self.assertRaises(TypeError):
+            snap.regions['compass'] = (0, 0, 1, 1)
+
+    def test_parsed_once(self):
+        self.assertEqual(self.registry.parse_count, 3)
+        reg_a = {'list': {'rect': [0, 0, 1, 1]}, 'item': {'rect': [0, 0, 1, 1]}}
+        reg_b = {'list': {'rect': [0, 0, 1, 1]}}
+        load_calibrated_regions('Panel', reg_a, self.registry)
+        load_calibrated_regions('Panel', reg_b, self.registry)
+        self.assertFalse(self.registry.poll())
+        self.assertEqual(self.registry.parse_count, 3)
+        self.assertEqual(reg_b['list']['rect'], [0.1, 0.2, 0.5, 0.6])
+        for value, expected in zip(reg_a['item']['rect'], [0.1, 0.2, 0.3, 0.4]):
+            self.assertAlmostEqual(value, expected)
+
+    def test_calibration_without_watcher(self):
+        # RegionHotReload off: load_calibrated_regions still sees an edit of the calibration file
+        reg = {'list': {'rect': [0, 0, 1, 1]}}
+        self.write_json(self.calibration_file, {'Panel.list': {'rect': [0.2, 0.2, 0.4, 0.4]}})
+        load_calibrated_regions('Panel', reg, self.registry)
+        self.assertEqual(reg['list']['rect'], [0.2, 0.2, 0.4, 0.4])
+        self.assertEqual(self.registry.parse_count, 4)
+
+    def test_reload(self):
+        snap = self.registry.snapshot(1920, 1080)
+        versions = []
+        self.registry.add_listener(versions.append)
+        self.write('default.json', {'compass': [700, 800, 776, 876]})
+        self.assertTrue(self.registry.poll())
+        self.assertEqual(versions, [snap.version + 1])
+        self.assertEqual(self.registry.snapshot(1920, 1080).regions['compass'], (700, 800, 776, 876))
+        self.assertEqual(snap.regions['compass'], (687, 788, 763, 864))  # Old snapshot unchanged
+
+        with open(os.path.join(self.res_dir, 'default.json'), 'w') as f:
+            f.write('{"regions": {')  # Half saved
+        os.utime(os.path.join(self.res_dir, 'default.json'), ns=(1, 1))
+        self.registry.poll()
+        self.assertEqual(self.registry.snapshot(1920, 1080).regions['compass'], (700, 800, 776, 876))
+
+    def test_screen_regions_follow(self):
+        scr = Screen(dummy_cb, ReplayBackend([np.zeros((1080, 1920, 3), dtype=np.uint8)], speed=0))
+        scr_reg = Screen_Regions(scr, registry=self.registry)
+        reg = scr_reg.reg
+        self.assertEqual(reg['compass']['slice'], (slice(788, 864), slice(687, 763)))
+        self.assertFalse(scr_reg.refresh_regions())
+
+        self.write_json(self.calibration_file, {})
+        self.registry.poll()
+        self.assertFalse(scr_reg.refresh_regions())  # Same regions, nothing rebuilt
+        self.assertIs(scr_reg.reg, reg)
+
+        self.write('default.json', {'compass': [700, 800, 776, 876], 'target': [633, 270, 1267, 810]})
+        self.registry.poll()
+        self.assertEqual(scr_reg.capture_region(scr, 'compass').shape, (76, 76, 4))
+        self.assertIsNot(scr_reg.reg, reg)  # Swapped whole
+        self.assertEqual(scr_reg.reg['compass']['rect'], [700, 800, 776, 876])
+        self.assertEqual(reg['compass']['rect'], [687, 788, 763, 864])
+
+    def test_watcher_thread(self):
+        self.registry.poll_interval = 0.01
+        self.registry.start()
+        self.assertTrue(self.registry.is_running())
+        version = self.registry.version
+        self.write('default.json', {'compass': [1, 2, 3, 4]})
+        for _ in range(200):
+            if self.registry.version != version:
+                break
+            self.registry._stop_event.wait(0.01)
+        self.assertEqual(self.registry.snapshot(1920, 1080).regions['compass'], (1, 2, 3, 4))
+        self.registry.stop()
+        self.assertFalse(self.registry.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Standalone ship response curve test.
+
+Does NOT require Elite Dangerous to be running (a simulated ship axis: spool up during the hold, coast
+after the release, navball read noise).
+Tests AxisResponse: the calibration table fallback matches the table walk _move_axis did, the learned
+curve predicts the hold of a simulated ship better than the axis rate, follows a change of the ship
+(decay), and survives a save and load of the ship config.
+
+Usage:
+    python -m pytest test/test_ResponseModel.py -s
+"""
+import unittest
+
+import numpy as np
+
+from src.autopilot.ResponseModel import AxisResponse, ShipResponse
+
+RATE = 12.0  # Axis rate of the ship config, deg/s
+SPOOL = 0.5  # Time constant of the turn rate after a press
+COAST = 0.1  # Seconds the ship keeps turning after the release
+NOISE = 1.5  # EDAutopilot.NAV_READ_STD
+
+
+def turn(hold: float, rate: float = RATE) -> float:
+    """ Degrees the simulated ship turns for a hold, settled. """
+    spooled = rate * (1.0 - np.exp(-hold / SPOOL))
+    return rate * (hold - SPOOL * (1.0 - np.exp(-hold / SPOOL))) + spooled * COAST
+
+
+def table_walk(table: dict, abs_deg: float, rate: float, threshold: float) -> float:
+    """ The hold of the calibration table walk of _move_axis before the response curves. """
+    htime = abs_deg / rate
+    if abs_deg < threshold:
+        last_deg = 0.0
+        last_val = 0.0
+        for key, value in table.items():
+            key_deg = float(int(key)) / 10
+            if abs_deg <= key_deg:
+                ratio_val = (abs_deg - last_deg) / (key_deg - last_deg) * (value - last_val) + last_val
+                htime = abs_deg / ratio_val
+                break
+            last_deg = key_deg
+            last_val = value
+    return htime
+
+
+def learn(curve: AxisResponse, pairs: int, rate: float = RATE, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for hold in np.exp(rng.uniform(np.log(0.1), np.log(4.0), pairs)):
+        curve.observe(hold, turn(hold, rate) + rng.normal(0, NOISE * np.sqrt(2)))
+
+
+class ResponseModelTestCase(unittest.TestCase):
+
+    def test_fallbacks(self):
+        curve = AxisResponse()
+        self.assertAlmostEqual(curve.hold_for(24.0, RATE), 2.0)
+        self.assertAlmostEqual(curve.angle_for(2.0, RATE), 24.0)
+        table = {'50': 4.1, '100': 6.3, '200': 8.8, '400': 10.5, '300': 12.0}  # As the calibration stores it
+        curve.set_table(table, 30)
+        ordered = dict(sorted(table.items(), key=lambda item: int(item[0])))
+        for deg in (0.5, 3.0, 5.0, 7.5, 12.0, 19.9, 25.0, 29.0, 35.0, 60.0):
+            self.assertAlmostEqual(curve.hold_for(deg, RATE), table_walk(ordered, deg, RATE, 30), places=9,
+                                   msg=f"{deg} deg")
+
+    def test_learned_curve(self):
+        curve = AxisResponse()
+        learn(curve, 200)
+        self.assertTrue(curve.learned)
+        rate_err, curve_err = [], []
+        for deg in (3.0, 6.0, 10.0, 20.0, 40.0):
+            true_hold = float(np.interp(deg, [turn(h) for h in np.linspace(0, 8, 801)], np.linspace(0, 8, 801)))
+            rate_err.append(abs(deg / RATE - true_hold))
+            curve_err.append(abs(curve.hold_for(deg, RATE) - true_hold))
+            self.assertLess(abs(curve.angle_for(curve.hold_for(deg, RATE), RATE) - deg), 1e-6)
+        print(f"\nhold error, axis rate {np.round(rate_err, 3)} s, learned {np.round(curve_err, 3)} s")
+        self.assertLess(max(curve_err), 0.1)
+        self.assertLess(np.mean(curve_err), np.mean(rate_err) / 2)
+
+    def test_decay(self):
+        curve = AxisResponse()
+        learn(curve, 300)
+        learn(curve, 300, rate=RATE / 2, seed=1)  # A slower loadout
+        hold = curve.hold_for(turn(1.5, RATE / 2), RATE)
+        self.assertLess(abs(hold - 1.5), 0.15)
+
+    def test_save_and_load(self):
+        ship = ShipResponse()
+        learn(ship.curve('SCSpeed0', 'pitch'), 100)
+        self.assertFalse(ship.changed)
+        self.assertTrue(ship.observe('SCSpeed0', 'pitch', 1.0, turn(1.0)))
+        self.assertFalse(ship.observe('SCSpeed0', 'pitch', 20.0, 240.0))  # Out of the hold bins
+        self.assertTrue(ship.changed)
+        ship.curve('SCSpeed0', 'yaw')  # Nothing learned, not stored
+        stored = ship.to_dict()
+        self.assertEqual(list(stored['SCSpeed0']), ['pitch'])
+        loaded = ShipResponse()
+        loaded.load(stored)
+        self.assertFalse(loaded.changed)
+        for deg in (2.0, 10.0, 30.0):
+            self.assertAlmostEqual(loaded.curve('SCSpeed0', 'pitch').hold_for(deg, RATE),
+                                   ship.curve('SCSpeed0', 'pitch').hold_for(deg, RATE), places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
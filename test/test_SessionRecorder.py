@@ -0,0 +1,107 @@
+"""Standalone session recorder test.
+
+Does NOT require Elite Dangerous to be running (records from a replay backend).
+Tests the memmap frame store, ring wrap, reading back, and replaying a recording.
+
+Usage:
+    python -m pytest test/test_SessionRecorder.py -s
+"""
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.screen.CaptureBackend import ReplayBackend
+from src.screen.ImageFormat import FMT_BGRA, FMT_RGB
+from src.screen.Screen import Screen
+from src.screen.Screen_Regions import Screen_Regions
+from src.screen.SessionRecorder import RecordedSession, SessionFrames, SessionRecorder
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+class FakeStatus:
+    current_data = {'Flags': 0x10, 'Flags2': 0x2, 'GuiFocus': 6}
+
+
+def make_frames(count):
+    frames = []
+    for i in range(count):
+        image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        image[:, :, 1] = i + 1
+        frames.append(image)
+    return frames
+
+
+class SessionRecorderTestCase(unittest.TestCase):
+
+    def test_record_and_read(self):
+        with tempfile.TemporaryDirectory() as folder:
+            rec = SessionRecorder(folder, FakeStatus(), capacity=10, screen_size=(100, 50))
+            for i in range(3):
+                rec.record('compass', np.full((4, 5, 4), i, dtype=np.uint8), FMT_BGRA, i + 1, 0.5 * i, [10, 10, 15, 14])
+            rec.record('target', np.full((2, 2, 3), 7, dtype=np.uint8), FMT_RGB, 3, 1.0, [0, 0, 2, 2])
+            rec.close()
+
+            session = RecordedSession(folder)
+            self.assertEqual(session.regions, ['compass', 'target'])
+            self.assertEqual(len(session), 4)
+            compass = list(session.frames('compass'))
+            self.assertEqual([int(r['frame_id']) for r, _ in compass], [1, 2, 3])
+            self.assertEqual(compass[2][1][0, 0, 0], 2)
+            record = session.records('target')[0]
+            self.assertEqual((record['flags'], record['flags2'], record['gui_focus']), (0x10, 0x2, 6))
+
+    def test_ring_wrap(self):
+        with tempfile.TemporaryDirectory() as folder:
+            rec = SessionRecorder(folder, capacity=3)
+            for i in range(5):
+                rec.record('sun', np.full((2, 2, 4), i, dtype=np.uint8), FMT_BGRA, i, float(i))
+            rec.close()
+
+            session = RecordedSession(folder)
+            values = [int(img[0, 0, 0]) for _, img in session.frames('sun')]
+            self.assertEqual(values, [2, 3, 4])
+
+    def test_format_and_shape_mismatch(self):
+        with tempfile.TemporaryDirectory() as folder:
+            rec = SessionRecorder(folder, capacity=3)
+            rec.record('sun', np.zeros((2, 2, 4), dtype=np.uint8), FMT_BGRA, 1, 0.0)
+            rec.record('sun', np.zeros((2, 2, 3), dtype=np.uint8), FMT_RGB, 2, 0.1)  # Converted
+            rec.record('sun', np.zeros((3, 3, 4), dtype=np.uint8), FMT_BGRA, 3, 0.2)  # Dropped
+            rec.close()
+            self.assertEqual(rec.record_count, 2)
+            self.assertEqual(rec.dropped_count, 1)
+
+    def test_record_screen_regions_and_replay(self):
+        with tempfile.TemporaryDirectory() as folder:
+            replay = ReplayBackend(make_frames(2), timestamps=[0.0, 1.0], speed=0)
+            scr = Screen(dummy_cb, replay)
+            scr_reg = Screen_Regions(scr)
+            scr_reg.recorder = SessionRecorder(folder, capacity=5, screen_size=(1920, 1080))
+            for _ in range(2):
+                scr_reg.capture_region(scr, 'compass', ttl=10.0)
+                scr_reg.sun_percent(scr, ttl=10.0)
+                scr.invalidate_frame()
+                replay.advance()
+            scr_reg.recorder.close()
+
+            session = RecordedSession(folder)
+            self.assertEqual(session.regions, ['compass', 'sun'])
+            self.assertEqual(session.region_info('sun')['fmt'], FMT_RGB)
+            frames = SessionFrames(session)
+            self.assertEqual(len(frames), 2)  # compass and sun of a tick share the frame id
+
+            # Replay the recording through a Screen
+            scr2 = Screen(dummy_cb, ReplayBackend(folder, speed=0))
+            compass = Screen_Regions(scr2).capture_region(scr2, 'compass')
+            self.assertEqual(compass[0, 0, 1], 1)
+            scr2.backend.advance()
+            compass = Screen_Regions(scr2).capture_region(scr2, 'compass')
+            self.assertEqual(compass[0, 0, 1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Standalone vision accuracy regression test.
+
+Does NOT require Elite Dangerous to be running (labeled synthetic frames, see bench_Vision).
+Runs the cases of the offline vision suite with a few items each and checks their accuracy limits.
+Latency is not checked here (machine dependent, see bench_Vision --update-baseline). The autopilot
+and nav panel cases are skipped where the autopilot can't be imported (its Windows dependencies).
+
+Usage:
+    python -m pytest test/test_VisionSuite.py -s
+"""
+import unittest
+
+from test.bench_Vision import CASES, VisionHarness, check_report
+
+FRAMES = 20
+
+try:
+    from src.autopilot.ED_AP import EDAutopilot  # noqa: F401
+    autopilot = True
+except Exception:
+    autopilot = False
+
+
+class VisionSuiteTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.harness = VisionHarness()
+
+    def run_case(self, name):
+        case = CASES[name](self.harness, FRAMES)
+        report = case.run()
+        self.assertEqual(len(report['results']), FRAMES)
+        self.assertEqual(check_report(case, report, None), [])
+
+    def test_sun_percent(self):
+        self.run_case('sun_percent')
+
+    def test_tab_index(self):
+        self.run_case('tab_index')
+
+    @unittest.skipUnless(autopilot, "EDAutopilot can't be imported")
+    def test_nav_offset(self):
+        self.run_case('nav_offset')
+
+    @unittest.skipUnless(autopilot, "EDAutopilot can't be imported")
+    def test_target_circle(self):
+        self.run_case('target_circle')
+
+    @unittest.skipUnless(autopilot, "EDAutopilot can't be imported")
+    def test_target_track(self):
+        self.run_case('target_track')
+
+    @unittest.skipUnless(autopilot, "EDAutopilot can't be imported")
+    def test_target_arc(self):
+        self.run_case('target_arc')
+
+    @unittest.skipUnless(autopilot, "EDAutopilot can't be imported")
+    def test_nav_row(self):
+        self.run_case('nav_row')
+
+
+if __name__ == '__main__':
+    unittest.main()
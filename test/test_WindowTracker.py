@@ -0,0 +1,132 @@
+"""Standalone window tracker test.
+
+Does NOT require Elite Dangerous to be running (uses FakeWindowTracker, no Win32 calls).
+Tests handle caching, revalidation, change notification, monitor mapping, focus and Screen
+following a moved window.
+
+Usage:
+    python -m pytest test/test_WindowTracker.py -s
+"""
+import unittest
+
+import numpy as np
+
+from src.screen.CaptureBackend import CaptureBackend
+from src.screen.Screen import Screen
+from src.screen.WindowTracker import FakeWindowTracker, WindowTracker
+
+
+def dummy_cb(msg, body=None):
+    pass
+
+
+MONITORS = [
+    {'left': 0, 'top': 0, 'width': 3840, 'height': 1080},
+    {'left': 0, 'top': 0, 'width': 1920, 'height': 1080},
+    {'left': 1920, 'top': 0, 'width': 1920, 'height': 1080},
+]
+
+
+class DesktopBackend(CaptureBackend):
+    """ Live like backend (no size of its own) over a fixed desktop image. Records the grabbed monitor dicts. """
+
+    monitors = MONITORS
+
+    def __init__(self):
+        self.desktop = np.zeros((1080, 3840, 4), dtype=np.uint8)
+        self.desktop[:, 1920:, 0] = 2
+        self.grabs = []
+
+    def grab(self, monitor):
+        self.grabs.append(monitor)
+        left, top = monitor['left'], monitor['top']
+        return self.desktop[top:top + monitor['height'], left:left + monitor['width']].copy()
+
+
+class WindowTrackerTestCase(unittest.TestCase):
+
+    def test_handle_cached(self):
+        window = FakeWindowTracker((0, 0, 1920, 1080), poll_interval=10.0)
+        for _ in range(5):
+            self.assertTrue(window.exists())
+            self.assertEqual(window.get_client_rect(), (0, 0, 1920, 1080))
+        self.assertEqual(window.find_count, 1)
+        self.assertEqual(window.refresh_count, 1)
+
+    def test_revalidate_on_invalidate(self):
+        window = FakeWindowTracker((0, 0, 1920, 1080), poll_interval=10.0)
+        window.get_client_rect()
+        window.set_client_rect((100, 50, 1380, 770))
+        self.assertEqual(window.get_client_rect(), (0, 0, 1920, 1080))  # Still cached
+        window.invalidate()
+        self.assertEqual(window.get_client_rect(), (100, 50, 1380, 770))
+        self.assertEqual(window.find_count, 1)  # Same handle, no new lookup
+
+    def test_listeners(self):
+        window = FakeWindowTracker((0, 0, 1920, 1080), border=8)
+        changes = []
+        window.add_listener(lambda old, new: changes.append((old, new)))
+        self.assertEqual(window.get_window_rect(), (-8, -8, 1928, 1088))
+        window.set_client_rect((10, 10, 1930, 1090))
+        window.poll()
+        window.poll()  # No change, no call
+        window.recreate()
+        window.poll()
+        window.set_client_rect(None)
+        self.assertFalse(window.exists())
+        self.assertEqual(changes, [((0, 0, 1920, 1080), (10, 10, 1930, 1090)),
+                                   ((10, 10, 1930, 1090), (10, 10, 1930, 1090)),
+                                   ((10, 10, 1930, 1090), None)])
+        self.assertEqual(window.find_count, 3)
+
+    def test_monitor_index(self):
+        window = FakeWindowTracker((1920, 0, 3840, 1080))
+        self.assertEqual(window.monitor_index(MONITORS), 2)
+        window.set_client_rect((100, 100, 1380, 820))
+        self.assertEqual(window.monitor_index(MONITORS), 1)
+        window.set_client_rect(None)
+        self.assertIsNone(window.monitor_index(MONITORS))
+
+    def test_focus(self):
+        window = FakeWindowTracker(foreground=True)
+        self.assertTrue(window.focus())
+        self.assertEqual(window.focus_count, 0)  # Already focused, nothing done
+        window.foreground = False
+        self.assertFalse(window.is_foreground())
+        self.assertTrue(window.focus())
+        self.assertEqual(window.focus_count, 1)
+        self.assertFalse(FakeWindowTracker(None).focus())
+
+    def test_no_window_off_windows(self):
+        window = WindowTracker()
+        if not window.exists():
+            self.assertIsNone(window.get_client_rect())
+            self.assertFalse(window.is_foreground())
+
+
+class ScreenWindowTestCase(unittest.TestCase):
+
+    def test_screen_follows_moved_window(self):
+        window = FakeWindowTracker((0, 0, 1920, 1080))
+        backend = DesktopBackend()
+        scr = Screen(dummy_cb, backend, window)
+        self.assertEqual((scr.screen_width, scr.screen_height), (1920, 1080))
+        self.assertEqual(scr.get_screen(0, 0, 4, 4)[0, 0, 0], 0)
+
+        window.set_client_rect((1920, 0, 3840, 1080))
+        self.assertEqual(scr.get_screen(0, 0, 4, 4)[0, 0, 0], 2)
+        self.assertEqual((scr.screen_left, scr.monitor_number), (1920, 2))
+        self.assertEqual(backend.grabs[-1]['left'], 1920)
+
+    def test_screen_ignores_resize(self):
+        messages = []
+        window = FakeWindowTracker((0, 0, 1920, 1080))
+        scr = Screen(lambda msg, body=None: messages.append(body), DesktopBackend(), window)
+        window.set_client_rect((0, 0, 1280, 720))
+        scr.get_screen(0, 0, 4, 4)
+        self.assertEqual((scr.screen_width, scr.screen_height), (1920, 1080))
+        self.assertTrue(any('resized' in m for m in messages))
+
+
+if __name__ == '__main__':
+    unittest.main()